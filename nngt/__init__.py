@@ -95,6 +95,8 @@ __version__ = '2.2.1'
 
 # IMPORTANT: configuration MUST come first
 _config = {
+    'adjacency_cache': None,
+    'analysis_memory': 128,
     'color_lib': 'matplotlib',
     'db_folder': "~/.nngt/database",
     'db_name': "main",
@@ -114,6 +116,7 @@ _config = {
     'omp': 1,
     'palette_continuous': 'magma',
     'palette_discrete': 'Set1',
+    'processes': 1,
     'use_database': False,
     'use_tex': False,
     'seeds': None,
@@ -357,6 +360,7 @@ _log_info = '''
 # ----------- #
 Graph library:  {gl}
 Multithreading: {thread} ({omp} thread{s})
+Processes:      {proc}
 MPI:            {mpi}
 Plotting:       {plot}
 NEST support:   {nest}
@@ -373,6 +377,7 @@ Database:       {db}
     omp     = _config["omp"],
     s       = "s" if _config["omp"] > 1 else "",
     mpi     = _config["mpi"],
+    proc    = _config["processes"],
     shapely = _has_shapely,
     svg     = _has_svg,
     dxf     = _has_dxf,
@@ -26,13 +26,16 @@ import numpy as np
 import scipy.signal as sps
 import scipy.sparse as ssp
 
-from nngt.lib import nonstring_container, find_idx_nearest
+from nngt.lib import nonstring_container
 from nngt.lib.logger import _log_message
 
 
 __all__ = [
+    "StreamingFiringRate",
     "get_b2",
+    "get_fano_factor",
     "get_firing_rate",
+    "get_isi_cv",
     "get_spikes",
     "total_firing_rate",
 ]
@@ -65,16 +68,15 @@ def get_b2(network=None, spike_detector=None, data=None, nodes=None):
     Returns
     -------
     b2 : array-like
-        B2 coefficient for each neuron in `nodes`.
+        B2 coefficient for each neuron in `nodes` (NaN for neurons with less
+        than 3 spikes).
     '''
-    if data is None:
-        data, nodes = _set_data_nodes(network, data, nodes)
-        data = _set_spike_data(data, spike_detector)
-    else:
-        if nodes is None:
-            nodes = np.unique(data[:, 0])
+    trains = _spike_trains(network, spike_detector, data, nodes)
 
-    return _b2_from_data(nodes, data)
+    if not len(trains.times):
+        _log_message(logger, "WARNING", 'No spikes in the data.')
+
+    return trains.b2()
 
 
 def get_firing_rate(network=None, spike_detector=None, data=None, nodes=None):
@@ -99,19 +101,79 @@ def get_firing_rate(network=None, spike_detector=None, data=None, nodes=None):
     fr : array-like
         Firing rate for each neuron in `nodes`.
     '''
-    if data is None:
-        data, nodes = _set_data_nodes(network, data, nodes)
-        data = _set_spike_data(data, spike_detector)
-    else:
-        if nodes is None:
-            nodes = np.unique(data[:, 0])
+    trains = _spike_trains(network, spike_detector, data, nodes)
+
+    return trains.counts / trains.duration
 
-    return _fr_from_data(nodes, data)
+
+def get_isi_cv(network=None, spike_detector=None, data=None, nodes=None):
+    '''
+    Return the coefficient of variation of the interspike intervals (ISI)
+    for the neurons.
+
+    .. versionadded:: 2.3
+
+    Parameters
+    ----------
+    network : :class:`nngt.Network`, optional (default: None)
+        Network for which the activity was simulated.
+    spike_detector : tuple of ints, optional (default: spike detectors)
+        GID of the "spike_detector" objects recording the network activity.
+    data : :class:`numpy.array` of shape (N, 2), optionale (default: None)
+        Array containing the spikes data (first line must contain the NEST GID
+        of the neuron that fired, second line must contain the associated spike
+        time).
+    nodes : array-like, optional (default: all nodes)
+        NNGT ids of the nodes for which the CV should be computed.
+
+    Returns
+    -------
+    cv : array-like
+        Standard deviation of the ISIs divided by their average for each
+        neuron in `nodes` (NaN for neurons with less than 2 spikes).
+    '''
+    trains = _spike_trains(network, spike_detector, data, nodes)
+
+    return trains.isi_cv()
+
+
+def get_fano_factor(network=None, spike_detector=None, data=None, nodes=None,
+                    bin_size=100.):
+    '''
+    Return the Fano factor of the spike counts for the neurons.
+
+    .. versionadded:: 2.3
+
+    Parameters
+    ----------
+    network : :class:`nngt.Network`, optional (default: None)
+        Network for which the activity was simulated.
+    spike_detector : tuple of ints, optional (default: spike detectors)
+        GID of the "spike_detector" objects recording the network activity.
+    data : :class:`numpy.array` of shape (N, 2), optionale (default: None)
+        Array containing the spikes data (first line must contain the NEST GID
+        of the neuron that fired, second line must contain the associated spike
+        time).
+    nodes : array-like, optional (default: all nodes)
+        NNGT ids of the nodes for which the Fano factor should be computed.
+    bin_size : float, optional (default: 100.)
+        Duration of the time windows in which the spikes are counted, in ms.
+        The windows start at the first spike in the data.
+
+    Returns
+    -------
+    fano : array-like
+        Variance of the spike counts divided by their average for each
+        neuron in `nodes` (NaN for neurons which did not spike).
+    '''
+    trains = _spike_trains(network, spike_detector, data, nodes)
+
+    return trains.fano_factor(bin_size)
 
 
 def total_firing_rate(network=None, spike_detector=None, nodes=None, data=None,
                       kernel_center=0., kernel_std=30., resolution=None,
-                      cut_gaussian=5.):
+                      cut_gaussian=5., groups=None):
     '''
     Computes the total firing rate of the network from the spike times.
     Firing rate is obtained as the convolution of the spikes with a Gaussian
@@ -119,6 +181,9 @@ def total_firing_rate(network=None, spike_detector=None, nodes=None, data=None,
 
     .. versionadded:: 0.7
 
+    .. versionchanged:: 2.3
+        Added the `groups` argument.
+
     Parameters
     ----------
     network : :class:`nngt.Network`, optional (default: None)
@@ -143,20 +208,32 @@ def total_firing_rate(network=None, spike_detector=None, nodes=None, data=None,
         the 5-sigma range. Decreasing this value will increase speed at the
         cost of lower fidelity; increasing it with increase the fidelity at the
         cost of speed.
+    groups : list, optional (default: None)
+        List of :class:`~nngt.NeuralGroup` objects (or of their names, in
+        which case `network` must be provided). If given, the rate of each
+        group is computed from the spikes of its neurons.
 
     Returns
     -------
     fr : array-like
-        The firing rate in Hz.
+        The firing rate in Hz (2D array with one row per group if `groups` is
+        provided).
     times : array-like
         The times associated to the firing rate values.
+
+    See also
+    --------
+    :class:`~nngt.analysis.StreamingFiringRate` to compute the rate
+    incrementally from successive batches of spikes.
     '''
-    times, kernel_size = None, None
+    times = None
 
     if data is None:
         data, _ = _set_data_nodes(network, data, nodes)
         data    = _set_spike_data(data, spike_detector)
 
+    data = np.asarray(data)
+
     # set resolution and kernel properties + generate the times
     if resolution is None:
         resolution = 0.1*kernel_std
@@ -166,35 +243,43 @@ def total_firing_rate(network=None, spike_detector=None, nodes=None, data=None,
         assert np.allclose(dt - dt[0], 0.), 'If `resolution` is an array, ' +\
                                             'it must contain evenly spaced ' +\
                                             'times.'
-        times = np.array(resolution)
+        times = np.array(resolution, dtype=float)
         resolution = dt[0]
 
-    bin_std = int(kernel_std / float(resolution))
-    kernel_size = int(2. * cut_gaussian * bin_std)
+    kernel = _rate_kernel(kernel_std, resolution, cut_gaussian)
 
     if times is None:
-        delta_T = resolution * 0.5 * kernel_size
+        delta_T = resolution * 0.5 * len(kernel)
         times = np.arange(np.min(data[:, 1]) - delta_T,
                           np.max(data[:, 1]) + delta_T, resolution)
 
-    rate = np.zeros(len(times))
+    num_bins = len(times)
+
+    # counts the spikes at each time (nearest bin)
+    pos = _bin_index(data[:, 1], times[0], resolution)
+    np.clip(pos, 0, num_bins - 1, out=pos)
+
+    rows, num_rows = None, 1
 
-    # counts the spikes at each time
-    pos = find_idx_nearest(times, data[:, 1])
-    bins = np.linspace(0, len(times), len(times)+1)
-    counts, _ = np.histogram(pos, bins=bins)
+    if groups is not None:
+        rows, spikes = _group_rows(data[:, 0], groups, network)
+        pos          = pos[spikes]
+        num_rows     = len(groups)
+
+    counts = _bin_counts(pos, num_bins, rows, num_rows)
 
     # initialize with delta rate in Hz
-    rate += 1000. * counts / (kernel_std*np.sqrt(np.pi))
-    fr = _smooth(rate, kernel_size, bin_std, mode='same')
+    rate = counts * _rate_factor(kernel_std)
+    fr   = _convolve(rate, kernel, mode="same")
 
     # translate times
     times += kernel_center
 
-    return fr, times
+    return (fr[0] if groups is None else fr), times
 
 
-def get_spikes(recorder=None, spike_times=None, senders=None, astype="ssp"):
+def get_spikes(recorder=None, spike_times=None, senders=None, astype="ssp",
+               dtype=float):
     '''
     Return a 2D sparse matrix, where:
 
@@ -204,6 +289,9 @@ def get_spikes(recorder=None, spike_times=None, senders=None, astype="ssp"):
     .. versionchanged:: 1.0
         Neurons are now located in the row corresponding to their NEST GID.
 
+    .. versionchanged:: 2.3
+        Added the `dtype` argument.
+
     Parameters
     ----------
     recorder : tuple, optional (default: None)
@@ -214,11 +302,17 @@ def get_spikes(recorder=None, spike_times=None, senders=None, astype="ssp"):
         through their `spike_times` and the associated `senders`.
     senders : array-like, optional (default: None)
         `senders[i]` corresponds to the neuron which fired at `spike_times[i]`.
+        Both `spike_times` and `senders` can be memory-mapped arrays (see
+        :class:`numpy.memmap`), which are not copied before being sorted.
     astype : str, optional (default: "ssp")
         Format of the returned data. Default is sparse lil_matrix ("ssp")
         with one row per neuron, otherwise "np" returns a (T, 2) array, with
         T the number of spikes (the first row being the NEST gid, the second
         the spike time).
+    dtype : numpy dtype, optional (default: float)
+        Type of the spike times in the sparse matrix (e.g.
+        :obj:`numpy.float32` to halve the memory used); indices are stored on
+        32 bits whenever possible.
 
     Example
     -------
@@ -257,49 +351,423 @@ def get_spikes(recorder=None, spike_times=None, senders=None, astype="ssp"):
     if astype == "np":
         return np.array([senders, spike_times]).T
     elif astype == "ssp":
+        senders = np.asarray(senders)
+
         if np.any(senders):
-            max_sender = np.max(senders)
-            # create the sparse matrix
-            data = [0 for _ in range(max_sender + 1)]
-            row_idx = []
-            col_idx = []
-            for time, neuron in zip(spike_times, senders):
-                row_idx.append(neuron)
-                col_idx.append(data[neuron])
-                data[neuron] += 1
-            return ssp.csr_matrix((spike_times, (row_idx, col_idx)))
+            # sort by sender, keeping the order of the spikes of each neuron
+            order  = _sender_order(senders)
+            counts = np.bincount(senders, minlength=senders.max() + 1)
+
+            num_spikes = len(order)
+
+            idx_dtype = np.int32 if num_spikes < 2**31 else np.int64
+
+            indptr = np.zeros(len(counts) + 1, dtype=idx_dtype)
+            np.cumsum(counts, out=indptr[1:])
+
+            # the column of each spike is its rank among those of its neuron
+            indices  = np.arange(num_spikes, dtype=idx_dtype)
+            indices -= np.repeat(indptr[:-1], counts)
+
+            data = np.asarray(spike_times)[order].astype(dtype, copy=False)
+
+            return ssp.csr_matrix((data, indices, indptr),
+                                  shape=(len(counts), counts.max()))
         else:
             return ssp.csr_matrix([])
 
 
+# ------------------- #
+# Streaming estimator #
+# ------------------- #
+
+class StreamingFiringRate:
+
+    '''
+    Incremental version of :func:`~nngt.analysis.total_firing_rate`, which
+    consumes the spikes by batches (e.g. while a simulation is running) and
+    returns the firing rate as soon as its values are final.
+
+    The batches must be sent in chronological order: all spikes of a batch
+    must occur after the `until` time of the previous one.
+    The contributions of each batch are convolved separately and summed into
+    a buffer (overlap-add), so that the rate is identical to the one obtained
+    from the whole recording, including at the edges of the batches.
+
+    .. versionadded:: 2.3
+
+    Example
+    -------
+    >>> stream = StreamingFiringRate(kernel_std=20.)
+    >>> for step in range(10):
+    ...     nest.Simulate(1000.)
+    ...     fr, times = stream.update(new_spikes, until=1000.*(step + 1))
+    >>> fr, times = stream.finalize()
+    '''
+
+    def __init__(self, start=None, kernel_center=0., kernel_std=30.,
+                 resolution=None, cut_gaussian=5., groups=None, network=None):
+        '''
+        Create the estimator.
+
+        Parameters
+        ----------
+        start : float, optional (default: first spike time minus half the
+            kernel duration)
+            Time associated to the first firing rate value, in ms.
+        kernel_center : float, optional (default: 0.)
+            Temporal shift of the Gaussian kernel, in ms.
+        kernel_std : float, optional (default: 30.)
+            Standard deviation of the Gaussian kernel in ms.
+        resolution : float, optional (default: `0.1*kernel_std`)
+            Time step between two firing rate values.
+        cut_gaussian : float, optional (default: 5.)
+            Range over which the Gaussian will be computed (in units of
+            `kernel_std`).
+        groups : list, optional (default: None)
+            List of :class:`~nngt.NeuralGroup` objects or of their names, to
+            compute one rate per group.
+        network : :class:`nngt.Network`, optional (default: None)
+            Network containing the `groups`, required if they are given by
+            name.
+        '''
+        self._resolution = 0.1*kernel_std if resolution is None \
+                           else float(resolution)
+
+        self._kernel        = _rate_kernel(
+            kernel_std, self._resolution, cut_gaussian)
+        self._factor        = _rate_factor(kernel_std)
+        self._kernel_center = kernel_center
+        self._groups        = groups
+        self._network       = network
+        self._num_rows      = 1 if groups is None else len(groups)
+        self._start         = start
+
+        # first bin that has not been returned yet, first bin that can still
+        # receive spikes, and rate accumulated from the `_next` bin on
+        self._next     = 0
+        self._min_bin  = 0
+        self._buffer   = np.zeros((self._num_rows, 0))
+
+    @property
+    def start(self):
+        ''' Time of the first firing rate value (None before the first
+        batch if it was not provided) '''
+        return self._start
+
+    def update(self, data, until=None):
+        '''
+        Add a batch of spikes and return the firing rate values that became
+        final.
+
+        Parameters
+        ----------
+        data : array of shape (N, 2)
+            Senders on the first column and spike times on the second one.
+        until : float, optional (default: last spike time in `data`)
+            Time up to which the recording is complete: all the following
+            batches will only contain spikes occurring after `until`.
+
+        Returns
+        -------
+        fr : array-like
+            Final firing rate values in Hz (one row per group if `groups`
+            was provided), which can be empty.
+        times : array-like
+            Times associated to these values.
+        '''
+        data = np.asarray(data, dtype=float).reshape(-1, 2)
+
+        if self._start is None:
+            if not len(data):
+                return self._emit(self._next)
+
+            self._start = np.min(data[:, 1]) \
+                          - 0.5*self._resolution*len(self._kernel)
+
+        if until is None and len(data):
+            until = np.max(data[:, 1])
+
+        if len(data):
+            self._add(data)
+
+        if until is None:
+            return self._emit(self._next)
+
+        last_bin = _bin_index(until, self._start, self._resolution)
+
+        self._min_bin = max(self._min_bin, last_bin)
+
+        # values before the bin of `until` minus the kernel half-size cannot
+        # be modified by subsequent spikes
+        return self._emit(self._min_bin - (len(self._kernel) - 1) // 2)
+
+    def finalize(self):
+        '''
+        Return all remaining firing rate values once the last batch has been
+        sent.
+        '''
+        return self._emit(self._next + self._buffer.shape[1])
+
+    def _add(self, data):
+        ''' Bin a batch, convolve it and add it to the buffer '''
+        pos = _bin_index(data[:, 1], self._start, self._resolution)
+
+        rows = None
+
+        if self._groups is not None:
+            rows, spikes = _group_rows(data[:, 0], self._groups,
+                                       self._network)
+            pos = pos[spikes]
+
+        if not len(pos):
+            return
+
+        lo = pos.min()
+
+        if lo < self._min_bin:
+            raise ValueError("Spikes must be sent in chronological order: "
+                             "some spikes occur before the `until` time of "
+                             "a previous batch.")
+
+        counts = _bin_counts(pos - lo, pos.max() - lo + 1, rows,
+                             self._num_rows)
+
+        conv = _convolve(counts*self._factor, self._kernel, mode="full")
+
+        # first bin of the full convolution, relative to the buffer
+        first = lo - (len(self._kernel) - 1) // 2 - self._next
+
+        if first < 0:
+            # contributions before `start` are discarded
+            conv, first = conv[:, -first:], 0
+
+        stop = first + conv.shape[1]
+
+        if stop > self._buffer.shape[1]:
+            self._buffer = np.pad(
+                self._buffer, ((0, 0), (0, stop - self._buffer.shape[1])))
+
+        self._buffer[:, first:stop] += conv
+
+    def _emit(self, stop):
+        ''' Return the values up to bin `stop` (excluded) '''
+        num_values = max(stop - self._next, 0)
+
+        fr = np.zeros((self._num_rows, num_values))
+
+        available = min(num_values, self._buffer.shape[1])
+
+        fr[:, :available] = self._buffer[:, :available]
+
+        self._buffer = self._buffer[:, available:]
+
+        start = 0. if self._start is None else self._start
+
+        times = start + self._kernel_center \
+                + self._resolution*np.arange(self._next, self._next + num_values)
+
+        self._next += num_values
+
+        return (fr[0] if self._groups is None else fr), times
+
+
 # ----- #
 # Tools #
 # ----- #
 
-def _b2_from_data(ids, data):
-    b2 = np.full(len(ids), np.NaN)
-    if len(data[:, 0]) > 0:
-        for i, neuron in enumerate(ids):
-            ids = np.where(data[:, 0] == neuron)[0]
-            dt1 = np.diff(data[ids, 1])
-            dt2 = dt1[1:] + dt1[:-1]
-            avg_isi = np.mean(dt1)
-            if avg_isi != 0.:
-                b2[i] = (2*np.var(dt1) - np.var(dt2)) / (2*avg_isi**2)
-            else:
-                b2[i] = np.inf
-    else:
-        _log_message(logger, "WARNING", 'No spikes in the data.')
-    return b2
+class _SpikeTrains:
+
+    '''
+    Spike trains of a set of neurons, used to compute the statistics of all
+    neurons at once.
+
+    The spike times are sorted by neuron, then time, and stored with CSR-like
+    offsets: the spikes of ``nodes[i]`` are ``times[indptr[i]:indptr[i+1]]``.
+    All statistics are then obtained by segmented reductions over this array
+    instead of a search for the spikes of each neuron.
+    '''
+
+    __slots__ = ("duration", "indptr", "nodes", "start", "times")
+
+    def __init__(self, senders, times, nodes=None):
+        senders = np.asarray(senders)
+        times   = np.asarray(times, dtype=float)
+
+        if len(times) and np.all(times[1:] >= times[:-1]):
+            # spikes are sorted by time (e.g. from NEST): a stable sort on
+            # the senders is enough
+            order = _sender_order(senders)
+        else:
+            order = np.lexsort((times, senders))
+
+        senders = senders[order]
+        times   = times[order]
+
+        if nodes is None:
+            nodes = np.unique(senders)
+
+        self.nodes = np.asarray(nodes)
+
+        # time span of the whole recording
+        self.start    = times.min() if len(times) else 0.
+        self.duration = times.max() - self.start if len(times) else 0.
+
+        starts = np.searchsorted(senders, self.nodes, "left")
+        counts = np.searchsorted(senders, self.nodes, "right") - starts
+
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+
+        if np.array_equal(starts, self.indptr[:-1]) \
+           and self.indptr[-1] == len(times):
+            # all spikes are used, in order
+            self.times = times
+        else:
+            self.times = times[np.repeat(starts - self.indptr[:-1], counts)
+                               + np.arange(self.indptr[-1])]
+
+    @property
+    def counts(self):
+        ''' Number of spikes of each neuron '''
+        return np.diff(self.indptr)
+
+    def isi(self):
+        '''
+        Interspike intervals of each neuron, in the same CSR format as the
+        spike times.
+        '''
+        return _segment_diff(self.times, self.indptr)
+
+    def isi_cv(self):
+        ''' Coefficient of variation of the interspike intervals '''
+        isi, indptr = self.isi()
+
+        mean, var = _segment_mean_var(isi, indptr)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(var) / mean
+
+    def b2(self):
+        '''
+        B2 coefficient: ``(2 var(ISI_1) - var(ISI_2)) / (2 <ISI_1>^2)``,
+        where ISI_2 are the intervals between a spike and the next but one.
+        '''
+        isi, indptr = self.isi()
+
+        # sums of consecutive ISIs
+        isi2, indptr2 = _segment_diff(isi, indptr, op=np.add)
 
+        mean, var = _segment_mean_var(isi, indptr)
+        _, var2   = _segment_mean_var(isi2, indptr2)
 
-def _fr_from_data(ids, data):
-    fr = np.zeros(len(ids))
-    T = float(np.max(data[:, 1]) - np.min(data[:, 1]))
-    for i, neuron in enumerate(ids):
-        ids = np.where(data[:, 0] == neuron)[0]
-        fr[i] = len(ids) / T
-    return fr
+        with np.errstate(divide="ignore", invalid="ignore"):
+            b2 = (2*var - var2) / (2*mean**2)
+
+        b2[mean == 0] = np.inf
+
+        return b2
+
+    def fano_factor(self, bin_size):
+        '''
+        Fano factor of the spike counts in windows of duration `bin_size`
+        covering the whole recording.
+        '''
+        num_bins = max(int(np.ceil(self.duration / bin_size)), 1)
+
+        rows = np.repeat(np.arange(len(self.nodes)), self.counts)
+        bins = np.minimum(((self.times - self.start) // bin_size).astype(int),
+                          num_bins - 1)
+
+        # spike count of each (neuron, window) pair with at least one spike
+        pairs, bin_counts = np.unique(rows*num_bins + bins,
+                                      return_counts=True)
+
+        sum_sq = np.bincount(pairs // num_bins, weights=bin_counts**2,
+                             minlength=len(self.nodes))
+
+        mean = self.counts / num_bins
+        var  = sum_sq / num_bins - mean**2
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return var / mean
+
+
+def _sender_order(senders):
+    '''
+    Stable argsort of the `senders`, using the radix sort of numpy if the
+    range of the ids fits on 16 bits.
+    '''
+    keys = senders - senders.min()
+
+    if keys.max() < 2**16:
+        keys = keys.astype(np.uint16)
+
+    return np.argsort(keys, kind="stable")
+
+
+def _segment_sums(values, indptr):
+    '''
+    Sum of ``values[indptr[i]:indptr[i+1]]`` for each segment (0 for empty
+    segments) in one pass with :func:`numpy.add.reduceat`.
+    '''
+    sums     = np.zeros(len(indptr) - 1)
+    nonempty = indptr[1:] > indptr[:-1]
+
+    if np.any(nonempty):
+        # empty segments are skipped so that reduceat sums up to the next
+        # nonempty segment, i.e. to the end of the current one
+        sums[nonempty] = np.add.reduceat(values, indptr[:-1][nonempty])
+
+    return sums
+
+
+def _segment_mean_var(values, indptr):
+    ''' Mean and variance of each segment (NaN for empty segments) '''
+    counts = np.diff(indptr)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _segment_sums(values, indptr) / counts
+
+        # two-pass variance for accuracy
+        dev = values - np.repeat(mean, counts)
+        var = _segment_sums(dev*dev, indptr) / counts
+
+    return mean, var
+
+
+def _segment_diff(values, indptr, op=np.subtract):
+    '''
+    Apply `op` to the consecutive values of each segment (``values[j+1]`` and
+    ``values[j]``), returning the results and their CSR offsets.
+    '''
+    counts = np.diff(indptr)
+
+    res = op(values[1:], values[:-1])
+
+    # drop the results that straddle two segments
+    keep = np.ones(len(res), dtype=bool)
+    ends = indptr[1:-1]
+    keep[ends[(ends > 0) & (ends < len(values))] - 1] = False
+
+    new_indptr = np.zeros(len(indptr), dtype=np.int64)
+    np.cumsum(np.maximum(counts - 1, 0), out=new_indptr[1:])
+
+    return res[keep], new_indptr
+
+
+def _spike_trains(network, spike_detector, data, nodes):
+    ''' Build the :class:`_SpikeTrains` from the arguments of the getters '''
+    if data is None:
+        data, nodes = _set_data_nodes(network, data, nodes)
+        data = _set_spike_data(data, spike_detector)
+
+    data = np.asarray(data)
+
+    if not len(data):
+        return _SpikeTrains([], [], nodes=nodes)
+
+    return _SpikeTrains(data[:, 0], data[:, 1], nodes=nodes)
 
 
 def _set_data_nodes(network, data, nodes):
@@ -329,21 +797,333 @@ def _set_spike_data(data, spike_detector):
     return np.array(data)[:, sorter].T
 
 
-def _smooth(data, kernel_size, std, mode='same'):
+def _rate_kernel(kernel_std, resolution, cut_gaussian):
+    ''' Normalized Gaussian kernel used to smooth the spike counts '''
+    bin_std     = int(kernel_std / float(resolution))
+    kernel_size = int(2. * cut_gaussian * bin_std)
+
+    kernel = sps.gaussian(kernel_size, bin_std)
+
+    return kernel / np.sum(kernel)
+
+
+def _rate_factor(kernel_std):
+    ''' Delta rate (in Hz) associated to one spike '''
+    return 1000. / (kernel_std*np.sqrt(np.pi))
+
+
+def _bin_index(spike_times, start, resolution):
+    ''' Index of the bin of a regular grid closest to each spike time '''
+    return np.floor(
+        (np.asarray(spike_times) - start) / resolution + 0.5).astype(np.int64)
+
+
+def _bin_counts(pos, num_bins, rows=None, num_rows=1):
+    '''
+    Number of spikes in each bin as a (num_rows, num_bins) array, where
+    `rows` gives the row of each spike (all spikes are in row 0 if None).
+    '''
+    if rows is not None:
+        pos = rows*num_bins + pos
+
+    counts = np.bincount(pos, minlength=num_rows*num_bins)
+
+    return counts.reshape(num_rows, num_bins)
+
+
+def _group_rows(senders, groups, network=None):
+    '''
+    Return the index of the group of each spike and the indices of the
+    associated spikes (spikes from neurons in several groups are repeated,
+    spikes from neurons in no group are dropped).
+    '''
+    gids, rows = [], []
+
+    for i, group in enumerate(groups):
+        if isinstance(group, str):
+            group = network.population[group]
+
+        if group.nest_gids is None:
+            raise RuntimeError("The groups must have been sent to NEST.")
+
+        gids.append(np.asarray(group.nest_gids))
+        rows.append(np.full(len(gids[-1]), i))
+
+    gids = np.concatenate(gids)
+    rows = np.concatenate(rows)
+
+    order = np.argsort(gids, kind="stable")
+    gids, rows = gids[order], rows[order]
+
+    # each spike is matched with all the (gid, row) pairs of its sender
+    lo     = np.searchsorted(gids, senders, side="left")
+    counts = np.searchsorted(gids, senders, side="right") - lo
+
+    spikes = np.repeat(np.arange(len(senders)), counts)
+    offset = np.arange(len(spikes)) - np.repeat(np.cumsum(counts) - counts,
+                                                counts)
+
+    return rows[np.repeat(lo, counts) + offset], spikes
+
+
+def _convolve(signal, kernel, mode='same'):
     '''
-    Convolve an array by a Gaussian kernel.
+    Convolve each row of `signal` by `kernel`, using a direct convolution for
+    short kernels, the overlap-add method if the signal is much longer than
+    the kernel, and a single FFT otherwise.
 
     Parameters
     ----------
-    kernel_size : int
-        Size of the kernel array in bins.
-    std : float
-        Width of the Gaussian (also in bins).
+    signal : 2D array
+        Signals to convolve (one per row).
+    kernel : 1D array
+        Convolution kernel.
+    mode : str, optional (default: 'same')
+        Convolution mode (see :func:`scipy.signal.convolve`).
 
     Returns
     -------
     convolved array.
     '''
-    kernel = sps.gaussian(kernel_size, std)
-    kernel /= np.sum(kernel)
-    return sps.convolve(data, kernel, mode=mode)
+    kernel = kernel[None, :]
+
+    num_bins, kernel_size = signal.shape[1], kernel.shape[1]
+
+    if kernel_size <= 32 or num_bins <= 32:
+        return sps.convolve(signal, kernel, mode=mode, method="direct")
+
+    if num_bins > 8*kernel_size:
+        return sps.oaconvolve(signal, kernel, mode=mode, axes=1)
+
+    return sps.fftconvolve(signal, kernel, mode=mode, axes=1)
+
+
+# -------------- #
+# Phase analysis #
+# -------------- #
+
+def _find_phases(times, phases, lim_burst, lim_quiet, simplify):
+    '''
+    Find the time limits of the different phases.
+
+    Each interspike interval is labelled as bursting (0), mixed (1) or
+    quiescent (2), then the phases are given by the runs of identical labels.
+    '''
+    isi = np.diff(times)
+
+    if not len(isi):
+        return
+
+    labels = (isi >= lim_burst) * (1 + (isi > lim_quiet))
+
+    if simplify:
+        # mixed runs that are contiguous to a burst are merged into it, i.e.
+        # every run of non-quiescent intervals containing a burst is a burst
+        starts, stops = _runs(labels == 2)
+
+        run_labels = labels[starts]
+
+        has_burst = np.add.reduceat(labels == 0, starts) > 0
+
+        run_labels[(run_labels < 2)*has_burst] = 0
+    else:
+        starts, stops = _runs(labels)
+
+        run_labels = labels[starts]
+
+    for i, name in enumerate(("bursting", "mixed", "quiescent")):
+        keep = run_labels == i
+
+        phases[name].extend(
+            np.array((times[starts[keep]], times[stops[keep]])).T.tolist())
+
+
+def _check_burst_size(phases, senders, times, network, mflb, mfb):
+    '''
+    Check that bursting periods involve at least a fraction mfb of the neurons.
+    '''
+    bursts = np.reshape(phases["bursting"], (-1, 2))
+
+    if len(bursts):
+        n = len(np.unique(senders)) if network is None else network.node_nb()
+
+        # the end spike is not included
+        start = np.searchsorted(times, bursts[:, 0])
+        stop  = np.searchsorted(times, bursts[:, 1])
+
+        participating_frac = _unique_counts(senders, start, stop) / float(n)
+
+        to_mixed = participating_frac < mflb
+        to_local = (participating_frac < mfb)*~to_mixed
+
+        phases["bursting"]  = bursts[~(to_mixed + to_local)].tolist()
+        phases["localized"] = bursts[to_local].tolist() + phases["localized"]
+        phases["mixed"]     = bursts[to_mixed].tolist() + phases["mixed"]
+
+    # merge the contiguous mixed periods
+    mixed = np.reshape(phases["mixed"], (-1, 2))
+
+    if len(mixed):
+        mixed = mixed[np.argsort(mixed[:, 0], kind="stable")]
+
+        first = np.flatnonzero(
+            np.concatenate(([True], mixed[1:, 0] != mixed[:-1, 1])))
+
+        last = np.append(first[1:] - 1, len(mixed) - 1)
+
+        phases["mixed"] = np.array(
+            (mixed[first, 0], mixed[last, 1])).T.tolist()
+
+
+def _analysis(times, senders, limits, network=None,
+              phase_coeff=(0.5, 10.), mbis=0.5, mfb=0.2, mflb=0.05,
+              simplify=False):
+    # prepare the phases and check the validity of the data
+    phases = {
+        "bursting": [],
+        "mixed": [],
+        "quiescent": [],
+        "localized": []
+    }
+    num_spikes, avg_rate = len(times), 0.
+    if num_spikes:
+        num_neurons = (len(np.unique(senders)) if network is None
+                       else network.node_nb())
+        # set the studied region
+        if limits[0] >= times[0]:
+            idx_start = np.searchsorted(times, limits[0], side="left")
+            times = times[idx_start:]
+            senders = senders[idx_start:]
+        if limits[1] <= times[-1]:
+            idx_end = np.searchsorted(times, limits[1], side="right") - 1
+            times = times[:idx_end]
+            senders = senders[:idx_end]
+        # get the average firing rate to differenciate the phases
+        simtime = limits[1] - limits[0]
+        lim_burst, lim_quiet = 0., 0.
+        avg_rate = num_spikes / float(simtime)
+        lim_burst = max(phase_coeff[0] / avg_rate, mbis)
+        lim_quiet = min(phase_coeff[1] / avg_rate, 10.)
+        # find the phases
+        _find_phases(times, phases, lim_burst, lim_quiet, simplify)
+        _check_burst_size(phases, senders, times, network, mflb, mfb)
+        avg_rate *= 1000. / float(num_neurons)
+    return phases, avg_rate
+
+
+def _compute_properties(data, phases, fr, skip_bursts):
+    '''
+    Compute the properties from the spike times and phases.
+
+    Parameters
+    ----------
+    data : 2D array, shape (N, 2)
+        Spike times and senders.
+    phases : dict
+        The phases.
+    fr : double
+        Firing rate.
+
+    Returns
+    -------
+    prop : dict
+        Properties of the activity. Contains the following pairs:
+            - "firing_rate": average value in Hz for 1 neuron in the network.
+            - "bursting": True if there were bursts of activity detected.
+            - "burst_duration", "ISI", and "IBI" in ms, if "bursting" is True.
+            - "SpB": average number of spikes per burst for one neuron.
+    '''
+    prop = {}
+    senders, times = data[0, :], data[1, :]
+
+    if np.any(times[1:] < times[:-1]):
+        order   = np.argsort(times, kind="stable")
+        senders = senders[order]
+        times   = times[order]
+
+    # firing rate (in Hz, normalized for 1 neuron)
+    prop["firing_rate"] = fr
+
+    bursts     = np.reshape(phases["bursting"], (-1, 2))
+    num_bursts = len(bursts)
+    num_valid  = num_bursts - skip_bursts
+
+    if num_bursts:
+        prop["bursting"] = True
+        prop.update({
+            "burst_duration": np.NaN,
+            "IBI": np.NaN,
+            "ISI": np.NaN,
+            "SpB": np.NaN,
+            "period": np.NaN})
+    else:
+        prop["bursting"] = False
+
+    if num_valid > 0:
+        valid    = bursts[skip_bursts:]
+        duration = valid[:, 1] - valid[:, 0]
+
+        # IBI (the interval preceding the first valid burst is included)
+        first = max(skip_bursts, 1)
+        ibi   = bursts[first:, 0] - bursts[first - 1:-1, 1]
+
+        # get num_spikes inside each burst, divide by num_neurons
+        start = np.searchsorted(times, valid[:, 0], side="left")
+        stop  = np.searchsorted(times, valid[:, 1], side="right")
+
+        num_spikes  = stop - start
+        num_neurons = _unique_counts(senders, start, stop)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spb = np.where(num_neurons > 0, num_spikes / num_neurons, 0.)
+            isi = np.where(num_spikes > 0,
+                           num_neurons * duration / num_spikes, 0.)
+
+        prop["burst_duration"] = np.sum(duration) / num_valid
+        prop["IBI"]            = np.sum(ibi) / num_valid
+        prop["ISI"]            = np.sum(isi) / num_valid
+        prop["SpB"]            = np.sum(spb) / num_valid
+        prop["period"]         = prop["IBI"] + prop["burst_duration"]
+
+    if num_bursts and prop["SpB"] < 2.:
+        prop["ISI"] = np.NaN
+
+    return prop
+
+
+def _runs(labels):
+    '''
+    Return the start and stop indices of the runs of identical values in
+    `labels` (stop indices are excluded from the runs).
+    '''
+    change = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+
+    starts = np.concatenate(([0], change))
+    stops  = np.concatenate((change, [len(labels)]))
+
+    return starts, stops
+
+
+def _unique_counts(values, start, stop):
+    '''
+    Return the number of distinct entries of `values` in each of the
+    ``values[start[i]:stop[i]]`` slices.
+    '''
+    lengths = np.maximum(np.asarray(stop) - start, 0)
+    offsets = np.cumsum(lengths) - lengths
+
+    num_slices = len(lengths)
+
+    if not lengths.sum():
+        return np.zeros(num_slices, dtype=int)
+
+    # label each value by its slice, then count the distinct (slice, value)
+    slice_ids = np.repeat(np.arange(num_slices), lengths)
+
+    idx = np.arange(lengths.sum()) + np.repeat(start - offsets, lengths)
+
+    ids, inverse = np.unique(values, return_inverse=True)
+
+    keys = np.unique(slice_ids*len(ids) + inverse[idx])
+
+    return np.bincount(keys // len(ids), minlength=num_slices)
@@ -27,11 +27,13 @@ Bayesian Block implementation
 
 Dynamic programming algorithm for finding the optimal adaptive-width histogram.
 
-Based on Scargle et al 2012 [1]_
+Based on Scargle et al 2012 [1]_, with the pruning of the candidate change
+points from Killick et al 2012 [2]_.
 
 References
 ----------
 .. [1] http://adsabs.harvard.edu/abs/2012arXiv1207.5578S
+.. [2] https://doi.org/10.1080/01621459.2012.737745
 """
 
 import numpy as np
@@ -46,6 +48,9 @@ class FitnessFunc:
     - fitness(...) : compute fitness function.
        Arguments accepted by fitness must be among [T_k, N_k, a_k, b_k, c_k]
     - prior(N, Ntot) : compute prior on N given a total number of points Ntot
+    - can_prune(x, T) : whether the candidate change points can be pruned for
+      the counts `x` of cells of widths `T`, i.e. whether splitting a block
+      never decreases the fitness.
     """
 
     def __init__(self, p0=0.05, gamma=None):
@@ -59,6 +64,9 @@ class FitnessFunc:
     def fitness(**kwargs):
         raise NotImplementedError()
 
+    def can_prune(self, x, T):
+        return False
+
     def prior(self, N, Ntot):
         if self.gamma is None:
             return self.p0_prior(N, Ntot)
@@ -108,6 +116,11 @@ class Events(FitnessFunc):
         # eq. 19 from Scargle 2012
         return N_k * (np.log(N_k) - np.log(T_k))
 
+    def can_prune(self, x, T):
+        # log-likelihood of a Poisson process: superadditive (log-sum
+        # inequality) if all counts are strictly positive
+        return bool(np.all(x > 0) and np.all(T > 0))
+
     def prior(self, N, Ntot):
         if self.gamma is not None:
             return self.gamma_prior(N, Ntot)
@@ -160,6 +173,13 @@ class RegularEvents(FitnessFunc):
 
         return N_k * np.log(N_over_M) + (M_k - N_k) * np.log(one_m_NM)
 
+    def can_prune(self, x, T):
+        # log-likelihood of Bernoulli trials: superadditive as long as there
+        # is at most one event per tick (the first and last cells, which are
+        # only half-ticks, are never pruned)
+        M = T[1:-1] / self.dt
+        return bool(np.all(M > 0) and np.all(x[1:-1] <= M * (1 + 1e-12)))
+
 
 class PointMeasures(FitnessFunc):
 
@@ -192,7 +212,8 @@ class PointMeasures(FitnessFunc):
             return 1.32 + 0.577 * np.log10(N)
 
 
-def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
+def bayesian_blocks(t, x=None, sigma=None, fitness='events', resolution=None,
+                    **kwargs):
     """
     Bayesian Blocks Implementation
 
@@ -201,6 +222,10 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
 
     .. versionadded:: 0.7
 
+    .. versionchanged:: 2.3
+        Candidate change points are pruned for the 'events' and
+        'regular_events' fitness functions; added the `resolution` argument.
+
     Parameters
     ----------
     t : array_like
@@ -228,6 +253,12 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
 
         Alternatively, the fitness can be a user-specified object of
         type derived from the FitnessFunc class.
+    resolution : float (optional)
+        Approximate mode for 'events': the values of `t` are rounded to
+        multiples of `resolution` and identical values are aggregated into
+        weighted events before the blocks are computed.
+        This bounds the number of cells by the range of `t` divided by
+        `resolution` (e.g. use 1 for integer degrees).
 
     Returns
     -------
@@ -255,6 +286,11 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
     >>> x[np.random.randint(0, len(t), len(t) / 10)] = 1
     >>> bins = bayesian_blocks(t, fitness='regular_events', dt=dt, gamma=0.9)
 
+    Approximate blocks for a large set of values:
+
+    >>> t = np.random.lognormal(size=1000000)
+    >>> bins = bayesian_blocks(t, resolution=0.01)
+
     Measured point data with errors:
 
     >>> t = 100 * np.random.random(100)
@@ -303,6 +339,22 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
     # find unique values of t
     t = np.array(t, dtype=float)
     assert t.ndim == 1
+
+    # aggregate the quantized values into weighted events
+    if resolution is not None:
+        if fitness != 'events':
+            raise ValueError("`resolution` is only supported for "
+                             "fitness='events'")
+
+        t = resolution * np.round(t / resolution)
+
+        if x is not None:
+            if len(t) != len(x):
+                raise ValueError("Size of t and x does not match")
+
+            t, inv = np.unique(t, return_inverse=True)
+            x = np.bincount(inv, weights=x)
+
     unq_t, unq_ind, unq_inv = np.unique(t, return_index=True,
                                         return_inverse=True)
 
@@ -362,42 +414,49 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
     best = np.zeros(N, dtype=float)
     last = np.zeros(N, dtype=int)
 
-    #-----------------------------------------------------------------
-    # Start with first data cell; add one cell at each iteration
-    #-----------------------------------------------------------------
-    for R in range(N):
-        # Compute fit_vec : fitness of putative last block (end at R)
-        kwds = {}
+    # pruned search if the fitness function supports it
+    can_prune = getattr(fitfunc, 'can_prune', None)
+    cell_length = block_length[:-1] - block_length[1:]
 
-        # T_k: width/duration of each block
-        if 'T_k' in fitfunc.args:
-            kwds['T_k'] = block_length[:R + 1] - block_length[R + 1]
+    if can_prune is not None and can_prune(x, cell_length):
+        _pruned_blocks(fitfunc, x, block_length, best, last)
+    else:
+        #-----------------------------------------------------------------
+        # Start with first data cell; add one cell at each iteration
+        #-----------------------------------------------------------------
+        for R in range(N):
+            # Compute fit_vec : fitness of putative last block (end at R)
+            kwds = {}
 
-        # N_k: number of elements in each block
-        if 'N_k' in fitfunc.args:
-            kwds['N_k'] = np.cumsum(x[:R + 1][::-1])[::-1]
+            # T_k: width/duration of each block
+            if 'T_k' in fitfunc.args:
+                kwds['T_k'] = block_length[:R + 1] - block_length[R + 1]
 
-        # a_k: eq. 31
-        if 'a_k' in fitfunc.args:
-            kwds['a_k'] = 0.5 * np.cumsum(ak_raw[:R + 1][::-1])[::-1]
+            # N_k: number of elements in each block
+            if 'N_k' in fitfunc.args:
+                kwds['N_k'] = np.cumsum(x[:R + 1][::-1])[::-1]
 
-        # b_k: eq. 32
-        if 'b_k' in fitfunc.args:
-            kwds['b_k'] = - np.cumsum(bk_raw[:R + 1][::-1])[::-1]
+            # a_k: eq. 31
+            if 'a_k' in fitfunc.args:
+                kwds['a_k'] = 0.5 * np.cumsum(ak_raw[:R + 1][::-1])[::-1]
 
-        # c_k: eq. 33
-        if 'c_k' in fitfunc.args:
-            kwds['c_k'] = 0.5 * np.cumsum(ck_raw[:R + 1][::-1])[::-1]
+            # b_k: eq. 32
+            if 'b_k' in fitfunc.args:
+                kwds['b_k'] = - np.cumsum(bk_raw[:R + 1][::-1])[::-1]
 
-        # evaluate fitness function
-        fit_vec = fitfunc.fitness(**kwds)
+            # c_k: eq. 33
+            if 'c_k' in fitfunc.args:
+                kwds['c_k'] = 0.5 * np.cumsum(ck_raw[:R + 1][::-1])[::-1]
 
-        A_R = fit_vec - fitfunc.prior(R + 1, N)
-        A_R[1:] += best[:R]
+            # evaluate fitness function
+            fit_vec = fitfunc.fitness(**kwds)
 
-        i_max = np.argmax(A_R)
-        last[R] = i_max
-        best[R] = A_R[i_max]
+            A_R = fit_vec - fitfunc.prior(R + 1, N)
+            A_R[1:] += best[:R]
+
+            i_max = np.argmax(A_R)
+            last[R] = i_max
+            best[R] = A_R[i_max]
 
     #-----------------------------------------------------------------
     # Now find changepoints by iteratively peeling off the last block
@@ -414,3 +473,55 @@ def bayesian_blocks(t, x=None, sigma=None, fitness='events', **kwargs):
     change_points = change_points[i_cp:]
 
     return edges[change_points]
+
+
+def _pruned_blocks(fitfunc, x, block_length, best, last):
+    """
+    Dynamic programming with pruning of the candidate change points (PELT).
+
+    If splitting a block never decreases the fitness, a cell `k` that is
+    worse than the optimum by more than the prior when the last block ends
+    at `R` cannot start the last block of any optimal partition ending
+    after `R` (Killick et al 2012), so it is dropped from the candidates.
+    Fitness values are computed as in the full search, so the results are
+    identical.
+    """
+    N = len(best)
+
+    # cumulated counts, to get N_k = x[k:R + 1].sum() for any k
+    cum_x = np.concatenate(([0], np.cumsum(x)))
+
+    candidates = np.zeros(0, dtype=int)
+
+    for R in range(N):
+        if R == N - 1:
+            # the last cell can be a half-tick for regular events: check all
+            candidates = np.arange(N)
+        else:
+            candidates = np.append(candidates, R)
+
+        kwds = {}
+
+        # T_k: width/duration of each block
+        if 'T_k' in fitfunc.args:
+            kwds['T_k'] = block_length[candidates] - block_length[R + 1]
+
+        # N_k: number of elements in each block
+        if 'N_k' in fitfunc.args:
+            kwds['N_k'] = cum_x[R + 1] - cum_x[candidates]
+
+        prior = fitfunc.prior(R + 1, N)
+
+        A_R = fitfunc.fitness(**kwds) - prior
+        A_R += np.where(candidates > 0, best[candidates - 1], 0)
+
+        i_max = np.argmax(A_R)
+        last[R] = candidates[i_max]
+        best[R] = A_R[i_max]
+
+        # prune with a margin for rounding errors, never dropping the first
+        # cell (half-tick for regular events)
+        tol = 1e-8 * (1 + np.abs(best[R]))
+        keep = (A_R + prior >= best[R] - tol) | (candidates == 0)
+
+        candidates = candidates[keep]
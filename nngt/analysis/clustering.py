@@ -22,6 +22,7 @@
 """ Tools for directed/weighted clsutering analysis """
 
 import numpy as np
+import scipy.sparse as ssp
 
 import nngt
 from nngt.lib import nonstring_container
@@ -225,55 +226,31 @@ def local_closure(g, directed=True, weights=None, method=None,
     if not directed and g.is_directed():
         _, mat = _get_matrices(g, directed, weights, weighted, combine_weights)
     else:
-        mat = g.adjacency_matrix(weights=weights)
-        mat.setdiag(0)
-
-    mat2, mat3 = None, None
+        mat = _remove_self_loops(g._adjacency(weights=weights))
 
     if directed:
         # set correct matrix
         if mode.endswith("-in"):
             mat = mat.T
 
-        if method == "continuous" and weights is not None:
-            sqmat = mat.sqrt()
-            cbmat = mat.power(2/3)
-
-            mat2 = sqmat*sqmat
-
-            if mode in ("cycle-in", "cycle-out"):
-                mat3 = cbmat*cbmat*cbmat
-            elif mode in ("fan-in", "fan-out"):
-                mat3 = cbmat*cbmat*cbmat.T
-            else:
-                raise ValueError("Unknown `mode`: '" + mode + "'.'")
-        elif method in ("normal", "zhang", None):
-            mat2 = mat*mat
+        if mode not in ("cycle-in", "cycle-out", "fan-in", "fan-out"):
+            raise ValueError("Unknown `mode`: '" + mode + "'.'")
 
-            if mode in ("cycle-in", "cycle-out"):
-                mat3 = mat2*mat
-            elif mode in ("fan-in", "fan-out"):
-                mat3 = mat2*mat.T
-            else:
-                raise ValueError("Unknown `mode`: '" + mode + "'.'")
-        else:
-            raise ValueError("Unknown `method`: '" + method + "'.'")
+    if method == "continuous" and weights is not None:
+        sqmat = mat.sqrt()
+        cbmat = mat.power(2/3)
+    elif method in ("normal", "zhang", None):
+        sqmat = cbmat = mat
     else:
-        # undirected
-        if method == "continuous" and weights is not None:
-            sqmat = mat.sqrt()
-            cbmat = mat.power(2/3)
+        raise ValueError("Unknown `method`: '" + method + "'.'")
 
-            mat2 = sqmat*sqmat
-            mat3 = cbmat*cbmat*cbmat
-        elif method in ("normal", "zhang", None):
-            mat2 = mat*mat
-            mat3 = mat2*mat
-        else:
-            raise ValueError("Unknown `method`: '" + method + "'.'")
+    if directed and mode in ("fan-in", "fan-out"):
+        numer = _diag_product(cbmat, cbmat, cbmat.T)
+    else:
+        numer = _diag_product(cbmat, cbmat, cbmat)
 
-    numer = mat3.diagonal()
-    denom = mat2.sum(axis=1).A1 - mat2.diagonal()
+    # the row sums of sqmat*sqmat do not require the matrix product
+    denom = sqmat*sqmat.sum(axis=1).A1 - _diag_product(sqmat, sqmat)
 
     denom[denom == 0] = 1
 
@@ -648,9 +625,9 @@ def triplet_count(g, nodes=None, directed=True, weights=None,
 
         # directed
         if mode in ("total", "cycle", "middleman"):
-            adj = g.adjacency_matrix()
+            adj = g._adjacency()
 
-            d_recip = (adj*adj).diagonal()
+            d_recip = _diag_product(adj, adj)
 
             if nodes is not None:
                 d_recip = d_recip[nodes]
@@ -681,8 +658,8 @@ def triplet_count(g, nodes=None, directed=True, weights=None,
                               combine_weights=combine_weights)
     elif method == "barrat":
         # we need only the (potentially) directed matrices
-        W = g.adjacency_matrix(weights=weights)
-        A = g.adjacency_matrix()
+        W = g._adjacency(weights=weights)
+        A = g._adjacency()
     else:
         raise ValueError("`method` must be either 'barrat', 'onnela', "
                          "'zhang', or 'continuous'/'normal' (identical "
@@ -762,19 +739,22 @@ def _triangle_count(mat, matsym, adj, adjsym, method, mode, weighted, directed,
     '''
     (Un)weighted (un)directed triangle count.
     '''
-    tr = None
+    tr   = None
+    rows = None if nodes is None else np.atleast_1d(nodes)
 
     if method == "barrat":
         if mode == "total":
-            tr = 0.5*(matsym*adjsym*adjsym).diagonal()
+            tr = 0.5*_diag_product(matsym, adjsym, adjsym, rows)
         elif mode == "cycle":
-            tr = 0.5*(mat*adj*adj + mat.T*adj.T*adj.T).diagonal()
+            tr = 0.5*(_diag_product(mat, adj, adj, rows) +
+                      _diag_product(mat.T, adj.T, adj.T, rows))
         elif mode == "middleman":
-            tr = 0.5*(mat.T*adj*adj.T + mat*adj.T*adj).diagonal()
+            tr = 0.5*(_diag_product(mat.T, adj, adj.T, rows) +
+                      _diag_product(mat, adj.T, adj, rows))
         elif mode == "fan-in":
-            tr = 0.5*(mat.T*adjsym*adj).diagonal()
+            tr = 0.5*_diag_product(mat.T, adjsym, adj, rows)
         elif mode == "fan-out":
-            tr = 0.5*(mat*adjsym*adj.T).diagonal()
+            tr = 0.5*_diag_product(mat, adjsym, adj.T, rows)
         else:
             raise ValueError("Unknown mode ''.".format(mode))
     else:
@@ -784,22 +764,22 @@ def _triangle_count(mat, matsym, adj, adjsym, method, mode, weighted, directed,
             raise ValueError("Invalid `method`: '{}'".format(method))
 
         if mode == "total":
-            tr = 0.5*(matsym*matsym*matsym).diagonal()
+            tr = 0.5*_diag_product(matsym, matsym, matsym, rows)
         elif mode == "cycle":
-            tr = (mat*mat*mat).diagonal()
+            tr = _diag_product(mat, mat, mat, rows)
         elif mode == "middleman":
-            tr = (mat*mat.T*mat).diagonal()
+            tr = _diag_product(mat, mat.T, mat, rows)
         elif mode == "fan-in":
-            tr = (mat.T*mat*mat).diagonal()
+            tr = _diag_product(mat.T, mat, mat, rows)
         elif mode == "fan-out":
-            tr = (mat*mat*mat.T).diagonal()
+            tr = _diag_product(mat, mat, mat.T, rows)
         else:
             raise ValueError("Unknown mode ''.".format(mode))
 
-    if nodes is None:
+    if nodes is None or nonstring_container(nodes):
         return tr
 
-    return tr[nodes]
+    return tr[0]
 
 
 def _triplet_count_weighted(g, mat, matsym, adj, adjsym, method, mode,
@@ -819,13 +799,13 @@ def _triplet_count_weighted(g, mat, matsym, adj, adjsym, method, mode,
                 s2_sq_tot = np.square(sqmat.sum(axis=0).A1 +
                                       sqmat.sum(axis=1).A1)
                 s_tot     = mat.sum(axis=0).A1 + mat.sum(axis=1).A1
-                s_recip   = 2*(sqmat*sqmat).diagonal()
+                s_recip   = 2*_diag_product(sqmat, sqmat)
 
                 tr = s2_sq_tot - s_tot - s_recip
             elif mode in ("cycle", "middleman"):
                 s_sq_out = sqmat.sum(axis=0).A1
                 s_sq_in  = sqmat.sum(axis=1).A1
-                s_recip  = (sqmat*sqmat).diagonal()
+                s_recip  = _diag_product(sqmat, sqmat)
 
                 tr = s_sq_in*s_sq_out - s_recip
             elif mode in ("fan-in", "fan-out"):
@@ -851,13 +831,13 @@ def _triplet_count_weighted(g, mat, matsym, adj, adjsym, method, mode,
                 s2_sq_tot = np.square(mat.sum(axis=0).A1 +
                                       mat.sum(axis=1).A1)
                 s_tot     = mat2.sum(axis=0).A1 + mat2.sum(axis=1).A1
-                s_recip   = 2*(mat*mat).diagonal()
+                s_recip   = 2*_diag_product(mat, mat)
 
                 tr = s2_sq_tot - s_tot - s_recip
             elif mode in ("cycle", "middleman"):
                 s_sq_out = mat.sum(axis=0).A1
                 s_sq_in  = mat.sum(axis=1).A1
-                s_recip  = (mat*mat).diagonal()
+                s_recip  = _diag_product(mat, mat)
 
                 tr = s_sq_in*s_sq_out - s_recip
             elif mode in ("fan-in", "fan-out"):
@@ -879,7 +859,8 @@ def _triplet_count_weighted(g, mat, matsym, adj, adjsym, method, mode,
         if directed:
             # specifc definition of the reciprocal strength from Clemente
             if mode == "total":
-                s_recip = 0.5*(mat*adj + adj*mat).diagonal()
+                s_recip = 0.5*(_diag_product(mat, adj) +
+                                 _diag_product(adj, mat))
 
                 dtot = g.get_degrees("total")
                 wmax = np.max(g.get_weights())
@@ -887,7 +868,8 @@ def _triplet_count_weighted(g, mat, matsym, adj, adjsym, method, mode,
 
                 tr = stot*(dtot - 1) - 2*s_recip
             elif mode in ("cycle", "middleman"):
-                s_recip = 0.5*(mat*adj + adj*mat).diagonal()
+                s_recip = 0.5*(_diag_product(mat, adj) +
+                                 _diag_product(adj, mat))
                 s_in    = mat.sum(axis=0).A1
                 s_out   = mat.sum(axis=1).A1
                 d_in    = g.get_degrees("in")
@@ -931,11 +913,11 @@ def _get_matrices(g, directed, weights, weighted, combine_weights,
     '''
     if weighted:
         # weighted undirected
-        W  = g.adjacency_matrix(weights=weights)
-        W /= W.max()
+        W = g._adjacency(weights=weights)
+        W = W / W.max()
 
         # remove potential self-loops
-        W.setdiag(0.)
+        W = _remove_self_loops(W)
 
         if exponent is not None:
             W = W.power(exponent)
@@ -956,10 +938,8 @@ def _get_matrices(g, directed, weights, weighted, combine_weights,
         return W, Wu
 
     # binary undirected
-    A = g.adjacency_matrix()
-
     # remove potential self-loops
-    A.setdiag(0.)
+    A = _remove_self_loops(g._adjacency())
 
     Au = A
 
@@ -970,3 +950,69 @@ def _get_matrices(g, directed, weights, weighted, combine_weights,
             Au.data = np.ones(len(Au.data))
 
     return A, Au
+
+
+def _remove_self_loops(mat):
+    '''
+    Return `mat` without its diagonal entries (`mat` is never modified since
+    it can be the graph's cached adjacency matrix).
+    '''
+    diag = mat.diagonal()
+
+    if diag.any():
+        return mat - ssp.diags(diag, format=mat.format)
+
+    return mat
+
+
+def _diag_product(a, b, c=None, rows=None):
+    '''
+    Return the diagonal of the product of sparse matrices ``a*b`` or
+    ``a*b*c`` (only for `rows` if they are given).
+
+    Since only the entries of ``a*b`` matching a nonzero of ``c.T`` are used,
+    the product is never computed: the rows of ``a*b`` are built by blocks,
+    multiplied by the corresponding rows of ``c.T`` and summed, and the size
+    of each block is chosen so that it stays below the "analysis_memory"
+    budget.
+    '''
+    a = a.tocsr()
+
+    if rows is not None:
+        a = a[rows]
+
+    if c is None:
+        bt = b.T.tocsr()
+        bt = bt if rows is None else bt[rows]
+
+        return a.multiply(bt).sum(axis=1).A1
+
+    b  = b.tocsr()
+    ct = c.T.tocsr()
+    ct = ct if rows is None else ct[rows]
+
+    num_rows = a.shape[0]
+
+    # upper bound of the number of nonzeros in each row of a*b (about 24
+    # bytes per entry are used by the product)
+    pattern = ssp.csr_matrix((np.ones(a.nnz), a.indices, a.indptr),
+                             shape=a.shape)
+
+    work = np.zeros(num_rows + 1)
+    np.cumsum(pattern @ np.diff(b.indptr), out=work[1:])
+
+    budget = max(1, 1e6*float(nngt._config["analysis_memory"]) / 24)
+
+    diag  = np.zeros(num_rows)
+    start = 0
+
+    while start < num_rows:
+        stop = np.searchsorted(work, work[start] + budget, side="right") - 1
+        stop = max(stop, start + 1)
+
+        diag[start:stop] = \
+            (a[start:stop]*b).multiply(ct[start:stop]).sum(axis=1).A1
+
+        start = stop
+
+    return diag
@@ -752,7 +752,7 @@ def subgraph_centrality(graph, weights=True, nodes=None,
        Subgraph centrality in complex networks, PHYSICAL REVIEW E 71, 056103
        (2005), :doi:`10.1103/PhysRevE.71.056103`, :arxiv:`cond-mat/0504730`.
     '''
-    adj_mat = graph.adjacency_matrix(types=False, weights=weights).tocsc()
+    adj_mat = graph._adjacency(types=False, weights=weights, mformat="csc")
 
     centralities = None
 
@@ -797,7 +797,7 @@ def spectral_radius(graph, typed=True, weights=True):
     -------
     the spectral radius as a float.
     '''
-    mat_adj  = graph.adjacency_matrix(types=typed, weights=weights)
+    mat_adj  = graph._adjacency(types=typed, weights=weights)
     eigenval = []
 
     try:
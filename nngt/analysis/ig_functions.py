@@ -513,7 +513,7 @@ def average_path_length(g, sources=None, targets=None, directed=True,
     if unconnected:
         num_paths -= np.sum(np.isinf(mat_dist))
 
-        return np.nansum(mat_dist) / num_paths
+        return np.sum(mat_dist[~np.isinf(mat_dist)]) / num_paths
 
     return np.sum(mat_dist) / num_paths
 
@@ -23,23 +23,36 @@
 
 import numpy as np
 import scipy.sparse as ssp
+import scipy.sparse.csgraph as csg
+
+import nngt
+from ..lib.test_functions import nonstring_container, is_integer
 
 
 def adj_mat(g, weight=None, mformat="csr"):
     data = None
 
-    if weight in g.edge_attributes:
+    if nonstring_container(weight):
+        data = np.asarray(weight, dtype=float)
+    elif weight in g.edge_attributes:
         data = g.get_edge_attributes(name=weight)
     else:
         data = np.ones(g.edge_nb())
 
-    if not g.is_directed():
-        data = np.repeat(data, 2)
-        
-    edges     = np.array(list(g._graph._edges), dtype=int)
+    edges     = g._graph.edges
     num_nodes = g.node_nb()
-    mat       = ssp.coo_matrix((data, (edges[:, 0], edges[:, 1])),
-                               shape=(num_nodes, num_nodes))
+
+    sources, targets = edges[:, 0], edges[:, 1]
+
+    if not g.is_directed():
+        # add reciprocal edges (self-loops appear only once)
+        recip   = sources != targets
+        data    = np.concatenate((data, data[recip]))
+        sources = np.concatenate((sources, targets[recip]))
+        targets = np.concatenate((targets, edges[recip, 0]))
+
+    mat = ssp.coo_matrix((data, (sources, targets)),
+                         shape=(num_nodes, num_nodes))
 
     return mat.asformat(mformat)
 
@@ -69,8 +82,558 @@ def reciprocity(g):
 
     num_edges = g.edge_nb()
 
-    g = g._graph
+    edges = g._graph.edges
 
-    num_recip = sum((1 if e[::-1] in g._edges else 0 for e in g._edges))
+    num_recip = np.sum(g._graph.edge_ids(edges[:, ::-1]) >= 0)
 
     return num_recip / num_edges
+
+
+def closeness(g, weights=None, nodes=None, mode="out", harmonic=False,
+              default=np.NaN):
+    r'''
+    Returns the closeness centrality of some `nodes`.
+
+    .. versionadded:: 2.3
+
+    Closeness centrality of a node `u` is defined, for the harmonic version,
+    as the sum of the reciprocal of the shortest path distance :math:`d_{uv}`
+    from `u` to the N - 1 other nodes in the graph (if `mode` is "out",
+    reciprocally :math:`d_{vu}`, the distance to `u` from another node v,
+    if `mode` is "in"):
+
+    .. math::
+
+        C(u) = \frac{1}{N - 1} \sum_{v \neq u} \frac{1}{d_{uv}},
+
+    or, using the arithmetic definition, as the reciprocal of the
+    average shortest path distance to/from `u` over to all other nodes:
+
+    .. math::
+
+        C(u) = \frac{n - 1}{\sum_{v \neq u} d_{uv}},
+
+    where `d_{uv}` is the shortest-path distance from `u` to `v`,
+    and `n` is the number of nodes in the component.
+
+    By definition, the distance is infinite when nodes are not connected by
+    a path in the harmonic case (such that :math:`\frac{1}{d(v, u)} = 0`),
+    while the distance itself is taken as zero for unconnected nodes in the
+    first equation.
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    weights : bool or str, optional (default: binary edges)
+        Whether edge weights should be considered; if ``None`` or ``False``
+        then use binary edges; if ``True``, uses the 'weight' edge attribute,
+        otherwise uses any valid edge attribute required.
+    nodes : list, optional (default: all nodes)
+        The list of nodes for which the clutering will be returned
+    mode : str, optional (default: "out")
+        For directed graphs, whether the distances are computed from ("out") or
+        to ("in") each of the nodes.
+    harmonic : bool, optional (default: False)
+        Whether the arithmetic (default) or the harmonic (recommended) version
+        of the closeness should be used.
+
+    Returns
+    -------
+    c : :class:`numpy.ndarray`
+        The list of closeness centralities, on per node.
+
+    References
+    ----------
+    .. [scipy-dijkstra] :scipydoc:`sparse.csgraph.dijkstra`
+    '''
+    mat, directed, wvals = _get_matrix(g, True, weights)
+
+    if mode == "in" and g.is_directed():
+        mat = mat.T.tocsr()
+
+    num_nodes = g.node_nb()
+    sources   = np.arange(num_nodes) if nodes is None else nodes
+    sources   = np.array([sources]) if is_integer(sources) else sources
+
+    c = np.zeros(len(sources))
+
+    for start, dist in _distance_blocks(mat, directed, wvals, sources):
+        stop = start + len(dist)
+
+        if harmonic:
+            with np.errstate(divide="ignore"):
+                inv_dist = 1 / dist
+
+            # remove the node itself
+            inv_dist[dist == 0] = 0
+
+            c[start:stop] = inv_dist.sum(axis=1)
+        else:
+            finite  = np.isfinite(dist)
+            reached = finite.sum(axis=1) - 1
+            total   = np.where(finite, dist, 0).sum(axis=1)
+
+            np.divide(reached, total, out=c[start:stop], where=total > 0)
+
+    # normalize
+    if harmonic:
+        c *= 1 / (num_nodes - 1)
+    elif default != 0:
+        c[c == 0.] = default
+
+    if is_integer(nodes):
+        return c[0]
+
+    return c
+
+
+def betweenness(g, btype="both", weights=None):
+    '''
+    Returns the normalized betweenness centrality of the nodes and edges.
+
+    .. versionadded:: 2.3
+
+    The shortest paths from blocks of sources are computed with
+    :func:`scipy.sparse.csgraph.dijkstra`, then the number of shortest paths
+    and the dependencies of [Brandes2001]_ are accumulated for all the
+    sources of a block at once along the shortest-path DAGs.
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    btype : str, optional (default 'both')
+        The centrality that should be returned (either 'node', 'edge', or
+        'both'). By default, both betweenness centralities are computed.
+    weights : bool or str, optional (default: binary edges)
+        Whether edge weights should be considered; if ``None`` or ``False``
+        then use binary edges; if ``True``, uses the 'weight' edge attribute,
+        otherwise uses any valid edge attribute required.
+        Weights must be strictly positive.
+
+    Returns
+    -------
+    nb : :class:`numpy.ndarray`
+        The nodes' betweenness if `btype` is 'node' or 'both'
+    eb : :class:`numpy.ndarray`
+        The edges' betweenness if `btype` is 'edge' or 'both'
+
+    References
+    ----------
+    .. [Brandes2001] U. Brandes, A faster algorithm for betweenness
+       centrality, J. Math. Sociol. 25, 163-177 (2001),
+       :doi:`10.1080/0022250X.2001.9990249`.
+    '''
+    if btype not in ("both", "node", "edge"):
+        raise ValueError("`btype` must be either 'both', 'node', or 'edge'.")
+
+    mat, directed, wvals = _get_matrix(g, True, weights)
+
+    # zero-length edges would create cycles in the shortest-path DAGs
+    if wvals is not None and np.any(wvals <= 0):
+        raise ValueError("Betweenness requires strictly positive `weights`.")
+
+    num_nodes = g.node_nb()
+    edges     = g.edges_array
+    num_edges = len(edges)
+
+    # arcs are the directed links followed by the paths (both directions of
+    # the edges for undirected graphs)
+    arc_eids = np.arange(num_edges)
+
+    if not g.is_directed():
+        arc_eids = np.concatenate(
+            (arc_eids, np.where(edges[:, 0] != edges[:, 1])[0]))
+
+    num_arcs = len(arc_eids)
+
+    sources  = np.concatenate((edges[:, 0], edges[arc_eids[num_edges:], 1]))
+    targets  = np.concatenate((edges[:, 1], edges[arc_eids[num_edges:], 0]))
+    lengths  = np.ones(num_arcs) if wvals is None else wvals[arc_eids]
+
+    # sort the arcs by target so that the DAGs are directly built in
+    # compressed format
+    order    = np.argsort(targets, kind="stable")
+    arc_eids = arc_eids[order]
+    sources  = sources[order]
+    targets  = targets[order]
+    lengths  = lengths[order]
+
+    nb = np.zeros(num_nodes)
+    eb = np.zeros(num_arcs)
+
+    # the (block x arcs) arrays dominate the memory
+    size = max(1, int(_block_memory() / (24*max(num_arcs, num_nodes))))
+
+    for start in range(0, num_nodes, size):
+        roots = np.arange(start, min(start + size, num_nodes))
+        bsize = len(roots)
+
+        dist = csg.dijkstra(mat, directed=directed, indices=roots,
+                            unweighted=wvals is None)
+
+        # arcs belonging to the shortest-path DAG of each root, the DAGs of
+        # the block are merged into one graph on the (root, node) states
+        on_path  = (dist[:, sources] + lengths == dist[:, targets])
+        on_path &= np.isfinite(dist)[:, sources]
+
+        col, arc = np.nonzero(on_path)
+
+        del on_path, dist
+
+        num_states = bsize*num_nodes
+        src_state  = col*num_nodes + sources[arc]
+        tgt_state  = col*num_nodes + targets[arc]
+        root_state = np.arange(bsize)*num_nodes + roots
+
+        # tgt_state is sorted
+        indptr = np.zeros(num_states + 1, dtype=int)
+        np.cumsum(np.bincount(tgt_state, minlength=num_states),
+                  out=indptr[1:])
+
+        # number of shortest paths, converges after (DAG depth + 1) steps,
+        # the depth being lower than the number of nodes
+        dag = ssp.csr_matrix((np.ones(len(arc)), src_state, indptr),
+                             shape=(num_states, num_states))
+
+        sigma = np.zeros(num_states)
+        sigma[root_state] = 1
+
+        for _ in range(num_nodes + 1):
+            new_sigma = dag @ sigma
+            new_sigma[root_state] = 1
+
+            if np.array_equal(new_sigma, sigma):
+                break
+
+            sigma = new_sigma
+
+        # dependencies, accumulated backwards along the DAG (the transposed
+        # DAG is the CSC matrix with the same structure)
+        ratio = sigma[src_state] / sigma[tgt_state]
+
+        dag = ssp.csc_matrix((ratio, src_state, indptr),
+                             shape=(num_states, num_states))
+
+        delta = np.zeros(num_states)
+
+        for _ in range(num_nodes + 1):
+            new_delta = dag @ (1 + delta)
+
+            if np.array_equal(new_delta, delta):
+                break
+
+            delta = new_delta
+
+        eb += np.bincount(arc, weights=ratio*(1 + delta[tgt_state]),
+                          minlength=num_arcs)
+
+        delta[root_state] = 0
+
+        nb += delta.reshape(bsize, num_nodes).sum(axis=0)
+
+    # normalize (undirected paths were counted in both directions)
+    if num_nodes > 2:
+        nb *= 1 / ((num_nodes - 1)*(num_nodes - 2))
+
+    if num_nodes > 1:
+        eb *= 1 / (num_nodes*(num_nodes - 1))
+
+    eb = np.bincount(arc_eids, weights=eb, minlength=num_edges)
+
+    if btype == "node":
+        return nb
+    elif btype == "edge":
+        return eb
+
+    return nb, eb
+
+
+def connected_components(g, ctype=None):
+    '''
+    Returns the connected component to which each node belongs.
+
+    .. versionadded:: 2.3
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    ctype : str, optional (default 'scc')
+        Type of component that will be searched: either strongly connected
+        ('scc', by default) or weakly connected ('wcc').
+
+    Returns
+    -------
+    cc, hist : :class:`numpy.ndarray`
+        The component associated to each node (`cc`) and the number of nodes in
+        each of the component (`hist`).
+
+    References
+    ----------
+    .. [scipy-cc] :scipydoc:`sparse.csgraph.connected_components`
+    '''
+    ctype = "scc" if ctype is None else ctype
+
+    if ctype not in ("scc", "wcc"):
+        raise ValueError("Invalid `ctype`, only 'scc' and 'wcc' are allowed.")
+
+    connection = "strong" if ctype == "scc" else "weak"
+
+    _, cc = csg.connected_components(
+        g._adjacency(), directed=g.is_directed(), connection=connection)
+
+    return cc, np.bincount(cc)
+
+
+def shortest_distance(g, sources=None, targets=None, directed=True,
+                      weights=None):
+    '''
+    Returns the length of the shortest paths between `sources`and `targets`.
+    The algorithms return infinity if there are no paths between nodes.
+
+    .. versionadded:: 2.3
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    sources : list of nodes, optional (default: all)
+        Nodes from which the paths must be computed.
+    targets : list of nodes, optional (default: all)
+        Nodes to which the paths must be computed.
+    directed : bool, optional (default: True)
+        Whether the edges should be considered as directed or not
+        (automatically set to False if `g` is undirected).
+    weights : str or array, optional (default: binary)
+        Whether to use weighted edges to compute the distances. By default,
+        all edges are considered to have distance 1.
+
+    Returns
+    -------
+    distance : float, or 1d/2d numpy array of floats
+        Distance (if single source and single target) or distance array.
+        For multiple sources and targets, the shape of the matrix is (S, T),
+        with S the number of sources and T the number of targets; for a single
+        source or target, return a 1d-array of length T or S.
+
+    References
+    ----------
+    .. [scipy-dijkstra] :scipydoc:`sparse.csgraph.dijkstra`
+    '''
+    mat, directed, wvals = _get_matrix(g, directed, weights)
+
+    unweighted = wvals is None
+
+    # single source/target case
+    if is_integer(sources) and is_integer(targets):
+        dist = csg.dijkstra(mat, directed=directed, indices=sources,
+                            unweighted=unweighted)
+
+        return dist[targets]
+
+    sources = [sources] if is_integer(sources) else sources
+    targets = [targets] if is_integer(targets) else targets
+
+    mat_dist = None
+
+    if sources is None and targets is not None:
+        # compute the distances to the targets on the reversed graph
+        mat_dist = csg.dijkstra(mat.T.tocsr(), directed=directed,
+                                indices=targets, unweighted=unweighted).T
+    else:
+        mat_dist = csg.dijkstra(mat, directed=directed, indices=sources,
+                                unweighted=unweighted)
+
+        if targets is not None:
+            mat_dist = mat_dist[:, targets]
+
+    if mat_dist.shape[0] == 1:
+        return mat_dist[0]
+
+    if mat_dist.shape[1] == 1:
+        return mat_dist.T[0]
+
+    return mat_dist
+
+
+def average_path_length(g, sources=None, targets=None, directed=True,
+                        weights=None, unconnected=False):
+    r'''
+    Returns the average shortest path length between `sources` and `targets`.
+    The algorithms raises an error if all nodes are not connected unless
+    `unconnected` is set to True.
+
+    .. versionadded:: 2.3
+
+    The average path length is defined as
+
+    .. math::
+
+       L = \frac{1}{N_p} \sum_{u,v} d(u, v),
+
+    where :math:`N_p` is the number of paths between `sources` and `targets`,
+    and :math:`d(u, v)` is the shortest path distance from u to v.
+
+    If `sources` and `targets` are both None, then the total number of paths is
+    :math:`N_p = N(N - 1)`, with :math:`N` the number of nodes in the graph.
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    sources : list of nodes, optional (default: all)
+        Nodes from which the paths must be computed.
+    targets : list of nodes, optional (default: all)
+        Nodes to which the paths must be computed.
+    directed : bool, optional (default: True)
+        Whether the edges should be considered as directed or not
+        (automatically set to False if `g` is undirected).
+    weights : str, optional (default: binary)
+        Whether to use weighted edges to compute the distances. By default,
+        all edges are considered to have distance 1.
+    unconnected : bool, optional (default: False)
+        If set to true, ignores unconnected nodes and returns the average path
+        length of the existing paths.
+
+    References
+    ----------
+    .. [scipy-dijkstra] :scipydoc:`sparse.csgraph.dijkstra`
+    '''
+    blocks = None
+
+    if sources is None and targets is None:
+        # all distances are never stored at once
+        mat, directed, wvals = _get_matrix(g, directed, weights)
+
+        blocks = (dist for _, dist in _distance_blocks(
+            mat, directed, wvals, np.arange(g.node_nb())))
+    else:
+        blocks = [shortest_distance(g, sources=sources, targets=targets,
+                                    directed=directed, weights=weights)]
+
+    total, num_paths = 0., 0
+
+    for dist in blocks:
+        finite = np.isfinite(dist)
+
+        if not unconnected and not np.all(finite):
+            raise RuntimeError("`sources` and `target` do not belong to the "
+                               "same connected component.")
+
+        total     += np.sum(dist[finite])
+        num_paths += np.count_nonzero(dist[finite])
+
+    return total / num_paths
+
+
+def diameter(g, directed=True, weights=None, is_connected=False):
+    '''
+    Returns the diameter of the graph.
+
+    .. versionadded:: 2.3
+
+    It returns infinity if the graph is not connected (strongly connected for
+    directed graphs) unless `is_connected` is True, in which case it returns
+    the longest existing shortest distance.
+
+    Parameters
+    ----------
+    g : :class:`~nngt.Graph`
+        Graph to analyze.
+    directed : bool, optional (default: True)
+        Whether to compute the directed diameter if the graph is directed.
+        If False, then the graph is treated as undirected. The option switches
+        to False automatically if `g` is undirected.
+    weights : bool or str, optional (default: binary edges)
+        Whether edge weights should be considered; if ``None`` or ``False``
+        then use binary edges; if ``True``, uses the 'weight' edge attribute,
+        otherwise uses any valid edge attribute required.
+    is_connected : bool, optional (default: False)
+        If False, check whether the graph is connected or not and return
+        infinite diameter if graph is unconnected. If True, the graph is
+        assumed to be connected.
+
+    See also
+    --------
+    :func:`nngt.analysis.shortest_distance`
+
+    References
+    ----------
+    .. [scipy-dijkstra] :scipydoc:`sparse.csgraph.dijkstra`
+    '''
+    mat, directed, wvals = _get_matrix(g, directed, weights)
+
+    # first check whether the graph is fully connected
+    if not is_connected:
+        num_cc, _ = csg.connected_components(
+            mat, directed=directed, connection="strong")
+
+        if num_cc > 1:
+            return np.inf
+
+    diam = 0.
+
+    for _, dist in _distance_blocks(mat, directed, wvals,
+                                    np.arange(g.node_nb())):
+        diam = max(diam, np.max(dist[np.isfinite(dist)], initial=0.))
+
+    return diam
+
+
+# ----- #
+# Tools #
+# ----- #
+
+def _get_matrix(g, directed, weights):
+    '''
+    Return the adjacency matrix, whether it must be considered as directed by
+    the :mod:`scipy.sparse.csgraph` functions, and the edge weights (None if
+    the graph is considered as binary).
+    '''
+    if weights is True:
+        weights = "weight" if "weight" in g.edge_attributes else None
+    elif weights is False:
+        weights = None
+
+    wvals = None
+
+    if nonstring_container(weights):
+        wvals = np.asarray(weights, dtype=float)
+    elif weights in g.edge_attributes:
+        wvals = g.get_edge_attributes(name=weights)
+    elif weights is not None:
+        raise ValueError(
+            "Unknown attribute '{}' for `weights`.".format(weights))
+
+    if not directed and g.is_directed() and wvals is not None:
+        raise ValueError(
+            "Cannot make graph undirected if `weights` are used.")
+
+    # undirected graphs have symmetric matrices, which is faster to use as
+    # directed than letting csgraph symmetrize it
+    directed = directed or not g.is_directed()
+
+    return g._adjacency(weights=weights), directed, wvals
+
+
+def _block_memory():
+    '''
+    Maximum memory (in bytes) of the temporary arrays used by the algorithms
+    that process the sources by blocks (distances, centralities).
+    '''
+    return 1e6*float(nngt._config["analysis_memory"])
+
+
+def _distance_blocks(mat, directed, weights, sources):
+    '''
+    Yield the first index of each block of `sources` with the array of the
+    distances from these sources to all nodes.
+    '''
+    size = max(1, int(_block_memory() / (8*mat.shape[0])))
+
+    for start in range(0, len(sources), size):
+        yield start, csg.dijkstra(mat, directed=directed,
+                                  indices=sources[start:start + size],
+                                  unweighted=weights is None)
@@ -180,7 +180,7 @@ class Connections:
         # normalize by the inhibitory weight factor
         if graph is not None and graph.is_network():
             if not np.isclose(graph._iwf, 1.):
-                adj = graph.adjacency_matrix(types=True, weights=False)
+                adj = graph._adjacency(types=True, weights=False)
                 keep = (adj[elist[:, 0], elist[:, 1]] < 0).A1
                 wlist[keep] *= graph._iwf
 
@@ -44,6 +44,7 @@ from nngt.lib.logger import _log_message
 from nngt.lib.test_functions import graph_tool_check, is_integer
 
 from .connections import Connections
+from .graph_interface import _MatrixCache
 
 
 logger = logging.getLogger(__name__)
@@ -205,7 +206,9 @@ class Graph(nngt.core.GraphObject):
             default if `filename` ends with '.graphml' or '.xml'), "dot" (dot
             format, default if `filename` ends with '.dot'), "gt" (only
             when using `graph_tool <http://graph-tool.skewed.de/>`_ as library,
-            detected if `filename` ends with '.gt').
+            detected if `filename` ends with '.gt'), "nngt-bin" (binary
+            format, default if `filename` ends with '.nngt', see
+            :func:`~nngt.save_to_file`).
         separator : str, optional (default " ")
             separator used to separate inputs in the case of custom formats
             (namely "neighbour" and "edge_list")
@@ -252,7 +255,7 @@ class Graph(nngt.core.GraphObject):
         '''
         fmt = _get_format(fmt, filename)
 
-        if fmt not in ("neighbour", "edge_list", "gml"):
+        if fmt not in ("neighbour", "edge_list", "gml", "nngt-bin"):
             # only partial support for these formats, relying on backend
             libgraph = _library_load(filename, fmt)
 
@@ -272,7 +275,8 @@ class Graph(nngt.core.GraphObject):
         name = info.get("name", "LoadedGraph") if name is None else name
 
         graph = Graph(nodes=info["size"], name=name,
-                      directed=info.get("directed", directed))
+                      directed=info.get("directed", directed),
+                      weighted=info.get("weighted", True))
 
         # make the nodes attributes
         lst_attr, dtpes, lst_values = [], [], []
@@ -286,19 +290,12 @@ class Graph(nngt.core.GraphObject):
             graph.new_node_attribute(nattr, dtype, values=values)
 
         # make the edges and their attributes
-        lst_attr, dtpes, lst_values = [], [], []
-
-        if info["edge_attributes"]:  # edge attributes to add to the graph
-            lst_attr   = info["edge_attributes"]
-            dtpes      = info["edge_attr_types"]
-            lst_values = [eattr[name] for name in info["edge_attributes"]]
+        eattributes = {
+            name: (dtype, eattr[name]) for name, dtype in zip(
+                info["edge_attributes"], info["edge_attr_types"])
+        }
 
-        if len(edges):
-            graph.new_edges(edges, check_duplicates=False,
-                            check_self_loops=False, check_existing=False)
-
-        for eattr, dtype, values in zip(lst_attr, dtpes, lst_values):
-            graph.new_edge_attribute(eattr, dtype, values=values)
+        graph._load_edges(edges, eattributes, degrees=info.get("degrees"))
 
         if struct is not None:
             if isinstance(struct, nngt.NeuralPop):
@@ -465,6 +462,9 @@ class Graph(nngt.core.GraphObject):
 
         self._struct = structure
 
+        # cache for the adjacency matrices
+        self._mcache = _MatrixCache()
+
         # Init the core.GraphObject
         super().__init__(nodes=nodes, copy_graph=copy_graph,
                          directed=directed, weighted=weighted)
@@ -670,38 +670,40 @@ class Graph(nngt.core.GraphObject):
         g = nngt.Graph(nodes,
                        name="Structure-graph of '{}'".format(self.name))
 
-        eattr = {"weight": []}
+        # membership matrix (groups x nodes) of the sources and targets
+        rows = np.concatenate(
+            [np.full(len(struct[n].ids), i) for i, n in enumerate(names)])
+        cols = np.concatenate([struct[n].ids for n in names]).astype(int)
 
-        if self.is_network():
-            eattr["delay"] = []
-
-        new_edges = []
+        member = ssp.csc_matrix((np.ones(len(rows)), (rows, cols)),
+                                shape=(nodes, self.node_nb()))
 
-        for i, n1 in enumerate(names):
-            g1 = struct[n1]
+        edges = self.edges_array
+        src   = member[:, edges[:, 0]]
+        tgt   = member[:, edges[:, 1]]
+        both  = src.multiply(tgt)
 
-            for j, n2 in enumerate(names):
-                g2 = struct[n2]
+        directed  = self.is_directed()
+        num_edges = _group_sums(src, tgt, both, np.ones(len(edges)), directed)
+        new_edges = np.argwhere(num_edges > 0)
+        exist     = num_edges > 0
 
-                edges = self.get_edges(source_node=g1.ids, target_node=g2.ids)
+        eattr = {
+            "weight": _group_sums(
+                src, tgt, both, self.get_weights(), directed)[exist]
+        }
 
-                if len(edges):
-                    weights = self.get_weights(edges=edges)
-                    w = np.sum(weights)
-                    eattr["weight"].append(w)
-
-                    if self.is_network():
-                        delays  = self.get_delays(edges=edges)
-                        d = np.average(delays)
-                        eattr["delay"].append(d)
+        if self.is_network():
+            delays = _group_sums(src, tgt, both, self.get_delays(), directed)
 
-                    new_edges.append((i, j))
+            eattr["delay"] = delays[exist] / num_edges[exist]
 
         # add edges and attributes
         if self.is_network():
             g.new_edge_attribute("delay", "double")
 
-        g.new_edges(new_edges, attributes=eattr, check_self_loops=False)
+        if len(new_edges):
+            g.new_edges(new_edges, attributes=eattr, check_self_loops=False)
 
         # set node attributes
         g.new_node_attribute("name", "string", values=names)
@@ -718,11 +720,21 @@ class Graph(nngt.core.GraphObject):
         .. versionchanged: 2.0
             Added matrix format option (`mformat`).
 
+        .. versionchanged:: 2.3
+            Matrices are cached until the graph is modified.
+
         Note
         ----
         Source nodes are represented by the rows, targets by the
         corresponding columns.
 
+        The matrix is computed once and stored until the edges or the
+        attributes of the graph change (see the "adjacency_cache"
+        configuration entry to limit the memory it uses); the returned matrix
+        is a copy that can safely be modified.
+        Modifications made directly on the underlying library object
+        (:attr:`~nngt.Graph.graph`) are not tracked.
+
         Parameters
         ----------
         types : bool, optional (default: False)
@@ -742,8 +754,41 @@ class Graph(nngt.core.GraphObject):
         mat : :mod:`scipy.sparse` matrix
             The adjacency matrix of the graph.
         '''
+        mat = self._adjacency(types=types, weights=weights, mformat=mformat)
+
+        return mat.copy()
+
+    def _adjacency(self, types=False, weights=False, mformat="csr"):
+        '''
+        Return the (shared) cached adjacency matrix, computing it if the graph
+        changed since the last call.
+
+        Warning
+        -------
+        The returned matrix must not be modified in place, use
+        :func:`~nngt.Graph.adjacency_matrix` to get a modifiable copy.
+        '''
         weights = "weight" if weights is True else weights
+        weights = None if weights is False else weights
 
+        # matrices built from external weights are not cached
+        if nonstring_container(weights):
+            return self._build_adjacency(types, weights, mformat)
+
+        # only compressed formats are stored, others are converted from CSR
+        fmt = mformat if mformat in ("csr", "csc") else "csr"
+        key = (weights, bool(types), fmt)
+
+        mat = self._mcache.get(key, self._version)
+
+        if mat is None:
+            mat = self._build_adjacency(types, weights, fmt)
+            self._mcache.store(key, mat, self._version)
+
+        return mat if fmt == mformat else mat.asformat(mformat)
+
+    def _build_adjacency(self, types, weights, mformat):
+        ''' Compute the adjacency matrix '''
         mat = None
 
         if types:
@@ -770,7 +815,7 @@ class Graph(nngt.core.GraphObject):
                 else:
                     data = self.get_edge_attributes(name=weights)
 
-                data *= self.get_edge_attributes(name="type")
+                data = data*self.get_edge_attributes(name="type")
 
                 edges     = self.edges_array
                 num_nodes = self.node_nb()
@@ -781,7 +826,8 @@ class Graph(nngt.core.GraphObject):
                 if not self.is_directed():
                     mat += mat.T
 
-            return mat.asformat(mformat)
+            if mat is not None:
+                return mat.asformat(mformat)
 
         # untyped
         mat = nngt.analyze_graph["adjacency"](self, weights, mformat=mformat)
@@ -903,7 +949,7 @@ class Graph(nngt.core.GraphObject):
                 else:
                     tgt = np.sort(target_node)
 
-                mat = self.adjacency_matrix()
+                mat = self._adjacency()
 
                 nnz = mat[src].tocsc()[:, tgt].nonzero()
 
@@ -957,6 +1003,9 @@ class Graph(nngt.core.GraphObject):
         ----
         The attributes values are ordered as the edges in
         :func:`~nngt.Graph.edges_array` if `edges` is None.
+        With the "nngt" backend, numeric attributes of all edges are returned
+        as read-only views on the stored values (use ``copy()`` to modify
+        them).
 
         See also
         --------
@@ -1005,6 +1054,12 @@ class Graph(nngt.core.GraphObject):
         the specific attribute for the required nodes (or all nodes if
         unspecified).
 
+        Note
+        ----
+        With the "nngt" backend, numeric attributes of all nodes are returned
+        as read-only views on the stored values (use ``copy()`` to modify
+        them).
+
         See also
         --------
         :func:`~nngt.Graph.get_edge_attributes`,
@@ -1098,7 +1153,7 @@ class Graph(nngt.core.GraphObject):
         ----------
         .. [ig-connected] :igdoc:`is_connected`
         '''
-        return super().is_connected()
+        return super().is_connected(mode)
 
     def get_degrees(self, mode="total", nodes=None, weights=None,
                     edge_type="all"):
@@ -1156,12 +1211,12 @@ class Graph(nngt.core.GraphObject):
                     neurons.extend(g.ids)
 
             if mode in {"in", "all"} or not self.is_directed():
-                degrees += self.adjacency_matrix(
+                degrees += self._adjacency(
                     weights=weights,
                     types=False)[neurons, :].sum(axis=0).A1
 
             if mode in {"out", "all"} and self.is_directed():
-                degrees += self.adjacency_matrix(
+                degrees += self._adjacency(
                     weights=weights,
                     types=False)[neurons, :].sum(axis=1).A1
         else:
@@ -1297,10 +1352,13 @@ class Graph(nngt.core.GraphObject):
         '''
         Return the neighbours of `node`.
 
+        .. versionchanged:: 2.3
+            Added batched queries when `node` is a list of nodes.
+
         Parameters
         ----------
-        node : int
-            Index of the node of interest.
+        node : int or array-like of ints
+            Index of the node of interest, or indices of several nodes.
         mode : string, optional (default: "all")
             Type of neighbours that will be returned: "all" returns all the
             neighbours regardless of directionality, "in" returns the
@@ -1310,8 +1368,21 @@ class Graph(nngt.core.GraphObject):
         Returns
         -------
         neighbours : set
-            The neighbours of `node`.
+            The neighbours of `node` if `node` is an int.
+        indptr, indices : arrays
+            If several nodes are given, the neighbours of ``node[i]`` are
+            ``indices[indptr[i]:indptr[i+1]]`` (sorted), as in the rows of a
+            :class:`scipy.sparse.csr_matrix`; this is much faster than
+            calling the function for each node.
+
+        Example
+        -------
+        >>> indptr, indices = g.neighbours([0, 1, 2], mode="out")
+        >>> out_nghb_1 = indices[indptr[1]:indptr[2]]
         '''
+        if nonstring_container(node):
+            return self._neighbours_csr(node, mode=mode)
+
         return super().neighbours(node, mode=mode)
 
     def is_spatial(self):
@@ -1651,3 +1722,33 @@ class Graph(nngt.core.GraphObject):
         return Connections.delays(
             self, elist=elist, dlist=delay, distribution=distribution,
             parameters=parameters, noise_scale=noise_scale)
+
+
+# ----- #
+# Tools #
+# ----- #
+
+def _group_sums(src, tgt, both, values, directed):
+    '''
+    Sum of the edge `values` over the edges between each pair of groups.
+
+    Parameters
+    ----------
+    src, tgt : sparse matrices of shape (groups, edges)
+        Membership of the source and target of each edge to the groups.
+    both : sparse matrix of shape (groups, edges)
+        Whether both the source and the target of each edge are in a group.
+    values : array of size E
+        Edge values.
+    directed : bool
+        Whether the graph is directed; if not, each edge between two groups
+        is counted once, whatever its direction.
+    '''
+    values = ssp.diags(values)
+
+    sums = src @ values @ tgt.T
+
+    if not directed:
+        sums = sums + tgt @ values @ src.T - both @ values @ both.T
+
+    return sums.toarray()
@@ -33,6 +33,7 @@ from scipy.sparse import csr_matrix
 
 import nngt
 from nngt.lib import InvalidArgument, BWEIGHT, nonstring_container, is_integer
+from nngt.lib.decorator import decorate
 from nngt.lib.graph_helpers import _get_edge_attr, _get_syn_param
 from nngt.lib.converters import _np_dtype, _to_np_array
 from nngt.lib.logger import _log_message
@@ -41,6 +42,103 @@ from nngt.lib.logger import _log_message
 logger = logging.getLogger(__name__)
 
 
+# -------------------------- #
+# Graph versioning and cache #
+# -------------------------- #
+
+def _modifies_graph(func):
+    '''
+    Decorator for the methods that modify the edges or the attributes of a
+    graph (or of its properties): increments the graph version, which
+    invalidates the cached matrices.
+    '''
+    def wrapper(func, self, *args, **kwargs):
+        graph = self.parent() if isinstance(self, BaseProperty) else self
+
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            if graph is not None:
+                graph._version += 1
+
+    return decorate(func, wrapper)
+
+
+class _MatrixCache:
+
+    '''
+    Least-recently-used store for the matrices computed from a graph.
+
+    All entries are tied to the version of the graph they were computed for
+    and are dropped as soon as the graph is modified.
+    If the "adjacency_cache" configuration entry is set, it gives the maximum
+    memory (in MB) that the cached matrices of a graph can use, the least
+    recently used ones being evicted first; setting it to 0 disables caching.
+    '''
+
+    __slots__ = ("_entries", "_nbytes", "_version")
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._nbytes  = 0
+        self._version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        ''' Memory used by the cached matrices '''
+        return self._nbytes
+
+    def get(self, key, version):
+        ''' Return the matrix stored for `key` or None if not up-to-date. '''
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+            return None
+
+        mat = self._entries.get(key, None)
+
+        if mat is not None:
+            self._entries.move_to_end(key)
+
+        return mat
+
+    def store(self, key, mat, version):
+        ''' Store `mat` for `key`, evicting old entries if necessary. '''
+        max_bytes = nngt._config["adjacency_cache"]
+        max_bytes = None if max_bytes is None else 1e6*max_bytes
+
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        if key in self._entries:
+            self._nbytes -= _matrix_nbytes(self._entries.pop(key))
+
+        nbytes = _matrix_nbytes(mat)
+
+        if max_bytes is None or nbytes <= max_bytes:
+            self._entries[key] = mat
+            self._nbytes += nbytes
+
+        while max_bytes is not None and self._nbytes > max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._nbytes -= _matrix_nbytes(old)
+
+    def clear(self):
+        ''' Remove all entries '''
+        self._entries.clear()
+        self._nbytes = 0
+
+
+def _matrix_nbytes(mat):
+    ''' Memory used by the arrays of a compressed sparse matrix. '''
+    return mat.data.nbytes + mat.indices.nbytes + mat.indptr.nbytes
+
+
 # ---------------------------------- #
 # Library-dependent graph properties #
 # ---------------------------------- #
@@ -79,6 +177,9 @@ class GraphInterface:
     _nattr_class = None
     _eattr_class = None
 
+    # incremented by all methods modifying the graph (see `_modifies_graph`)
+    _version = 0
+
     #------------------------------------------------------------------#
     # Shared properties methods
 
@@ -140,7 +241,16 @@ class GraphInterface:
         pass
 
     @abstractmethod
-    def delete_edges(self, edges):
+    def delete_edges(self, edges, compact=True):
+        pass
+
+    def compact(self):
+        '''
+        Finalize the removal of the edges deleted with ``compact=False``
+        (does nothing for backends that always remove edges immediately).
+
+        .. versionadded:: 2.3
+        '''
         pass
 
     @abstractmethod
@@ -167,6 +277,61 @@ class GraphInterface:
     def _from_library_graph(self, graph, copy=True):
         pass
 
+    def _load_edges(self, edges, attributes, degrees=None):
+        '''
+        Add the edges and edge attributes loaded from a file.
+
+        Parameters
+        ----------
+        edges : array of shape (E, 2)
+            Edges of the graph.
+        attributes : dict
+            Attribute names as keys, (value type, values) as values.
+        degrees : tuple of arrays, optional (default: None)
+            Out- and in-degrees associated to `edges`, which can be used
+            by the backend to avoid recomputing them.
+        '''
+        if len(edges):
+            self.new_edges(edges, check_duplicates=False,
+                           check_self_loops=False, check_existing=False)
+
+        for name, (dtype, values) in attributes.items():
+            self.new_edge_attribute(name, dtype, values=values)
+
+    def _has_edges(self, edges):
+        '''
+        Vectorized existence test for `edges` (array of shape (E, 2)); for
+        undirected graphs, the edges can be passed in any direction.
+        '''
+        from nngt.lib.connect_tools import _EdgeSet
+
+        existing = _EdgeSet(self.is_directed(), self.edges_array)
+
+        return existing.contains(edges)
+
+    def _neighbours_csr(self, nodes, mode="all"):
+        '''
+        Batched neighbours of `nodes`, obtained from the cached adjacency
+        matrix, as the (indptr, indices) arrays of a CSR matrix.
+        '''
+        mat = self._adjacency(mformat="csr")
+
+        if self.is_directed():
+            if mode == "in":
+                # the transpose of the CSC matrix is a CSR view
+                mat = self._adjacency(mformat="csc").T
+            elif mode == "all":
+                mat = mat + self._adjacency(mformat="csc").T
+            elif mode != "out":
+                raise ValueError(
+                    ('Invalid `mode` argument {}; possible values are "all", '
+                     '"out" or "in".').format(mode))
+
+        sub = mat[np.asarray(nodes, dtype=int)]
+        sub.sort_indices()
+
+        return sub.indptr, sub.indices
+
     def _attr_new_edges(self, edge_list, attributes=None):
         ''' Generate attributes for newly created edges. '''
         num_edges = len(edge_list)
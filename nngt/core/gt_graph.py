@@ -35,7 +35,7 @@ from nngt.lib.converters import _to_np_array
 from nngt.lib.graph_helpers import (_get_dtype, _get_gt_weights,
                                     _post_del_update)
 from nngt.lib.logger import _log_message
-from .graph_interface import GraphInterface, BaseProperty
+from .graph_interface import GraphInterface, BaseProperty, _modifies_graph
 
 
 logger = logging.getLogger(__name__)
@@ -63,6 +63,7 @@ class _GtNProperty(BaseProperty):
 
         return _to_np_array(g.vertex_properties[name].a, dtype)
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         dtype = super(_GtNProperty, self).__getitem__(name)
 
@@ -82,6 +83,7 @@ class _GtNProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         dtype = object
         g     = self.parent()._graph
@@ -116,6 +118,7 @@ class _GtNProperty(BaseProperty):
         g.vertex_properties[name] = nprop
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, nodes=None):
         '''
         Set the node attribute.
@@ -226,6 +229,7 @@ class _GtEProperty(BaseProperty):
 
         return _to_np_array(g.edge_properties[name].a, dtype)
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         g = self.parent()._graph
 
@@ -254,6 +258,7 @@ class _GtEProperty(BaseProperty):
 
         self._num_values_set[name] = len(value)
 
+    @_modifies_graph
     def set_attribute(self, name, values, edges=None, last_edges=False):
         '''
         Set the edge property.
@@ -293,6 +298,7 @@ class _GtEProperty(BaseProperty):
         if num_e:
             self._num_values_set[name] = num_edges
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         g = self.parent()._graph
 
@@ -329,6 +335,7 @@ class _GtEProperty(BaseProperty):
         g.edge_properties[name] = eprop
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def edges_deleted(self):
         ''' Notify that some edges were deleted '''
         g = self.parent()
@@ -510,6 +517,7 @@ class _GtGraph(GraphInterface):
 
         return list(edges)
 
+    @_modifies_graph
     def new_node(self, n=1, neuron_type=1, attributes=None, value_types=None,
                  positions=None, groups=None):
         '''
@@ -583,6 +591,7 @@ class _GtGraph(GraphInterface):
             return nodes[0]
         return nodes
 
+    @_modifies_graph
     def delete_nodes(self, nodes):
         '''
         Remove nodes (and associated edges) from the graph.
@@ -606,6 +615,7 @@ class _GtGraph(GraphInterface):
         # check spatial and structure properties
         _post_del_update(self, nodes)
 
+    @_modifies_graph
     def new_edge(self, source, target, attributes=None, ignore=False,
                  self_loop=False):
         '''
@@ -679,6 +689,7 @@ class _GtGraph(GraphInterface):
 
         return (source, target)
 
+    @_modifies_graph
     def new_edges(self, edge_list, attributes=None, check_duplicates=False,
                   check_self_loops=True, check_existing=True,
                   ignore_invalid=False):
@@ -774,8 +785,12 @@ class _GtGraph(GraphInterface):
 
         return edge_list
 
-    def delete_edges(self, edges):
-        ''' Remove a list of edges '''
+    @_modifies_graph
+    def delete_edges(self, edges, compact=True):
+        '''
+        Remove a list of edges (edges are always removed immediately, so
+        `compact` is ignored).
+        '''
         g = self._graph
 
         Edge = g.edge
@@ -791,6 +806,7 @@ class _GtGraph(GraphInterface):
 
             self._edges_deleted = True
 
+    @_modifies_graph
     def clear_all_edges(self):
         ''' Remove all edges from the graph '''
         self._graph.clear_edges()
@@ -870,6 +886,7 @@ class _GtGraph(GraphInterface):
             raise ArgumentError('''Invalid `mode` argument {}; possible values
                                 are "all", "out" or "in".'''.format(mode))
 
+    @_modifies_graph
     def _from_library_graph(self, graph, copy=True):
         ''' Initialize `self._graph` from existing library object. '''
         nodes = graph.num_vertices()
@@ -35,7 +35,7 @@ from nngt.lib.graph_helpers import (_get_dtype, _get_ig_weights,
                                     _post_del_update)
 from nngt.lib.converters import _np_dtype, _to_np_array
 from nngt.lib.logger import _log_message
-from .graph_interface import GraphInterface, BaseProperty
+from .graph_interface import GraphInterface, BaseProperty, _modifies_graph
 
 
 logger = logging.getLogger(__name__)
@@ -56,6 +56,7 @@ class _IgNProperty(BaseProperty):
         dtype = _np_dtype(super(_IgNProperty, self).__getitem__(name))
         return _to_np_array(g.vs[name], dtype=dtype)
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         g    = self.parent()._graph
         size = g.vcount()
@@ -70,6 +71,7 @@ class _IgNProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         g = self.parent()._graph
 
@@ -93,6 +95,7 @@ class _IgNProperty(BaseProperty):
         self[name] = values
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, nodes=None):
         '''
         Set the node attribute.
@@ -158,6 +161,7 @@ class _IgEProperty(BaseProperty):
 
         return _to_np_array(g.es[name], dtype=dtype)
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         g = self.parent()._graph
 
@@ -172,6 +176,7 @@ class _IgEProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         g = self.parent()._graph
 
@@ -195,6 +200,7 @@ class _IgEProperty(BaseProperty):
         self[name] = values
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, edges=None, last_edges=False):
         '''
         Set the edge property.
@@ -337,6 +343,7 @@ class _IGraph(GraphInterface):
 
         return [e.tuple for e in edges]
 
+    @_modifies_graph
     def new_node(self, n=1, neuron_type=1, attributes=None, value_types=None,
                  positions=None, groups=None):
         '''
@@ -424,6 +431,7 @@ class _IGraph(GraphInterface):
 
         return nodes
 
+    @_modifies_graph
     def delete_nodes(self, nodes):
         '''
         Remove nodes (and associated edges) from the graph.
@@ -439,6 +447,7 @@ class _IGraph(GraphInterface):
         # check spatial and structure properties
         _post_del_update(self, nodes)
 
+    @_modifies_graph
     def new_edge(self, source, target, attributes=None, ignore=False,
                  self_loop=False):
         '''
@@ -482,6 +491,7 @@ class _IGraph(GraphInterface):
                               check_self_loops=(not ignore and not self_loop),
                               ignore_invalid=ignore)
 
+    @_modifies_graph
     def new_edges(self, edge_list, attributes=None, check_duplicates=False,
                   check_self_loops=True, check_existing=True,
                   ignore_invalid=False):
@@ -560,8 +570,12 @@ class _IGraph(GraphInterface):
 
         return edge_list
 
-    def delete_edges(self, edges):
-        ''' Remove a list of edges '''
+    @_modifies_graph
+    def delete_edges(self, edges, compact=True):
+        '''
+        Remove a list of edges (edges are always removed immediately, so
+        `compact` is ignored).
+        '''
         if nonstring_container(edges[0]):
             if isinstance(edges[0], tuple):
                 self._graph.delete_edges(edges)
@@ -573,6 +587,7 @@ class _IGraph(GraphInterface):
         for key in self._eattr:
             self._eattr._num_values_set[key] = self.edge_nb()
 
+    @_modifies_graph
     def clear_all_edges(self):
         ''' Remove all edges from the graph '''
         self._graph.delete_edges(None)
@@ -643,6 +658,7 @@ class _IGraph(GraphInterface):
         raise ArgumentError('Invalid `mode` argument {}; possible values are '
                             '"all", "out" or "in".'.format(mode))
 
+    @_modifies_graph
     def _from_library_graph(self, graph, copy=True):
         ''' Initialize `self._graph` from existing library object. '''
         nodes = graph.vcount()
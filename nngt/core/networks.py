@@ -28,6 +28,7 @@ import nngt
 from nngt.lib import (InvalidArgument, nonstring_container, default_neuron,
                       default_synapse)
 from .graph import Graph
+from .graph_interface import _modifies_graph
 from .spatial_graph import SpatialGraph
 
 
@@ -301,6 +302,7 @@ class Network(Graph):
         return self._population
 
     @population.setter
+    @_modifies_graph
     def population(self, population):
         if issubclass(population.__class__, nngt.NeuralPop):
             if self.node_nb() == population.size:
@@ -379,6 +381,7 @@ class Network(Graph):
     #-------------------------------------------------------------------------#
     # Init tool
 
+    @_modifies_graph
     def _init_bioproperties(self, population):
         ''' Set the population attribute and link each neuron to its group. '''
         self._population = None
@@ -27,15 +27,16 @@ import logging
 
 import numpy as np
 from scipy.sparse import coo_matrix, lil_matrix
+from scipy.sparse.csgraph import connected_components
 
 import nngt
 from nngt.lib import InvalidArgument, nonstring_container, is_integer
 from nngt.lib.connect_tools import (_cleanup_edges, _set_dist_new_edges,
                                     _set_default_edge_attributes)
-from nngt.lib.graph_helpers import _get_edge_attr, _get_dtype, _post_del_update
+from nngt.lib.graph_helpers import _get_dtype, _post_del_update
 from nngt.lib.converters import _np_dtype, _to_np_array
 from nngt.lib.logger import _log_message
-from .graph_interface import GraphInterface, BaseProperty
+from .graph_interface import GraphInterface, BaseProperty, _modifies_graph
 
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,88 @@ logger = logging.getLogger(__name__)
 # Properties #
 # ---------- #
 
+class _Column:
+
+    '''
+    Growable, typed buffer storing the values of one attribute.
+
+    Numeric attributes ("int" and "double") are stored in a contiguous NumPy
+    buffer and their values are returned as read-only views; other attributes
+    (strings and objects) use an object array and are returned as copies.
+    If `copy` is False, numeric values of the right type are used directly as
+    buffer (e.g. memory-mapped arrays).
+    '''
+
+    __slots__ = ("buffer", "size", "default")
+
+    def __init__(self, value_type, values, copy=True):
+        dtype = _np_dtype(value_type)
+
+        if copy or dtype is object:
+            self.buffer = _to_np_array(values, dtype)
+        else:
+            self.buffer = np.asarray(values, dtype=dtype)
+
+        self.size    = len(self.buffer)
+        self.default = _default_value(value_type)
+
+    @property
+    def numeric(self):
+        return self.buffer.dtype != object
+
+    def view(self):
+        ''' Values of the attribute '''
+        values = self.buffer[:self.size]
+
+        if self.numeric:
+            values = values.view()
+            values.flags.writeable = False
+            return values
+
+        return values.copy()
+
+    def get(self, idx):
+        ''' Values for an index, a slice, or an array of indices '''
+        if isinstance(idx, slice):
+            return self.view()[idx]
+
+        return self.buffer[:self.size][idx]
+
+    def set(self, idx, values):
+        ''' Set the values at `idx` (an index, slice, or array of indices) '''
+        if nonstring_container(values) and not self.numeric:
+            # prevent numpy from broadcasting nested lists
+            values = _to_np_array(values, object)
+
+        self.buffer[:self.size][idx] = values
+
+    def set_all(self, values):
+        ''' Replace all values '''
+        self.buffer = _to_np_array(values, self.buffer.dtype)
+        self.size   = len(self.buffer)
+
+    def resize(self, size):
+        '''
+        Set the number of values, growing the buffer by chunks if necessary;
+        new entries are set to the default value for the attribute type.
+        '''
+        if size > len(self.buffer):
+            capacity = max(size, 2*len(self.buffer), 64)
+            new_buf  = np.empty(capacity, dtype=self.buffer.dtype)
+            new_buf[:self.size] = self.buffer[:self.size]
+            self.buffer = new_buf
+
+        if size > self.size:
+            self.buffer[self.size:size] = self.default
+
+        self.size = size
+
+    def compact(self, keep):
+        ''' Keep only the entries where the boolean mask `keep` is True '''
+        self.buffer = self.buffer[:self.size][keep]
+        self.size   = len(self.buffer)
+
+
 class _NProperty(BaseProperty):
 
     ''' Class for generic interactions with nodes properties (graph-tool)  '''
@@ -54,14 +137,14 @@ class _NProperty(BaseProperty):
         self.prop = OrderedDict()
 
     def __getitem__(self, name):
-        dtype = _np_dtype(super().__getitem__(name))
-        return _to_np_array(self.prop[name], dtype=dtype)
+        return self.prop[name].view()
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         if name in self:
             size = self.parent().node_nb()
             if len(value) == size:
-                self.prop[name] = list(value)
+                self.prop[name].set_all(value)
             else:
                 raise ValueError("A list or a np.array with one entry per "
                                  "node in the graph is required")
@@ -69,27 +152,20 @@ class _NProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
-        dtype = object
         if val is None:
-            if value_type == "int":
-                val = int(0)
-                dtype = int
-            elif value_type == "double":
-                val = np.NaN
-                dtype = float
-            elif value_type == "string":
-                val = ""
-            else:
-                val = None
+            if value_type not in ("int", "double", "string"):
                 value_type = "object"
 
+            val = _default_value(value_type)
+
+        num_nodes = self.parent().node_nb()
+
         if values is None:
-            values = _to_np_array(
-                [deepcopy(val) for _ in range(self.parent().node_nb())],
-                value_type)
+            values = _full_values(num_nodes, val, value_type)
 
-        if len(values) != self.parent().node_nb():
+        if len(values) != num_nodes:
             raise ValueError("A list or a np.array with one entry per "
                              "node in the graph is required")
 
@@ -97,9 +173,10 @@ class _NProperty(BaseProperty):
         super().__setitem__(name, value_type)
 
         # store the real values in the attribute
-        self.prop[name] = list(values)
+        self.prop[name] = _Column(value_type, values)
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, nodes=None):
         '''
         Set the node attribute.
@@ -117,7 +194,7 @@ class _NProperty(BaseProperty):
         num_nodes = self.parent().node_nb()
         num_n = len(nodes) if nodes is not None else num_nodes
         if num_n == num_nodes:
-            self[name] = list(values)
+            self[name] = values
             self._num_values_set[name] = num_nodes
         else:
             if num_n != len(values):
@@ -125,19 +202,27 @@ class _NProperty(BaseProperty):
                                  "size; got respectively " + str(num_n) + \
                                  " and " + str(len(values)) + " entries.")
 
+            col = self.prop[name]
+
             if self._num_values_set[name] == num_nodes - num_n:
-                self.prop[name].extend(values)
+                # new nodes, write the values at the end
+                col.resize(num_nodes)
+                col.set(slice(num_nodes - num_n, num_nodes), values)
             else:
-                for n, val in zip(nodes, values):
-                    self.prop[name][n] = val
+                col.set(np.asarray(nodes, dtype=int), values)
 
         self._num_values_set[name] = num_nodes
 
+    @_modifies_graph
     def remove(self, nodes):
         ''' Remove entries for a set of nodes '''
         for key in self:
-            for n in reversed(sorted(nodes)):
-                self.prop[key].pop(n)
+            col = self.prop[key]
+
+            keep = np.ones(col.size, dtype=bool)
+            keep[list(nodes)] = False
+
+            col.compact(keep)
 
             self._num_values_set[key] -= len(nodes)
 
@@ -157,36 +242,31 @@ class _EProperty(BaseProperty):
         eprop = {}
         graph = self.parent()
 
+        graph._graph.compact()
+
         if isinstance(name, slice):
             for k in self.keys():
-                dtype = _np_dtype(super().__getitem__(k))
-                eprop[k] = _to_np_array(self.prop[k], dtype)[name]
+                eprop[k] = self.prop[k].get(name)
 
             return eprop
         elif nonstring_container(name):
-            if nonstring_container(name[0]):
-                eids = [graph.edge_id(e) for e in name]
-
-                for k in self.keys():
-                    dtype = _np_dtype(super().__getitem__(k))
-                    eprop[k] = _to_np_array(self.prop[k], dtype=dtype)[eids]
-            else:
-                eid = graph.edge_id(name)
+            eids = graph.edge_id(name)
 
-                for k in self.keys():
-                    eprop[k] = self.prop[k][eid]
+            for k in self.keys():
+                eprop[k] = self.prop[k].get(eids)
 
             return eprop
-            
-        dtype = _np_dtype(super().__getitem__(name))
 
-        return _to_np_array(self.prop[name], dtype=dtype)
+        return self.prop[name].view()
 
+    @_modifies_graph
     def __setitem__(self, name, value):
+        self.parent()._graph.compact()
+
         if name in self:
             size = self.parent().edge_nb()
             if len(value) == size:
-                self.prop[name] = list(value)
+                self.prop[name].set_all(value)
             else:
                 raise ValueError("A list or a np.array with one entry per "
                                  "edge in the graph is required")
@@ -195,6 +275,7 @@ class _EProperty(BaseProperty):
                                   "set_attribute to create it.")
         self._num_values_set[name] = len(value)
 
+    @_modifies_graph
     def set_attribute(self, name, values, edges=None, last_edges=False):
         '''
         Set the edge property.
@@ -208,7 +289,13 @@ class _EProperty(BaseProperty):
         edges : array-like, optional (default: None)
             Edges for which the value of the property should be set. If `edges`
             is not None, it must be an array of shape `(len(values), 2)`.
+        last_edges : bool, optional (default: False)
+            Whether `edges` are the last edges that were added to the graph, in
+            which case the values are directly written at the end of the
+            attribute.
         '''
+        self.parent()._graph.compact()
+
         num_edges = self.parent().edge_nb()
         num_e     = len(edges) if edges is not None else num_edges
 
@@ -218,40 +305,34 @@ class _EProperty(BaseProperty):
                              " and " + str(len(values)) + " entries.")
 
         if edges is None:
-            self[name] = list(values)
+            self[name] = values
         else:
+            col = self.prop[name]
+
             if last_edges:
-                self.prop[name].extend(values)
+                col.resize(num_edges)
+                col.set(slice(num_edges - num_e, num_edges), values)
             else:
-                eid  = self.parent().edge_id
-                prop = self.prop[name]
-
-                # using list comprehension for fast loop
-                [_set_prop(prop, eid(e), val) for e, val in zip(edges, values)]
+                col.set(self.parent().edge_id(edges), values)
 
         if num_e:
             self._num_values_set[name] = num_edges
 
-    def new_attribute(self, name, value_type, values=None, val=None):
+    @_modifies_graph
+    def new_attribute(self, name, value_type, values=None, val=None,
+                      copy=True):
+        self.parent()._graph.compact()
+
         num_edges = self.parent().edge_nb()
 
         if values is None and val is None:
             self._num_values_set[name] = num_edges
 
         if val is None:
-            if value_type == "int":
-                val = int(0)
-            elif value_type == "double":
-                val = np.NaN
-            elif value_type == "string":
-                val = ""
-            else:
-                val = None
+            val = _default_value(value_type)
 
         if values is None:
-            values = _to_np_array(
-                [deepcopy(val) for _ in range(num_edges)],
-                value_type)
+            values = _full_values(num_edges, val, value_type)
 
         if len(values) != num_edges:
             self._num_values_set[name] = 0
@@ -262,14 +343,30 @@ class _EProperty(BaseProperty):
         super().__setitem__(name, value_type)
 
         # store the real values in the attribute
-        self.prop[name] = list(values)
+        self.prop[name] = _Column(value_type, values, copy=copy)
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def edges_deleted(self, eids):
         ''' Remove the attributes of a set of edge ids '''
-        for key, val in self.prop.items():
-            self.prop[key] = [v for i, v in enumerate(val) if i not in eids]
-            self._num_values_set[key] -= len(eids)
+        if len(eids):
+            keep = np.ones(self.parent().edge_nb() + len(eids), dtype=bool)
+
+            keep[eids] = False
+
+            self.edges_compacted(keep)
+
+    def edges_compacted(self, keep):
+        '''
+        Keep only the attributes of the edges where the boolean mask `keep`
+        is True (called when the graph object removes edges).
+        '''
+        num_removed = len(keep) - np.count_nonzero(keep)
+
+        for key in self:
+            self.prop[key].compact(keep)
+
+            self._num_values_set[key] -= num_removed
 
 
 # ----------------- #
@@ -280,42 +377,62 @@ class _NNGTGraphObject:
     '''
     Minimal implementation of the GraphObject, which does not rely on any
     graph-library.
+
+    Edges are stored, by order of creation, in a contiguous int64 array that
+    grows by chunks; degrees are stored as int64 arrays.
+    A CSR-like index (edges sorted by source, then target) is built lazily
+    when edges are looked up and only covers the first edges of the array:
+    edges added afterwards are kept in a small unsorted "tail" which is
+    scanned directly until it becomes large enough to justify a rebuild.
+    A CSC-like index (edges sorted by target, then source) is also built on
+    demand for the queries on the incoming edges and is simply dropped when
+    edges are added or removed.
+
+    Edges can also be removed lazily: they are then only marked as deleted
+    (and removed from the degrees) until :meth:`compact` is called, which is
+    done automatically before the edges or their ids are accessed.
     '''
 
+    #: minimal number of edges allocated when the edge buffer grows
+    _chunk_size = 4096
+
     def __init__(self, nodes=0, weighted=True, directed=True):
         ''' Initialized independent graph '''
-        self._nodes    = set(i for i in range(nodes))
-        self._out_deg  = [0]*nodes
-        self._in_deg   = [0]*nodes
-
-        if directed:
-            # for directed networks, edges and unique are the same
-            self._edges = self._unique = OrderedDict()
-            assert self._edges is self._unique
-        else:
-            # for undirected networks
-            self._edges  = OrderedDict()
-            self._unique = OrderedDict()
+        self._num_nodes = nodes
+        self._out_deg   = np.zeros(nodes, dtype=np.int64)
+        self._in_deg    = np.zeros(nodes, dtype=np.int64)
+
+        # edge buffer (only the first `_num_edges` rows are valid)
+        self._edges     = np.empty((0, 2), dtype=np.int64)
+        self._num_edges = 0
+
+        # lazy CSR index: sorted edge keys, associated eids, and indptr
+        self._keys      = None
+        self._key_eids  = None
+        self._indptr    = None
+        self._num_index = 0
+
+        # lazy CSC index: eids sorted by target and indptr
+        self._in_eids   = None
+        self._in_indptr = None
+
+        # tombstones of the lazily removed edges and compaction callback
+        self._dead       = None
+        self._num_dead   = 0
+        self._on_compact = None
 
         self._directed = directed
         self._weighted = weighted
 
     def copy(self):
         ''' Returns a deep copy of the graph object '''
-        copy = _NNGTGraphObject(len(self._nodes), weighted=self._weighted,
+        copy = _NNGTGraphObject(self._num_nodes, weighted=self._weighted,
                                 directed=self._directed)
 
-        copy._nodes   = self._nodes.copy()
-
-        if self._directed:
-            copy._unique = copy._edges = self._edges.copy()
-            assert copy._unique is copy._edges
-        else:
-            copy._edges  = self._edges.copy()
-            copy._unique = self._unique.copy()
-
-        copy._out_deg = self._out_deg.copy()
-        copy._in_deg  = self._in_deg.copy()
+        copy._edges     = self.edges.copy()
+        copy._num_edges = len(copy._edges)
+        copy._out_deg   = self._out_deg.copy()
+        copy._in_deg    = self._in_deg.copy()
 
         return copy
 
@@ -324,7 +441,456 @@ class _NNGTGraphObject:
 
     @property
     def nodes(self):
-        return list(self._nodes)
+        return list(range(self._num_nodes))
+
+    @property
+    def edges(self):
+        ''' View on the valid part of the edge buffer '''
+        self.compact()
+
+        return self._edges[:self._num_edges]
+
+    def add_nodes(self, n):
+        ''' Add `n` nodes and return their ids '''
+        nodes = np.arange(self._num_nodes, self._num_nodes + n)
+
+        self._num_nodes += n
+
+        self._out_deg = np.concatenate(
+            (self._out_deg, np.zeros(n, dtype=np.int64)))
+        self._in_deg  = np.concatenate(
+            (self._in_deg, np.zeros(n, dtype=np.int64)))
+
+        # indptr depends on the number of nodes
+        self._invalidate_index()
+
+        return nodes
+
+    def add_edges(self, edges):
+        '''
+        Append `edges` (array of shape (E, 2)) to the buffer; no check is
+        performed. The new edges get the ids following the last edge id.
+        '''
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        num_e = len(edges)
+
+        if not num_e:
+            return
+
+        self.compact()
+
+        num_new = self._num_edges + num_e
+
+        if num_new > len(self._edges):
+            # amortized growth: at least double the buffer
+            capacity  = max(num_new, 2*len(self._edges), self._chunk_size)
+            new_buf   = np.empty((capacity, 2), dtype=np.int64)
+            new_buf[:self._num_edges] = self.edges
+            self._edges = new_buf
+
+        self._edges[self._num_edges:num_new] = edges
+        self._num_edges = num_new
+
+        self._in_eids   = None
+        self._in_indptr = None
+
+        self._update_degrees(edges, 1)
+
+    def remove_edges(self, eids, lazy=False):
+        '''
+        Remove edges from their ids; remaining edges are renumbered.
+
+        If `lazy` is True, the edges are only marked as deleted, so that the
+        cost is proportional to the number of removed edges; they are
+        actually removed by the next call to :meth:`compact`.
+        Returns the number of removed edges.
+        '''
+        eids = np.unique(np.asarray(eids, dtype=np.int64))
+
+        if self._dead is not None:
+            eids = eids[~self._dead[eids]]
+
+        if not len(eids):
+            return 0
+
+        self._update_degrees(self._edges[eids], -1)
+
+        if self._dead is None:
+            self._dead = np.zeros(self._num_edges, dtype=bool)
+
+        self._dead[eids] = True
+        self._num_dead  += len(eids)
+
+        if not lazy:
+            self.compact()
+
+        return len(eids)
+
+    def compact(self):
+        '''
+        Remove the edges marked as deleted, renumbering the others, in one
+        pass over the edges and the index; the callback `_on_compact` is then
+        called with the boolean mask of the kept edges.
+        '''
+        if self._dead is None:
+            return
+
+        keep = ~self._dead
+
+        self._dead     = None
+        self._num_dead = 0
+
+        # the sorted index stays sorted when entries are removed
+        if self._keys is not None:
+            new_ids = np.cumsum(keep) - 1
+            indexed = keep[self._key_eids]
+
+            self._keys      = self._keys[indexed]
+            self._key_eids  = new_ids[self._key_eids[indexed]]
+            self._indptr    = np.searchsorted(
+                self._keys >> 32, np.arange(self._num_nodes + 1))
+            self._num_index = int(np.count_nonzero(keep[:self._num_index]))
+
+        self._edges     = self._edges[:self._num_edges][keep]
+        self._num_edges = len(self._edges)
+
+        self._in_eids   = None
+        self._in_indptr = None
+
+        if self._on_compact is not None:
+            self._on_compact(keep)
+
+    def remove_nodes(self, nodes):
+        '''
+        Remove nodes and their edges.
+
+        Returns
+        -------
+        remapping : array mapping old node ids to new ids (-1 if deleted).
+        eids : ids of the deleted edges.
+        '''
+        keep_nodes = np.ones(self._num_nodes, dtype=bool)
+        keep_nodes[list(nodes)] = False
+
+        remapping = np.cumsum(keep_nodes) - 1
+        remapping[~keep_nodes] = -1
+
+        edges = self.edges
+        keep  = keep_nodes[edges[:, 0]] & keep_nodes[edges[:, 1]]
+
+        self._num_nodes = int(keep_nodes.sum())
+        self._set_edges(remapping[edges[keep]])
+
+        return remapping, np.flatnonzero(~keep)
+
+    def clear_edges(self):
+        self._set_edges(np.empty((0, 2), dtype=np.int64))
+
+    def edge_id(self, source, target):
+        '''
+        Return the id of an edge; for undirected graphs, the edge can be
+        passed in any direction. Raises KeyError if the edge does not exist.
+        '''
+        self.compact()
+
+        eid = self._find(source, target)
+
+        if eid < 0 and not self._directed:
+            eid = self._find(target, source)
+
+        if eid < 0:
+            raise KeyError((source, target))
+
+        return eid
+
+    def edge_ids(self, edges):
+        '''
+        Vectorized version of :meth:`edge_id`; returns -1 for nonexistent
+        edges.
+        '''
+        self.compact()
+
+        return self._edge_ids(edges)
+
+    def _edge_ids(self, edges, distinct=False):
+        '''
+        Ids of `edges` in the buffer, without compaction (-1 for nonexistent
+        or deleted edges).
+        If `distinct` is True, the repetitions of a multiple edge get the ids
+        of its next copies (as long as there are some left).
+        '''
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        eids = self._find_all(edges[:, 0], edges[:, 1])
+
+        if not self._directed:
+            missing = eids < 0
+
+            if np.any(missing):
+                eids[missing] = self._find_all(edges[missing, 1],
+                                               edges[missing, 0])
+
+        if distinct and len(eids):
+            order  = np.argsort(eids, kind="stable")
+            repeat = order[1:][(eids[order][1:] == eids[order][:-1])
+                               & (eids[order][1:] >= 0)]
+
+            copies = {}
+
+            for i in repeat:
+                eid = eids[i]
+
+                if eid not in copies:
+                    source, target = self._edges[eid]
+
+                    others = self._copies(source, target)
+
+                    if not self._directed and source != target:
+                        others = np.sort(np.concatenate(
+                            (others, self._copies(target, source))))
+
+                    copies[eid] = iter(others[others != eid].tolist())
+
+                eids[i] = next(copies[eid], eid)
+
+        return eids
+
+    def has_edges(self, edges):
+        '''
+        Vectorized existence test; for undirected graphs, the edges can be
+        passed in any direction.
+        '''
+        self.compact()
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        found = self._contains(edges[:, 0], edges[:, 1])
+
+        if not self._directed:
+            found |= self._contains(edges[:, 1], edges[:, 0])
+
+        return found
+
+    def out_neighbours(self, node):
+        ''' Targets of the edges stored with `node` as source '''
+        self.compact()
+        self._update_index(full=True)
+
+        start, stop = self._indptr[node], self._indptr[node + 1]
+
+        return self._keys[start:stop] & _KEY_MASK
+
+    def in_neighbours(self, node):
+        ''' Sources of the edges stored with `node` as target '''
+        self._update_in_index()
+
+        start, stop = self._in_indptr[node], self._in_indptr[node + 1]
+
+        return self._edges[self._in_eids[start:stop], 0]
+
+    def out_edges(self, nodes):
+        '''
+        Ids of the edges stored with `nodes` as sources, in CSR format.
+
+        Returns
+        -------
+        indptr : array of size ``len(nodes) + 1``
+        eids : array of edge ids, the ones of node ``nodes[i]`` being
+            ``eids[indptr[i]:indptr[i+1]]``, sorted by target.
+        '''
+        self.compact()
+        self._update_index(full=True)
+
+        indptr, pos = _gather(self._indptr, nodes)
+
+        return indptr, self._key_eids[pos]
+
+    def in_edges(self, nodes):
+        '''
+        Ids of the edges stored with `nodes` as targets, in CSR format
+        (see :meth:`out_edges`), sorted by source.
+        '''
+        self._update_in_index()
+
+        indptr, pos = _gather(self._in_indptr, nodes)
+
+        return indptr, self._in_eids[pos]
+
+    def _map_edges(self, edges, out_deg, in_deg):
+        '''
+        Use `edges` as edge buffer and `out_deg`, `in_deg` as degrees,
+        without copy (used for memory-mapped arrays).
+        '''
+        self._edges     = edges
+        self._num_edges = len(edges)
+
+        self._out_deg = out_deg
+        self._in_deg  = in_deg
+
+        self._dead     = None
+        self._num_dead = 0
+
+        self._invalidate_index()
+
+    def _set_edges(self, edges):
+        ''' Replace all edges and recompute the degrees '''
+        self._edges     = np.empty((0, 2), dtype=np.int64)
+        self._num_edges = 0
+
+        self._out_deg = np.zeros(self._num_nodes, dtype=np.int64)
+        self._in_deg  = np.zeros(self._num_nodes, dtype=np.int64)
+
+        self._dead     = None
+        self._num_dead = 0
+
+        self._invalidate_index()
+
+        self.add_edges(edges)
+
+    def _update_degrees(self, edges, sign):
+        ''' Add (`sign` = 1) or remove (`sign` = -1) `edges` from degrees '''
+        # undirected edges count for both nodes in both degrees
+        sources = edges[:, 0] if self._directed else edges.ravel()
+        targets = edges[:, 1] if self._directed else sources
+
+        if len(edges) < self._chunk_size:
+            # few edges: avoid allocating one count per node
+            np.add.at(self._out_deg, sources, sign)
+            np.add.at(self._in_deg, targets, sign)
+        else:
+            n = self._num_nodes
+
+            self._out_deg += sign*np.bincount(sources, minlength=n)
+            self._in_deg  += sign*np.bincount(targets, minlength=n)
+
+    def _invalidate_index(self):
+        self._keys      = None
+        self._key_eids  = None
+        self._indptr    = None
+        self._num_index = 0
+
+        self._in_eids   = None
+        self._in_indptr = None
+
+    def _update_in_index(self):
+        ''' Build the CSC index if required '''
+        self.compact()
+
+        if self._in_eids is None:
+            edges = self.edges
+
+            self._in_eids   = np.argsort(_edge_keys(edges[:, 1], edges[:, 0]),
+                                         kind="stable")
+            self._in_indptr = np.searchsorted(
+                edges[self._in_eids, 1], np.arange(self._num_nodes + 1))
+
+    def _update_index(self, full=False):
+        '''
+        (Re)build the sorted index if it does not cover enough edges: the
+        unindexed tail must stay small compared to the indexed part, unless
+        `full` is True, in which case all edges must be indexed.
+        '''
+        tail = self._num_edges - self._num_index
+
+        if self._keys is not None:
+            if tail == 0 or (not full and
+                             tail <= max(self._chunk_size,
+                                         self._num_index // 8)):
+                return
+
+        # raw buffer: lazily removed edges stay in the index until compaction
+        edges = self._edges[:self._num_edges]
+
+        keys  = _edge_keys(edges[:, 0], edges[:, 1])
+        order = np.argsort(keys, kind="stable")
+
+        self._keys      = keys[order]
+        self._key_eids  = order
+        self._indptr    = np.searchsorted(
+            edges[order, 0], np.arange(self._num_nodes + 1))
+        self._num_index = self._num_edges
+
+    def _find(self, source, target):
+        ''' Id of edge (source, target) as stored, or -1 '''
+        self._update_index()
+
+        key = _edge_keys(source, target)
+        pos = np.searchsorted(self._keys, key)
+
+        if pos < len(self._keys) and self._keys[pos] == key:
+            return int(self._key_eids[pos])
+
+        tail = self._edges[self._num_index:self._num_edges]
+
+        found = np.where((tail[:, 0] == source) & (tail[:, 1] == target))[0]
+
+        if len(found):
+            return int(self._num_index + found[0])
+
+        return -1
+
+    def _contains(self, sources, targets):
+        '''
+        Whether the (source, target) pairs are stored, using the sorted index
+        and the unindexed tail, so that adding a few edges to a large graph
+        does not trigger a full rebuild of the index.
+        '''
+        self._update_index()
+
+        keys  = _edge_keys(sources, targets)
+        found = np.zeros(len(keys), dtype=bool)
+
+        if self._num_index:
+            pos = np.searchsorted(self._keys, keys).clip(
+                max=self._num_index - 1)
+
+            found = self._keys[pos] == keys
+
+        if self._num_index < self._num_edges:
+            tail = self._edges[self._num_index:self._num_edges]
+
+            found |= np.isin(keys, _edge_keys(tail[:, 0], tail[:, 1]))
+
+        return found
+
+    def _find_all(self, sources, targets):
+        ''' Vectorized :meth:`_find` '''
+        self._update_index(full=True)
+
+        eids = np.full(len(sources), -1, dtype=np.int64)
+
+        if not self._num_edges:
+            return eids
+
+        keys = _edge_keys(sources, targets)
+        pos  = np.searchsorted(self._keys, keys).clip(max=len(self._keys) - 1)
+
+        found = self._keys[pos] == keys
+
+        eids[found] = self._key_eids[pos[found]]
+
+        if self._dead is not None:
+            # the first copy of a multiple edge may have been removed
+            for i in np.flatnonzero(found)[self._dead[eids[found]]]:
+                copies  = self._copies(sources[i], targets[i])
+                eids[i] = copies[0] if len(copies) else -1
+
+        return eids
+
+    def _copies(self, source, target):
+        '''
+        Ids of the copies of edge (source, target) that were not removed, in
+        increasing order (the index must cover all edges).
+        '''
+        key    = _edge_keys(source, target)
+        lo, hi = np.searchsorted(self._keys, (key, key + 1))
+
+        eids = np.sort(self._key_eids[lo:hi])
+
+        if self._dead is not None:
+            eids = eids[~self._dead[eids]]
+
+        return eids
 
 
 class _NNGTGraph(GraphInterface):
@@ -339,16 +905,15 @@ class _NNGTGraph(GraphInterface):
         self._nattr = _NProperty(self)
         self._eattr = _EProperty(self)
 
-        self._max_eid = 0
-
         # test if copying graph
         if copy_graph is not None:
             self._from_library_graph(copy_graph, copy=True)
-            self._max_eid = copy_graph._max_eid
         else:
             self._graph = _NNGTGraphObject(
                 nodes=nodes, weighted=weighted, directed=directed)
 
+            self._graph._on_compact = self._eattr.edges_compacted
+
     #------------------------------------------------------------------#
     # Graph manipulation
 
@@ -371,9 +936,13 @@ class _NNGTGraph(GraphInterface):
         g = self._graph
 
         if is_integer(edge[0]):
-            return g._edges[tuple(edge)]
+            return g.edge_id(edge[0], edge[1])
         elif nonstring_container(edge[0]):
-            idx = [g._edges[tuple(e)] for e in edge]
+            idx = g.edge_ids(edge)
+
+            if np.any(idx < 0):
+                raise KeyError(tuple(np.asarray(edge)[idx < 0][0]))
+
             return idx
         else:
             raise AttributeError("`edge` must be either a 2-tuple of ints or "
@@ -385,9 +954,12 @@ class _NNGTGraph(GraphInterface):
 
         .. versionadded:: 2.0
         '''
-        e = tuple(edge)
+        try:
+            self._graph.edge_id(edge[0], edge[1])
+        except KeyError:
+            return False
 
-        return e in self._graph._edges
+        return True
 
     @property
     def edges_array(self):
@@ -395,53 +967,47 @@ class _NNGTGraph(GraphInterface):
         Edges of the graph, sorted by order of creation, as an array of
         2-tuple.
         '''
-        return np.asarray(list(self._graph._unique), dtype=int)
+        return self._graph.edges.copy()
+
+    def _has_edges(self, edges):
+        return self._graph.has_edges(edges)
 
     def _get_edges(self, source_node=None, target_node=None):
         g = self._graph
 
-        edges = None
-
-        if source_node is not None:
-            source_node = \
-                [source_node] if is_integer(source_node) else source_node
+        nodes = source_node if source_node is not None else target_node
+        nodes = np.asarray([nodes] if is_integer(nodes) else nodes,
+                           dtype=np.int64)
 
-            if g.is_directed():
-                edges = [e for e in g._unique if e[0] in source_node]
-            else:
-                edges = set()
-
-                for e in g._unique:
-                    if e[0] in source_node or e[1] in source_node:
-                        if e[::-1] not in edges:
-                            edges.add(e)
-
-                edges = list(edges)
-
-            return edges
-
-        target_node = \
-            [target_node] if is_integer(target_node) else target_node
-
-        if g.is_directed():
-            edges = [e for e in g._unique if e[1] in target_node]
+        if not g.is_directed():
+            eids = np.concatenate((g.out_edges(nodes)[1],
+                                   g.in_edges(nodes)[1]))
+        elif source_node is not None:
+            eids = g.out_edges(nodes)[1]
         else:
-            edges = set()
+            eids = g.in_edges(nodes)[1]
+
+        # sorted unique ids: edges are returned by order of creation
+        return g.edges[np.unique(eids)]
 
-            for e in g._unique:
-                if e[0] in target_node or e[1] in target_node:
-                    if e[::-1] not in edges:
-                        edges.add(e)
+    def is_connected(self, mode="strong"):
+        '''
+        Return whether the graph is connected.
 
-            edges = list(edges)
+        .. versionadded:: 2.3
 
-        return edges
+        Parameters
+        ----------
+        mode : str, optional (default: "strong")
+            Whether to test connectedness with directed ("strong") or
+            undirected ("weak") connections.
+        '''
+        num_cc, _ = connected_components(
+            self._adjacency(), directed=self.is_directed(), connection=mode)
 
-    def is_connected(self):
-        raise NotImplementedError("Not available with 'nngt' backend, please "
-                                  "install a graph library (networkx, igraph, "
-                                  "or graph-tool).")
+        return num_cc == 1
 
+    @_modifies_graph
     def new_node(self, n=1, neuron_type=1, attributes=None, value_types=None,
                  positions=None, groups=None):
         '''
@@ -469,22 +1035,7 @@ class _NNGTGraph(GraphInterface):
         -------
         The node or a tuple of the nodes created.
         '''
-        nodes = []
-
-        g = self._graph
-
-        if n == 1:
-            nodes.append(len(g._nodes))
-            g._in_deg.append(0)
-            g._out_deg.append(0)
-        else:
-            num_nodes = len(g._nodes)
-            nodes.extend(
-                [i for i in range(num_nodes, num_nodes + n)])
-            g._in_deg.extend([0 for _ in range(n)])
-            g._out_deg.extend([0 for _ in range(n)])
-
-        g._nodes.update(nodes)
+        nodes = self._graph.add_nodes(n).tolist()
 
         attributes = {} if attributes is None else deepcopy(attributes)
 
@@ -539,69 +1090,28 @@ class _NNGTGraph(GraphInterface):
 
         return nodes
 
+    @_modifies_graph
     def delete_nodes(self, nodes):
         '''
         Remove nodes (and associated edges) from the graph.
         '''
         g = self._graph
 
-        old_nodes = range(self.node_nb())
-
-        # update node set and degrees
-        if nonstring_container(nodes):
-            nodes = set(nodes)
-
-            g._nodes = g._nodes.difference(nodes)
-        else:
-            g._nodes.remove(nodes)
-            g._out_deg.pop(nodes)
-            g._in_deg.pop(nodes)
-
-            nodes = {nodes}
+        nodes = set(nodes) if nonstring_container(nodes) else {nodes}
 
         # remove node attributes
         self._nattr.remove(nodes)
 
-        # map from old nodes to new node ids
-        idx = 0
-
-        remapping = {}
-
-        for n in old_nodes:
-            if n not in nodes:
-                remapping[n] = idx
-                idx += 1
-
         # remove edges and remap edges
-        remove_eids = set()
-
-        new_edges  = OrderedDict()
-
-        new_eid = 0
-
-        for e, eid in g._unique.items():
-            if e[0] in nodes or e[1] in nodes:
-                remove_eids.add(eid)
-            else:
-                new_edges[(remapping[e[0]], remapping[e[1]])] = new_eid
-                new_eid += 1
-
-        g._unique = new_edges
-
-        if not g._directed:
-            g._edges = new_edges.copy()
-            g._edges.update({e[::-1]: i for e, i in new_edges.items()})
-        else:
-            g._edges = g._unique
+        remapping, remove_eids = g.remove_nodes(nodes)
 
         # tell edge attributes
         self._eattr.edges_deleted(remove_eids)
 
-        g._nodes = set(range(len(g._nodes)))
-
         # check spatial and structure properties
         _post_del_update(self, nodes, remapping=remapping)
 
+    @_modifies_graph
     def new_edge(self, source, target, attributes=None, ignore=False,
                  self_loop=False):
         '''
@@ -640,10 +1150,12 @@ class _NNGTGraph(GraphInterface):
         # check that the edge does not already exist
         edge = (source, target)
 
-        if source not in g._nodes:
+        num_nodes = self.node_nb()
+
+        if not 0 <= source < num_nodes:
             raise InvalidArgument("There is no node {}.".format(source))
 
-        if target not in g._nodes:
+        if not 0 <= target < num_nodes:
             raise InvalidArgument("There is no node {}.".format(target))
 
         if source == target:
@@ -655,29 +1167,14 @@ class _NNGTGraph(GraphInterface):
 
                 return None
 
-        if (g._directed and edge not in g._unique) or edge not in g._edges:
-            edge_id             = self._max_eid
-            # ~ edge_id             = len(g._unique)
-            g._unique[edge]     = edge_id
-            g._out_deg[source] += 1
-            g._in_deg[target]  += 1
-
-            self._max_eid += 1
+        if not self.has_edge(edge):
+            g.add_edges([edge])
 
             # check distance
             _set_dist_new_edges(attributes, self, [edge])
 
             # attributes
             self._attr_new_edges([(source, target)], attributes=attributes)
-
-            if not g._directed:
-                # edges and unique are different objects, so update _edges
-                g._edges[edge] = edge_id
-                # add reciprocal
-                e_recip             = (target, source)
-                g._edges[e_recip]   = edge_id
-                g._out_deg[target] += 1
-                g._in_deg[source]  += 1
         else:
             if not ignore:
                 raise InvalidArgument("Trying to add existing edge.")
@@ -687,12 +1184,18 @@ class _NNGTGraph(GraphInterface):
 
         return edge
 
+    @_modifies_graph
     def new_edges(self, edge_list, attributes=None, check_duplicates=False,
                   check_self_loops=True, check_existing=True,
                   ignore_invalid=False):
         '''
         Add a list of edges to the graph.
 
+        .. versionchanged:: 2.3
+            Edges are stored in an array: if the checks are disabled,
+            duplicate edges are kept as separate edges (with their own ids,
+            attributes, and contribution to the degrees).
+
         .. versionchanged:: 2.0
             Can perform all possible checks before adding new edges via the
             ``check_duplicates`` ``check_self_loops``, and ``check_existing``
@@ -725,6 +1228,8 @@ class _NNGTGraph(GraphInterface):
             Setting `check_existing` to False will lead to undefined behavior
             if existing edges are provided! Only use it (for speedup) if you
             are sure that you are indeed only adding new edges.
+            With this backend, duplicate or existing edges that are not
+            checked are added again, so that the graph becomes a multigraph.
 
         Returns
         -------
@@ -753,39 +1258,7 @@ class _NNGTGraph(GraphInterface):
             new_attr = attributes
 
         # create the edges
-        initial_eid = self._max_eid
-
-        ws        = None
-        num_added = len(edge_list)
-
-        if "weight" in new_attr:
-            if nonstring_container(new_attr["weight"]):
-                ws = new_attr["weight"]
-            else:
-                ws = (new_attr["weight"] for _ in range(num_added))
-        else:
-            ws = _get_edge_attr(self, edge_list, "weight", last_edges=True)
-
-        for i, (e, w) in enumerate(zip(edge_list, ws)):
-            eid = self._max_eid
-
-            g._unique[tuple(e)] = eid
-
-            self._max_eid += 1
-
-            g._out_deg[e[0]] += 1
-            g._in_deg[e[1]]  += 1
-
-            if not g._directed:
-                # edges and unique are different objects, so update _edges
-                g._edges[tuple(e)] = eid
-                # reciprocal edge
-                g._edges[tuple(e[::-1])] = eid
-
-                g._out_deg[e[1]] += 1
-                g._in_deg[e[0]]  += 1
-
-        
+        g.add_edges(edge_list)
 
         # check distance
         _set_dist_new_edges(new_attr, self, edge_list)
@@ -795,59 +1268,76 @@ class _NNGTGraph(GraphInterface):
 
         return edge_list
 
-    def delete_edges(self, edges):
-        ''' Remove a list of edges '''
-        g = self._graph
+    @_modifies_graph
+    def _load_edges(self, edges, attributes, degrees=None):
+        '''
+        Add the edges and edge attributes loaded from a file.
 
-        old_enum = len(g._unique)
+        If the graph has no edges, if `degrees` are provided, and if the
+        values of all existing edge attributes are given, the arrays are used
+        directly as storage, so that memory-mapped data is not copied.
+        '''
+        missing = set(self._eattr).difference(attributes)
 
-        if not nonstring_container(edges[0]):
-            edges = [edges]
+        if degrees is None or missing or self.edge_nb():
+            return super()._load_edges(edges, attributes, degrees=degrees)
 
-        if not isinstance(edges[0], tuple):
-            edges = [tuple(e) for e in edges]
+        self._graph._map_edges(edges, *degrees)
 
-        # get edge ids
-        e_to_eid = g._unique
+        for name, (dtype, values) in attributes.items():
+            self._eattr.new_attribute(name, dtype, values=values, copy=False)
 
-        eids = {e_to_eid[e] for e in edges}
+    @_modifies_graph
+    def delete_edges(self, edges, compact=True):
+        '''
+        Remove a list of edges.
 
-        # remove
-        directed = g._directed
+        .. versionchanged:: 2.3
+            Added the `compact` argument.
 
-        for e in edges:
-            if e in g._unique:
-                del g._unique[e]
+        Parameters
+        ----------
+        edges : 2-tuple or array of edges
+            Edges to remove. For multiple edges, each occurrence of the edge
+            in `edges` removes one of its copies (repeating an edge more times
+            than it has copies removes all of them).
+        compact : bool, optional (default: True)
+            If False, the edges are only marked as deleted, so that removing
+            `k` edges costs O(k) instead of O(E); the edge array and the edge
+            attributes are compacted at once when they are next accessed (or
+            when :meth:`compact` is called). Use it when removing edges in
+            many small steps (e.g. when pruning synapses).
+        '''
+        g = self._graph
 
-            if not directed:
-                if e in g._edges:
-                    del g._edges[e]
-                    del g._edges[e[::-1]]
+        if not nonstring_container(edges[0]):
+            edges = [edges]
 
-        # reset eids
-        for i, e in enumerate(g._unique):
-            g._unique[e] = i
+        # get edge ids (ids of the current buffer if some edges were already
+        # lazily removed), each repetition of a multiple edge removes a copy
+        eids = g._edge_ids(edges, distinct=True)
 
-            if not directed:
-                e._edges[e] = i
-                e._edges[e[::-1]] = i
+        if np.any(eids < 0):
+            raise KeyError(tuple(np.asarray(edges)[eids < 0][0]))
 
-        self._eattr.edges_deleted(eids)
+        # remove edges, the attributes are updated by `compact`
+        g.remove_edges(eids, lazy=not compact)
 
-    def clear_all_edges(self):
-        g = self._graph
+    def compact(self):
+        '''
+        Remove the edges that were deleted with ``compact=False`` from the
+        edge array and the edge attributes.
 
-        if g._directed:
-            g._edges = g._unique = OrderedDict()
-            assert g._edges is g._unique
-        else:
-            g._edges  = OrderedDict()
-            g._unique = OrderedDict()
+        .. versionadded:: 2.3
+        '''
+        self._graph.compact()
 
-        g._out_deg = [0 for _ in range(self.node_nb())]
-        g._out_deg = [0 for _ in range(self.node_nb())]
+    @_modifies_graph
+    def clear_all_edges(self):
+        self._graph.clear_edges()
 
         self._eattr.clear()
+        self._eattr.prop.clear()
 
     #------------------------------------------------------------------#
     # Getters
@@ -858,7 +1348,7 @@ class _NNGTGraph(GraphInterface):
 
         .. warning:: When using MPI, returns only the local number of nodes.
         '''
-        return len(self._graph._nodes)
+        return self._graph._num_nodes
 
     def edge_nb(self):
         '''
@@ -866,10 +1356,10 @@ class _NNGTGraph(GraphInterface):
 
         .. warning:: When using MPI, returns only the local number of edges.
         '''
-        return len(self._graph._unique)
+        return self._graph._num_edges - self._graph._num_dead
 
     def is_directed(self):
-        return g._directed
+        return self._graph._directed
 
     def get_degrees(self, mode="total", nodes=None, weights=None):
         '''
@@ -896,7 +1386,7 @@ class _NNGTGraph(GraphInterface):
         # weighted
         if nonstring_container(weights) or weights in self._eattr:
             degrees = np.zeros(num_nodes)
-            adj_mat = self.adjacency_matrix(types=False, weights=weights)
+            adj_mat = self._adjacency(types=False, weights=weights)
 
             if mode in ("in", "total") or not self.is_directed():
                 degrees += adj_mat.sum(axis=0).A1[nodes]
@@ -911,16 +1401,10 @@ class _NNGTGraph(GraphInterface):
         degrees = np.zeros(num_nodes, dtype=int)
 
         if not g._directed or mode in ("in", "total"):
-            if isinstance(nodes, slice):
-                degrees += g._in_deg[nodes]
-            else:
-                degrees += [g._in_deg[i] for i in nodes]
+            degrees += g._in_deg[nodes]
 
         if g._directed and mode in ("out", "total"):
-            if isinstance(nodes, slice):
-                degrees += g._out_deg[nodes]
-            else:
-                degrees += [g._out_deg[i] for i in nodes]
+            degrees += g._out_deg[nodes]
 
         if num_nodes == 1:
             return degrees[0]
@@ -946,25 +1430,74 @@ class _NNGTGraph(GraphInterface):
         neighbours : set
             The neighbours of `node`.
         '''
-        edges = self.edges_array
+        g = self._graph
 
-        if mode == "all" or not self._graph._directed:
-            neighbours = set(edges[edges[:, 1] == node, 0])
-            return neighbours.union(edges[edges[:, 0] == node, 1])
+        if mode == "all" or not g._directed:
+            neighbours = set(g.in_neighbours(node).tolist())
+            return neighbours.union(g.out_neighbours(node).tolist())
 
         if mode == "in":
-            return set(edges[edges[:, 1] == node, 0])
+            return set(g.in_neighbours(node).tolist())
 
         if mode == "out":
-            return set(edges[edges[:, 0] == node, 1])
+            return set(g.out_neighbours(node).tolist())
 
         raise ValueError(('Invalid `mode` argument {}; possible values'
                           'are "all", "out" or "in".').format(mode))
 
+    def _neighbours_csr(self, nodes, mode="all"):
+        ''' Batched neighbours from the CSR and CSC indexes '''
+        g = self._graph
+
+        if mode not in ("all", "in", "out"):
+            raise ValueError(('Invalid `mode` argument {}; possible values'
+                              'are "all", "out" or "in".').format(mode))
+
+        nodes = np.asarray(nodes, dtype=np.int64)
+        edges = g.edges
+        rows  = []
+        nghbr = []
+
+        if mode in ("all", "out") or not g._directed:
+            indptr, eids = g.out_edges(nodes)
+
+            rows.append(np.repeat(np.arange(len(nodes)), np.diff(indptr)))
+            nghbr.append(edges[eids, 1])
+
+        if mode in ("all", "in") or not g._directed:
+            indptr, eids = g.in_edges(nodes)
+
+            rows.append(np.repeat(np.arange(len(nodes)), np.diff(indptr)))
+            nghbr.append(edges[eids, 0])
+
+        if len(rows) == 1:
+            # entries are already sorted by row, then neighbour, so parallel
+            # edges are contiguous
+            rows, nghbr = rows[0], nghbr[0]
+
+            keep = np.ones(len(nghbr), dtype=bool)
+
+            keep[1:] = (rows[1:] != rows[:-1]) | (nghbr[1:] != nghbr[:-1])
+
+            indptr = np.searchsorted(rows[keep], np.arange(len(nodes) + 1))
+
+            return indptr, nghbr[keep]
+
+        # union of in- and out-neighbours, sorted by row then neighbour
+        keys = np.unique(_edge_keys(np.concatenate(rows),
+                                    np.concatenate(nghbr)))
+
+        indptr = np.searchsorted(keys >> 32, np.arange(len(nodes) + 1))
+
+        return indptr, keys & _KEY_MASK
+
+    @_modifies_graph
     def _from_library_graph(self, graph, copy=True):
         ''' Initialize `self._graph` from existing library object. '''
         self._graph = graph._graph.copy() if copy else graph._graph
 
+        self._graph._on_compact = self._eattr.edges_compacted
+
         for key, val in graph._nattr.items():
             dtype = graph._nattr.value_type(key)
             self._nattr.new_attribute(key, dtype, values=val)
@@ -974,7 +1507,59 @@ class _NNGTGraph(GraphInterface):
             self._eattr.new_attribute(key, dtype, values=val)
 
 
-# tool function to set edge properties
+# tool functions
+
+_KEY_MASK = np.int64(0xFFFFFFFF)
+
+
+def _edge_keys(sources, targets):
+    '''
+    Pack (source, target) pairs into int64 keys that sort by source, then
+    target (node ids must fit on 32 bits).
+    '''
+    return (np.left_shift(np.asarray(sources, dtype=np.int64), 32)
+            | np.asarray(targets, dtype=np.int64))
+
+
+def _gather(indptr, nodes):
+    '''
+    Positions of the entries of `nodes` in a compressed index.
+
+    Returns
+    -------
+    indptr : array, the compressed index restricted to `nodes`.
+    positions : array, positions of the associated entries.
+    '''
+    nodes  = np.asarray(nodes, dtype=np.int64)
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+
+    new_indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_indptr[1:])
+
+    positions = np.repeat(starts - new_indptr[:-1], counts) \
+                + np.arange(new_indptr[-1])
+
+    return new_indptr, positions
+
+
+def _default_value(value_type):
+    ''' Default value for an attribute type '''
+    if value_type == "int":
+        return 0
+    elif value_type == "double":
+        return np.NaN
+    elif value_type == "string":
+        return ""
+
+    return None
+
+
+def _full_values(num_values, val, value_type):
+    ''' Array containing `num_values` times `val` '''
+    if value_type in ("int", "double"):
+        return np.full(num_values, val, dtype=_np_dtype(value_type))
 
-def _set_prop(array, eid, val):
-    array[eid] = val
+    # mutable objects must not be shared between entries
+    return _to_np_array([deepcopy(val) for _ in range(num_values)],
+                        value_type)
@@ -37,7 +37,7 @@ from nngt.lib.graph_helpers import (_get_dtype, _get_nx_weights,
                                     _post_del_update)
 from nngt.lib.converters import _np_dtype, _to_np_array
 from nngt.lib.logger import _log_message
-from .graph_interface import GraphInterface, BaseProperty
+from .graph_interface import GraphInterface, BaseProperty, _modifies_graph
 
 
 logger = logging.getLogger(__name__)
@@ -62,6 +62,7 @@ class _NxNProperty(BaseProperty):
 
         return _to_np_array(lst, dtype=dtype)
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         g    = self.parent()._graph
         size = g.number_of_nodes()
@@ -77,6 +78,7 @@ class _NxNProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         g = self.parent()._graph
 
@@ -101,6 +103,7 @@ class _NxNProperty(BaseProperty):
         self[name] = values
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, nodes=None):
         '''
         Set the node attribute.
@@ -190,6 +193,7 @@ class _NxEProperty(BaseProperty):
 
         return eprop
 
+    @_modifies_graph
     def __setitem__(self, name, value):
         g = self.parent()._graph
 
@@ -215,6 +219,7 @@ class _NxEProperty(BaseProperty):
             raise InvalidArgument("Attribute does not exist yet, use "
                                   "set_attribute to create it.")
 
+    @_modifies_graph
     def new_attribute(self, name, value_type, values=None, val=None):
         g = self.parent()._graph
 
@@ -240,6 +245,7 @@ class _NxEProperty(BaseProperty):
         self[name] = values
         self._num_values_set[name] = len(values)
 
+    @_modifies_graph
     def set_attribute(self, name, values, edges=None, last_edges=False):
         '''
         Set the edge property.
@@ -409,6 +415,7 @@ class _NxGraph(GraphInterface):
             g.in_edges(target_node) if g.is_directed()
             else g.edges(target_node))
 
+    @_modifies_graph
     def new_node(self, n=1, neuron_type=1, attributes=None, value_types=None,
                  positions=None, groups=None):
         '''
@@ -498,6 +505,7 @@ class _NxGraph(GraphInterface):
 
         return new_nodes
 
+    @_modifies_graph
     def delete_nodes(self, nodes):
         '''
         Remove nodes (and associated edges) from the graph.
@@ -525,6 +533,7 @@ class _NxGraph(GraphInterface):
         # check spatial and structure properties
         _post_del_update(self, nodes)
 
+    @_modifies_graph
     def new_edge(self, source, target, attributes=None, ignore=False,
                  self_loop=False):
         '''
@@ -604,6 +613,7 @@ class _NxGraph(GraphInterface):
 
         return (source, target)
 
+    @_modifies_graph
     def new_edges(self, edge_list, attributes=None, check_duplicates=False,
                   check_self_loops=True, check_existing=True,
                   ignore_invalid=False):
@@ -698,8 +708,12 @@ class _NxGraph(GraphInterface):
 
         return edge_list
 
-    def delete_edges(self, edges):
-        ''' Remove a list of edges '''
+    @_modifies_graph
+    def delete_edges(self, edges, compact=True):
+        '''
+        Remove a list of edges (edges are always removed immediately, so
+        `compact` is ignored).
+        '''
         if nonstring_container(edges[0]):
             self._graph.remove_edges_from(edges)
         else:
@@ -708,6 +722,7 @@ class _NxGraph(GraphInterface):
         for key in self._eattr:
             self._eattr._num_values_set[key] = self.edge_nb()
 
+    @_modifies_graph
     def clear_all_edges(self):
         ''' Remove all edges from the graph '''
         g = self._graph
@@ -805,6 +820,7 @@ class _NxGraph(GraphInterface):
         raise ArgumentError('Invalid `mode` argument {}; possible values are '
                             '"all", "out" or "in".'.format(mode))
 
+    @_modifies_graph
     def _from_library_graph(self, graph, copy=True):
         ''' Initialize `self._graph` from existing library object. '''
         import networkx as nx
@@ -26,6 +26,7 @@ import numpy as np
 
 import nngt
 from nngt.lib import InvalidArgument, nonstring_container
+from nngt.lib.connect_tools import _SpatialIndex
 
 from .connections import Connections
 from .graph import Graph
@@ -86,8 +87,9 @@ class SpatialGraph(Graph):
         self.__class__.__num_graphs += 1
         self.__class__.__max_id += 1
 
-        self._shape = None
-        self._pos   = None
+        self._shape  = None
+        self._pos    = None
+        self._sindex = None
 
         super().__init__(nodes, name, weighted, directed, from_graph, **kwargs)
 
@@ -164,6 +166,8 @@ class SpatialGraph(Graph):
         b_rnd_pos = True if not self.node_nb() or positions is None else False
         self._pos = self._shape.seed_neurons() if b_rnd_pos else positions
 
+        self._sindex = None
+
         Connections.distances(self)
 
     #-------------------------------------------------------------------------#
@@ -206,3 +210,15 @@ class SpatialGraph(Graph):
             if len(positions) != self.node_nb():
                 raise ValueError("One position per node is required.")
             self._pos = np.array(positions)
+
+        self._sindex = None
+
+    def _spatial_index(self):
+        '''
+        Spatial index on the nodes' positions, used to find the neighbours
+        of the nodes; it is built once and kept until the positions change.
+        '''
+        if self._sindex is None or self._sindex.positions is not self._pos:
+            self._sindex = _SpatialIndex(self._pos)
+
+        return self._sindex
@@ -8,6 +8,7 @@ import warnings
 
 from .cconnect cimport *
 cimport numpy as cnp
+from cython.parallel cimport prange
 
 import numpy as np
 import scipy.sparse as ssp
@@ -16,7 +17,8 @@ from numpy.random import randint, get_state
 import nngt
 from nngt.lib import InvalidArgument
 from nngt.lib.connect_tools import (_check_num_edges, _compute_connections,
-                                    _set_degree_type, max_proba_dist_rule)
+                                    _get_spatial_index, _set_degree_type,
+                                    max_proba_dist_rule)
 
 
 __all__ = [
@@ -52,74 +54,238 @@ cdef bytes _to_bytes(string):
     return string
 
 
-def _no_self_loops(cnp.ndarray[int64_t, ndim=2] array):
+cdef int64_t EMPTY = -1
+cdef int64_t REMOVED = -2
+
+
+cdef inline uint64_t _hash_key(int64_t key) noexcept nogil:
+    ''' Mix the bits of the packed edge (finalizer of MurmurHash3) '''
+    cdef uint64_t h = <uint64_t>key
+
+    h ^= h >> 33
+    h *= 0xff51afd7ed558ccdULL
+    h ^= h >> 33
+    h *= 0xc4ceb9fe1a85ec53ULL
+    h ^= h >> 33
+
+    return h
+
+
+cdef class _EdgeSet:
+
     '''
-    Remove self-loops
+    Set of the edges created by the generation algorithms.
+
+    Compiled version of :class:`nngt.lib.connect_tools._EdgeSet`: edges are
+    stored as packed int64 keys (``source << 32 | target``) in an
+    open-addressing hash table with linear probing, the keys of undirected
+    edges being computed from the sorted nodes.
+    Key packing and lookups are done in parallel with OpenMP; insertions are
+    sequential so that the first occurence of duplicate edges is kept.
     '''
-    cdef cnp.ndarray[bool, ndim=1] test = array[:, 0] != array[:, 1]
 
-    return array[test], test
+    cdef:
+        object _table_array
+        int64_t[:] _table
+        size_t _size, _used, _mask
+        readonly bool directed
+
+    def __init__(self, directed=True, edges=None):
+        self.directed = directed
+        self._size    = 0
+        self._used    = 0
+
+        self._resize(1024)
+
+        if edges is not None:
+            self.insert(edges)
+
+    def __len__(self):
+        return self._size
+
+    def contains(self, edges):
+        ''' Return whether each of the `edges` is in the set. '''
+        cdef:
+            int64_t[:] keys = self._pack(edges)
+            Py_ssize_t i, n = keys.shape[0]
+            int num_omp = nngt._config["omp"]
+
+        found = np.zeros(n, dtype=np.uint8)
+
+        cdef uint8[:] vfound = found
+
+        for i in prange(n, nogil=True, num_threads=num_omp):
+            vfound[i] = self._find(keys[i]) >= 0
+
+        return found.view(np.bool_)
+
+    def insert(self, edges):
+        '''
+        Add the `edges` that are not already in the set and return a boolean
+        array telling which entries were added (only the first occurence of
+        duplicate edges is added).
+        '''
+        cdef:
+            int64_t[:] keys = self._pack(edges)
+            Py_ssize_t i, n = keys.shape[0]
+            size_t capacity = self._mask + 1
+
+        # keep the load factor below 1/2
+        while 2*(self._used + n) > capacity:
+            capacity *= 2
+
+        if capacity > self._mask + 1:
+            self._resize(capacity)
+
+        added = np.zeros(n, dtype=np.uint8)
+
+        cdef uint8[:] vadded = added
+
+        with nogil:
+            for i in range(n):
+                vadded[i] = self._insert(keys[i])
+
+        return added.view(np.bool_)
+
+    def remove(self, edges):
+        ''' Remove `edges` from the set (ignoring missing ones). '''
+        cdef:
+            int64_t[:] keys = self._pack(edges)
+            Py_ssize_t i, n = keys.shape[0]
+            Py_ssize_t slot
+
+        with nogil:
+            for i in range(n):
+                slot = self._find(keys[i])
+
+                if slot >= 0:
+                    self._table[slot] = REMOVED
+                    self._size -= 1
+
+    cdef int64_t[:] _pack(self, edges):
+        cdef:
+            int64_t[:, :] vedges = np.ascontiguousarray(
+                edges, dtype=np.int64).reshape(-1, 2)
+            Py_ssize_t i, n = vedges.shape[0]
+            bool directed = self.directed
+            int num_omp = nngt._config["omp"]
+            int64_t s, t
+
+        keys = np.empty(n, dtype=np.int64)
+
+        cdef int64_t[:] vkeys = keys
+
+        for i in prange(n, nogil=True, num_threads=num_omp):
+            s = vedges[i, 0]
+            t = vedges[i, 1]
+
+            if directed or s <= t:
+                vkeys[i] = (s << 32) | t
+            else:
+                vkeys[i] = (t << 32) | s
+
+        return vkeys
+
+    cdef Py_ssize_t _find(self, int64_t key) noexcept nogil:
+        ''' Slot containing `key` or -1 if it is not in the set. '''
+        cdef:
+            size_t slot = _hash_key(key) & self._mask
+            int64_t current = self._table[slot]
+
+        while current != EMPTY:
+            if current == key:
+                return slot
+
+            slot    = (slot + 1) & self._mask
+            current = self._table[slot]
+
+        return -1
+
+    cdef bool _insert(self, int64_t key) noexcept nogil:
+        ''' Insert `key` and return whether it was not in the set. '''
+        cdef:
+            size_t slot = _hash_key(key) & self._mask
+            Py_ssize_t free = -1
+            int64_t current = self._table[slot]
+
+        while current != EMPTY:
+            if current == key:
+                return False
+
+            if current == REMOVED and free < 0:
+                free = slot
+
+            slot    = (slot + 1) & self._mask
+            current = self._table[slot]
 
+        if free < 0:
+            free = slot
+            self._used += 1
 
-def _filter(cnp.ndarray[int64, ndim=2] ia_edges,
-            cnp.ndarray[int64, ndim=2] ia_edges_tmp,
-            size_t num_ecurrent, set edges_hash, bool b_one_pop,
-            bool multigraph, bool directed=True, set recip_hash=None,
-            cnp.ndarray distance=None, cnp.ndarray dist_tmp=None):
+        self._table[free] = key
+        self._size += 1
+
+        return True
+
+    cdef void _resize(self, size_t capacity):
+        ''' Rehash the keys in a table of `capacity` slots (power of 2). '''
+        cdef:
+            int64_t[:] old = None if self._used == 0 else self._table
+            Py_ssize_t i
+
+        self._table_array = np.full(capacity, EMPTY, dtype=np.int64)
+        self._table       = self._table_array
+        self._mask        = capacity - 1
+        self._size        = 0
+        self._used        = 0
+
+        if old is not None:
+            with nogil:
+                for i in range(old.shape[0]):
+                    if old[i] >= 0:
+                        self._insert(old[i])
+
+
+def _filter(ia_edges, ia_edges_tmp, size_t num_ecurrent, _EdgeSet edges_hash,
+            bool b_one_pop, bool multigraph, distance=None, dist_tmp=None):
     '''
     Filter the edges: remove self loops and multiple connections if the graph
     is not a multigraph.
+
+    Same as :func:`nngt.lib.connect_tools._filter` with the compiled
+    :class:`_EdgeSet`.
     '''
+    ia_edges_tmp = np.asarray(ia_edges_tmp, dtype=np.int64).reshape(-1, 2)
+
+    if dist_tmp is not None:
+        dist_tmp = np.asarray(dist_tmp)
+
     if b_one_pop:
-        ia_edges_tmp, test = _no_self_loops(ia_edges_tmp)
+        keep = ia_edges_tmp[:, 0] != ia_edges_tmp[:, 1]
 
-        if dist_tmp is not None:
-            dist_tmp = dist_tmp[test]
+        ia_edges_tmp = ia_edges_tmp[keep]
 
-    cdef:
-        int64_t[:] e
-        float d
-        tuple tpl_e
+        if dist_tmp is not None:
+            dist_tmp = dist_tmp[keep]
 
     if not multigraph:
         num_ecurrent = len(edges_hash)
 
-        if distance is not None:
-            for e, d in zip(ia_edges_tmp, dist_tmp):
-                tpl_e = tuple(e)
+        added = edges_hash.insert(ia_edges_tmp)
 
-                if tpl_e not in edges_hash:
-                    if directed or tpl_e not in recip_hash:
-                        ia_edges[num_ecurrent] = e
-                        distance.append(d)
-                        edges_hash.add(tpl_e)
+        ia_edges_tmp = ia_edges_tmp[added]
 
-                        if not directed:
-                            recip_hash.add(tpl_e[::-1])
-
-                        num_ecurrent += 1
-        else:
-            for e in ia_edges_tmp:
-                tpl_e = tuple(e)
-
-                if tpl_e not in edges_hash:
-                    if directed or tpl_e not in recip_hash:
-                        ia_edges[num_ecurrent] = e
-                        edges_hash.add(tpl_e)
+        if dist_tmp is not None:
+            dist_tmp = dist_tmp[added]
 
-                        if not directed:
-                            recip_hash.add(tpl_e[::-1])
+    cdef size_t num_added = len(ia_edges_tmp)
 
-                        num_ecurrent += 1
-    else:
-        num_added = len(ia_edges_tmp)
-        ia_edges[num_ecurrent:num_ecurrent + num_added, :] = ia_edges_tmp
-        num_ecurrent += num_added
+    ia_edges[num_ecurrent:num_ecurrent + num_added] = ia_edges_tmp
 
-        if distance is not None:
-            distance.extend(dist_tmp)
+    if distance is not None:
+        distance.extend(dist_tmp)
 
-    return ia_edges, num_ecurrent
+    return ia_edges, num_ecurrent + num_added
 
 
 # ---------------------- #
@@ -217,8 +383,7 @@ def _total_degree_list(cnp.ndarray[int64, ndim=1] source_ids,
     cdef:
         size_t i, k, num_tests, num_choice, new_etot
         size_t ecurrent = 0
-        set edges_hash = set()
-        set recip_hash = set()
+        _EdgeSet edges_hash = _EdgeSet(directed)
         set ids
         int64[:] sorted_degrees = np.sort(degree_list)[::-1]
         int64[:] data
@@ -259,7 +424,7 @@ def _total_degree_list(cnp.ndarray[int64, ndim=1] source_ids,
 
             ia_edges, new_etot =  _filter(
                 ia_edges, new_edges, ecurrent, edges_hash, b_one_pop,
-                multigraph, directed=directed, recip_hash=recip_hash)
+                multigraph)
 
             np.add.at(degree_list, np.ravel(ia_edges[ecurrent:new_etot]), -1)
 
@@ -300,32 +465,15 @@ def _total_degree_list(cnp.ndarray[int64, ndim=1] source_ids,
                         new_edges[reverse, 1], new_edges[reverse, 0]
 
                 # check that new_edges are indeed new
-                skip = False
-
-                for e in new_edges:
-                    if e[0] == e[1]:
-                        skip = True
-                        break
-
-                    tpl_e = tuple(e)
-                        
-                    if tpl_e in edges_hash:
-                        skip = True
-                        break
-
-                    if not directed and tpl_e in recip_hash:
-                        skip = True
-                        break
+                skip = np.any(new_edges[:, 0] == new_edges[:, 1])
+                skip = skip or np.any(edges_hash.contains(new_edges))
 
                 if skip:
                     num_tests += 1
                     continue
 
                 # remove old ones from edges_hash
-                edges_hash -= {tuple(e) for e in chosen}
-
-                if not directed:
-                    recip_hash -= {tuple(e) for e in chosen[:, ::-1]}
+                edges_hash.remove(chosen)
 
                 # remove chosen edges from existing edges
                 ia_edges[:ecurrent - num_choice] = np.array(
@@ -336,7 +484,7 @@ def _total_degree_list(cnp.ndarray[int64, ndim=1] source_ids,
 
                 ia_edges, new_etot =  _filter(
                     ia_edges, new_edges, ecurrent, edges_hash, b_one_pop,
-                    multigraph, directed=directed, recip_hash=recip_hash)
+                    multigraph)
 
                 decr  = new_edges.ravel()
                 incr  = chosen.ravel()
@@ -516,13 +664,18 @@ def _distance_rule(cnp.ndarray[size_t, ndim=1] source_ids,
     # for each node, check the neighbours that are in an area where
     # connections can be made: +/- scale for lin, +/- 10*scale for exp
     lim = scale if rule == 'lin' else 10*scale
-    for i in source_ids:
-        keep  = (np.abs(positions[0, target_ids] - positions[0, i]) < lim)
-        keep *= (np.abs(positions[1, target_ids] - positions[1, i]) < lim)
+
+    tgt_index = _get_spatial_index(positions, target_ids,
+                                   kwargs.get("spatial_index", None))
+
+    indptr, indices = tgt_index.neighbours(positions[:, source_ids].T, lim)
+
+    neighbours = np.split(target_ids[indices], indptr[1:-1])
+
+    for i, tgts in zip(source_ids, neighbours):
         if b_one_pop:
-            idx = np.where(target_ids == i)[0][0]
-            keep[idx] = 0
-        local_targets.push_back(target_ids[keep].tolist())
+            tgts = tgts[tgts != i]
+        local_targets.push_back(tgts.tolist())
 
     # create the edges
     cdef:
@@ -27,8 +27,15 @@ from numpy.random import randint
 
 import nngt
 from nngt.lib import InvalidArgument
+from nngt.lib.logger import _log_message
 from nngt.lib.connect_tools import *
 
+try:
+    # use the compiled edge filter if available
+    from .cconnect import _EdgeSet, _filter
+except Exception:
+    pass
+
 
 __all__ = [
     "_all_to_all",
@@ -49,6 +56,7 @@ logger = logging.getLogger(__name__)
 
 MAXTESTS = 1000 # ensure that generation will finish
 EPS = 0.00001
+_MAX_TRIALS = 5000000 # max. number of pairs tested at once (distance rule)
 
 
 # ---------------------- #
@@ -131,8 +139,7 @@ def _total_degree_list(source_ids, target_ids, degree_list, directed=True,
         source_ids, target_ids, edges, directed, multigraph, return_sets=True)
 
     ecurrent = 0
-    edges_hash = set()
-    recip_hash = set()
+    edges_hash = _EdgeSet(directed)
 
     ia_edges = np.full((edges, 2), -1, dtype=int)
 
@@ -168,7 +175,7 @@ def _total_degree_list(source_ids, target_ids, degree_list, directed=True,
 
             ia_edges, new_etot =  _filter(
                 ia_edges, new_edges, ecurrent, edges_hash, b_one_pop,
-                multigraph, directed=directed, recip_hash=recip_hash)
+                multigraph)
 
             np.add.at(degree_list, ia_edges[ecurrent:new_etot].ravel(), -1)
 
@@ -207,30 +214,15 @@ def _total_degree_list(source_ids, target_ids, degree_list, directed=True,
                         new_edges[reverse, 1], new_edges[reverse, 0]
 
                 # check that new_edges are indeed new
-                skip = False
-
-                for e in new_edges:
-                    if e[0] == e[1]:
-                        skip = True
-                        break
-                        
-                    if tuple(e) in edges_hash:
-                        skip = True
-                        break
-
-                    if not directed and tuple(e) in recip_hash:
-                        skip = True
-                        break
+                skip = np.any(new_edges[:, 0] == new_edges[:, 1])
+                skip = skip or np.any(edges_hash.contains(new_edges))
 
                 if skip:
                     num_tests += 1
                     continue
 
                 # remove old ones from edges_hash
-                edges_hash -= {tuple(e) for e in chosen}
-
-                if not directed:
-                    recip_hash -= {tuple(e) for e in chosen[:, ::-1]}
+                edges_hash.remove(chosen)
 
                 # remove chosen edges from existing edges
                 ia_edges[:ecurrent - num_choice] = np.array(
@@ -241,7 +233,7 @@ def _total_degree_list(source_ids, target_ids, degree_list, directed=True,
 
                 ia_edges, new_etot =  _filter(
                     ia_edges, new_edges, ecurrent, edges_hash, b_one_pop,
-                    multigraph, directed=directed, recip_hash=recip_hash)
+                    multigraph)
 
                 decr  = list(new_edges.ravel())
                 incr  = list(chosen.ravel())
@@ -372,6 +364,17 @@ def _gaussian_degree(source_ids, target_ids, avg, std, degree_type="in",
                      directed=True, multigraph=False, existing_edges=None,
                      **kwargs):
     ''' Connect nodes with a Gaussian distribution '''
+    degrees = _gaussian_degree_list(len(source_ids), avg, std, degree_type,
+                                    directed)
+
+    return _from_degree_list(
+        source_ids, target_ids, degrees, degree_type=degree_type,
+        directed=directed, multigraph=multigraph,
+        existing_edges=existing_edges, **kwargs)
+
+
+def _gaussian_degree_list(num_source, avg, std, degree_type, directed):
+    ''' Draw the degrees of the source neurons for `_gaussian_degree` '''
     # switch values to float
     avg = float(avg)
     std = float(std)
@@ -379,8 +382,6 @@ def _gaussian_degree(source_ids, target_ids, avg, std, degree_type="in",
     assert avg >= 0, "A positive value is required for `avg`."
     assert std >= 0, "A positive value is required for `std`."
 
-    num_source = len(source_ids)
-
     # type of degree
     degree_type = _set_degree_type(degree_type)
 
@@ -403,10 +404,7 @@ def _gaussian_degree(source_ids, target_ids, avg, std, degree_type="in",
                 if degrees[idx] > 0:
                     degrees[idx] -= 1
 
-    return _from_degree_list(
-        source_ids, target_ids, degrees, degree_type=degree_type,
-        directed=directed, multigraph=multigraph,
-        existing_edges=existing_edges, **kwargs)
+    return degrees
 
 
 def _random_scale_free(source_ids, target_ids, in_exp, out_exp, density=None,
@@ -423,8 +421,7 @@ def _random_scale_free(source_ids, target_ids, in_exp, out_exp, density=None,
 
     ia_edges = np.full((edges, 2), -1, dtype=int)
     num_ecurrent, num_test = 0, 0
-    edges_hash = set()
-    recip_hash = None if not directed else set()
+    edges_hash = _EdgeSet(directed)
 
     # lists containing the in/out-degrees for all nodes
     ia_in_deg = np.random.pareto(in_exp,num_target)+1
@@ -456,8 +453,7 @@ def _random_scale_free(source_ids, target_ids, in_exp, out_exp, density=None,
     np.random.shuffle(ia_targets)
     ia_edges_tmp = np.array([ia_sources,ia_targets]).T
     ia_edges, num_ecurrent = _filter(ia_edges, ia_edges_tmp, num_ecurrent,
-                                     edges_hash, b_one_pop, multigraph,
-                                     directed=directed, recip_hash=recip_hash)
+                                     edges_hash, b_one_pop, multigraph)
 
     while num_ecurrent != pre_recip_edges and num_test < MAXTESTS:
         num_desired = pre_recip_edges-num_ecurrent
@@ -466,7 +462,7 @@ def _random_scale_free(source_ids, target_ids, in_exp, out_exp, density=None,
         ia_edges_tmp = np.array([ia_sources_tmp, ia_targets_tmp]).T
         ia_edges, num_ecurrent = _filter(
             ia_edges, ia_edges_tmp, num_ecurrent, edges_hash, b_one_pop,
-            multigraph, directed=directed, recip_hash=recip_hash)
+            multigraph)
         num_test += 1
 
     if directed and reciprocity > 0:
@@ -490,7 +486,16 @@ def _erdos_renyi(source_ids, target_ids, density=None, edges=None,
     '''
     Returns a numpy array of dimension (2,edges) that describes the edge list
     of an Erdos-Renyi graph.
-    @todo: perform all the calculations here
+
+    .. versionchanged:: 2.3
+        Edges are sampled without replacement among the indices of the
+        possible pairs (see :func:`_sample_pairs`).
+
+    The possible (source, target) pairs are numbered so that self-loops (if
+    the sources and targets are the same population) and reciprocal
+    duplicates (for undirected graphs) are excluded from the start; the
+    edges are then drawn as a sample of these indices and converted back to
+    node pairs, which requires no filtering and no retries.
     '''
     source_ids = np.array(source_ids).astype(int)
     target_ids = np.array(target_ids).astype(int)
@@ -501,41 +506,211 @@ def _erdos_renyi(source_ids, target_ids, density=None, edges=None,
     b_one_pop = _check_num_edges(
         source_ids, target_ids, edges, directed, multigraph)
 
-    ia_edges = np.full((edges, 2), -1, dtype=int)
+    if not (directed or b_one_pop or multigraph) and \
+       len(np.intersect1d(source_ids, target_ids)):
+        # partly overlapping populations: reciprocal duplicates cannot be
+        # excluded by numbering the pairs so we filter them
+        ia_edges, _, _ = _random_edges(
+            source_ids, target_ids, edges, b_one_pop, directed, multigraph)
+
+        return ia_edges
+
+    if b_one_pop:
+        target_ids = source_ids
+
+    rng = nngt._rng
+
+    ia_edges = np.empty((edges, 2), dtype=np.int64)
+
+    # draw the pairs
+    num_pairs = _num_pairs(num_source, num_target, b_one_pop, directed)
+
+    if multigraph:
+        idx = rng.integers(0, num_pairs, pre_recip_edges)
+    else:
+        idx = _sample_pairs(num_pairs, pre_recip_edges, rng)
+
+    sources, targets = _pair_indices(idx, num_target, b_one_pop, directed)
+
+    ia_edges[:pre_recip_edges, 0] = source_ids[sources]
+    ia_edges[:pre_recip_edges, 1] = target_ids[targets]
+
+    if not directed:
+        # randomize the direction of the edges (sources are always larger
+        # than targets for a single population)
+        flip = rng.random(edges) < 0.5
+
+        ia_edges[flip] = ia_edges[flip, ::-1]
+
+    # make reciprocal edges by reversing existing edges
+    num_recip = edges - pre_recip_edges
+
+    if directed and num_recip > 0:
+        existing = ia_edges[:pre_recip_edges]
+
+        if multigraph:
+            chosen = rng.integers(0, pre_recip_edges, num_recip)
+        else:
+            # edges that are not already reciprocal: the element-wise
+            # product of the adjacency matrix and of the transposed matrix
+            # of edge ids gives the edges (j, i) for each (i, j)
+            size = existing.max() + 1
+            eids = np.arange(1, pre_recip_edges + 1)
+            ones = np.ones(pre_recip_edges)
+            rows, cols = existing.T
+
+            adj = ssp.csr_matrix((ones, (rows, cols)), shape=(size, size))
+            ids = ssp.csr_matrix((eids, (cols, rows)), shape=(size, size))
+
+            is_recip = np.zeros(pre_recip_edges, dtype=bool)
+            is_recip[adj.multiply(ids).tocsr().data.astype(int) - 1] = True
+
+            candidates = np.where(~is_recip)[0]
+
+            if len(candidates) < num_recip:
+                _log_message(logger, "WARNING",
+                             "Only {} reciprocal edges could be created "
+                             "instead of {}.".format(len(candidates),
+                                                     num_recip))
+
+                num_recip = len(candidates)
+                ia_edges  = ia_edges[:pre_recip_edges + num_recip]
+
+            chosen = rng.choice(candidates, num_recip, replace=False)
+
+        ia_edges[pre_recip_edges:] = existing[chosen, ::-1]
+
+    return ia_edges
+
+
+def _num_pairs(num_source, num_target, b_one_pop, directed):
+    ''' Number of possible edges (excluding multiple edges) '''
+    if b_one_pop:
+        if directed:
+            return num_source*(num_source - 1)
+
+        return num_source*(num_source - 1) // 2
+
+    return num_source*num_target
+
+
+def _pair_indices(idx, num_target, b_one_pop, directed):
+    '''
+    Convert the pair indices `idx` into the indices of the sources and
+    targets, with the numbering used in :func:`_num_pairs`.
+
+    For a single population, directed pairs are numbered row by row and the
+    diagonal is skipped, whereas undirected pairs are the strictly lower
+    triangle, with ``idx = i*(i - 1)/2 + j`` for ``j < i``.
+    '''
+    idx = np.asarray(idx, dtype=np.int64)
+
+    if not b_one_pop:
+        return np.divmod(idx, num_target)
+
+    if directed:
+        sources, targets = np.divmod(idx, num_target - 1)
+
+        # skip the diagonal
+        targets += (targets >= sources)
+
+        return sources, targets
+
+    # invert the triangular numbers (then correct floating point errors)
+    sources = ((1 + np.sqrt(1 + 8*idx.astype(float))) // 2).astype(np.int64)
+
+    sources -= (sources*(sources - 1) // 2 > idx)
+    sources += ((sources + 1)*sources // 2 <= idx)
+
+    targets = idx - sources*(sources - 1) // 2
+
+    return sources, targets
+
+
+def _sample_pairs(num_pairs, num_edges, rng):
+    '''
+    Sorted sample of `num_edges` distinct indices among `num_pairs`.
+
+    Sparse samples use Floyd's algorithm (through :meth:`Generator.choice`),
+    which costs O(`num_edges`).
+    Since it falls back to a permutation of all the pairs for dense samples,
+    these are drawn instead with the geometric skipping of Batagelj and
+    Brandes: a Bernoulli sample of the pairs with a probability slightly
+    larger than ``num_edges / num_pairs`` is obtained from the cumulated sum
+    of geometric gaps between the chosen indices, then the few extra indices
+    are uniformly removed to get exactly `num_edges` indices.
+    '''
+    # draw slightly more than num_edges so that we almost never get less
+    margin = 6*np.sqrt(num_edges) + 10
+    proba  = (num_edges + margin) / num_pairs
+
+    if num_edges <= num_pairs // 50 or proba > 0.9:
+        idx = rng.choice(num_pairs, num_edges, replace=False, shuffle=False)
+        idx.sort()
+
+        return idx
+
+    idx = np.array([], dtype=np.int64)
+
+    while len(idx) < num_edges:
+        gaps = rng.geometric(proba, size=int(num_edges + 2*margin))
+        idx  = np.cumsum(gaps, dtype=np.int64) - 1
+
+        # in the very unlikely case where we did not reach the last pair
+        while idx[-1] < num_pairs - 1:
+            gaps = rng.geometric(proba, size=int(margin))
+            idx  = np.concatenate((idx, idx[-1] + np.cumsum(gaps)))
+
+        idx = idx[:np.searchsorted(idx, num_pairs)]
+
+    # thin the sample by removing the (few) extra indices
+    extra = rng.choice(len(idx), len(idx) - num_edges, replace=False)
+
+    return np.delete(idx, extra)
+
+
+def _random_edges(source_ids, target_ids, num_edges, b_one_pop, directed,
+                  multigraph):
+    '''
+    Draw `num_edges` edges uniformly between the sources and the targets.
+
+    Returns the edges, their number (lower than `num_edges` only if the
+    generation did not finish after `MAXTESTS` rounds), and the number of
+    rounds.
+    '''
+    num_source, num_target = len(source_ids), len(target_ids)
+
+    ia_edges = np.full((num_edges, 2), -1, dtype=int)
     num_test, num_ecurrent = 0, 0 # number of tests and current number of edges
-    edges_hash = set()
-    recip_hash = None if directed else set()
+    edges_hash = _EdgeSet(directed)
 
-    while num_ecurrent != pre_recip_edges and num_test < MAXTESTS:
+    while num_ecurrent != num_edges and num_test < MAXTESTS:
         ia_sources = source_ids[randint(0, num_source,
-                                        pre_recip_edges-num_ecurrent)]
+                                        num_edges - num_ecurrent)]
         ia_targets = target_ids[randint(0, num_target,
-                                        pre_recip_edges-num_ecurrent)]
-        ia_edges_tmp = np.array([ia_sources,ia_targets]).T
+                                        num_edges - num_ecurrent)]
+        ia_edges_tmp = np.array([ia_sources, ia_targets]).T
         ia_edges, num_ecurrent = _filter(
             ia_edges, ia_edges_tmp, num_ecurrent, edges_hash, b_one_pop,
-            multigraph, directed=directed, recip_hash=recip_hash)
+            multigraph)
         num_test += 1
 
-    if directed and reciprocity > 0:
-        while num_ecurrent != edges and num_test < MAXTESTS:
-            ia_indices = randint(0, pre_recip_edges,
-                                           edges-num_ecurrent)
-            ia_edges[num_ecurrent:] = ia_edges[ia_indices]
-            num_ecurrent = edges
-            if not multigraph:
-                ia_edges_tmp = _unique_rows(ia_edges)
-                num_ecurrent = ia_edges_tmp.shape[0]
-                ia_edges[:num_ecurrent,:] = ia_edges_tmp
-            num_test += 1
-
-    return ia_edges
+    return ia_edges, num_ecurrent, num_test
 
 
 def _price_scale_free(ids, m, c, gamma, reciprocity, directed, multigraph,
                       **kwargs):
     '''
     Generate a Price network.
+
+    Each new node connects to ``min(m, i)`` distinct previous nodes, drawn
+    with probability proportional to ``k**gamma + c``, where ``k`` is their
+    (in-)degree, and without replacement as with
+    ``rng.choice(i, min(m, i), replace=False, p=p)``, i.e. the targets are
+    the first distinct values of a sequence of independent draws.
+    The linear case (``gamma == 1``) is vectorized (see
+    :func:`_price_linear`); otherwise, the weights are stored in a
+    :class:`_FenwickTree`.
     '''
     ids = np.array(ids).astype(int)
 
@@ -550,52 +725,225 @@ def _price_scale_free(ids, m, c, gamma, reciprocity, directed, multigraph,
 
     assert 0 <= reciprocity <= 1, "`reciprocity` must be in [0, 1]."
 
-    in_degrees = np.zeros(num_nodes)
+    rng = nngt._rng
 
-    edges = []
-    edges_hash = set()
-    recip_hash = None if directed else set()
+    # number of edges created by each node and whether they are reciprocated
+    num_new = np.minimum(np.arange(num_nodes), m)
+    sources = np.repeat(np.arange(num_nodes), num_new)
 
-    rng = nngt._rng
+    recip = np.zeros(len(sources), dtype=bool)
+
+    if directed and reciprocity > 0:
+        recip = rng.random(len(sources)) < reciprocity
+
+    num_recip = np.bincount(sources, weights=recip,
+                            minlength=num_nodes).astype(int)
 
-    for i, n in zip(range(1, num_nodes), ids[1:]):
-        proba = None if i == 1 else np.power(in_degrees[:i], gamma) + c
+    # degree of each node when it is added
+    own = num_recip if directed else num_new
 
-        if proba is not None:
-            proba /= proba.sum()
+    if num_nodes < 2 or m == 0:
+        return np.zeros((0, 2), dtype=int)
 
-        edges_i = []
+    if gamma == 1:
+        targets = _price_linear(num_new, own, sources, c, rng)
+    else:
+        targets = []
+
+        degrees = [0]*num_nodes
+        weights = [0.]*num_nodes
+        tree    = _FenwickTree(num_nodes)
+
+        def uniform():
+            while True:
+                yield from rng.random(len(sources)).tolist()
+
+        draws = uniform()
+
+        for i, (m_i, k_i) in enumerate(zip(num_new.tolist(), own.tolist())):
+            # draw without replacement by rounds, as numpy's choice: the
+            # missing targets are drawn among the remaining nodes, then the
+            # first occurrence of each new target is kept and removed
+            chosen = []
+
+            while len(chosen) < m_i:
+                batch = []
+
+                for _ in range(m_i - len(chosen)):
+                    t = 0 if i == 1 else min(
+                        tree.find(next(draws)*tree.total), i - 1)
 
-        m_i = min(i, m)
+                    if t not in batch:
+                        batch.append(t)
 
-        while len(edges_i) < m_i:
-            targets = rng.choice(i, size=m_i, replace=False, p=proba)
+                for t in batch:
+                    tree.add(t, -weights[t])
 
-            for t in targets:
-                e = (n, ids[t])
+                chosen.extend(batch)
 
-                if e not in edges_hash:
-                    if directed:
-                        edges_i.append(e)
-                        in_degrees[t] += 1
-                    elif e not in recip_hash:
-                        edges_i.append(e)
-                        in_degrees[i] += 1
-                        in_degrees[t] += 1
+            # update the degrees and weights
+            for t in chosen:
+                degrees[t] += 1
+                weights[t]  = degrees[t]**gamma + c
+                tree.add(t, weights[t])
 
-        edges.extend(edges_i)
+            degrees[i] = int(k_i)
+            weights[i] = np.power(float(k_i), gamma) + c
+            tree.add(i, weights[i])
 
-        if directed and reciprocity > 0:
-            make_recip = rng.random(m) < reciprocity
+            targets.extend(chosen)
 
-            for b, e in zip(make_recip, edges_i):
-                if b:
-                    edges.append(e[::-1])
-                    in_degrees[i] += 1
+        targets = np.array(targets, dtype=int)
+
+    # edges of each node followed by the reciprocal ones
+    is_recip = np.ones(len(sources) + np.sum(recip), dtype=bool)
+
+    is_recip[np.arange(len(sources))
+             + (np.cumsum(num_recip) - num_recip)[sources]] = False
+
+    edges = np.empty((len(is_recip), 2), dtype=int)
+
+    edges[~is_recip, 0] = ids[sources]
+    edges[~is_recip, 1] = ids[targets]
+    edges[is_recip, 0]  = ids[targets[recip]]
+    edges[is_recip, 1]  = ids[sources[recip]]
 
     return edges
 
 
+def _price_linear(num_new, own, sources, c, rng):
+    '''
+    Targets of the edges of a Price network with linear preferential
+    attachment.
+
+    The weight ``k + c`` of a node is split between its tokens in an urn
+    (one per edge it received, minus one if ``c < 0``) and a uniform part
+    ``c`` (+ 1 if ``c < 0``), so that each draw is either a uniform node or
+    a random token of the urn.
+    Since the size of the urn when each node is added only depends on the
+    numbers of edges, all draws are made at once; a token can be the target
+    of a previous draw, so values are then found by pointer jumping.
+    Draws are made without replacement for each node: a draw giving one of
+    the previous targets of the node is replaced by a new one, which is done
+    iteratively until all targets are known and distinct, so that the targets
+    are the first distinct values of independent draws, as for
+    :meth:`numpy.random.Generator.choice`.
+    '''
+    num_nodes = len(num_new)
+    num_slots = len(sources)
+    shift     = 1 if c < 0 else 0
+    uniform   = c + shift
+
+    first_slot = np.cumsum(num_new) - num_new
+    rank       = np.arange(num_slots) - first_slot[sources]
+
+    # tokens of each node in the urn: first the targets of its draws, then
+    # its `own` tokens (degree when it is added), minus the first token of
+    # each node if shift is 1
+    skip = np.zeros(num_nodes, dtype=int)
+
+    if shift:
+        # node 0 first token is node 1's target
+        skip[1] = 1
+        own = own - (np.arange(num_nodes) > 0)
+
+    kept = num_new - skip
+    urn  = np.cumsum(kept + own) - kept - own
+
+    def draw(slots):
+        '''
+        Return a token for each slot: a node id (>= 0) or a slot -1 - s.
+        '''
+        node  = sources[slots]
+        total = urn[node] + uniform*node
+
+        x = rng.random(len(slots))*total
+
+        in_urn = x < urn[node]
+        tokens = np.zeros(len(slots), dtype=int)
+
+        if uniform > 0:
+            unif = ~in_urn
+
+            tokens[unif] = np.minimum(
+                (x[unif] - urn[node[unif]]) / uniform, node[unif] - 1)
+
+        pos = np.minimum(x[in_urn], urn[node[in_urn]] - 1).astype(int)
+        # first block ending after pos (skips the empty ones)
+        blk = np.searchsorted(urn + kept + own, pos, side="right")
+
+        off = pos - urn[blk]
+
+        tokens[in_urn] = np.where(
+            off < kept[blk], -1 - (first_slot[blk] + skip[blk] + off), blk)
+
+        return tokens
+
+    props_slot  = np.arange(num_slots)
+    props_token = draw(props_slot)
+    accepted    = np.arange(num_slots)
+
+    # targets of each node, by rank
+    max_rank = num_new.max()
+    chosen   = np.full((num_nodes, max_rank), -1)
+
+    while True:
+        # values of the accepted draws by pointer jumping
+        tokens = props_token[accepted]
+        values = np.where(tokens >= 0, tokens, -1)
+        link   = np.where(tokens < 0, -1 - tokens, 0)
+
+        todo = np.flatnonzero(values < 0)
+
+        while len(todo):
+            nxt = link[todo]
+            val = values[nxt]
+            end = val >= 0
+
+            values[todo[end]] = val[end]
+            link[todo[~end]]  = link[nxt[~end]]
+
+            todo = todo[~end]
+
+        chosen[sources, rank] = values
+
+        # a draw is rejected if it gives the target of an earlier slot
+        pvalues = props_token.copy()
+        ptokens = pvalues < 0
+
+        pvalues[ptokens] = values[-1 - pvalues[ptokens]]
+
+        pnode = sources[props_slot]
+        prank = rank[props_slot]
+        valid = np.ones(len(props_slot), dtype=bool)
+
+        for r in range(max_rank - 1):
+            valid &= (chosen[pnode, r] != pvalues) | (prank <= r)
+
+        # accept the first valid draw of each slot (initial draws come first)
+        new_accepted = np.where(valid[:num_slots], np.arange(num_slots), -1)
+
+        extra = num_slots + np.flatnonzero(valid[num_slots:])
+        extra = extra[new_accepted[props_slot[extra]] < 0]
+
+        slots, first = np.unique(props_slot[extra], return_index=True)
+
+        new_accepted[slots] = extra[first]
+
+        # make new draws for the slots that have none
+        missing = np.flatnonzero(new_accepted < 0)
+
+        if len(missing):
+            new_accepted[missing] = len(props_slot) + np.arange(len(missing))
+
+            props_slot  = np.concatenate((props_slot, missing))
+            props_token = np.concatenate((props_token, draw(missing)))
+        elif np.array_equal(new_accepted, accepted):
+            return values
+
+        accepted = new_accepted
+
+
 def _circular(source_ids, target_ids, coord_nb, reciprocity=1, directed=True,
               reciprocity_choice="random", **kwargs):
     '''
@@ -629,19 +977,15 @@ def _circular_directed_recip(node_ids, coord_nb, reciprocity,
                              reciprocity_choice="random", **kwargs):
     ''' Circular graph with given reciprocity '''
     nodes    = len(node_ids)
-    edges    = int(0.5*nodes*coord_nb*(1 + reciprocity))
+    num_e    = int(0.5*nodes*coord_nb*(1 + reciprocity))
     init_deg = int(0.5*coord_nb)
 
-    # sources and targets
-    sources = np.full(edges, -1, dtype=int)
-    targets = np.full(edges, -1, dtype=int)
+    edges = np.empty((num_e, 2), dtype=np.int64)
 
     # set non-reciprocal edges using the full undirected circular graph
-    init_edges = _circular_full(node_ids, coord_nb, False)
-    num_init   = len(init_edges)
+    num_init = nodes*init_deg
 
-    sources[:num_init] = init_edges[:, 0]
-    targets[:num_init] = init_edges[:, 1]
+    edges[:num_init] = _circular_full(node_ids, coord_nb, False)
 
     # then we randomize the direction of these E_init edges
     # this is equivalent to reversing E edges with E from Binom(E_init, 0.5)
@@ -650,53 +994,36 @@ def _circular_directed_recip(node_ids, coord_nb, reciprocity,
 
     chosen = rng.choice(num_init, E, replace=False)
 
-    sources[chosen], targets[chosen] = targets[chosen], sources[chosen]
+    edges[chosen] = edges[chosen, ::-1]
 
-    # set reciprocal edges
-    num_recip = edges - nodes*init_deg
+    # set reciprocal edges (reversed copies of the chosen initial edges)
+    num_recip = num_e - num_init
 
     if num_recip:
         if reciprocity_choice == "random":
-            chosen = rng.choice(nodes*init_deg, size=num_recip, replace=False)
-
-            sources[-num_recip:] = targets[chosen]
-            targets[-num_recip:] = sources[chosen]
+            chosen = rng.choice(num_init, size=num_recip, replace=False)
         elif reciprocity_choice == "closest":
             # closest connections are the first ones, so if
-            # num_recip = k*num_nodes + l then we reverse all first k*num_nodes
-            # then we randomly chose the remaining l
-            remainder = num_recip % num_nodes
+            # num_recip = k*nodes + l then we reverse all first k*nodes
+            # then we randomly chose the remaining l among the next nodes
+            remainder = num_recip % nodes
             rounds    = num_recip - remainder
-            
-            sources[-num_recip:-num_recip + rounds] = targets[:rounds]
-            targets[-num_recip:-num_recip + rounds] = sources[:rounds]
 
-            # chose randomly the remaining connections
-            stop = min(rounds + num_nodes, edges)
-            chosen = rng.choice([i for i in range(rounds, stop)],
-                                size=remainder, replace=False)
+            stop = min(rounds + nodes, num_init)
 
-            sources[-num_recip + rounds:] = targets[chosen]
-            targets[-num_recip + rounds:] = sources[chosen]
+            chosen = np.concatenate((
+                np.arange(rounds, dtype=np.int64),
+                rounds + rng.choice(stop - rounds, size=remainder,
+                                    replace=False)))
         else:
             # deterministic (ordered) closest connections, only for the
-            # lattice rewiring (see function _lattice_shuffle_eattr)
-            # closest connections are the first ones
-            remainder = num_recip % num_nodes
-            rounds    = num_recip - remainder
-
-            sources[-num_recip:-num_recip + rounds] = targets[:rounds]
-            targets[-num_recip:-num_recip + rounds] = sources[:rounds]
-
-            # chose randomly the remaining connections
-            stop = min(rounds + num_nodes, edges)
-            chosen = rng.choice([i for i in range(rounds, stop)],
-                                size=remainder, replace=False)
+            # lattice rewiring (see function _lattice_distance_rank): the
+            # first initial edges get reciprocal connections, in order
+            chosen = np.arange(num_recip, dtype=np.int64)
 
-            sources[-num_recip + rounds:] = targets[chosen]
-            targets[-num_recip + rounds:] = sources[chosen]
+        edges[num_init:] = edges[chosen, ::-1]
 
-    return np.array([sources, targets], dtype=int).T
+    return edges
 
 
 def _circular_full(node_ids, coord_nb, directed, **kwargs):
@@ -707,30 +1034,29 @@ def _circular_full(node_ids, coord_nb, directed, **kwargs):
 
     out_deg = coord_nb if directed else dist
 
-    # create the graph using a continuous range from zero
-    sources = np.tile(np.arange(0, nodes).astype(int), out_deg)
-
-    # prepare conversion dict if nodes do not start from zero or are not
-    # contiguous. Initial generation assumes continuous range from zero
-    convertor = {i: n for i, n in enumerate(node_ids)}
-
     # create the connection mask
     start = -dist if directed else 0
     stop  = dist + 1
 
     conn_mask = np.concatenate((np.arange(start, 0), np.arange(1, stop)))
 
-    # make the targets and put them back into [0, nodes - 1]
-    targets   = np.repeat(conn_mask, nodes) + sources
+    # create the graph using a continuous range from zero, edges are ordered
+    # by offset in the mask, targets are put back into [0, nodes - 1]
+    edges = np.empty((nodes*out_deg, 2), dtype=np.int64)
 
-    targets[targets < 0] += nodes
-    targets[targets >= nodes] -= nodes
+    sources = np.arange(nodes, dtype=np.int64)
 
-    # convert back to ids
-    sources = np.array([convertor[i] for i in sources])
-    targets = np.array([convertor[i] for i in targets])
+    edges[:, 0] = np.tile(sources, out_deg)
+    edges[:, 1] = np.add.outer(conn_mask, sources).ravel() % nodes
 
-    return np.array((sources, targets), dtype=int).T
+    # convert back to ids if nodes do not start from zero or are not
+    # contiguous
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+
+    if not np.array_equal(node_ids, sources):
+        edges = node_ids[edges]
+
+    return edges
 
 
 def _newman_watts(source_ids, target_ids, coord_nb, proba_shortcut,
@@ -774,11 +1100,7 @@ def _newman_watts(source_ids, target_ids, coord_nb, proba_shortcut,
 
     # add the random connections
     num_test, num_ecurrent = 0, circular_edges
-    edges_hash = set(tuple(e) for e in ia_edges[:circular_edges])
-    recip_hash = None
-
-    if not directed:
-        recip_hash = set((tuple(e) for e in ia_edges[:circular_edges, ::-1]))
+    edges_hash = _EdgeSet(directed, ia_edges[:circular_edges])
 
     rng = nngt._rng
 
@@ -788,7 +1110,7 @@ def _newman_watts(source_ids, target_ids, coord_nb, proba_shortcut,
 
         ia_edges, num_ecurrent = _filter(
             ia_edges, chosen.reshape(todo, 2), num_ecurrent, edges_hash,
-            b_one_pop, multigraph, directed=directed, recip_hash=recip_hash)
+            b_one_pop, multigraph)
 
         num_test += 1
 
@@ -930,8 +1252,7 @@ def _distance_rule(source_ids, target_ids, density=None, edges=None,
     Returns a distance-rule graph
     '''
     distance = [] if distance is None else distance
-    edges_hash = set()
-    recip_hash = None if directed else set()
+    edges_hash = _EdgeSet(directed)
 
     # compute the required values
     source_ids = np.array(source_ids).astype(int)
@@ -948,29 +1269,25 @@ def _distance_rule(source_ids, target_ids, density=None, edges=None,
     b_one_pop = _check_num_edges(
         source_ids, target_ids, num_edges, directed, multigraph)
 
-    num_neurons = len(set(np.concatenate((source_ids, target_ids))))
-
-    # for each node, check the neighbours that are in an area where
-    # connections can be made: +/- scale for lin, +/- 10*scale for exp.
-    # Get the sources and associated targets for each MPI process
-    list_targets = []
+    # the neighbours of each source are the targets that are in an area where
+    # connections can be made: +/- scale for lin, +/- 10*scale for exp; they
+    # are found through a spatial index on the target positions
     lim = scale if rule == 'lin' else 10*scale
 
-    for s in source_ids:
-        keep  = (np.abs(positions[0, target_ids] - positions[0, s]) < lim)
-        keep *= (np.abs(positions[1, target_ids] - positions[1, s]) < lim)
-        if b_one_pop:
-            idx = np.where(target_ids == s)[0][0]
-            keep[idx] = 0
-        list_targets.append(target_ids[keep])
+    spatial_index = kwargs.get("spatial_index", None)
+
+    tgt_index = _get_spatial_index(positions, target_ids, spatial_index)
+    src_index = tgt_index
+
+    if not np.array_equal(source_ids, target_ids):
+        src_index = _get_spatial_index(positions, source_ids, spatial_index)
 
     # the number of trials should be done depending on the number of
     # neighbours that each node has, so compute this number
-    tot_neighbours = 0
-    neigh_norm     = 1.
+    tot_neighbours = src_index.count_pairs(tgt_index, lim)
 
-    for tgt_list in list_targets:
-        tot_neighbours += len(tgt_list)
+    if b_one_pop:
+        tot_neighbours -= num_source
 
     if max_proba <= 0:
         assert tot_neighbours > num_edges, \
@@ -978,76 +1295,128 @@ def _distance_rule(source_ids, target_ids, density=None, edges=None,
             "create the required number of connections. Increase `scale` " +\
             "or `neuron_density`."
 
-        neigh_norm = 1. / tot_neighbours
-
     # try to create edges until num_edges is attained
     ia_edges = None
     num_ecurrent = 0
 
     if max_proba <= 0:
         ia_edges = np.full((num_edges, 2), -1, dtype=int)
+
+        # random (source, neighbour) pairs are drawn uniformly, the number of
+        # trials being adapted to the fraction that led to new edges
+        num_trials = min(num_edges, _MAX_TRIALS)
+
         while num_ecurrent < num_edges:
-            trials = []
-            for tgt_list in list_targets:
-                trials.append(max(
-                    int(len(tgt_list)*(num_edges - num_ecurrent)*neigh_norm),
-                    1))
-            edges_tmp = [[], []]
-            dist = []
-            dist_tmp = []
-            total_trials = int(np.sum(trials))
-            local_targets = []
-            local_sources = []
-            current_pos = 0
-            for s, tgts, num_try in zip(source_ids, list_targets, trials):
-                if len(tgts):
-                    t = np.random.randint(0, len(tgts), num_try)
-                    local_targets.extend(tgts[t])
-                    local_sources.extend((s for _ in range(num_try)))
-            local_targets = np.array(local_targets, dtype=int)
-            local_sources = np.array(local_sources, dtype=int)
-            test = dist_rule(rule, scale, positions[:, local_sources],
-                             positions[:, local_targets], dist=dist_tmp)
-            test = np.greater(test, np.random.uniform(size=len(test)))
-            edges_tmp[0].extend(local_sources[test])
-            edges_tmp[1].extend(local_targets[test])
-            dist = np.array(dist_tmp)[test]
-
-            edges_tmp = np.array(edges_tmp).T
-
-            # assess the current number of edges
-            # if we're at the end, we'll make too many edges, so we keep only
-            # the necessary fraction that we pick randomly
-            num_desired = num_edges - num_ecurrent
-            if num_desired < len(edges_tmp):
-                chosen = {}
-                while len(chosen) != num_desired:
-                    idx = np.random.randint(
-                        0, len(edges_tmp), num_desired - len(chosen))
-                    for i in idx:
-                        chosen[i] = None
-                idx = list(chosen.keys())
-                edges_tmp = edges_tmp[idx]
-                dist = dist[idx]
-
-            ia_edges, num_ecurrent = _filter(
+            edges_tmp, dist = _dist_rule_trials(
+                source_ids, target_ids, positions, tgt_index, rule, scale,
+                num_trials)
+
+            num_previous = num_ecurrent
+
+            ia_edges, num_ecurrent = _dist_rule_filter(
                 ia_edges, edges_tmp, num_ecurrent, edges_hash, b_one_pop,
-                multigraph, directed=directed, recip_hash=recip_hash,
-                distance=distance, dist_tmp=dist)
+                multigraph, distance, dist)
+
+            rate = max(num_ecurrent - num_previous, 1) / num_trials
+
+            num_trials = min(int((num_edges - num_ecurrent) / rate) + 1,
+                             _MAX_TRIALS)
     else:
-        sources, targets = [], []
-        for i, s in enumerate(source_ids):
-            local_tgts = np.array(list_targets[i], dtype=int)
-            if len(local_tgts):
-                dist_tmp = []
-                test = max_proba_dist_rule(
-                    rule, scale, max_proba, positions[:, s],
-                    positions[:, local_tgts], dist=dist_tmp)
-                test = np.greater(test, np.random.uniform(size=len(test)))
-                added = np.sum(test)
-                sources.extend((s for _ in range(added)))
-                targets.extend(local_tgts[test])
-                distance.extend(np.array(dist_tmp)[test])
-        ia_edges = np.array([sources, targets]).T
+        # go through the sources by chunks to limit memory usage
+        chunk = max(int(_MAX_TRIALS*num_source / max(tot_neighbours, 1)), 1)
+
+        ia_edges, dist = _dist_rule_max_proba(
+            source_ids, target_ids, positions, tgt_index, rule, scale,
+            max_proba, b_one_pop, chunk)
+
+        distance.extend(dist)
 
     return ia_edges
+
+
+def _dist_rule_trials(source_ids, target_ids, positions, tgt_index, rule,
+                      scale, num_trials):
+    '''
+    Test `num_trials` random (source, neighbour) pairs with the distance rule.
+
+    Returns the accepted edges and their lengths.
+    '''
+    lim = scale if rule == 'lin' else 10*scale
+
+    src, tgt = tgt_index.sample_pairs(positions[:, source_ids].T, lim,
+                                      num_trials)
+
+    local_sources = source_ids[src]
+    local_targets = target_ids[tgt]
+
+    dist_tmp = _distances(positions, local_sources, local_targets)
+    test = _dist_rule_proba(rule, scale, dist_tmp)
+    test = np.greater(test, np.random.uniform(size=len(test)))
+
+    edges = np.array((local_sources[test], local_targets[test])).T
+
+    return edges, dist_tmp[test]
+
+
+def _dist_rule_filter(ia_edges, edges_tmp, num_ecurrent, edges_hash,
+                      b_one_pop, multigraph, distance, dist):
+    '''
+    Add the new edges among `edges_tmp` to `ia_edges`, picking them randomly
+    if there are more than necessary.
+    '''
+    if not multigraph:
+        # remove existing edges before the random selection below
+        keep = ~edges_hash.contains(edges_tmp)
+        edges_tmp = edges_tmp[keep]
+        dist = dist[keep]
+
+    # assess the current number of edges
+    # if we're at the end, we'll make too many edges, so we keep only
+    # the necessary fraction that we pick randomly
+    num_desired = len(ia_edges) - num_ecurrent
+    if num_desired < len(edges_tmp):
+        idx = np.random.choice(len(edges_tmp), num_desired, replace=False)
+        edges_tmp = edges_tmp[idx]
+        dist = dist[idx]
+
+    return _filter(ia_edges, edges_tmp, num_ecurrent, edges_hash, b_one_pop,
+                   multigraph, distance=distance, dist_tmp=dist)
+
+
+def _dist_rule_max_proba(source_ids, target_ids, positions, tgt_index, rule,
+                         scale, max_proba, b_one_pop, chunk):
+    '''
+    Test all (source, neighbour) pairs with the distance rule (with a
+    maximum probability `max_proba`), by chunks of `chunk` sources.
+
+    Returns the accepted edges and their lengths.
+    '''
+    lim = scale if rule == 'lin' else 10*scale
+
+    pos_sources = positions[:, source_ids].T
+
+    sources, targets, dist = [], [], []
+
+    for i in range(0, len(source_ids), chunk):
+        indptr, indices = tgt_index.neighbours(pos_sources[i:i + chunk], lim)
+
+        local_sources = np.repeat(source_ids[i:i + chunk], np.diff(indptr))
+        local_targets = target_ids[indices]
+
+        if b_one_pop:
+            keep = local_sources != local_targets
+            local_sources = local_sources[keep]
+            local_targets = local_targets[keep]
+
+        dist_tmp = _distances(positions, local_sources, local_targets)
+        test = max_proba*_dist_rule_proba(rule, scale, dist_tmp)
+        test = np.greater(test, np.random.uniform(size=len(test)))
+        sources.append(local_sources[test])
+        targets.append(local_targets[test])
+        dist.append(dist_tmp[test])
+
+    edges = np.array(
+        [np.concatenate(sources), np.concatenate(targets)], dtype=int).T
+
+    return edges, np.concatenate(dist)
+
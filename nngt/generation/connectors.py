@@ -99,6 +99,7 @@ def connect_nodes(network, sources, targets, graph_model, density=None,
     '''
     if network.is_spatial() and 'positions' not in kwargs:
         kwargs['positions'] = network.get_positions().astype(np.float32).T
+        kwargs['spatial_index'] = network._spatial_index()
     if network.is_spatial() and 'shape' not in kwargs:
         kwargs['shape'] = network.shape
 
@@ -194,6 +195,7 @@ def connect_neural_types(network, source_type, target_type, graph_model,
 
     if network.is_spatial() and 'positions' not in kwargs:
         kwargs['positions'] = network.get_positions().astype(np.float32).T
+        kwargs['spatial_index'] = network._spatial_index()
 
     if network.is_spatial() and 'shape' not in kwargs:
         kwargs['shape'] = network.shape
@@ -279,6 +281,7 @@ def connect_groups(network, source_groups, target_groups, graph_model,
     if network.is_spatial():
         if 'positions' not in kwargs:
             kwargs['positions'] = network.get_positions().astype(np.float32).T
+            kwargs['spatial_index'] = network._spatial_index()
         if 'shape' not in kwargs:
             kwargs['shape'] = network.shape
 
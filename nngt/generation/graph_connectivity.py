@@ -53,7 +53,7 @@ __all__ = [
 
 from .connect_algorithms import *
 
-# try to import multithreaded or mpi algorithms
+# try to import multithreaded, multiprocessing, or mpi algorithms
 
 using_mt_algorithms = False
 
@@ -102,6 +102,9 @@ if nngt.get_config("multithreading"):
                 "Cython import failed, using non-multithreaded algorithms.")
             nngt._config['multithreading'] = False
 
+if nngt.get_config("processes") > 1:
+    from .mp_connect import *
+
 if nngt.get_config("mpi"):
     try:
         from .mpi_connect import *
@@ -1076,6 +1079,8 @@ def distance_rule(scale, rule="exp", shape=None, neuron_density=1000.,
     conversion_factor = conversion_magnitude(shape.unit, unit)
     if unit != shape.unit:
         positions = np.multiply(conversion_factor, positions, dtype=np.float32)
+    else:
+        kwargs["spatial_index"] = graph_dr._spatial_index()
     if nodes > 1:
         ids = np.arange(0, nodes, dtype=np.uint)
         ia_edges = _distance_rule(
@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+#
+# This file is part of the NNGT project to generate and analyze
+# neuronal networks and their activity.
+# Copyright (C) 2015-2019  Tanguy Fardet
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Generation tools for NNGT using a pool of processes.
+
+The source nodes are split into one contiguous shard per process; each worker
+generates the edges of its shard with its own random stream (spawned from
+``nngt._rng``) and returns them through shared memory.
+"""
+
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import nngt
+from nngt.lib.connect_tools import *
+from . import connect_algorithms
+from .connect_algorithms import *
+from .connect_algorithms import (_MAX_TRIALS, _dist_rule_filter,
+                                 _dist_rule_max_proba, _dist_rule_trials,
+                                 _gaussian_degree_list, _random_edges)
+
+
+# only the generators that are parallelized here, the others are kept from
+# the serial (compiled or pure Python) modules
+__all__ = [
+    "_distance_rule",
+    "_erdos_renyi",
+    "_fixed_degree",
+    "_from_degree_list",
+    "_gaussian_degree",
+]
+
+
+# maximum number of possible edges for which the number of edges of each
+# shard is drawn from a multivariate hypergeometric distribution (numpy limit)
+_MAX_HYPERGEOM = 1000000000
+
+# data shared with the workers of the current pool
+_worker_data = {}
+
+
+# ---------------------- #
+# Graph model generation #
+# ---------------------- #
+
+def _from_degree_list(source_ids, target_ids, degree_list, degree_type="in",
+                      directed=True, multigraph=False, existing_edges=None,
+                      **kwargs):
+    ''' Connect nodes from a list of degrees '''
+    degree_type = _set_degree_type(degree_type)
+
+    if not directed or degree_type == "total":
+        # degrees are coupled, use the serial algorithm
+        return _serial("_from_degree_list")(
+            source_ids, target_ids, degree_list, degree_type=degree_type,
+            directed=directed, multigraph=multigraph,
+            existing_edges=existing_edges, **kwargs)
+
+    assert len(degree_list) == len(source_ids), \
+        "One degree per source neuron must be provided."
+
+    source_ids  = np.array(source_ids).astype(int)
+    target_ids  = np.array(target_ids).astype(int)
+    degree_list = np.array(degree_list).astype(int)
+
+    _check_num_edges(source_ids, target_ids, np.sum(degree_list), directed,
+                     multigraph)
+
+    idx = 0 if degree_type == "out" else 1
+
+    tasks = []
+
+    for shard in _shards(len(source_ids)):
+        existing = None
+
+        if existing_edges is not None:
+            local    = np.isin(existing_edges[:, idx], source_ids[shard])
+            existing = existing_edges[local]
+
+        tasks.append((source_ids[shard], target_ids, degree_list[shard],
+                      degree_type, multigraph, existing))
+
+    with _pool() as pool:
+        return _run(pool, _degree_shard, tasks)[0]
+
+
+def _fixed_degree(source_ids, target_ids, degree, degree_type="in",
+                  reciprocity=-1, directed=True, multigraph=False,
+                  existing_edges=None, **kwargs):
+    ''' Connect nodes with a delta distribution '''
+    degree = int(degree)
+    assert degree >= 0, "A positive value is required for `degree`."
+
+    lst_deg = np.full(len(source_ids), degree, dtype=int)
+
+    return _from_degree_list(
+        source_ids, target_ids, lst_deg, degree_type=degree_type,
+        directed=directed, multigraph=multigraph,
+        existing_edges=existing_edges, **kwargs)
+
+
+def _gaussian_degree(source_ids, target_ids, avg, std, degree_type="in",
+                     directed=True, multigraph=False, existing_edges=None,
+                     **kwargs):
+    ''' Connect nodes with a Gaussian distribution '''
+    degrees = _gaussian_degree_list(len(source_ids), avg, std, degree_type,
+                                    directed)
+
+    return _from_degree_list(
+        source_ids, target_ids, degrees, degree_type=degree_type,
+        directed=directed, multigraph=multigraph,
+        existing_edges=existing_edges, **kwargs)
+
+
+def _erdos_renyi(source_ids, target_ids, density=None, edges=None,
+                 avg_deg=None, reciprocity=-1, directed=True, multigraph=False,
+                 **kwargs):
+    '''
+    Returns a numpy array of dimension (2,edges) that describes the edge list
+    of an Erdos-Renyi graph.
+    '''
+    if not directed or reciprocity > 0:
+        # edges from different shards can collide, use the serial algorithm
+        return _serial("_erdos_renyi")(
+            source_ids, target_ids, density=density, edges=edges,
+            avg_deg=avg_deg, reciprocity=reciprocity, directed=directed,
+            multigraph=multigraph, **kwargs)
+
+    source_ids = np.array(source_ids).astype(int)
+    target_ids = np.array(target_ids).astype(int)
+    num_source, num_target = len(source_ids), len(target_ids)
+    edges, _ = _compute_connections(num_source, num_target, density, edges,
+                                    avg_deg, directed)
+
+    b_one_pop = _check_num_edges(
+        source_ids, target_ids, edges, directed, multigraph)
+
+    # the edges are uniformly distributed among the possible edges, which
+    # gives the number of edges of each shard
+    shards = _shards(num_source)
+
+    possible = np.array(
+        [len(source_ids[s])*(num_target - b_one_pop) for s in shards])
+
+    num_edges = _split_edges(edges, possible, multigraph)
+
+    tasks = [(source_ids[s], target_ids, n, b_one_pop, multigraph)
+             for s, n in zip(shards, num_edges)]
+
+    with _pool() as pool:
+        return _run(pool, _erdos_renyi_shard, tasks)[0]
+
+
+def _distance_rule(source_ids, target_ids, density=None, edges=None,
+                   avg_deg=None, scale=-1, rule="exp", max_proba=-1,
+                   shape=None, positions=None, directed=True, multigraph=False,
+                   distance=None, **kwargs):
+    '''
+    Returns a distance-rule graph
+    '''
+    distance = [] if distance is None else distance
+    edges_hash = _EdgeSet(directed)
+
+    # compute the required values
+    source_ids = np.array(source_ids).astype(int)
+    target_ids = np.array(target_ids).astype(int)
+
+    num_source, num_target = len(source_ids), len(target_ids)
+    num_edges = 0
+
+    if max_proba <= 0:
+        num_edges, _ = _compute_connections(
+            num_source, num_target, density, edges, avg_deg, directed,
+            reciprocity=-1)
+
+    b_one_pop = _check_num_edges(
+        source_ids, target_ids, num_edges, directed, multigraph)
+
+    lim = scale if rule == 'lin' else 10*scale
+
+    spatial_index = kwargs.get("spatial_index", None)
+
+    tgt_index = _get_spatial_index(positions, target_ids, spatial_index)
+    src_index = tgt_index
+
+    if not np.array_equal(source_ids, target_ids):
+        src_index = _get_spatial_index(positions, source_ids, spatial_index)
+
+    tot_neighbours = src_index.count_pairs(tgt_index, lim)
+
+    if b_one_pop:
+        tot_neighbours -= num_source
+
+    shards = _shards(num_source)
+
+    # the index is filled before starting the pool so that the workers
+    # inherit its tree and grid
+    data = {
+        "positions": positions,
+        "source_ids": source_ids,
+        "target_ids": target_ids,
+        "index": tgt_index,
+    }
+
+    if max_proba > 0:
+        chunk = max(int(_MAX_TRIALS*num_source / max(tot_neighbours, 1)), 1)
+
+        tasks = [(s, rule, scale, max_proba, b_one_pop, chunk)
+                 for s in shards]
+
+        with _pool(data) as pool:
+            ia_edges, dist = _run(pool, _max_proba_shard, tasks)
+
+        distance.extend(dist)
+
+        return ia_edges
+
+    assert tot_neighbours > num_edges, \
+        "Scale is too small: there are not enough close neighbours to " +\
+        "create the required number of connections. Increase `scale` " +\
+        "or `neuron_density`."
+
+    # trials are split between the shards in proportion to the pools where
+    # their targets are drawn, which keeps the pairs uniformly distributed
+    pools   = tgt_index.pool_sizes(positions[:, source_ids].T, lim)
+    weights = np.array([np.sum(pools[s]) for s in shards], dtype=float)
+    weights /= weights.sum()
+
+    ia_edges     = np.full((num_edges, 2), -1, dtype=int)
+    num_ecurrent = 0
+    num_trials   = min(num_edges, _MAX_TRIALS)
+
+    with _pool(data) as pool:
+        while num_ecurrent < num_edges:
+            trials = np.random.multinomial(num_trials, weights)
+            tasks  = [(s, rule, scale, n) for s, n in zip(shards, trials)]
+
+            edges_tmp, dist = _run(pool, _trials_shard, tasks)
+
+            num_previous = num_ecurrent
+
+            ia_edges, num_ecurrent = _dist_rule_filter(
+                ia_edges, edges_tmp, num_ecurrent, edges_hash, b_one_pop,
+                multigraph, distance, dist)
+
+            rate = max(num_ecurrent - num_previous, 1) / num_trials
+
+            num_trials = min(int((num_edges - num_ecurrent) / rate) + 1,
+                             _MAX_TRIALS)
+
+    return ia_edges
+
+
+# ------------- #
+# Shard workers #
+# ------------- #
+
+def _degree_shard(source_ids, target_ids, degrees, degree_type, multigraph,
+                  existing_edges):
+    ''' Edges of the nodes of a shard with given in- or out-degrees '''
+    return (connect_algorithms._from_degree_list(
+        source_ids, target_ids, degrees, degree_type=degree_type,
+        directed=True, multigraph=multigraph, existing_edges=existing_edges),)
+
+
+def _erdos_renyi_shard(source_ids, target_ids, num_edges, b_one_pop,
+                       multigraph):
+    ''' Random edges from the sources of a shard '''
+    ia_edges, num_ecurrent, _ = _random_edges(
+        source_ids, target_ids, num_edges, b_one_pop, True, multigraph)
+
+    return (ia_edges[:num_ecurrent],)
+
+
+def _trials_shard(shard, rule, scale, num_trials):
+    ''' Distance-rule trials from the sources of a shard '''
+    return _dist_rule_trials(
+        _worker_data["source_ids"][shard], _worker_data["target_ids"],
+        _worker_data["positions"], _worker_data["index"], rule, scale,
+        num_trials)
+
+
+def _max_proba_shard(shard, rule, scale, max_proba, b_one_pop, chunk):
+    ''' Distance-rule edges from the sources of a shard with `max_proba` '''
+    return _dist_rule_max_proba(
+        _worker_data["source_ids"][shard], _worker_data["target_ids"],
+        _worker_data["positions"], _worker_data["index"], rule, scale,
+        max_proba, b_one_pop, chunk)
+
+
+# ----- #
+# Tools #
+# ----- #
+
+def _serial(name):
+    '''
+    Serial generator `name`, from the compiled module if multithreading is
+    enabled and it provides this generator.
+    '''
+    if nngt.get_config("multithreading"):
+        try:
+            from . import cconnect
+
+            if name in cconnect.__all__:
+                return getattr(cconnect, name)
+        except ImportError:
+            pass
+
+    return getattr(connect_algorithms, name)
+
+
+def _shards(num_nodes):
+    ''' Split the nodes into one contiguous slice per process '''
+    bounds = np.linspace(0, num_nodes, nngt._config["processes"] + 1)
+    bounds = bounds.astype(int)
+
+    return [slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _split_edges(num_edges, possible, multigraph):
+    '''
+    Split `num_edges` edges, uniformly distributed, between shards containing
+    `possible` possible edges.
+    '''
+    rng = nngt._rng
+
+    if not multigraph and possible.sum() < _MAX_HYPERGEOM:
+        return rng.multivariate_hypergeometric(possible, num_edges)
+
+    # multinomial approximation, ignoring that edges are unique (the
+    # difference is negligible for sparse graphs), then make sure that no
+    # shard receives more edges than it can contain
+    counts = rng.multinomial(num_edges, possible / possible.sum())
+
+    if not multigraph:
+        excess = np.sum(np.maximum(counts - possible, 0))
+
+        while excess:
+            counts = np.minimum(counts, possible)
+            free   = possible - counts
+            counts += rng.multinomial(excess, free / free.sum())
+            excess = np.sum(np.maximum(counts - possible, 0))
+
+    return counts
+
+
+def _pool(data=None):
+    '''
+    Process pool with ``nngt.get_config("processes")`` workers, `data` being
+    available to the workers through `_worker_data`.
+    '''
+    # start the tracker of the shared memory blocks before the workers so
+    # that they all use the one of the main process
+    resource_tracker.ensure_running()
+
+    return get_context().Pool(nngt._config["processes"],
+                              initializer=_init_worker, initargs=(data,))
+
+
+def _init_worker(data):
+    _worker_data.clear()
+
+    if data is not None:
+        _worker_data.update(data)
+
+
+def _run(pool, func, tasks):
+    '''
+    Call ``func(*task)`` for each task on the pool, each call using its own
+    random stream, and concatenate the arrays that it returns.
+    '''
+    entropy = nngt._rng.integers(2**63)
+    seeds   = np.random.SeedSequence(entropy).spawn(len(tasks))
+
+    results = pool.starmap(
+        _call_worker, [(func, seed, task) for seed, task in zip(seeds, tasks)])
+
+    return _gather(results)
+
+
+def _call_worker(func, seed, args):
+    ''' Seed the random generators, then call `func` '''
+    nngt._rng = np.random.default_rng(seed)
+    np.random.seed(seed.generate_state(1)[0])
+
+    return _share(func(*args))
+
+
+def _share(arrays):
+    ''' Copy the arrays to shared memory, return the block descriptions '''
+    blocks = []
+
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+
+        blocks.append((shm.name, arr.shape, arr.dtype.str))
+
+        shm.close()
+
+    return blocks
+
+
+def _gather(results):
+    '''
+    Concatenate the arrays returned by the workers (in the order of the
+    tasks) and free the shared memory.
+    '''
+    merged = []
+
+    for blocks in zip(*results):
+        shms = [SharedMemory(name=name) for name, _, _ in blocks]
+
+        try:
+            merged.append(np.concatenate(
+                [np.ndarray(shape, dtype, buffer=shm.buf)
+                 for shm, (_, shape, dtype) in zip(shms, blocks)]))
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+
+    return merged
@@ -202,7 +202,7 @@ def _distance_rule(source_ids, target_ids, density=-1, edges=-1, avg_deg=-1,
 
     distance     = [] if distance is None else distance
     distance_tmp = []
-    edges_hash   = set()
+    edges_hash   = _EdgeSet(directed)
 
     # mpi-related stuff
     comm, size, rank = _mpi_and_random_init()
@@ -221,16 +221,19 @@ def _distance_rule(source_ids, target_ids, density=-1, edges=-1, avg_deg=-1,
     # for each node, check the neighbours that are in an area where
     # connections can be made: ± scale for lin, ± 10*scale for exp.
     # Get the sources and associated targets for each MPI process
-    sources = []
-    targets = []
     lim = scale if rule == 'lin' else 10*scale
-    for s in source_ids[rank::size]:
-        keep  = (np.abs(positions[0, target_ids] - positions[0, s]) < lim)
-        keep *= (np.abs(positions[1, target_ids] - positions[1, s]) < lim)
-        if b_one_pop:
-            keep[s] = 0
-        sources.append(s)
-        targets.append(target_ids[keep])
+
+    tgt_index = _get_spatial_index(positions, target_ids,
+                                   kwargs.get("spatial_index", None))
+
+    sources = source_ids[rank::size]
+
+    indptr, indices = tgt_index.neighbours(positions[:, sources].T, lim)
+
+    targets = np.split(target_ids[indices], indptr[1:-1])
+
+    if b_one_pop:
+        targets = [tgts[tgts != s] for s, tgts in zip(sources, targets)]
 
     # the number of trials should be done depending on total number of
     # neighbours available, so we compute this number
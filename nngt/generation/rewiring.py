@@ -22,12 +22,15 @@
 """ Rewiring functions """
 
 from copy import deepcopy
+import logging
 
 import numpy as np
+import scipy.sparse as ssp
 
 import nngt
 from nngt.generation import graph_connectivity as gc
 from nngt.lib import nonstring_container
+from nngt.lib.logger import _log_message
 
 
 __all__ = [
@@ -36,6 +39,9 @@ __all__ = [
 ]
 
 
+logger = logging.getLogger(__name__)
+
+
 def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
                    edge_attr_constraints=None,  weight=None,
                    weight_constraint="distance", distance_sort="inverse"):
@@ -61,6 +67,9 @@ def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
     target_reciprocity : float, optional (default: 1.)
         Value of reciprocity that should be aimed at. Depending on the number
         of edges, it may not be possible to reach this value exactly.
+        For directed graphs, low reciprocities are only possible on sparse
+        enough graphs (a ValueError is raised if the lattice edges would
+        overlap).
     node_attr_constraints : str, optional (default: randomize all attributes)
         Whether attribute randomization is constrained: either "preserve",
         where all nodes keep their attributes, or "together", where attributes
@@ -122,7 +131,7 @@ def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
         raise ValueError("`distance_sort` must be either 'linear' or "
                          "'inverse'.")
 
-    if directed and target_reciprocity != 1:
+    if not directed and target_reciprocity != 1:
         raise ValueError("Reciprocity is always 1 for undirected graphs.")
 
     # init graph and edges
@@ -154,36 +163,43 @@ def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
     e_remaining = num_edges - e_reglat
 
     if e_remaining:
-        last_edges = np.full((e_remaining, 2), -1, dtype=np.int64)
+        last_edges = ia_edges[e_reglat:]
 
         # new connections are one step above the max regular lattice distance
         dist = int(0.5*coord_nb) + 1
 
-        if directed:
-            # make reciprocal edges
-            num_recip  = int(0.5*target_reciprocity*e_remaining)
+        # make reciprocal edges (directed only), each followed by the others
+        num_recip = int(0.5*target_reciprocity*e_remaining) if directed else 0
 
-            if num_recip:
-                last_edges[:num_recip] = \
-                    [(i, i + dist) for i in range(num_recip)]
+        # sources of the edges: reciprocal couples come first, then the
+        # remaining non-reciprocal edges; if there are more than num_nodes,
+        # the sources wrap around and the next round uses the next distance
+        sources = np.arange(e_remaining - num_recip, dtype=np.int64)
+        dists   = dist + sources // num_nodes
+        sources = sources % num_nodes
 
-                last_edges[num_recip:2*num_recip] = \
-                    last_edges[:num_recip, ::-1]
+        last_edges[:num_recip, 0] = sources[:num_recip]
+        last_edges[num_recip:2*num_recip, 1] = sources[:num_recip]
+        last_edges[2*num_recip:, 0] = sources[num_recip:]
 
-            # make remaning non-reciprocal edges
-            e_final = e_remaining - 2*num_recip
+        # put targets back into [0, num_nodes[
+        targets = (sources + dists) % num_nodes
 
-            if e_final:
-                last_edges[2*num_recip:] = \
-                    [(i, i + dist) for i in range(num_recip,
-                                                  num_recip + e_final)]
-        else:
-            last_edges[:] = [(i, i + dist) for i in range(e_remaining)]
+        last_edges[:num_recip, 1] = targets[:num_recip]
+        last_edges[num_recip:2*num_recip, 0] = targets[:num_recip]
+        last_edges[2*num_recip:, 1] = targets[num_recip:]
 
-        # put nodes back into [0, num_nodes[
-        last_edges[last_edges >= num_nodes] -= num_nodes
+    # dense directed graphs with low reciprocity do not fit in the lattice:
+    # the distances exceed half the circle and the edges overlap
+    if directed:
+        keys = ia_edges[:, 0]*num_nodes + ia_edges[:, 1]
 
-        ia_edges[e_reglat:] = last_edges
+        if (np.any(ia_edges[:, 0] == ia_edges[:, 1])
+                or len(np.unique(keys)) < num_edges):
+            raise ValueError(
+                "The graph is too dense to make a lattice with the requested "
+                "reciprocity without duplicate edges; increase "
+                "`target_reciprocity` or reduce the number of edges.")
 
     # add the edges
     new_graph.new_edges(ia_edges, check_duplicates=False,
@@ -192,14 +208,17 @@ def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
     # set the node attributes
     _set_node_attributes(g, new_graph, node_attr_constraints, num_nodes)
 
-    # edge attributes
+    # edge attributes: the rank of the edges by distance is shared by all the
+    # attributes sorted by distance
+    rank = _lattice_distance_rank(num_nodes, num_edges, e_reglat, coord_nb,
+                                  target_reciprocity, directed)
+
     order = None
 
     # start with the weight
     if weight is not None:
         order = _lattice_shuffle_eattr(
-            weight, g, new_graph, coord_nb, target_reciprocity,
-            weight_constraint, distance_sort)
+            weight, g, new_graph, rank, weight_constraint, distance_sort)
 
     for eattr in g.edge_attributes:
         if eattr != weight:
@@ -207,19 +226,24 @@ def lattice_rewire(g, target_reciprocity=1., node_attr_constraints=None,
                         else edge_attr_constraints)
 
             order = _lattice_shuffle_eattr(
-                eattr, g, new_graph, coord_nb, target_reciprocity,
-                ordering, distance_sort)
+                eattr, g, new_graph, rank, ordering, distance_sort)
 
     return new_graph
 
 
 def random_rewire(g, constraints=None, node_attr_constraints=None,
-                  edge_attr_constraints=None):
+                  edge_attr_constraints=None, swaps_per_edge=10,
+                  target_clustering=None, clustering_type="global",
+                  tolerance=1e-3, max_swaps=None):
     '''
     Generate a new rewired graph from `g`.
 
     .. versionadded:: 2.0
 
+    .. versionchanged:: 2.3
+        Added the "all-degrees" and "clustering" constraints and the
+        associated arguments.
+
     Parameters
     ----------
     g : :class:`~nngt.Graph`
@@ -238,13 +262,45 @@ def random_rewire(g, constraints=None, node_attr_constraints=None,
     edge_attr_constraints : str, optional (default: randomize all attributes)
         Whether attribute randomization is constrained.
         If `constraints` is "in-degree" (respectively "out-degree") or
-        "degrees", this can be "preserve_in" (respectively "preserve_out"),
+        "all-degrees", this can be "preserve_in" (respectively "preserve_out"),
         in which case all attributes of a given edge are moved together to a
         new incoming (respectively outgoing) edge of the same node.
         Regardless of `constraints`, "together" can be used so that edges
         attributes are randomized by groups (all attributes of a given edge are
         sent to the same new edge). By default, attributes are completely and
         separately randomized.
+    swaps_per_edge : float, optional (default: 10)
+        Number of successful double-edge swaps per edge used to randomize the
+        graph if `constraints` is "all-degrees" or "clustering".
+    target_clustering : float, optional (default: clustering of `g`)
+        Clustering that should be reached if `constraints` is "clustering".
+    clustering_type : str, optional (default: "global")
+        Clustering that is constrained, either the "global" clustering or the
+        average "local" clustering (binary undirected definitions, see
+        :func:`~nngt.analysis.global_clustering_binary_undirected` and
+        :func:`~nngt.analysis.local_clustering_binary_undirected`).
+    tolerance : float, optional (default: 1e-3)
+        Maximum absolute difference between the clustering of the rewired graph
+        and `target_clustering`.
+    max_swaps : int, optional (default: 10 `swaps_per_edge` times the number
+        of edges)
+        Maximum number of swaps attempted to reach `target_clustering`.
+
+    Note
+    ----
+    With "all-degrees", the graph is randomized by double-edge swaps, which
+    exchange the targets of two edges (a, b) and (c, d) to get (a, d) and
+    (c, b), so that both the in- and out-degrees of all nodes are preserved.
+    Swaps that would create self-loops or multiple edges are rejected.
+
+    With "clustering", which is only available for undirected graphs, the
+    graph is first randomized as for "all-degrees", then additional swaps
+    are only accepted if they bring the clustering closer to (or keep it at
+    the same distance from) `target_clustering`, until it is reached within
+    `tolerance` or `max_swaps` swaps have been attempted.
+    When the clustering must increase, the swaps are proposed so as to close
+    a triangle.
+    Progress is reported through the "INFO" log level.
     '''
     directed  = g.is_directed()
     num_nodes = g.node_nb()
@@ -252,6 +308,10 @@ def random_rewire(g, constraints=None, node_attr_constraints=None,
 
     new_graph = None
 
+    # for "all-degrees", index of the old edge whose target is used by each
+    # new edge (new edges keep the source of the old edge with same index)
+    targets_from = None
+
     if node_attr_constraints not in (None, "preserve", "together"):
         raise ValueError("`node_attr_constraints` must be either None, "
                          "'preserve', or 'together'.")
@@ -276,15 +336,49 @@ def random_rewire(g, constraints=None, node_attr_constraints=None,
         new_graph = gc.erdos_renyi(edges=num_edges, nodes=num_nodes,
                                    directed=directed)
     elif constraints == "all-degrees":
-        raise NotImplementedError("Full degrees constraints is not yet "
-                                  "implemented.")
+        edges, targets_from = _edge_swaps(
+            g.edges_array, num_nodes, directed,
+            int(swaps_per_edge*num_edges), nngt._rng)
+
+        new_graph = nngt.Graph(nodes=num_nodes, directed=directed)
+
+        new_graph.new_edges(edges, check_duplicates=False,
+                            check_self_loops=False, check_existing=False)
     elif "degree" in constraints:
         degrees   = g.get_degrees(constraints)
         new_graph = gc.from_degree_list(degrees, constraints,
                                         directed=directed)
     elif constraints == "clustering":
-        raise NotImplementedError("Rewiring with constrained clustering is "
-                                  "not yet available.")
+        if directed:
+            raise ValueError("Rewiring with constrained clustering is only "
+                             "available for undirected graphs.")
+
+        if clustering_type not in ("global", "local"):
+            raise ValueError("`clustering_type` must be either 'global' or "
+                             "'local'.")
+
+        if target_clustering is None:
+            if clustering_type == "global":
+                target_clustering = \
+                    nngt.analysis.global_clustering_binary_undirected(g)
+            else:
+                target_clustering = np.mean(
+                    nngt.analysis.local_clustering_binary_undirected(g))
+
+        if max_swaps is None:
+            max_swaps = int(10*swaps_per_edge*num_edges)
+
+        edges, _ = _edge_swaps(g.edges_array, num_nodes, directed,
+                               int(swaps_per_edge*num_edges), nngt._rng)
+
+        edges = _clustering_swaps(edges, num_nodes, target_clustering,
+                                  clustering_type, tolerance, max_swaps,
+                                  nngt._rng)
+
+        new_graph = nngt.Graph(nodes=num_nodes, directed=directed)
+
+        new_graph.new_edges(edges, check_duplicates=False,
+                            check_self_loops=False, check_existing=False)
 
     rng = nngt._rng
 
@@ -296,26 +390,14 @@ def random_rewire(g, constraints=None, node_attr_constraints=None,
 
     if edge_attr_constraints == "together":
         rng.shuffle(order)
+    elif targets_from is not None:
+        # new edges keep the source of the old edge with the same index
+        if edge_attr_constraints == "preserve_in" and directed:
+            order = targets_from
     elif edge_attr_constraints == "preserve_in":
-        for i in range(num_nodes):
-            old_edges = g.get_edges(target_node=i)
-            new_edges = new_graph.get_edges(target_node=i)
-
-            if len(new_edges):
-                old_ids = g.edge_id(old_edges)
-                new_ids = new_graph.edge_id(new_edges)
-
-                order[new_ids] = old_ids
+        order = _endpoint_order(g.edges_array, new_graph.edges_array, 1)
     elif edge_attr_constraints == "preserve_out":
-        for i in range(num_nodes):
-            old_edges = g.get_edges(source_node=i)
-            new_edges = new_graph.get_edges(source_node=i)
-
-            if len(new_edges):
-                old_ids = g.edge_id(old_edges)
-                new_ids = new_graph.edge_id(new_edges)
-
-                order[new_ids] = old_ids
+        order = _endpoint_order(g.edges_array, new_graph.edges_array, 0)
 
     for k in g.edge_attributes:
         v = deepcopy(g.get_edge_attributes(name=k))
@@ -366,8 +448,413 @@ def _set_node_attributes(old_graph, new_graph, constraints, num_nodes):
         new_graph.new_node_attribute(k, dtype, values=values)
 
 
-def _lattice_shuffle_eattr(name, old_graph, new_graph, coord_nb,
-                           target_recip, order, distance_sort):
+def _endpoint_order(old_edges, new_edges, col):
+    '''
+    Permutation mapping the new edges to the old edges sharing the same
+    preserved endpoint (source if `col` is 0, target if `col` is 1).
+
+    Both edge lists are stably sorted by the preserved endpoint, so that the
+    segments associated to each node are aligned (the degrees of the
+    preserved endpoints are the same in both graphs) and the k-th new edge
+    of a node receives the k-th old edge of that node, in edge id order.
+    '''
+    old_sort = np.argsort(old_edges[:, col], kind="stable")
+    new_sort = np.argsort(new_edges[:, col], kind="stable")
+
+    order = np.empty(len(new_edges), dtype=np.int64)
+
+    order[new_sort] = old_sort
+
+    return order
+
+
+def _edge_swaps(edges, num_nodes, directed, num_swaps, rng):
+    '''
+    Randomize a graph while keeping its degrees through batched double-edge
+    swaps.
+
+    At each step, the edges are randomly paired and each pair (a, b),
+    (c, d) is proposed to become (a, d), (c, b).
+    Proposals creating self-loops, existing edges, or edges that are also
+    created by another proposal of the same step are rejected; the existing
+    edges are found through a sorted index of the edges packed into single
+    integer keys.
+    For undirected graphs, one edge of each pair is randomly reversed first
+    so that both possible swaps are proposed.
+
+    Parameters
+    ----------
+    edges : array of shape (E, 2)
+        Edges of the graph.
+    num_nodes : int
+        Number of nodes in the graph.
+    directed : bool
+        Whether the graph is directed.
+    num_swaps : int
+        Number of successful swaps to perform.
+    rng : :class:`numpy.random.Generator`
+        Random number generator.
+
+    Returns
+    -------
+    edges : array of shape (E, 2)
+        The new edges.
+    targets_from : array of size E
+        Index of the old edge whose target is used by each new edge.
+    '''
+    sources = np.array(edges[:, 0], dtype=np.int64)
+    targets = np.array(edges[:, 1], dtype=np.int64)
+
+    num_edges    = len(sources)
+    targets_from = np.arange(num_edges, dtype=int)
+
+    # batches use half the edges, leaving room for conflicts
+    num_pairs = num_edges // 4 if num_edges >= 4 else num_edges // 2
+
+    if num_pairs == 0:
+        return np.array([sources, targets]).T, targets_from
+
+    def keys(s, t):
+        if directed:
+            return s*num_nodes + t
+
+        return np.minimum(s, t)*num_nodes + np.maximum(s, t)
+
+    index = np.sort(keys(sources, targets))
+
+    accepted, proposed = 0, 0
+    max_proposals = 100*num_swaps
+
+    while accepted < num_swaps and proposed < max_proposals:
+        chosen = rng.choice(num_edges, size=2*num_pairs, replace=False)
+        e1, e2 = chosen[:num_pairs], chosen[num_pairs:]
+
+        if not directed:
+            # reversing an undirected edge does not change the graph
+            flip = rng.random(num_pairs) < 0.5
+            rev  = e2[flip]
+
+            sources[rev], targets[rev] = targets[rev], sources[rev].copy()
+
+        # self-loops
+        valid = (sources[e1] != targets[e2]) & (sources[e2] != targets[e1])
+
+        # existing edges and edges created by several proposals, found
+        # from the sorted keys of the new edges (sorted queries are also
+        # much faster to search in the index)
+        new_keys = np.concatenate((keys(sources[e1], targets[e2]),
+                                   keys(sources[e2], targets[e1])))
+
+        order  = np.argsort(new_keys)
+        sorted_keys = new_keys[order]
+
+        pos = np.minimum(np.searchsorted(index, sorted_keys), num_edges - 1)
+
+        invalid = index[pos] == sorted_keys
+
+        same = sorted_keys[1:] == sorted_keys[:-1]
+        invalid[1:]  |= same
+        invalid[:-1] |= same
+
+        rejected = np.empty(2*num_pairs, dtype=bool)
+        rejected[order] = invalid
+
+        valid &= ~(rejected[:num_pairs] | rejected[num_pairs:])
+
+        e1, e2 = e1[valid], e2[valid]
+
+        # update the index: remove the old keys and merge the new ones
+        removed = np.sort(np.concatenate((keys(sources[e1], targets[e1]),
+                                          keys(sources[e2], targets[e2]))))
+
+        index = np.delete(index, np.searchsorted(index, removed))
+
+        # swap the targets
+        targets[e1], targets[e2] = targets[e2], targets[e1].copy()
+        targets_from[e1], targets_from[e2] = \
+            targets_from[e2], targets_from[e1].copy()
+
+        added = np.sort(np.concatenate((keys(sources[e1], targets[e1]),
+                                        keys(sources[e2], targets[e2]))))
+
+        # the stable sort merges the two sorted runs in linear time
+        index = np.sort(np.concatenate((index, added)), kind="stable")
+
+        accepted += len(e1)
+        proposed += num_pairs
+
+    if accepted < num_swaps:
+        _log_message(logger, "WARNING",
+                     "Only {} swaps out of {} could be performed.".format(
+                        accepted, num_swaps))
+
+    return np.array([sources, targets]).T, targets_from
+
+
+def _clustering_swaps(edges, num_nodes, target, clustering_type, tolerance,
+                      max_swaps, rng):
+    '''
+    Drive the clustering of an undirected graph towards `target` through
+    double-edge swaps, keeping the degrees.
+
+    The number of triangles of each node is updated incrementally: removing
+    or adding an edge (u, v) only changes the triangles formed with the
+    common neighbours of `u` and `v`, so a swap only requires four
+    intersections of neighbour sets.
+    Swaps moving the clustering away from `target` are reverted.
+
+    Parameters
+    ----------
+    edges : array of shape (E, 2)
+        Edges of the graph.
+    num_nodes : int
+        Number of nodes in the graph.
+    target : float
+        Target clustering.
+    clustering_type : str
+        Either "global" or "local" (average local clustering).
+    tolerance : float
+        Absolute tolerance on the clustering.
+    max_swaps : int
+        Maximum number of attempted swaps.
+    rng : :class:`numpy.random.Generator`
+        Random number generator.
+
+    Returns
+    -------
+    edges : array of shape (E, 2)
+        The new edges.
+    '''
+    num_edges = len(edges)
+
+    # neighbours and initial triangles of each node
+    adj = ssp.coo_matrix(
+        (np.ones(num_edges), (edges[:, 0], edges[:, 1])),
+        shape=(num_nodes, num_nodes)).tocsr()
+
+    adj = adj + adj.T
+
+    degrees   = np.diff(adj.indptr)
+    triangles = (np.asarray((adj @ adj).multiply(adj).sum(axis=1)).ravel()
+                 / 2).astype(int).tolist()
+
+    neighbours = [set(adj.indices[adj.indptr[i]:adj.indptr[i + 1]].tolist())
+                  for i in range(num_nodes)]
+
+    # contribution of the triangles of each node to the clustering, which is
+    # sum(weights * triangles) since the degrees are constant
+    triplets = 0.5*degrees*(degrees - 1)
+
+    if clustering_type == "global":
+        weights = np.full(num_nodes, 1. / max(np.sum(triplets), 1.))
+    else:
+        with np.errstate(divide="ignore"):
+            weights = np.where(triplets > 0, 1. / (triplets*num_nodes), 0.)
+
+    weights = weights.tolist()
+
+    clustering = float(np.dot(weights, triangles))
+
+    def update(u, v, add):
+        ''' Add or remove (u, v), return the change in clustering '''
+        if add:
+            common = neighbours[u] & neighbours[v]
+            neighbours[u].add(v)
+            neighbours[v].add(u)
+        else:
+            neighbours[u].discard(v)
+            neighbours[v].discard(u)
+            common = neighbours[u] & neighbours[v]
+
+        sign = 1 if add else -1
+        num  = sign*len(common)
+
+        triangles[u] += num
+        triangles[v] += num
+
+        delta = num*(weights[u] + weights[v])
+
+        for w in common:
+            triangles[w] += sign
+            delta += sign*weights[w]
+
+        return delta
+
+    edges = edges.tolist()
+
+    # slot of each edge in `edges`
+    slots = {(min(e), max(e)): i for i, e in enumerate(edges)}
+
+    chunk    = 10000
+    attempts = 0
+    accepted = 0
+    report   = max(max_swaps // 10, 1)
+
+    while abs(clustering - target) > tolerance and attempts < max_swaps:
+        # draw the random numbers by chunks
+        draws = rng.random((chunk, 5)).tolist()
+
+        for u1, u2, u3, u4, u5 in draws:
+            if abs(clustering - target) <= tolerance or attempts >= max_swaps:
+                break
+
+            attempts += 1
+
+            if attempts % report == 0:
+                _log_message(
+                    logger, "INFO",
+                    "Clustering rewiring: {} swaps attempted, {} accepted, "
+                    "clustering {:.4f} (target {:.4f}).".format(
+                        attempts, accepted, clustering, target))
+
+            i = int(u1*num_edges)
+            a, b = edges[i] if u2 < 0.5 else edges[i][::-1]
+
+            if clustering < target:
+                # propose to close a triangle a - x - d by replacing (a, b)
+                # and an edge (d, c) by (a, d) and (c, b)
+                x = _random_element(neighbours[a], u3)
+                d = _random_element(neighbours[x], u4)
+                c = _random_element(neighbours[d], u5)
+
+                j = slots[(min(c, d), max(c, d))]
+            else:
+                # random swap
+                j = int(u3*num_edges)
+                c, d = edges[j] if u4 < 0.5 else edges[j][::-1]
+
+            # reject self-loops, multiple edges, and trivial swaps
+            if a == d or c == b or a == c or b == d or d in neighbours[a] \
+               or b in neighbours[c]:
+                continue
+
+            delta  = update(a, b, False)
+            delta += update(c, d, False)
+            delta += update(a, d, True)
+            delta += update(c, b, True)
+
+            if abs(clustering + delta - target) <= abs(clustering - target):
+                clustering += delta
+                accepted   += 1
+
+                edges[i] = [a, d]
+                edges[j] = [c, b]
+
+                del slots[(min(a, b), max(a, b))]
+                del slots[(min(c, d), max(c, d))]
+
+                slots[(min(a, d), max(a, d))] = i
+                slots[(min(c, b), max(c, b))] = j
+            else:
+                # revert the swap
+                update(c, b, False)
+                update(a, d, False)
+                update(c, d, True)
+                update(a, b, True)
+
+    # recompute the final value from the triangles to remove rounding errors
+    clustering = float(np.dot(weights, triangles))
+
+    if abs(clustering - target) > tolerance:
+        _log_message(logger, "WARNING",
+                     "Target clustering {:.4f} was not reached after {} "
+                     "swaps: final clustering is {:.4f}.".format(
+                        target, attempts, clustering))
+    else:
+        _log_message(logger, "INFO",
+                     "Clustering rewiring converged after {} swaps ({} "
+                     "accepted): clustering {:.4f} (target {:.4f}).".format(
+                        attempts, accepted, clustering, target))
+
+    return np.array(edges, dtype=int).reshape(num_edges, 2)
+
+
+def _random_element(values, u):
+    ''' Element of the set `values` drawn from the uniform number `u` '''
+    values = tuple(values)
+
+    return values[int(u*len(values))]
+
+
+def _lattice_distance_rank(num_nodes, num_edges, e_reglat, coord_nb,
+                           target_recip, directed):
+    '''
+    Rank of the edges of the lattice by increasing distance, reciprocal edges
+    coming immediately after their directed counterpart.
+
+    This relies on the precise order of the edges generated by
+    :func:`lattice_rewire` (see also ``_circular_full`` and
+    ``_circular_directed_recip``): the edges of the regular lattice come
+    first, then the remaining edges, with the reciprocal couples followed by
+    the non-reciprocal edges.
+
+    Returns
+    -------
+    rank : array of indices or slice
+        Position of each edge in the distance-sorted list.
+    '''
+    if not directed:
+        # the edges are ordered by distance by default in the circular
+        # algorithm
+        return slice(num_edges)
+
+    d_max = int(0.5*coord_nb)
+
+    # `ordered` contains the edge indices, sorted by distance
+    ordered = np.empty(num_edges, dtype=np.int64)
+
+    if target_recip < 1:
+        # the initial (undirected) edges are sorted by distance and are
+        # followed by the reversed copies of the first `num_recip` edges
+        num_init  = num_nodes*d_max
+        num_recip = e_reglat - num_init
+
+        ordered[:2*num_recip:2]  = np.arange(num_recip)
+        ordered[1:2*num_recip:2] = np.arange(num_init, e_reglat)
+        ordered[2*num_recip:e_reglat] = np.arange(num_recip, num_init)
+    else:
+        # For the fully reciprocal lattice, the edges go both ways,
+        # with first the long-distance, left-pointing edges, then
+        # decreasing distances until the middle of the edges array,
+        # then increasing from the middle onward with the shortest
+        # right-pointing edges first (see _circular_full).
+        # Distances looks like [d_max, d_max... 1, 1... 1, 1... d_max].
+        # Each right-pointing edge (i, i + d) is followed by its reciprocal
+        # (i + d, i), which is at position i + d in the left-pointing
+        # block of distance d.
+        middle = int(0.5*e_reglat)
+        nodes  = np.arange(num_nodes, dtype=np.int64)
+        d_off  = num_nodes*np.arange(d_max, dtype=np.int64)[:, None]
+
+        pairs = ordered[:e_reglat].reshape(d_max, num_nodes, 2)
+
+        pairs[:, :, 0] = middle + d_off + nodes
+        pairs[:, :, 1] = middle - d_off - num_nodes + (nodes + 1) % num_nodes
+
+    # add remaining edges (those not in the regular lattice): reciprocal
+    # couples then non-reciprocal edges
+    remaining = num_edges - e_reglat
+    num_recip = int(0.5*target_recip*remaining)
+    first     = e_reglat
+
+    ordered[first:first + 2*num_recip:2] = \
+        np.arange(first, first + num_recip)
+
+    ordered[first + 1:first + 2*num_recip:2] = \
+        np.arange(first + num_recip, first + 2*num_recip)
+
+    ordered[first + 2*num_recip:] = np.arange(first + 2*num_recip, num_edges)
+
+    # invert the permutation
+    rank = np.empty(num_edges, dtype=np.int64)
+
+    rank[ordered] = np.arange(num_edges, dtype=np.int64)
+
+    return rank
+
+
+def _lattice_shuffle_eattr(name, old_graph, new_graph, rank, order,
+                           distance_sort):
     '''
     Reassign edge attributes based on a constraint or a pre-defined
     order for the lattice rewiring.
@@ -380,10 +867,9 @@ def _lattice_shuffle_eattr(name, old_graph, new_graph, coord_nb,
         The old graph.
     new_graph : :class:`~nngt.Graph`
         The new graph.
-    coord_nb : int
-        Coordination number of the lattice.
-    target_recip : float
-        Target reciprocity of the lattice.
+    rank : array of indices or slice
+        Rank of the new edges by distance (see
+        :func:`_lattice_distance_rank`).
     order : array of indices, distance", or None
         Constraint on edge reassignment: either a precomputed order, "distance"
         if we perform a distance-based shuffle, or None if we randomly
@@ -397,127 +883,29 @@ def _lattice_shuffle_eattr(name, old_graph, new_graph, coord_nb,
     order : array of indices
         The order in which the edge attributes have been shuffled.
     '''
-    num_nodes = new_graph.node_nb()
     num_edges = new_graph.edge_nb()
 
     # old attribute
     value_type = old_graph.get_attribute_type(name, "edge")
 
-    values = old_graph.edge_attributes[name].copy()
+    values = old_graph.edge_attributes[name]
 
     # compute order and reassign values
     if order is None:
-        order = np.arange(num_edges, dtype=int)
-        nngt._rng.shuffle(order)
-
-        values = values[order]
-    elif nonstring_container(order):
-        # use precomputed order
-        values = values[order]
-    else:
-        # distance sort
-        directed = new_graph.is_directed()
-
-        if directed:
-            if target_recip < 1:
-                # we need to find the reciprocal edges for the attribute
-                # assignment (this relies on the precise implementation of the
-                # function _circular_directed_recip that the closest distances
-                # come first, then the reciprocal edges are at the end in the
-                # same order)
-                init_edges = int(0.5*num_nodes*(1 + target_recip)*coord_nb)
-                num_recip  = init_edges - num_nodes*int(0.5*coord_nb)
-
-                # fill the order list in the following order
-                order = np.zeros(num_edges, dtype=int)
-                # the first entries are the initial edges that got a reciprocal
-                # connection, we order them with every other first indices
-                # since the reciprocal edges will come in between
-                order[:2*num_recip:2] = np.arange(num_recip)
-                # we enter the index of the reciprocal connection after each
-                order[1:2*num_recip + 1:2] = np.arange(init_edges,
-                                                       init_edges + num_recip)
-                # then we fill the last entries with the initial edges that did
-                # not get a reciprocal connection
-                order[2*num_recip + 1:] = np.arange(num_recip, init_edges)
-
-                if distance_sort == "inverse":
-                    order = order[::-1]
-            else:
-                # For the fully reciprocal lattice, the edges go both ways,
-                # with first the long-distance, left-pointing edges, then
-                # decreasing distances until the middle of the edges array,
-                # then increasing from the middle onward with the shortest
-                # right-pointing edges first (see _circular_full).
-                # Distances looks like [d_max, d_max... 1, 1... 1, 1... d_max].
-                # Therefore we proceed almost like for the partly reciprocal
-                # lattice but we start at the middle and the reciprocal edges
-                # are before the middle
-                e_reglat = int(0.5*num_nodes*(1 + target_recip)*coord_nb)
-
-                # we work based on the middle of the edges of the regular
-                # lattice, other edges are added at the end
-                middle = int(0.5*e_reglat)
-                d_max  = int(0.5*coord_nb)
-                order  = np.full(num_edges, -1, dtype=int)
-
-                count = 0
-
-                for d_n in range(1, d_max + 1):
-                    d_middle  = num_nodes*(d_n - 1)
-
-                    stop = count + 2*num_nodes
+        order = nngt._rng.permutation(num_edges)
+    elif not nonstring_container(order):
+        # distance sort: the i-th shortest edge gets the i-th lowest
+        # (respectively highest) value
+        sort = np.argsort(values)
 
-                    # the entries from the middle shortest edges; we order them
-                    # with every other increasing indices since the reciprocal
-                    # edges will come in between
-                    order[count:stop:2] = np.arange(
-                        middle + d_middle, middle + d_middle + num_nodes)
+        if distance_sort == "inverse":
+            sort = sort[::-1]
 
-                    # we enter the index of the reciprocal connection after
-                    # however, here the first one (starting from zero) needs
-                    # to go at the end
-                    order[count + 1:stop - 1:2] = \
-                        np.arange(middle - (d_middle + num_nodes) + 1,
-                                  middle - d_middle)
-
-                    order[stop -  1] = middle - d_middle - num_nodes
-
-                    count = stop
-
-                # add remaining edges (those not in the regular lattice)
-                remaining = num_edges - count
-                num_recip = int(0.5*remaining)
-
-                order[count:count + 2*num_recip:2] = \
-                    np.arange(count, count + num_recip)
-
-                order[count + 1:count + 2*num_recip + 1:2] = \
-                    np.arange(count + num_recip, count + 2*num_recip)
-
-                if remaining - 2*num_recip:
-                    order[-1] = num_edges - 1
-
-            order = np.argsort(order)
-        else:
-            # we don't need to sort the new edges because they are ordered by
-            # distance by default in the circular algorithm
-            order = slice(num_edges)
-                
-        # sort the attribute
-        if distance_sort == "linear":
-            # order for other attributes if "together" is used
-            order = np.argsort(values)[order]
-
-            # sorted values
-            values = values[order]
-
-        else:
-            # order for other attributes if "together" is used
-            order = np.argsort(values)[::-1][order]
+        # order for other attributes if "together" is used
+        order = sort[rank]
 
-            # sorted values
-            values = values[order]
+    # sorted values
+    values = values[order]
 
     # set the new attributes
     new_graph.new_edge_attribute(name, value_type, values=values)
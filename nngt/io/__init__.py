@@ -19,3 +19,13 @@
 """
 Input/output (I/O) module.
 """
+
+from .graph_loading import iter_edges, load_from_file
+from .graph_saving import save_to_file
+
+
+__all__ = [
+    "iter_edges",
+    "load_from_file",
+    "save_to_file",
+]
@@ -22,6 +22,7 @@
 
 import ast
 import codecs
+import json
 import logging
 import pickle
 import types
@@ -32,24 +33,14 @@ import nngt
 from nngt.lib import InvalidArgument
 from nngt.lib.logger import _log_message
 from ..geometry import Shape, _shapely_support
-from .io_helpers import _get_format
+from .io_helpers import (_BIN_MAGIC, _BIN_VERSION, _align, _get_format,
+                         _open_file)
 from .loading_helpers import *
 
 
 logger = logging.getLogger(__name__)
 
 
-# ---------- #
-# Formatting #
-# ---------- #
-
-di_get_edges = {
-    "neighbour": _get_edges_neighbour,
-    "edge_list": _get_edges_elist,
-    "gml": _get_edges_gml,
-}
-
-
 # ------------- #
 # Load function #
 # ------------- #
@@ -61,6 +52,9 @@ def load_from_file(filename, fmt="auto", separator=" ", secondary=";",
     '''
     Load a Graph from a file.
 
+    .. versionchanged :: 2.3
+        Added the "nngt-bin" format and compressed text files.
+
     .. versionchanged :: 2.0
         Added optional `attributes_types` and `cleanup` arguments.
 
@@ -71,7 +65,8 @@ def load_from_file(filename, fmt="auto", separator=" ", secondary=";",
     Parameters
     ----------
     filename: str
-        The path to the file.
+        The path to the file; files ending with '.gz', '.bz2', '.xz', or
+        '.lzma' are decompressed.
     fmt : str, optional (default: "neighbour")
         The format used to save the graph. Supported formats are: "neighbour"
         (neighbour list, default if format cannot be deduced automatically),
@@ -81,7 +76,8 @@ def load_from_file(filename, fmt="auto", separator=" ", secondary=";",
         (graphml format, default if `filename` ends with '.graphml' or '.xml'),
         "dot" (dot format, default if `filename` ends with '.dot'), "gt" (only
         when using `graph_tool`<http://graph-tool.skewed.de/>_ as library,
-        detected if `filename` ends with '.gt').
+        detected if `filename` ends with '.gt'), "nngt-bin" (memory-mapped
+        binary format, default if `filename` ends with '.nngt').
     separator : str, optional (default " ")
         separator used to separate inputs in the case of custom formats (namely
         "neighbour" and "edge_list")
@@ -130,6 +126,77 @@ def load_from_file(filename, fmt="auto", separator=" ", secondary=";",
         cleanup=cleanup) 
 
 
+def iter_edges(filename, fmt="auto", separator=" ", secondary=";",
+               attributes=None, attributes_types=None, notifier="@",
+               ignore="#", chunk_size=None):
+    '''
+    Iterate over the edges stored in a file, by blocks, without loading the
+    whole graph.
+
+    .. versionadded :: 2.3
+
+    Only the "neighbour" and "edge_list" formats are supported.
+
+    Parameters
+    ----------
+    filename: str
+        The path to the file.
+    fmt : str, optional (default: deduced from filename)
+        The format of the file, either "neighbour" or "edge_list".
+    separator : str, optional (default " ")
+        Separator used to separate inputs.
+    secondary : str, optional (default: ";")
+        Secondary separator used to separate attributes.
+    attributes : list, optional (default: [])
+        List of names for the edge attributes present in the file. If a
+        `notifier` is present in the file, names will be deduced from it;
+        otherwise the attributes will be numbered.
+    attributes_types : dict, optional (default: str)
+        Backup information if the type of the attributes is not specified
+        in the file. Values must be callables (types or functions) that will
+        take the argument value as a string input and convert it to the proper
+        type.
+    notifier : str, optional (default: "@")
+        Symbol specifying the following as meaningfull information (see
+        :func:`~nngt.load_from_file`).
+    ignore : str, optional (default: "#")
+        Ignore lines starting with the `ignore` string.
+    chunk_size : int, optional (default: 4 MiB)
+        Approximate number of bytes read from the file for each block.
+
+    Yields
+    ------
+    edges : array of shape (E, 2)
+        Edges of the current block.
+    attributes : dict
+        Dictionary containing the values of the edge attributes for `edges`
+        (name as key, array as value).
+    '''
+    fmt = _get_format(fmt, filename)
+
+    if fmt not in ("neighbour", "edge_list"):
+        raise InvalidArgument("Only 'neighbour' and 'edge_list' formats can "
+                              "be read by blocks.")
+
+    with _open_file(filename, "r") as filegraph:
+        lst_lines = _read_header(filegraph, notifier, separator)
+
+        di_notif = _get_notif(lst_lines, notifier, attributes, fmt=fmt,
+                              atypes=attributes_types)
+
+        eattributes     = di_notif["edge_attributes"]
+        di_edge_convert = _gen_convert(eattributes,
+                                       di_notif["edge_attr_types"],
+                                       attributes_types=attributes_types)
+
+        for block in _iter_edge_blocks(
+                filegraph, fmt, eattributes, di_notif["edge_attr_types"],
+                ignore, notifier, separator, secondary, di_edge_convert,
+                _numeric_attributes(di_notif, attributes_types),
+                chunk_size=chunk_size):
+            yield block
+
+
 def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
                     attributes=None, attributes_types=None,
                     notifier="@", ignore="#", cleanup=False):
@@ -149,7 +216,8 @@ def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
         (graphml format, default if `filename` ends with '.graphml' or '.xml'),
         "dot" (dot format, default if `filename` ends with '.dot'), "gt" (only
         when using `graph_tool <http://graph-tool.skewed.de/>`_ as library,
-        detected if `filename` ends with '.gt').
+        detected if `filename` ends with '.gt'), "nngt-bin" (memory-mapped
+        binary format, default if `filename` ends with '.nngt').
     separator : str, optional (default " ")
         separator used to separate inputs in the case of custom formats (namely
         "neighbour" and "edge_list")
@@ -184,13 +252,13 @@ def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
     -------
     di_notif : dict
         Dictionary containing the main graph arguments.
-    edges : list of 2-tuples
+    edges : array of shape (E, 2) or list of 2-tuples (GML)
         Edges of the graph.
     di_nattributes : dict
         Dictionary containing the node attributes.
     di_eattributes : dict
-        Dictionary containing the edge attributes (name as key, value as a
-        list sorted in the same order as `edges`).
+        Dictionary containing the edge attributes (name as key, value as an
+        array or a list sorted in the same order as `edges`).
     struct : :class:`~nngt.NeuralPop`
         Population (``None`` if not present in the file).
     shape : :class:`~nngt.geometry.Shape`
@@ -206,32 +274,48 @@ def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
     lst_lines, struct, shape, positions = None, None, None, None
     fmt = _get_format(fmt, filename)
 
+    if fmt == "nngt-bin":
+        return _load_binary(filename)
+
     if fmt not in ("neighbour", "edge_list", "gml"):
         return [None]*7
 
-    with open(filename, "r") as filegraph:
-        lst_lines = _process_file(filegraph, fmt, separator)
-
-    # notifier lines
-    di_notif = _get_notif(lst_lines, notifier, attributes, fmt=fmt,
-                          atypes=attributes_types)
-
-    # get nodes attributes
-    di_nattributes = _get_node_attr(di_notif, separator, fmt=fmt,
-                                    lines=lst_lines, atypes=attributes_types)
-
-    # make edges and attributes
-    eattributes     = di_notif["edge_attributes"]
-    di_eattributes  = {name: [] for name in eattributes}
-    di_edge_convert = _gen_convert(di_notif["edge_attributes"],
-                                   di_notif["edge_attr_types"],
-                                   attributes_types=attributes_types)
+    with _open_file(filename, "r") as filegraph:
+        if fmt == "gml":
+            lst_lines = _process_file(filegraph, fmt, separator)
+        else:
+            # only read the notifiers, edges are parsed by blocks below
+            lst_lines = _read_header(filegraph, notifier, separator)
+
+        # notifier lines
+        di_notif = _get_notif(lst_lines, notifier, attributes, fmt=fmt,
+                              atypes=attributes_types)
+
+        # get nodes attributes
+        di_nattributes = _get_node_attr(
+            di_notif, separator, fmt=fmt, lines=lst_lines,
+            atypes=attributes_types)
+
+        # make edges and attributes
+        eattributes     = di_notif["edge_attributes"]
+        di_edge_convert = _gen_convert(eattributes,
+                                       di_notif["edge_attr_types"],
+                                       attributes_types=attributes_types)
+
+        if fmt == "gml":
+            di_eattributes = {name: [] for name in eattributes}
+
+            edges = _get_edges_gml(
+                lst_lines, eattributes, ignore, notifier, separator,
+                secondary, di_attributes=di_eattributes,
+                di_convert=di_edge_convert, di_notif=di_notif)
+        else:
+            blocks = _iter_edge_blocks(
+                filegraph, fmt, eattributes, di_notif["edge_attr_types"],
+                ignore, notifier, separator, secondary, di_edge_convert,
+                _numeric_attributes(di_notif, attributes_types))
 
-    # process file
-    edges = di_get_edges[fmt](
-        lst_lines, eattributes, ignore, notifier, separator, secondary,
-        di_attributes=di_eattributes, di_convert=di_edge_convert,
-        di_notif=di_notif)
+            edges, di_eattributes = _gather_blocks(blocks, eattributes)
 
     if cleanup:
         edges = np.array(edges) - np.min(edges)
@@ -242,51 +326,12 @@ def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
 
     # check whether a shape is present
     if 'shape' in di_notif:
-        if _shapely_support:
-            min_x, max_x = float(di_notif['min_x']), float(di_notif['max_x'])
-            unit = di_notif['unit']
-            shape = Shape.from_wkt(
-                di_notif['shape'], min_x=min_x, max_x=max_x, unit=unit)
-            # load areas
-            try:
-                def_areas      = ast.literal_eval(di_notif['default_areas'])
-                def_areas_prop = ast.literal_eval(
-                    di_notif['default_areas_prop'])
-
-                for k in def_areas:
-                    p = {key: float(v) for key, v in def_areas_prop[k].items()}
-                    if "default_area" in k:
-                        shape._areas["default_area"]._prop.update(p)
-                        shape._areas["default_area"].height = p["height"]
-                    else:
-                        a = Shape.from_wkt(def_areas[k], unit=unit)
-                        shape.add_area(a, height=p["height"], name=k,
-                                       properties=p)
-
-                ndef_areas      = ast.literal_eval(
-                                      di_notif['non_default_areas'])
-                ndef_areas_prop = ast.literal_eval(
-                                      di_notif['non_default_areas_prop'])
-                for i in ndef_areas:
-                    p = {k: float(v) for k, v in ndef_areas_prop[i].items()}
-                    a = Shape.from_wkt(ndef_areas[i], unit=unit)
-                    shape.add_area(a, height=p["height"], name=i, properties=p)
-            except KeyError:
-                # backup compatibility with older versions
-                pass
-        else:
-            _log_message(logger, "WARNING",
-                         'A Shape object was present in the file but could '
-                         'not be loaded because Shapely is not installed.')
+        shape = _shape_from_info(di_notif)
 
     # check whether a structure is present
     if 'structure' in di_notif:
         str_enc = di_notif['structure'].replace('~', '\n').encode()
-        str_dec = codecs.decode(str_enc, "base64")
-        try:
-            struct = pickle.loads(str_dec)
-        except UnicodeError:
-            struct = pickle.loads(str_dec, encoding="latin1")
+        struct  = _unpickle(codecs.decode(str_enc, "base64"))
 
     if 'x' in di_notif:
         x = np.fromstring(di_notif['x'], sep=separator)
@@ -301,6 +346,77 @@ def _load_from_file(filename, fmt="auto", separator=" ", secondary=";",
             positions)
 
 
+def _numeric_attributes(di_notif, attributes_types):
+    '''
+    Whether all edge attributes are numbers, with default converters, so that
+    they can be parsed directly by NumPy.
+    '''
+    attributes_types = {} if attributes_types is None else attributes_types
+
+    for name, attr_type in zip(di_notif["edge_attributes"],
+                               di_notif["edge_attr_types"]):
+        if name in attributes_types or attr_type not in (
+                "double", "float", "real", "int", "integer"):
+            return False
+
+    return True
+
+
+def _gather_blocks(blocks, attributes):
+    '''
+    Store the edges and attributes yielded by `blocks` into arrays which are
+    grown by doubling their size when full.
+    '''
+    edges = np.empty((0, 2), dtype=np.int64)
+
+    di_attributes = {}
+
+    # number of values stored in each array
+    num_edges  = 0
+    num_values = {name: 0 for name in attributes}
+
+    for block_edges, block_attributes in blocks:
+        num_edges = _append(edges, num_edges, block_edges)
+
+        for name in attributes:
+            values = block_attributes[name]
+
+            if name not in di_attributes:
+                di_attributes[name] = np.empty(0, dtype=values.dtype)
+
+            num_values[name] = _append(
+                di_attributes[name], num_values[name], values)
+
+    # remove the unused space
+    edges.resize((num_edges, 2), refcheck=False)
+
+    for name in attributes:
+        if name in di_attributes:
+            di_attributes[name].resize(num_values[name], refcheck=False)
+        else:
+            di_attributes[name] = []
+
+    return edges, di_attributes
+
+
+def _append(buffer, size, values):
+    '''
+    Write `values` after the first `size` entries of `buffer`, which is
+    resized in place (at least doubling its length) if necessary.
+    Returns the new number of entries.
+    '''
+    new_size = size + len(values)
+
+    if new_size > len(buffer):
+        capacity = max(new_size, 2*len(buffer))
+
+        buffer.resize((capacity,) + buffer.shape[1:], refcheck=False)
+
+    buffer[size:new_size] = values
+
+    return new_size
+
+
 def _library_load(filename, fmt):
     ''' Load the file using the library functions '''
     if nngt.get_config("backend") == "networkx":
@@ -323,3 +439,136 @@ def _library_load(filename, fmt):
         return gt.load_graph(filename, fmt=fmt)
     else:
         raise NotImplementedError
+
+
+# ------------- #
+# Binary format #
+# ------------- #
+
+def _load_binary(filename):
+    '''
+    Load a graph saved in the "nngt-bin" format (see
+    :func:`~nngt.io.graph_saving._save_binary`).
+
+    Numeric arrays (edges, degrees, numeric attributes and positions) are
+    memory-mapped in copy-on-write mode: they are read from the disk only
+    when accessed and modifying them does not alter the file.
+
+    Returns
+    -------
+    Same as :func:`_load_from_file`; the degrees are stored as a
+    ``(out_degree, in_degree)`` tuple in the "degrees" entry of `di_notif`.
+    '''
+    with open(filename, "rb") as f_graph:
+        if f_graph.read(len(_BIN_MAGIC)) != _BIN_MAGIC:
+            raise InvalidArgument(
+                "'{}' is not a valid 'nngt-bin' file.".format(filename))
+
+        len_header = int.from_bytes(f_graph.read(8), "little")
+
+        di_notif = json.loads(f_graph.read(len_header).decode("utf-8"))
+
+        if di_notif["version"] > _BIN_VERSION:
+            raise InvalidArgument(
+                "'{}' was saved with a more recent version of "
+                "NNGT.".format(filename))
+
+        start  = _align(f_graph.tell())
+        blocks = di_notif.pop("blocks")
+
+        def _get_block(key):
+            entry  = blocks[key]
+            offset = start + entry["offset"]
+
+            if entry["dtype"] == "pickle":
+                f_graph.seek(offset)
+                return _unpickle(f_graph.read(entry["nbytes"]))
+
+            dtype = np.dtype(entry["dtype"])
+            shape = tuple(entry["shape"])
+
+            if not np.prod(shape):
+                # empty arrays cannot be mapped
+                return np.empty(shape, dtype=dtype)
+
+            return np.asarray(np.memmap(
+                filename, dtype=dtype, mode="c", offset=offset, shape=shape))
+
+        edges = _get_block("edges")
+
+        di_notif["degrees"] = (_get_block("out_degree"),
+                               _get_block("in_degree"))
+
+        di_nattributes = {
+            name: _get_block("na_" + name)
+            for name in di_notif["node_attributes"]
+        }
+
+        di_eattributes = {
+            name: _get_block("ea_" + name)
+            for name in di_notif["edge_attributes"]
+        }
+
+        struct    = _get_block("structure") if "structure" in blocks else None
+        positions = _get_block("positions") if "positions" in blocks else None
+
+    shape = _shape_from_info(di_notif) if "shape" in di_notif else None
+
+    return (di_notif, edges, di_nattributes, di_eattributes, struct, shape,
+            positions)
+
+
+# ----- #
+# Tools #
+# ----- #
+
+def _shape_from_info(di_notif):
+    ''' Rebuild the shape of a spatial graph from the file information '''
+    shape = None
+
+    if _shapely_support:
+        min_x, max_x = float(di_notif['min_x']), float(di_notif['max_x'])
+        unit = di_notif['unit']
+        shape = Shape.from_wkt(
+            di_notif['shape'], min_x=min_x, max_x=max_x, unit=unit)
+        # load areas
+        try:
+            def_areas      = ast.literal_eval(di_notif['default_areas'])
+            def_areas_prop = ast.literal_eval(
+                di_notif['default_areas_prop'])
+
+            for k in def_areas:
+                p = {key: float(v) for key, v in def_areas_prop[k].items()}
+                if "default_area" in k:
+                    shape._areas["default_area"]._prop.update(p)
+                    shape._areas["default_area"].height = p["height"]
+                else:
+                    a = Shape.from_wkt(def_areas[k], unit=unit)
+                    shape.add_area(a, height=p["height"], name=k,
+                                   properties=p)
+
+            ndef_areas      = ast.literal_eval(
+                                  di_notif['non_default_areas'])
+            ndef_areas_prop = ast.literal_eval(
+                                  di_notif['non_default_areas_prop'])
+            for i in ndef_areas:
+                p = {k: float(v) for k, v in ndef_areas_prop[i].items()}
+                a = Shape.from_wkt(ndef_areas[i], unit=unit)
+                shape.add_area(a, height=p["height"], name=i, properties=p)
+        except KeyError:
+            # backup compatibility with older versions
+            pass
+    else:
+        _log_message(logger, "WARNING",
+                     'A Shape object was present in the file but could '
+                     'not be loaded because Shapely is not installed.')
+
+    return shape
+
+
+def _unpickle(bytestring):
+    ''' Unpickle data, possibly saved from Python 2 '''
+    try:
+        return pickle.loads(bytestring)
+    except UnicodeError:
+        return pickle.loads(bytestring, encoding="latin1")
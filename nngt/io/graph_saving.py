@@ -21,6 +21,7 @@
 """ IO tools for NNGT """
 
 import codecs
+import json
 import logging
 import pickle
 import sys
@@ -33,12 +34,15 @@ import scipy.sparse as ssp
 
 import nngt
 from nngt.lib import InvalidArgument, on_master_process
+from nngt.lib.converters import _np_dtype
 from nngt.lib.logger import _log_message
 
 from ..geometry import Shape, _shapely_support
-from .io_helpers import _get_format
+from .io_helpers import (_BIN_MAGIC, _BIN_VERSION, _align, _get_format,
+                         _open_file)
 from .saving_helpers import (_neighbour_list, _edge_list, _gml, _custom_info,
-                           _gml_info, _str_bytes_len)
+                             _gml_info, _str_bytes_len, _write_edge_list,
+                             _write_info, _write_neighbour_list)
 
 
 logger = logging.getLogger(__name__)
@@ -54,6 +58,11 @@ di_format = {
     "gml": _gml
 }
 
+di_writer = {
+    "neighbour": _write_neighbour_list,
+    "edge_list": _write_edge_list,
+}
+
 format_graph_info = defaultdict(lambda: _custom_info)
 format_graph_info["gml"] = _gml_info
 
@@ -67,6 +76,9 @@ def save_to_file(graph, filename, fmt="auto", separator=" ",
     '''
     Save a graph to file.
 
+    .. versionchanged :: 2.3
+        Added the "nngt-bin" format and compression of text formats.
+
     @todo: implement dot, xml/graphml, and gt formats
 
     Parameters
@@ -74,7 +86,8 @@ def save_to_file(graph, filename, fmt="auto", separator=" ",
     graph : :class:`~nngt.Graph` or subclass
         Graph to save.
     filename: str
-        The path to the file.
+        The path to the file. Text formats are compressed if `filename` ends
+        with '.gz', '.bz2', '.xz', or '.lzma' (e.g. "graph.el.gz").
     fmt : str, optional (default: "auto")
         The format used to save the graph. Supported formats are: "neighbour"
         (neighbour list, default if format cannot be deduced automatically),
@@ -84,7 +97,8 @@ def save_to_file(graph, filename, fmt="auto", separator=" ",
         (graphml format, default if `filename` ends with '.graphml' or '.xml'),
         "dot" (dot format, default if `filename` ends with '.dot'), "gt" (only
         when using `graph_tool <http://graph-tool.skewed.de/>`_ as library,
-        detected if `filename` ends with '.gt').
+        detected if `filename` ends with '.gt'), "nngt-bin" (binary format,
+        default if `filename` ends with '.nngt', see Note).
     separator : str, optional (default " ")
         separator used to separate inputs in the case of custom formats (namely
         "neighbour" and "edge_list")
@@ -105,10 +119,21 @@ def save_to_file(graph, filename, fmt="auto", separator=" ",
 
     Note
     ----
-    Positions are saved as bytes by :func:`numpy.nparray.tostring`
+    The "neighbour" and "edge_list" formats are written by blocks, so the
+    memory used does not depend on the size of the graph.
+
+    The "nngt-bin" format stores the edges, the degrees, the numeric
+    attributes, and the positions as raw binary arrays which are
+    memory-mapped upon loading, so that even very large graphs can be opened
+    almost instantly, their data being read from the disk only when needed.
+    Text arguments (`separator`, `secondary`, `notifier`) are ignored for
+    this format.
     '''
     fmt = _get_format(fmt, filename)
 
+    if fmt == "nngt-bin":
+        return _save_binary(graph, filename, attributes=attributes)
+
     # check for mpi
     if nngt.get_config("mpi"):
         from mpi4py import MPI
@@ -142,11 +167,34 @@ def save_to_file(graph, filename, fmt="auto", separator=" ",
         fh.Write_at_all(offset[rank], str_local.encode('utf-8'))
         fh.Close()
     else:
-        str_graph = _as_string(
-            graph, separator=separator, fmt=fmt, secondary=secondary,
-            attributes=attributes, notifier=notifier)
-        with open(filename, "w") as f_graph:
-            f_graph.write(str_graph)
+        with _open_file(filename, "w") as f_graph:
+            _write_graph(graph, f_graph, fmt=fmt, separator=separator,
+                         secondary=secondary, attributes=attributes,
+                         notifier=notifier)
+
+
+def _write_graph(graph, f, fmt="neighbour", separator=" ", secondary=";",
+                 attributes=None, notifier="@"):
+    '''
+    Write the graph to the open file `f`: the notifiers are written first,
+    then the edges and their attributes, by blocks, so that the whole graph
+    is never stored as a string.
+    '''
+    if fmt not in di_writer:
+        f.write(_as_string(graph, fmt=fmt, separator=separator,
+                           secondary=secondary, attributes=attributes,
+                           notifier=notifier))
+        return
+
+    _check_separators(fmt, separator, secondary, notifier)
+
+    if attributes is None:
+        attributes = [a for a in graph.edge_attributes if a != "bweight"]
+
+    _write_info(_graph_info(graph, attributes, separator), f, notifier,
+                separator)
+
+    di_writer[fmt](graph, f, separator, secondary, attributes)
 
 
 # --------------------- #
@@ -196,23 +244,39 @@ def _as_string(graph, fmt="neighbour", separator=" ", secondary=";",
     str_graph : string
         The full graph representation as a string.
     '''
-    # checks
-    if separator == secondary and fmt != "edge_list":
-        raise InvalidArgument("`separator` and `secondary` strings must be "
-                              "different.")
-
-    if notifier == separator or notifier == secondary:
-        raise InvalidArgument("`notifier` string should differ from "
-                              "`separator` and `secondary`.")
-
-    # temporarily disable numpy cut threshold to save string
-    old_threshold = np.get_printoptions()['threshold']
-    np.set_printoptions(threshold=sys.maxsize)
+    _check_separators(fmt, separator, secondary, notifier)
 
     # data
     if attributes is None:
         attributes = [a for a in graph.edge_attributes if a != "bweight"]
 
+    additional_notif = _graph_info(graph, attributes, separator)
+
+    # format numeric arrays (node attributes and positions)
+    with np.printoptions(threshold=sys.maxsize):
+        for key, val in additional_notif.items():
+            if isinstance(val, np.ndarray):
+                additional_notif[key] = np.array2string(
+                    val, max_line_width=np.NaN, separator=separator)[1:-1]
+
+    str_graph = di_format[fmt](graph, separator=separator,
+                               secondary=secondary, attributes=attributes)
+
+    if return_info:
+        return str_graph, additional_notif
+
+    # format the info into the string
+    info_str = format_graph_info[fmt](additional_notif, notifier, graph=graph)
+
+    return info_str + str_graph
+
+
+def _graph_info(graph, attributes, separator):
+    '''
+    Information about the graph, written as notifiers for custom formats.
+    Numeric node attributes and positions are returned as arrays, other
+    values as strings.
+    '''
     nattributes = [a for a in graph.node_attributes]
 
     additional_notif = {
@@ -230,13 +294,19 @@ def _as_string(graph, fmt="neighbour", separator=" ", secondary=";",
     }
 
     # add node attributes to the notifications
-    for nattr in additional_notif["node_attributes"]:
-        key = "na_" + nattr
+    for nattr, vtype in zip(nattributes, additional_notif["node_attr_types"]):
+        key    = "na_" + nattr
+        values = graph.get_node_attributes(name=nattr)
+
+        if vtype in ("int", "double"):
+            additional_notif[key] = np.asarray(values)
+            continue
 
-        tmp = np.array2string(
-            graph.get_node_attributes(name=nattr), max_line_width=np.NaN,
-            separator=separator)[1:-1].replace("'" + separator + "'",
-                                               '"' + separator + '"')
+        with np.printoptions(threshold=sys.maxsize):
+            tmp = np.array2string(
+                values, max_line_width=np.NaN,
+                separator=separator)[1:-1].replace("'" + separator + "'",
+                                                   '"' + separator + '"')
 
         # replace possible variants
         tmp = tmp.replace("'" + separator + '"', '"' + separator + '"')
@@ -253,67 +323,206 @@ def _as_string(graph, fmt="neighbour", separator=" ", secondary=";",
 
     # save positions for SpatialGraph (and shape if Shapely is available)
     if graph.is_spatial():
-        if _shapely_support:
-            additional_notif['shape'] = graph.shape.wkt
-            additional_notif['default_areas'] = \
-                {k: v.wkt for k, v in graph.shape.default_areas.items()}
-            additional_notif['default_areas_prop'] = \
-                {k: v.properties for k, v in graph.shape.default_areas.items()}
-            additional_notif['non_default_areas'] = \
-                {k: v.wkt for k, v in graph.shape.non_default_areas.items()}
-            additional_notif['non_default_areas_prop'] = \
-                {k: v.properties
-                 for k, v in graph.shape.non_default_areas.items()}
-            additional_notif['unit'] = graph.shape.unit
-            min_x, min_y, max_x, max_y = graph.shape.bounds
-            additional_notif['min_x'] = min_x
-            additional_notif['max_x'] = max_x
-        else:
-            _log_message(logger, "WARNING",
-                         'The `shape` attribute of the graph could not be '
-                         'saved to file because Shapely is not installed.')
+        additional_notif.update(_shape_info(graph))
 
         pos = graph.get_positions()
-        additional_notif['x'] = np.array2string(
-            pos[:, 0], max_line_width=np.NaN, separator=separator)[1:-1]
-        additional_notif['y'] = np.array2string(
-            pos[:, 1], max_line_width=np.NaN, separator=separator)[1:-1]
-        if pos.shape[1] == 3:
-            additional_notif['z'] = np.array2string(
-                pos[:, 2], max_line_width=np.NaN, separator=separator)[1:-1]
+
+        for i, coord in enumerate("xyz"[:pos.shape[1]]):
+            additional_notif[coord] = pos[:, i]
 
     if graph.structure is not None:
-        # temporarily remove weakrefs
-        graph.structure._parent = None
-        for g in graph.structure.values():
-            g._struct = None
-            g._net    = None
         # save as string
-        if nngt.get_config("mpi"):
-            if nngt.get_config("mpi_comm").Get_rank() == 0:
-                additional_notif["structure"] = codecs.encode(
-                    pickle.dumps(graph.structure, protocol=2),
-                                 "base64").decode().replace('\n', '~')
-        else:
+        if (not nngt.get_config("mpi") or
+                nngt.get_config("mpi_comm").Get_rank() == 0):
             additional_notif["structure"] = codecs.encode(
-                pickle.dumps(graph.structure, protocol=2),
-                             "base64").decode().replace('\n', '~')
-        # restore weakrefs
-        graph.structure._parent = weakref.ref(graph)
-        for g in graph.structure.values():
-            g._struct = weakref.ref(graph.structure)
-            g._net    = weakref.ref(graph)
+                _structure_bytes(graph, protocol=2),
+                "base64").decode().replace('\n', '~')
 
-    str_graph = di_format[fmt](graph, separator=separator,
-                               secondary=secondary, attributes=attributes)
+    return additional_notif
 
-    # set numpy cut threshold back on
-    np.set_printoptions(threshold=old_threshold)
 
-    if return_info:
-        return str_graph, additional_notif
+def _check_separators(fmt, separator, secondary, notifier):
+    ''' Check that the separators and the notifier can be distinguished '''
+    if separator == secondary and fmt != "edge_list":
+        raise InvalidArgument("`separator` and `secondary` strings must be "
+                              "different.")
 
-    # format the info into the string
-    info_str = format_graph_info[fmt](additional_notif, notifier, graph=graph)
+    if notifier == separator or notifier == secondary:
+        raise InvalidArgument("`notifier` string should differ from "
+                              "`separator` and `secondary`.")
 
-    return info_str + str_graph
+
+# ------------- #
+# Binary format #
+# ------------- #
+
+def _save_binary(graph, filename, attributes=None):
+    '''
+    Save the graph in the "nngt-bin" format.
+
+    The file starts with a magic string followed by the length of a JSON
+    header, then by the header, which contains the graph information and
+    the location of each data block.
+    Numeric data (edges, degrees, "int" and "double" attributes, positions)
+    are stored as raw little-endian arrays, aligned on `_BIN_ALIGN` bytes so
+    that they can be memory-mapped; other attributes and the structure are
+    pickled.
+    '''
+    if nngt.get_config("mpi"):
+        raise NotImplementedError("The 'nngt-bin' format is not available "
+                                  "with MPI.")
+
+    if attributes is None:
+        attributes = [a for a in graph.edge_attributes if a != "bweight"]
+
+    nattributes = [a for a in graph.node_attributes]
+
+    directed  = graph.is_directed()
+    num_nodes = graph.node_nb()
+
+    header = {
+        "version": _BIN_VERSION,
+        "directed": directed,
+        "weighted": graph.is_weighted(),
+        "name": graph.name,
+        "size": num_nodes,
+        "node_attributes": nattributes,
+        "node_attr_types": [
+            graph.get_attribute_type(nattr, "node") for nattr in nattributes
+        ],
+        "edge_attributes": attributes,
+        "edge_attr_types": [
+            graph.get_attribute_type(attr, "edge") for attr in attributes
+        ],
+    }
+
+    # data blocks, either arrays or pickled bytes
+    blocks = {}
+
+    edges = np.asarray(graph.edges_array, dtype=np.int64).reshape(-1, 2)
+
+    # degrees as counted by the default backend (undirected edges count for
+    # both nodes) to avoid going through all the edges when loading
+    sources = edges[:, 0] if directed else edges.ravel()
+    targets = edges[:, 1] if directed else sources
+
+    blocks["edges"]      = edges
+    blocks["out_degree"] = np.bincount(sources, minlength=num_nodes)
+    blocks["in_degree"]  = np.bincount(targets, minlength=num_nodes)
+
+    for nattr, vtype in zip(nattributes, header["node_attr_types"]):
+        blocks["na_" + nattr] = _binary_block(
+            graph.get_node_attributes(name=nattr), vtype)
+
+    for attr, vtype in zip(attributes, header["edge_attr_types"]):
+        blocks["ea_" + attr] = _binary_block(
+            graph.get_edge_attributes(name=attr), vtype)
+
+    if graph.is_spatial():
+        header.update(_shape_info(graph))
+
+        blocks["positions"] = graph.get_positions()
+
+    if graph.structure is not None:
+        blocks["structure"] = _structure_bytes(graph)
+
+    # locate the blocks, relative to the end of the header
+    header["blocks"] = {}
+
+    offset = 0
+
+    for key, data in blocks.items():
+        if isinstance(data, bytes):
+            entry  = {"dtype": "pickle", "nbytes": len(data)}
+            nbytes = len(data)
+        else:
+            dtype = np.dtype(data.dtype).newbyteorder("<")
+            data  = np.ascontiguousarray(data, dtype=dtype)
+            entry = {"dtype": data.dtype.str, "shape": list(data.shape)}
+
+            blocks[key] = data
+            nbytes      = data.nbytes
+
+        entry["offset"] = offset
+        header["blocks"][key] = entry
+
+        offset = _align(offset + nbytes)
+
+    str_header = json.dumps(header).encode("utf-8")
+
+    with open(filename, "wb") as f_graph:
+        f_graph.write(_BIN_MAGIC)
+        f_graph.write(len(str_header).to_bytes(8, "little"))
+        f_graph.write(str_header)
+
+        start = _align(f_graph.tell())
+
+        for key, data in blocks.items():
+            f_graph.seek(start + header["blocks"][key]["offset"])
+
+            if isinstance(data, bytes):
+                f_graph.write(data)
+            else:
+                data.tofile(f_graph)
+
+
+def _binary_block(values, value_type):
+    ''' Raw array for numeric attributes, pickled values otherwise '''
+    if value_type in ("int", "double"):
+        return np.asarray(values, dtype=_np_dtype(value_type))
+
+    return pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# ----- #
+# Tools #
+# ----- #
+
+def _shape_info(graph):
+    ''' Information necessary to rebuild the shape of a spatial graph '''
+    info = {}
+
+    if _shapely_support:
+        shape = graph.shape
+
+        info['shape'] = shape.wkt
+        info['default_areas'] = \
+            str({k: v.wkt for k, v in shape.default_areas.items()})
+        info['default_areas_prop'] = \
+            str({k: v.properties for k, v in shape.default_areas.items()})
+        info['non_default_areas'] = \
+            str({k: v.wkt for k, v in shape.non_default_areas.items()})
+        info['non_default_areas_prop'] = \
+            str({k: v.properties for k, v in shape.non_default_areas.items()})
+        info['unit'] = shape.unit
+
+        min_x, min_y, max_x, max_y = shape.bounds
+
+        info['min_x'] = float(min_x)
+        info['max_x'] = float(max_x)
+    else:
+        _log_message(logger, "WARNING",
+                     'The `shape` attribute of the graph could not be '
+                     'saved to file because Shapely is not installed.')
+
+    return info
+
+
+def _structure_bytes(graph, protocol=pickle.HIGHEST_PROTOCOL):
+    ''' Pickle the structure of the graph without its weakrefs '''
+    # temporarily remove weakrefs
+    graph.structure._parent = None
+
+    for g in graph.structure.values():
+        g._struct = None
+        g._net    = None
+
+    try:
+        return pickle.dumps(graph.structure, protocol=protocol)
+    finally:
+        # restore weakrefs
+        graph.structure._parent = weakref.ref(graph)
+
+        for g in graph.structure.values():
+            g._struct = weakref.ref(graph.structure)
+            g._net    = weakref.ref(graph)
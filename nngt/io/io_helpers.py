@@ -19,16 +19,71 @@
 
 """ IO helpers """
 
+import bz2
+import gzip
+import lzma
+
 import nngt
 from nngt.lib import InvalidArgument
 
 
+# ----------- #
+# Compression #
+# ----------- #
+
+#: file extensions associated to compressed files and the function used to
+#: open them
+_compression = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def _open_file(filename, mode="r"):
+    '''
+    Open a text file, which is transparently (de)compressed if its extension
+    is one of `_compression`.
+    '''
+    for ext, opener in _compression.items():
+        if filename.endswith(ext):
+            return opener(filename, mode + "t", encoding="utf-8")
+
+    return open(filename, mode)
+
+
+# ------------------ #
+# Binary file layout #
+# ------------------ #
+
+#: first bytes of the files in "nngt-bin" format
+_BIN_MAGIC = b"\x93NNGTBIN"
+
+#: version of the "nngt-bin" layout
+_BIN_VERSION = 1
+
+#: alignment (in bytes) of the arrays stored in "nngt-bin" files
+_BIN_ALIGN = 64
+
+
+def _align(offset):
+    ''' First multiple of `_BIN_ALIGN` not lower than `offset` '''
+    return -(-offset // _BIN_ALIGN) * _BIN_ALIGN
+
+
 # ------------ #
 # Saving tools #
 # ------------ #
 
 def _get_format(fmt, filename):
     if fmt == "auto":
+        # use the extension preceding the compression extension
+        for ext in _compression:
+            if filename.endswith(ext):
+                filename = filename[:-len(ext)]
+                break
+
         if filename.endswith('.gml'):
             fmt = 'gml'
         elif filename.endswith('.graphml') or filename.endswith('.xml'):
@@ -42,6 +97,8 @@ def _get_format(fmt, filename):
             fmt = 'neighbour'
         elif filename.endswith('.el'):
             fmt = 'edge_list'
+        elif filename.endswith('.nngt'):
+            fmt = 'nngt-bin'
         else:
             raise InvalidArgument('Could not determine format from filename '
                                   'please specify `fmt`.')
@@ -21,11 +21,12 @@
 
 import re
 import types
+import warnings
 
 import numpy as np
 
-from ..lib.converters import (_np_dtype, _to_int, _to_string, _to_list,
-                              _string_from_object)
+from ..lib.converters import (_np_dtype, _to_int, _to_np_array, _to_string,
+                              _to_list, _string_from_object)
 
 
 __all__ = [
@@ -36,10 +37,16 @@ __all__ = [
     "_get_edges_neighbour",
     "_get_node_attr",
     "_get_notif",
+    "_iter_edge_blocks",
     "_process_file",
+    "_read_header",
 ]
 
 
+#: approximate size (in bytes) of the blocks read by the chunked loader
+_CHUNK_SIZE = 1 << 22
+
+
 # ----------------------- #
 # Initial file processing #
 # ----------------------- #
@@ -67,6 +74,26 @@ def _process_file(f, fmt, separator):
     return [_cleanup_line(line, separator) for line in f.readlines()]
 
 
+def _read_header(f, notifier, separator):
+    '''
+    Read the notifier lines at the beginning of a "neighbour" or "edge_list"
+    file and leave `f` at the start of the first other line.
+    '''
+    lines = []
+
+    while True:
+        pos  = f.tell()
+        line = f.readline()
+
+        clean_line = _cleanup_line(line, separator)
+
+        if not line or not clean_line.startswith(notifier):
+            f.seek(pos)
+            return lines
+
+        lines.append(clean_line)
+
+
 # ---------------- #
 # Graph properties #
 # ---------------- #
@@ -254,6 +281,186 @@ def _get_edges_elist(lst_lines, attributes, ignore, notifier, separator,
     return edges
 
 
+def _iter_edge_blocks(f, fmt, attributes, attr_types, ignore, notifier,
+                      separator, secondary, di_convert, numeric,
+                      chunk_size=None):
+    '''
+    Parse the edges and their attributes in "neighbour" or "edge_list"
+    format, from the current position of `f`, by blocks of about
+    `chunk_size` bytes.
+
+    Blocks containing only numbers are parsed at once by NumPy; blocks with
+    non-numeric attributes (as indicated by `numeric`) or with lines that
+    do not follow the expected layout are parsed line by line.
+
+    Yields
+    ------
+    edges : array of shape (E, 2)
+        Edges of the block.
+    di_attributes : dict
+        Attribute values of these edges.
+    '''
+    chunk_size = _CHUNK_SIZE if chunk_size is None else chunk_size
+
+    di_get_edges = {
+        "neighbour": _get_edges_neighbour,
+        "edge_list": _get_edges_elist,
+    }
+
+    di_parse = {
+        "neighbour": _parse_neighbour_block,
+        "edge_list": _parse_elist_block,
+    }
+
+    # lines that must be removed before parsing the numbers (lines with
+    # only whitespace are dealt with by the line by line parser)
+    skip = ("\n\n", "\n" + notifier, "\n" + ignore)
+
+    while True:
+        lines = f.readlines(chunk_size)
+
+        if not lines:
+            return
+
+        block = None
+
+        if numeric:
+            text = "".join(lines).replace("\r", "").rstrip("\n")
+
+            if (text.startswith((notifier, ignore, "\n")) or
+                    any(pattern in text for pattern in skip)):
+                text = "\n".join(
+                    line for line in text.split("\n")
+                    if line.strip() and not (line.startswith(notifier) or
+                                             line.startswith(ignore)))
+
+            if text:
+                block = di_parse[fmt](text, len(attributes), separator,
+                                      secondary)
+
+                if block is not None:
+                    edges, values = block
+
+                    di_attributes = {
+                        name: values[:, i].astype(_np_dtype(attr_type))
+                        for i, (name, attr_type) in enumerate(
+                            zip(attributes, attr_types))
+                    }
+
+                    block = (edges, di_attributes)
+
+        if block is None:
+            # line by line parsing
+            lst_lines = [_cleanup_line(line, separator) for line in lines]
+
+            di_attributes = {name: [] for name in attributes}
+
+            edges = di_get_edges[fmt](
+                lst_lines, attributes, ignore, notifier, separator, secondary,
+                di_attributes=di_attributes, di_convert=di_convert)
+
+            edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+            for name, attr_type in zip(attributes, attr_types):
+                di_attributes[name] = _to_np_array(
+                    di_attributes[name], _np_dtype(attr_type))
+
+            block = (edges, di_attributes)
+
+        if len(block[0]):
+            yield block
+
+
+def _parse_elist_block(text, num_attr, separator, secondary):
+    '''
+    Parse a block of "edge_list" lines containing only numbers.
+    Returns the edges and an array containing the attribute values as
+    columns, or None if the block does not have the expected layout.
+    '''
+    num_lines = text.count("\n") + 1
+    num_cols  = 2 + num_attr
+
+    text = _normalize_block(text, separator, secondary).replace(
+        "\n", separator)
+
+    values = _parse_numbers(text, separator)
+
+    if values is None or len(values) != num_lines*num_cols:
+        return None
+
+    values = values.reshape(num_lines, num_cols)
+
+    return values[:, :2].astype(np.int64), values[:, 2:]
+
+
+def _parse_neighbour_block(text, num_attr, separator, secondary):
+    '''
+    Parse a block of "neighbour" lines containing only numbers.
+    Returns the edges and an array containing the attribute values as
+    columns, or None if the block does not have the expected layout.
+    '''
+    text = _normalize_block(text, separator, secondary)
+
+    # number of values on each line: the source, then each neighbour
+    # followed by its attributes
+    num_values = np.array(
+        [line.count(separator) + 1 for line in text.split("\n")])
+
+    stub_size = 1 + num_attr
+
+    num_stubs, remainder = np.divmod(num_values - 1, stub_size)
+
+    if np.any(remainder):
+        return None
+
+    values = _parse_numbers(text.replace("\n", separator), separator)
+
+    if values is None or len(values) != num_values.sum():
+        return None
+
+    is_source = np.zeros(len(values), dtype=bool)
+    is_source[np.cumsum(num_values) - num_values] = True
+
+    sources = np.repeat(values[is_source], num_stubs)
+    stubs   = values[~is_source].reshape(-1, stub_size)
+
+    edges = np.array((sources, stubs[:, 0]), dtype=np.int64).T
+
+    return edges, stubs[:, 1:]
+
+
+def _normalize_block(text, separator, secondary):
+    '''
+    Use `separator` between all values and remove repeated separators as
+    well as separators at the beginning or at the end of the lines.
+    '''
+    sep  = re.escape(separator)
+    text = text.replace(secondary, separator)
+
+    # regular expressions are only used if necessary since they are slow
+    if 2*separator in text:
+        text = re.sub("(?:{})+".format(sep), separator, text)
+
+    if (text.startswith(separator) or text.endswith(separator) or
+            "\n" + separator in text or separator + "\n" in text):
+        text = re.sub("^{0}|{0}$".format(sep), "", text, flags=re.M)
+
+    return text
+
+
+def _parse_numbers(text, separator):
+    ''' Parse all numbers in `text`, or return None if it fails '''
+    with warnings.catch_warnings():
+        # unparsable data leads to a DeprecationWarning in recent numpy
+        # versions (ValueError in the future)
+        warnings.simplefilter("error", DeprecationWarning)
+
+        try:
+            return np.fromstring(text, sep=separator)
+        except (DeprecationWarning, ValueError):
+            return None
+
+
 def _get_edges_gml(lst_lines, attributes, *args, di_attributes=None,
                    di_convert=None, di_notif=None):
     '''
@@ -21,61 +21,194 @@
 """ IO tools for NNGT """
 
 
-def _neighbour_list(graph, separator, secondary, attributes):
+import io
+
+import numpy as np
+
+
+#: number of rows formatted at once by the streaming writers
+_BLOCK_SIZE = 1 << 16
+
+
+# ----------------- #
+# Streaming writers #
+# ----------------- #
+
+def _write_neighbour_list(graph, f, separator, secondary, attributes):
     '''
-    Generate a string containing the neighbour list of the graph as well as a
-    dict containing the notifiers as key and the associated values.
-    @todo: speed this up!
+    Write the neighbour list of the graph and the edge attributes to `f`,
+    by blocks of nodes.
+    For undirected graphs, each edge is listed for both of its nodes.
     '''
-    lst_neighbours = list(graph.adjacency_matrix(mformat="lil").rows)
+    edges   = graph.edges_array
+    columns = _edge_columns(graph, attributes)
 
-    for v1 in range(graph.node_nb()):
-        for i, v2 in enumerate(lst_neighbours[v1]):
-            str_edge = str(v2)
-            eattr    = graph.get_edge_attributes((v1, v2))
+    if not graph.is_directed():
+        # list edges in both directions, except self-loops
+        keep    = edges[:, 0] != edges[:, 1]
+        edges   = np.concatenate((edges, edges[keep, ::-1]))
+        columns = [np.concatenate((c, c[keep])) for c in columns]
 
-            for attr in attributes:
-                str_edge += "{}{}".format(secondary, eattr[attr])
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
 
-            lst_neighbours[v1][i] = str_edge
+    degrees = np.bincount(edges[:, 0], minlength=graph.node_nb())
+    offsets = np.concatenate(([0], np.cumsum(degrees)))
 
-        lst_neighbours[v1] = "{}{}{}".format(
-            v1, separator, separator.join(lst_neighbours[v1]))
+    # one stub per edge: target then attributes
+    stubs = [edges[order, 1]] + [c[order] for c in columns]
 
-    str_neighbours = "\n".join(lst_neighbours)
+    stub_fmt = separator + secondary.join(
+        ["%d"] + [_value_fmt(graph, attr) for attr in attributes])
 
-    return str_neighbours
+    for start, stop in _node_blocks(degrees):
+        first, last = offsets[start], offsets[stop]
 
+        # each line contains the node followed by its stubs
+        line_fmt = "".join(
+            "%d" + stub_fmt*int(d) + "\n" for d in degrees[start:stop])
 
-def _edge_list(graph, separator, secondary, attributes):
-    ''' Generate a string containing the edge list and their properties. '''
-    edges = graph.edges_array
+        block = _object_columns([c[first:last] for c in stubs])
 
-    di_attributes = {
-        k: v for k, v in graph.edge_attributes.items()
-        if k != 'bweight'
-    }
+        values = np.empty(stop - start + block.size, dtype=object)
 
-    end_strings = (len(attributes) - 1)*[secondary]
+        is_node = np.zeros(len(values), dtype=bool)
+        is_node[np.arange(stop - start) +
+                (offsets[start:stop] - first)*len(stubs)] = True
 
-    end_strings.append('')
+        values[is_node]  = range(start, stop)
+        values[~is_node] = block.ravel()
 
-    lst_edges = []
+        f.write(line_fmt % tuple(values))
+
+
+def _write_edge_list(graph, f, separator, secondary, attributes):
+    '''
+    Write the edge list and the edge attributes to `f`, by blocks of edges.
+    '''
+    edges   = graph.edges_array
+    columns = [edges[:, 0], edges[:, 1]] + _edge_columns(graph, attributes)
+
+    row_fmt = "%d{}%d".format(separator)
+
+    if attributes:
+        row_fmt += separator + secondary.join(
+            _value_fmt(graph, attr) for attr in attributes)
+
+    for start in range(0, len(edges), _BLOCK_SIZE):
+        block = _object_columns([c[start:start + _BLOCK_SIZE]
+                                 for c in columns])
+
+        f.write((row_fmt + "\n")*len(block) % tuple(block.ravel()))
+
+
+def _write_values(f, values, separator):
+    ''' Write the numbers in `values` on a single line, by blocks '''
+    fmt = "%d" if values.dtype.kind in "iub" else "%s"
+
+    for start in range(0, len(values), _BLOCK_SIZE):
+        block = values[start:start + _BLOCK_SIZE].tolist()
+        end   = "" if start + _BLOCK_SIZE >= len(values) else separator
+
+        f.write(separator.join([fmt]*len(block)) % tuple(block) + end)
+
+    f.write("\n")
+
+
+def _write_info(graph_info, f, notifier, separator):
+    '''
+    Write the graph information for custom formats; numeric arrays (node
+    attributes and positions) are written by blocks.
+    '''
+    for key, val in iter(graph_info.items()):
+        if isinstance(val, np.ndarray) and val.dtype != object:
+            f.write("{}{}=".format(notifier, key))
+            _write_values(f, val, separator)
+        else:
+            f.write("{}{}={}\n".format(notifier, key, val))
 
-    for i, e in enumerate(edges):
-        str_edge = "{}{}{}".format(e[0], separator, e[1])
 
-        if attributes:
-            str_edge += separator
+def _to_string(writer, graph, *args):
+    ''' Return the output of a streaming writer as a string '''
+    buf = io.StringIO()
 
-        for end, attr in zip(end_strings, attributes):
-            str_edge += "{}{}".format(di_attributes[attr][i], end)
+    writer(graph, buf, *args)
 
-        lst_edges.append(str_edge)
+    return buf.getvalue().rstrip("\n")
 
-    str_edges = "\n".join(lst_edges)
 
-    return str_edges
+def _edge_columns(graph, attributes):
+    ''' Values of the edge attributes as 1D arrays '''
+    columns = []
+
+    for attr in attributes:
+        values = graph.get_edge_attributes(name=attr)
+
+        if graph.get_attribute_type(attr, "edge") in ("int", "double"):
+            columns.append(np.asarray(values))
+        else:
+            # keep nested containers as objects
+            col    = np.empty(len(values), dtype=object)
+            col[:] = list(values)
+            columns.append(col)
+
+    return columns
+
+
+def _value_fmt(graph, attr):
+    ''' Format specifier for an edge attribute '''
+    return "%d" if graph.get_attribute_type(attr, "edge") == "int" else "%s"
+
+
+def _object_columns(columns):
+    '''
+    Stack columns into an object array so that the values keep their type
+    (no conversion of large integers to floats).
+    '''
+    num_rows = len(columns[0])
+    block    = np.empty((num_rows, len(columns)), dtype=object)
+
+    for i, col in enumerate(columns):
+        block[:, i] = col
+
+    return block
+
+
+def _node_blocks(degrees):
+    '''
+    Split the nodes into contiguous ranges containing about `_BLOCK_SIZE`
+    edges and nodes.
+    '''
+    if not len(degrees):
+        return
+
+    cumsize = np.cumsum(degrees + 1)
+
+    cuts = np.searchsorted(
+        cumsize, np.arange(_BLOCK_SIZE, cumsize[-1], _BLOCK_SIZE),
+        side="right")
+
+    bounds = np.unique(np.concatenate(([0], cuts, [len(degrees)])))
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        yield start, stop
+
+
+# -------------- #
+# String writers #
+# -------------- #
+
+def _neighbour_list(graph, separator, secondary, attributes):
+    '''
+    Generate a string containing the neighbour list of the graph.
+    '''
+    return _to_string(_write_neighbour_list, graph, separator, secondary,
+                      attributes)
+
+
+def _edge_list(graph, separator, secondary, attributes):
+    ''' Generate a string containing the edge list and their properties. '''
+    return _to_string(_write_edge_list, graph, separator, secondary,
+                      attributes)
 
 
 def _dot(graph, attributes, **kwargs):
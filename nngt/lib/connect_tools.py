@@ -5,8 +5,11 @@
 
 import logging
 
+from itertools import chain
+
 import numpy as np
 import scipy.sparse as ssp
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import cdist
 from numpy.random import randint
 
@@ -19,9 +22,15 @@ logger = logging.getLogger(__name__)
 
 
 __all__ = [
+    "_EdgeSet",
+    "_FenwickTree",
+    "_SpatialIndex",
     "_check_num_edges",
     "_compute_connections",
+    "_dist_rule_proba",
+    "_distances",
     "_filter",
+    "_get_spatial_index",
     "_no_self_loops",
     "_set_degree_type",
     "_set_options",
@@ -149,125 +158,254 @@ def _no_self_loops(array, return_test=False):
     return array[test, :].astype(int)
 
 
+class _EdgeSet:
+
+    '''
+    Set of the edges created by the generation algorithms.
+
+    Edges are stored as packed int64 keys (``source << 32 | target``) in a
+    sorted array; for undirected graphs, the key is computed from the sorted
+    nodes so that an edge and its reciprocal are the same element.
+    A compiled version, based on an open-addressing hash table written in
+    Cython, is provided by :mod:`nngt.generation.cconnect`.
+    '''
+
+    def __init__(self, directed=True, edges=None):
+        self.directed = directed
+        self._keys    = np.array([], dtype=np.int64)
+
+        if edges is not None:
+            self.insert(edges)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def contains(self, edges):
+        ''' Return whether each of the `edges` is in the set. '''
+        keys  = self._pack(edges)
+        order = np.argsort(keys)
+
+        # searching sorted keys is much faster for large arrays
+        idx = np.empty(len(keys), dtype=np.int64)
+        idx[order] = np.searchsorted(self._keys, keys[order])
+
+        found = idx < len(self._keys)
+        found[found] = self._keys[idx[found]] == keys[found]
+
+        return found
+
+    def insert(self, edges):
+        '''
+        Add the `edges` that are not already in the set and return a boolean
+        array telling which entries were added (only the first occurence of
+        duplicate edges is added).
+        '''
+        keys = self._pack(edges)
+
+        unique, first = np.unique(keys, return_index=True)
+
+        idx   = np.searchsorted(self._keys, unique)
+        found = idx < len(self._keys)
+        found[found] = self._keys[idx[found]] == unique[found]
+
+        # merging two sorted arrays is linear with the stable sort
+        self._keys = np.sort(np.concatenate((self._keys, unique[~found])),
+                             kind="stable")
+
+        added = np.zeros(len(keys), dtype=bool)
+        added[first[~found]] = True
+
+        return added
+
+    def remove(self, edges):
+        ''' Remove `edges` from the set (ignoring missing ones). '''
+        self._keys = np.setdiff1d(self._keys, self._pack(edges),
+                                  assume_unique=True)
+
+    def _pack(self, edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        sources, targets = edges[:, 0], edges[:, 1]
+
+        if not self.directed:
+            sources, targets = (np.minimum(sources, targets),
+                                np.maximum(sources, targets))
+
+        return (sources << 32) | targets
+
+
+class _FenwickTree:
+
+    '''
+    Binary indexed tree on non-negative weights, used to draw indices with a
+    probability proportional to their weight in O(log N) while the weights
+    are updated.
+    '''
+
+    def __init__(self, size):
+        self.total = 0.
+        self._size = size
+        self._tree = [0.]*(size + 1)
+        self._top  = 1 << (max(size, 1).bit_length() - 1)
+
+    def add(self, i, delta):
+        ''' Add `delta` to the weight of index `i`. '''
+        tree, size = self._tree, self._size
+
+        self.total += delta
+
+        i += 1
+
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def find(self, value):
+        '''
+        Return the first index such that the cumulated weight up to it
+        (included) is larger than `value`.
+        '''
+        tree, size = self._tree, self._size
+
+        pos, step = 0, self._top
+
+        while step:
+            nxt = pos + step
+
+            if nxt <= size and tree[nxt] <= value:
+                value -= tree[nxt]
+                pos = nxt
+
+            step >>= 1
+
+        return pos
+
+
 def _filter(ia_edges, ia_edges_tmp, num_ecurrent, edges_hash, b_one_pop,
-            multigraph, directed=True, recip_hash=None, distance=None,
-            dist_tmp=None):
+            multigraph, distance=None, dist_tmp=None):
     '''
     Filter the edges: remove self loops and multiple connections if the graph
     is not a multigraph.
+
+    `edges_hash` is an :class:`_EdgeSet` containing the existing edges, which
+    also takes care of reciprocal edges for undirected graphs.
+    Candidate edges in `ia_edges_tmp` (with their distance in `dist_tmp` if
+    `distance` is a list that must be extended) are added to `ia_edges` after
+    `num_ecurrent`; return `ia_edges` and the new number of edges.
     '''
+    ia_edges_tmp = np.asarray(ia_edges_tmp, dtype=np.int64).reshape(-1, 2)
+
+    if dist_tmp is not None:
+        dist_tmp = np.asarray(dist_tmp)
+
     if b_one_pop:
-        ia_edges_tmp, test = _no_self_loops(ia_edges_tmp, return_test=True)
+        keep = ia_edges_tmp[:, 0] != ia_edges_tmp[:, 1]
+
+        ia_edges_tmp = ia_edges_tmp[keep]
+
         if dist_tmp is not None:
-            dist_tmp = dist_tmp[test]
+            dist_tmp = dist_tmp[keep]
 
     if not multigraph:
         num_ecurrent = len(edges_hash)
-        if distance is not None:
-            for e, d in zip(ia_edges_tmp, dist_tmp):
-                tpl_e = tuple(e)
-
-                if tpl_e not in edges_hash:
-                    if directed or tpl_e not in recip_hash:
-                        ia_edges[num_ecurrent] = e
-                        distance.append(d)
-                        edges_hash.add(tpl_e)
 
-                        if not directed:
-                            recip_hash.add(tpl_e[::-1])
-
-                        num_ecurrent += 1
-        else:
-            for e in ia_edges_tmp:
-                tpl_e = tuple(e)
+        added = edges_hash.insert(ia_edges_tmp)
 
-                if tpl_e not in edges_hash:
-                    if directed or tpl_e not in recip_hash:
-                        ia_edges[num_ecurrent] = e
+        ia_edges_tmp = ia_edges_tmp[added]
 
-                        edges_hash.add(tpl_e)
+        if dist_tmp is not None:
+            dist_tmp = dist_tmp[added]
 
-                        if not directed:
-                            recip_hash.add(tpl_e[::-1])
+    num_added = len(ia_edges_tmp)
 
-                        num_ecurrent += 1
-    else:
-        num_added = len(ia_edges_tmp)
-        ia_edges[num_ecurrent:num_ecurrent + num_added, :] = ia_edges_tmp
-        num_ecurrent += num_added
+    ia_edges[num_ecurrent:num_ecurrent + num_added] = ia_edges_tmp
 
-        if distance is not None:
-            distance.extend(dist_tmp)
+    if distance is not None:
+        distance.extend(dist_tmp)
 
-    return ia_edges, num_ecurrent
+    return ia_edges, num_ecurrent + num_added
 
 
 def _cleanup_edges(g, edges, attributes, duplicates, loops, existing, ignore):
     '''
     Cleanup an list of edges.
+
+    All tests are vectorized: existing edges are found through
+    :meth:`~nngt.core.GraphInterface._has_edges` (which uses the edge index
+    of the graph when available) and duplicates through an :class:`_EdgeSet`.
+    If `ignore` is True, the number of invalid edges of each kind is logged
+    in a single warning, otherwise an error is raised on the first kind of
+    invalid edge found.
     '''
-    loops_only = loops and not (duplicates or existing)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
 
-    new_edges = None
-    new_attr  = {}
-    directed  = g.is_directed()
+    directed = g.is_directed()
+    invalid  = np.zeros(len(edges), dtype=bool)
+    ignored  = []
 
-    if loops_only:
-        edges = np.asarray(edges)
+    # existing edges, then self-loops, then duplicates among remaining edges
+    if existing:
+        test = g._has_edges(edges)
 
-        new_edges, test = _no_self_loops(edges, return_test=True)
+        _invalid_edges(edges, test, "existing edges",
+                       "Edge ({}, {}) already exists.", ignore, ignored)
 
-        if len(new_edges) != len(edges):
-            if ignore:
-                _log_message(logger, "WARNING",
-                             "Self-loops ignored: {}.".format(edges[~test]))
-            else:
-                raise InvalidArgument(
-                    "Self-loops are present: {}.".format(edges[~test]))
+        invalid |= test
 
-        new_attr  = {k: np.asarray(v)[test] for v, k in attributes.items()}
-    else:
-        # check (also) either duplicates or existing
-        new_attr = {key: [] for key in attributes}
-        edge_set = set()
-
-        new_edges = []
-
-        if existing:
-            edge_set = {tuple(e) for e in g.edges_array}
-
-        for i, e in enumerate(edges):
-            tpl_e = tuple(e)
-
-            if tpl_e in edge_set or (not directed and tpl_e[::-1] in edge_set):
-                if ignore:
-                    _log_message(logger, "WARNING",
-                                 "Existing edge {} ignored.".format(tpl_e))
-                else:
-                    raise InvalidArgument(
-                        "Edge {} already exists.".format(tpl_e))
-            elif loops and e[0] == e[1]:
-                if ignore:
-                    _log_message(logger, "WARNING",
-                                 "Self-loop on {} ignored.".format(e[0]))
-                else:
-                    raise InvalidArgument("Self-loop on {}.".format(e[0]))
-            else:
-                edge_set.add(tpl_e)
-                new_edges.append(tpl_e)
+    if loops:
+        test = (edges[:, 0] == edges[:, 1]) & ~invalid
+
+        _invalid_edges(edges, test, "self-loops", "Self-loop on {}.", ignore,
+                       ignored)
+
+        invalid |= test
+
+    if duplicates or existing:
+        valid = np.where(~invalid)[0]
+        test  = np.zeros(len(edges), dtype=bool)
 
-                if not directed:
-                    edge_set.add(tpl_e[::-1])
+        test[valid] = ~_EdgeSet(directed).insert(edges[valid])
 
-                for k, vv in attributes.items():
-                    if nonstring_container(vv):
-                        new_attr[k].append(vv[i])
-                    else:
-                        new_attr[k].append(vv)
+        _invalid_edges(edges, test, "duplicate edges",
+                       "Edge ({}, {}) is present multiple times.",
+                       ignore, ignored)
 
-        new_edges = np.asarray(new_edges)
+        invalid |= test
 
-    return new_edges, new_attr
+    if ignored:
+        _log_message(logger, "WARNING",
+                     "Ignored {}.".format(", ".join(ignored)))
+
+    keep      = ~invalid
+    num_edges = int(keep.sum())
+    new_attr  = {}
+
+    for k, vv in attributes.items():
+        if isinstance(vv, dict):
+            new_attr[k] = vv
+        elif nonstring_container(vv):
+            new_attr[k] = np.asarray(vv)[keep]
+        else:
+            new_attr[k] = [vv]*num_edges
+
+    return edges[keep], new_attr
+
+
+def _invalid_edges(edges, test, kind, error, ignore, ignored):
+    '''
+    Record the number of invalid `edges` of a given `kind` (where `test` is
+    True) in `ignored`, or raise an error formatted with the source and
+    target of the first invalid edge.
+    '''
+    num_invalid = np.count_nonzero(test)
+
+    if num_invalid:
+        if not ignore:
+            source, target = edges[np.argmax(test)]
+
+            raise InvalidArgument(error.format(source, target))
+
+        ignored.append("{} {}".format(num_invalid, kind))
 
 
 # ------------- #
@@ -295,18 +433,29 @@ def dist_rule(rule, scale, pos_src, pos_targets, dist=None):
     -------
     Array of size N giving the probability of the edges according to the rule.
     '''
-    vect = pos_targets - pos_src
-    origin = np.array([(0., 0.)])
-    # todo correct this
-    dist_tmp = np.squeeze(cdist(vect.T, origin), axis=1)
+    vect = np.subtract(pos_targets, pos_src, dtype=float)
+    dist_tmp = np.hypot(vect[0], vect[1])
     if dist is not None:
         dist.extend(dist_tmp)
+    return _dist_rule_proba(rule, scale, dist_tmp)
+
+
+def _distances(positions, sources, targets):
+    ''' Distances between `sources` and `targets` ((2, N) positions) '''
+    vect = np.subtract(positions[:, targets], positions[:, sources],
+                       dtype=float)
+
+    return np.hypot(vect[0], vect[1])
+
+
+def _dist_rule_proba(rule, scale, dist):
+    ''' Connection probability associated to each of the distances '''
     if rule == 'exp':
-        return np.exp(np.divide(dist_tmp, -scale))
+        return np.exp(np.divide(dist, -scale))
     elif rule == 'gaussian':
-        return np.exp(-0.5*np.square(np.divide(dist_tmp, scale)))
+        return np.exp(-0.5*np.square(np.divide(dist, scale)))
     elif rule == 'lin':
-        return np.divide(scale - dist_tmp, scale).clip(min=0.)
+        return np.divide(scale - dist, scale).clip(min=0.)
     else:
         raise InvalidArgument('Unknown rule "' + rule + '".')
 
@@ -336,21 +485,190 @@ def max_proba_dist_rule(rule, scale, max_proba, pos_src, pos_targets,
     Array of size N giving the probability of the edges according to the rule.
     '''
     x, y = pos_src
-    s = np.repeat([[x], [y]], pos_targets.shape[1], axis=1)
-    vect = pos_targets - np.repeat([[x], [y]], pos_targets.shape[1], axis=1)
-    origin = np.array([(0., 0.)])
-    # todo correct this
-    dist_tmp = np.squeeze(cdist(vect.T, origin), axis=1)
+    vect = np.subtract(pos_targets, [[x], [y]], dtype=float)
+    dist_tmp = np.hypot(vect[0], vect[1])
     if dist is not None:
         dist.extend(dist_tmp)
-    if rule == 'exp':
-        return max_proba*np.exp(np.divide(dist_tmp, -scale))
-    elif rule == 'gaussian':
-        return max_proba*np.exp(-0.5*np.square(np.divide(dist_tmp, scale)))
-    elif rule == 'lin':
-        return max_proba*np.divide(scale - dist_tmp, scale).clip(min=0.)
-    else:
-        raise InvalidArgument('Unknown rule "' + rule + '".')
+    return max_proba*_dist_rule_proba(rule, scale, dist_tmp)
+
+
+class _SpatialIndex:
+
+    '''
+    Spatial index on the positions of a set of nodes, used to find the nodes
+    that are in the square area around some points without scanning all the
+    nodes.
+
+    Neighbour queries and pair counts go through a
+    :class:`scipy.spatial.cKDTree`; random neighbours are drawn using a
+    uniform grid, built on demand and kept only for the last cell size so
+    that the memory of the index stays O(N).
+    All areas are open squares: a node is a neighbour of a point if its
+    distance along each axis is strictly smaller than `radius`.
+    '''
+
+    def __init__(self, positions):
+        self.positions = positions
+        self._tree     = None
+        self._grid_key = None
+        self._grid_val = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def tree(self):
+        ''' k-d tree on the positions '''
+        if self._tree is None:
+            self._tree = cKDTree(self.positions)
+
+        return self._tree
+
+    def neighbours(self, points, radius):
+        '''
+        Return the neighbours of `points` in compressed format: the
+        neighbours of ``points[i]`` are ``indices[indptr[i]:indptr[i+1]]``.
+        '''
+        nlists = self.tree.query_ball_point(
+            points, np.nextafter(radius, 0), p=np.inf, return_sorted=False)
+
+        indptr = np.zeros(len(points) + 1, dtype=int)
+        indptr[1:] = np.cumsum([len(n) for n in nlists])
+
+        indices = np.fromiter(chain.from_iterable(nlists), dtype=int,
+                              count=indptr[-1])
+
+        return indptr, indices
+
+    def count_pairs(self, other, radius):
+        ''' Number of neighbouring (node, other node) pairs. '''
+        return int(self.tree.count_neighbors(
+            other.tree, np.nextafter(radius, 0), p=np.inf))
+
+    def sample_pairs(self, points, radius, num):
+        '''
+        Draw random (point, neighbour) pairs, returned as two arrays of
+        indices.
+
+        Each of the `num` trials picks a node uniformly among those in the
+        3x3 grid cells around a point, the points being chosen in proportion
+        to the number of such nodes; trials giving a node outside of the area
+        of the point are discarded, so that the returned pairs are uniformly
+        distributed among all (point, neighbour) pairs.
+        Pairs are returned sorted by point.
+        '''
+        order = self._grid(radius)[-1]
+
+        ends, shift = self._pools(points, radius)
+
+        pools = ends[:, 2]
+        total = pools.sum()
+
+        if num == 0 or total == 0:
+            return np.array([], dtype=int), np.array([], dtype=int)
+
+        # number of trials for each point, then random node in its pool
+        trials = np.random.multinomial(num, pools / total)
+        src    = np.repeat(np.arange(len(points)), trials)
+        rank   = (np.random.random(num)*pools[src]).astype(np.int64)
+
+        segment = ((rank >= np.repeat(ends[:, 0], trials)).astype(int)
+                   + (rank >= np.repeat(ends[:, 1], trials)))
+
+        rank += np.choose(segment, [np.repeat(shift[:, i], trials)
+                                    for i in range(3)])
+
+        tgt = order[rank]
+
+        keep = np.all(np.abs(self.positions[tgt] - points[src]) < radius,
+                      axis=1)
+
+        return src[keep], tgt[keep]
+
+    def pool_sizes(self, points, radius):
+        '''
+        Number of nodes in the 3x3 grid cells around each point, i.e. the
+        relative number of trials that :meth:`sample_pairs` makes for them.
+        '''
+        return self._pools(points, radius)[0][:, 2]
+
+    def _pools(self, points, radius):
+        '''
+        Locate the nodes in the 3x3 grid cells around each point: they are in
+        3 contiguous segments of `order`, and a node of rank k in the pool of
+        a point is at ``order[k + shift[segment]]``, where `segment` is the
+        first one such that ``k < ends[segment]``.
+        '''
+        lo, cell, shape, bounds, order = self._grid(radius)
+
+        # cells containing the points (the 2-cell padding guarantees that
+        # all cells around the points which can contain nodes exist)
+        coords = np.floor((points - lo) / cell).astype(int) + 2
+        valid  = np.all((coords >= 1) & (coords <= np.subtract(shape, 2)),
+                        axis=1)
+        base   = coords[:, 0]*shape[1] + coords[:, 1]
+        base[~valid] = shape[1] + 1
+
+        ends  = np.zeros((len(points), 3), dtype=np.int64)
+        shift = np.zeros((len(points), 3), dtype=np.int64)
+
+        for i, dx in enumerate((-1, 0, 1)):
+            first = bounds[base + dx*shape[1] - 1]
+            last  = bounds[base + dx*shape[1] + 2]
+
+            ends[:, i]  = last - first + (ends[:, i - 1] if i else 0)
+            shift[:, i] = first - (ends[:, i - 1] if i else 0)
+
+        ends[~valid] = 0
+
+        return ends, shift
+
+    def _grid(self, radius):
+        '''
+        Uniform grid with cells larger than `radius`, padded with 2 empty
+        cells on each side; the nodes of cell ``i`` are
+        ``order[bounds[i]:bounds[i+1]]``.
+        '''
+        if radius != self._grid_key:
+            # release the previous grid before building the new one
+            self._grid_key, self._grid_val = None, None
+
+            lo     = self.positions.min(axis=0)
+            extent = self.positions.max(axis=0) - lo
+            size   = len(self.positions)
+
+            # avoid having many more cells than nodes
+            cell = max(radius, np.sqrt(np.prod(extent) / (4*size)),
+                       np.max(extent) / (4*size))
+
+            coords = np.floor((self.positions - lo) / cell).astype(int) + 2
+            shape  = tuple(coords.max(axis=0) + 3)
+            cells  = coords[:, 0]*shape[1] + coords[:, 1]
+
+            bounds = np.zeros(shape[0]*shape[1] + 1, dtype=np.int64)
+            bounds[1:] = np.cumsum(
+                np.bincount(cells, minlength=shape[0]*shape[1]))
+
+            order = np.argsort(cells, kind="stable")
+
+            self._grid_key = radius
+            self._grid_val = (lo, cell, shape, bounds, order)
+
+        return self._grid_val
+
+
+def _get_spatial_index(positions, node_ids, spatial_index=None):
+    '''
+    Return a :class:`_SpatialIndex` for the nodes in `node_ids`, reusing
+    `spatial_index` (built on all `positions`) if possible.
+
+    `positions` is a (2, N) array.
+    '''
+    if spatial_index is not None and len(spatial_index) == len(node_ids):
+        if np.array_equal(node_ids, np.arange(len(node_ids))):
+            return spatial_index
+
+    return _SpatialIndex(positions[:, node_ids].T)
 
 
 def _set_dist_new_edges(new_attr, graph, edge_list):
@@ -360,11 +678,11 @@ def _set_dist_new_edges(new_attr, graph, edge_list):
             positions = graph.get_positions(list(edge_list[0]))
             new_attr["distance"] = cdist([positions[0]], [positions[1]])[0][0]
         else:
+            edge_list = np.asarray(edge_list, dtype=int)
             positions = graph.get_positions()
-            mat = cdist(positions, positions)
-            distances = [mat[e[0], e[1]] for e in edge_list]
+            vectors   = positions[edge_list[:, 1]] - positions[edge_list[:, 0]]
 
-            new_attr["distance"] = distances
+            new_attr["distance"] = np.linalg.norm(vectors, axis=1)
 
 
 def _set_default_edge_attributes(g, attributes, num_edges):
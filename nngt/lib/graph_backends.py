@@ -233,15 +233,17 @@ def _set_nngt():
     def get_edges(g):
         return g.edges_array
 
-    from nngt.analysis.nngt_functions import reciprocity, adj_mat
+    from nngt.analysis.nngt_functions import (
+        reciprocity, adj_mat, betweenness, closeness, connected_components,
+        diameter)
 
     # store functions
     nngt.analyze_graph["assortativity"] = _notimplemented
-    nngt.analyze_graph["betweenness"] = _notimplemented
-    nngt.analyze_graph["diameter"] = _notimplemented
-    nngt.analyze_graph["closeness"] = _notimplemented
+    nngt.analyze_graph["betweenness"] = betweenness
+    nngt.analyze_graph["diameter"] = diameter
+    nngt.analyze_graph["closeness"] = closeness
     nngt.analyze_graph["reciprocity"] = reciprocity
-    nngt.analyze_graph["connected_components"] = _notimplemented
+    nngt.analyze_graph["connected_components"] = connected_components
     nngt.analyze_graph["adjacency"] = adj_mat
     nngt.analyze_graph["get_edges"] = get_edges
 
@@ -33,7 +33,8 @@ import nngt
 from .errors import InvalidArgument
 from .logger import _configure_logger, _init_logger, _log_message
 from .rng_tools import seed as nngt_seed
-from .test_functions import mpi_checker, num_mpi_processes, mpi_barrier
+from .test_functions import (mpi_checker, num_mpi_processes, mpi_barrier,
+                             is_integer)
 
 
 logger = logging.getLogger(__name__)
@@ -129,6 +130,7 @@ def set_config(config, value=None, silent=False):
     old_mt     = nngt._config["multithreading"]
     old_mpi    = nngt._config["mpi"]
     old_omp    = nngt._config["omp"]
+    old_proc   = nngt._config["processes"]
     old_gl     = nngt._config["backend"]
     old_msd    = nngt._config["msd"]
 
@@ -170,13 +172,14 @@ def set_config(config, value=None, silent=False):
         del new_config["palette"]
 
     # check multithreading status and number of threads
-    _pre_update_parallelism(new_config, old_mt, old_omp, old_mpi)
+    _pre_update_parallelism(new_config, old_mt, old_omp, old_mpi, old_proc)
 
     # update
     nngt._config.update(new_config)
 
     # apply multithreading parameters
-    _post_update_parallelism(new_config, old_gl, old_msd, old_mt, old_mpi)
+    _post_update_parallelism(new_config, old_gl, old_msd, old_mt, old_mpi,
+                             old_proc)
 
     # update matplotlib
     if nngt._config['use_tex']:
@@ -227,6 +230,7 @@ def set_config(config, value=None, silent=False):
         omp     = nngt._config["omp"],
         s       = "s" if nngt._config["omp"] > 1 else "",
         mpi     = s_mpi,
+        proc    = nngt._config["processes"],
         shapely = has_shapely,
         svg     = has_svg,
         dxf     = has_dxf,
@@ -297,9 +301,18 @@ def _set_gt_config(old_gl, new_config):
                          "`graph_tool` configuration was not changed.")
 
 
-def _pre_update_parallelism(new_config, old_mt, old_omp, old_mpi):
+def _pre_update_parallelism(new_config, old_mt, old_omp, old_mpi, old_proc):
     mt = "multithreading"
 
+    num_proc = new_config.get("processes", old_proc)
+
+    if not is_integer(num_proc) or num_proc < 1:
+        raise InvalidArgument('"processes" must be a positive integer.')
+
+    if num_proc > 1 and new_config.get('mpi', old_mpi):
+        raise InvalidArgument('Cannot use "mpi" with several "processes", '
+                              'choose one or the other.')
+
     if "omp" in new_config:
         if new_config["omp"] > 1:
             if mt in new_config and not new_config[mt]:
@@ -359,11 +372,14 @@ def _pre_update_parallelism(new_config, old_mt, old_omp, old_mpi):
             nngt._seeded        = False
 
 
-def _post_update_parallelism(new_config, old_gl, old_msd, old_mt, old_mpi):
-    # reload for omp
+def _post_update_parallelism(new_config, old_gl, old_msd, old_mt, old_mpi,
+                             old_proc):
+    # reload for omp or multiprocessing
     new_multithreading = new_config.get("multithreading", old_mt)
+    new_processes      = new_config.get("processes", old_proc)
 
-    if new_multithreading != old_mt:
+    if (new_multithreading != old_mt
+            or (new_processes > 1) != (old_proc > 1)):
         reload(sys.modules["nngt"].generation.graph_connectivity)
         reload(sys.modules["nngt"].generation.connectors)
         reload(sys.modules["nngt"].generation.rewiring)
@@ -432,6 +448,7 @@ config_info = '''
 # -------------- #
 Graph library:  {gl}
 Multithreading: {thread} ({omp} thread{s})
+Processes:      {proc}
 MPI:            {mpi}
 Plotting:       {plot}
 NEST support:   {nest}
@@ -735,7 +735,7 @@ def hive_plot(network, radial, axes=None, axes_bins=None, axes_range=None,
     nedges = network.edge_nb()
 
     esize = np.ones(nedges) if esize is None else network.edge_attributes[esize]
-    esize *= max_esize / esize.max()
+    esize = esize * max_esize / esize.max()
 
     esize = {tuple(e): s for e, s in zip(network.edges_array, esize)}
 
@@ -1036,7 +1036,7 @@ def library_draw(network, nsize="total-degree", ncolor="group", nshape="o",
     esize  = _edge_prop(network, esize)
 
     if nonstring_container(esize) and len(esize):
-        esize *= max_esize / np.max(esize)
+        esize = esize * max_esize / np.max(esize)
     
     # environment
     if spatial and network.is_spatial():
@@ -1435,7 +1435,7 @@ def _edge_size(network, edges, esize):
             max_size = np.max(network.get_weights())
 
         if np.any(size):
-            size /= max_size
+            size = size / max_size
 
     return size
 
@@ -28,6 +28,7 @@ import nest
 import numpy as np
 
 from nngt.lib import InvalidArgument, nonstring_container
+from nngt.analysis.activity_analysis import _analysis, _compute_properties
 from .nest_utils import nest_version, _get_nest_gids
 
 
@@ -463,197 +464,6 @@ def _get_data(source):
     return np.array(data)[:, idx_sort].T
 
 
-def _find_phases(times, phases, lim_burst, lim_quiet, simplify):
-    '''
-    Find the time limits of the different phases.
-    '''
-    diff = np.diff(times).tolist()[::-1]
-    i = 0
-    previous = {"bursting": -2, "mixed": -2, "quiescent": -2}
-
-    while diff:
-        tau = diff.pop()
-        while True:
-            if tau < lim_burst: # bursting phase
-                if previous["bursting"] == i-1:
-                    phases["bursting"][-1][1] = times[i+1]
-                else:
-                    if simplify and previous["mixed"] == i-1:
-                        start_mixed = phases["mixed"][-1][0]
-                        phases["bursting"].append([start_mixed, times[i+1]])
-                        del phases["mixed"][-1]
-                    else:
-                        phases["bursting"].append([times[i], times[i+1]])
-                previous["bursting"] = i
-                i+=1
-                break
-            elif tau > lim_quiet:
-                if previous["quiescent"] == i-1:
-                    phases["quiescent"][-1][1] = times[i+1]
-                else:
-                    phases["quiescent"].append([times[i], times[i+1]])
-                previous["quiescent"] = i
-                i+=1
-                break
-            else:
-                if previous["mixed"] == i-1:
-                    phases["mixed"][-1][1] = times[i+1]
-                    previous["mixed"] = i
-                else:
-                    if simplify and previous["bursting"] == i-1:
-                        phases["bursting"][-1][1] = times[i+1]
-                        previous["bursting"] = i
-                    else:
-                        phases["mixed"].append([times[i], times[i+1]])
-                        previous["mixed"] = i
-                i+=1
-                break
-
-
-def _check_burst_size(phases, senders, times, network, mflb, mfb):
-    '''
-    Check that bursting periods involve at least a fraction mfb of the neurons.
-    '''
-    transfer, destination = [], {}
-    n = len(set(senders)) if network is None else network.node_nb()
-    for i,burst in enumerate(phases["bursting"]):
-        idx_start = np.where(times==burst[0])[0][0]
-        idx_end = np.where(times==burst[1])[0][0]
-        participating_frac = len(set(senders[idx_start:idx_end])) / float(n)
-        if participating_frac < mflb:
-            transfer.append(i)
-            destination[i] = "mixed"
-        elif participating_frac < mfb:
-            transfer.append(i)
-            destination[i] = "localized"
-    for i in transfer[::-1]:
-        phase = phases["bursting"].pop(i)
-        phases[destination[i]].insert(0, phase)
-    remove = []
-    i = 0
-    while i < len(phases['mixed']):
-        mixed = phases['mixed'][i]
-        j=i+1
-        for span in phases['mixed'][i+1:]:
-            if span[0] == mixed[1]:
-                mixed[1] = span[1]
-                remove.append(j)
-            elif span[1] == mixed[0]:
-                mixed[0] = span[0]
-                remove.append(j)
-            j+=1
-        i+=1
-    remove = list(set(remove))
-    remove.sort()
-    for i in remove[::-1]:
-        del phases["mixed"][i]
-
-
-def _analysis(times, senders, limits, network=None,
-              phase_coeff=(0.5, 10.), mbis=0.5, mfb=0.2, mflb=0.05,
-              simplify=False):
-    # prepare the phases and check the validity of the data
-    phases = {
-        "bursting": [],
-        "mixed": [],
-        "quiescent": [],
-        "localized": []
-    }
-    num_spikes, avg_rate = len(times), 0.
-    if num_spikes:
-        num_neurons = (len(np.unique(senders)) if network is None
-                       else network.node_nb())
-        # set the studied region
-        if limits[0] >= times[0]:
-            idx_start = np.where(times >= limits[0])[0][0]
-            times = times[idx_start:]
-            senders = senders[idx_start:]
-        if limits[1] <= times[-1]:
-            idx_end = np.where(times <= limits[1])[0][-1]
-            times = times[:idx_end]
-            senders = senders[:idx_end]
-        # get the average firing rate to differenciate the phases
-        simtime = limits[1] - limits[0]
-        lim_burst, lim_quiet = 0., 0.
-        avg_rate = num_spikes / float(simtime)
-        lim_burst = max(phase_coeff[0] / avg_rate, mbis)
-        lim_quiet = min(phase_coeff[1] / avg_rate, 10.)
-        # find the phases
-        _find_phases(times, phases, lim_burst, lim_quiet, simplify)
-        _check_burst_size(phases, senders, times, network, mflb, mfb)
-        avg_rate *= 1000. / float(num_neurons)
-    return phases, avg_rate
-
-
-def _compute_properties(data, phases, fr, skip_bursts):
-    '''
-    Compute the properties from the spike times and phases.
-
-    Parameters
-    ----------
-    data : 2D array, shape (N, 2)
-        Spike times and senders.
-    phases : dict
-        The phases.
-    fr : double
-        Firing rate.
-
-    Returns
-    -------
-    prop : dict
-        Properties of the activity. Contains the following pairs:
-            - "firing_rate": average value in Hz for 1 neuron in the network.
-            - "bursting": True if there were bursts of activity detected.
-            - "burst_duration", "ISI", and "IBI" in ms, if "bursting" is True.
-            - "SpB": average number of spikes per burst for one neuron.
-    '''
-    prop = {}
-    times = data[1, :]
-    # firing rate (in Hz, normalized for 1 neuron)
-    prop["firing_rate"] = fr
-    num_bursts = len(phases["bursting"])
-    init_val = 0. if num_bursts > skip_bursts else np.NaN
-    if num_bursts:
-        prop["bursting"] = True
-        prop.update({
-            "burst_duration": init_val,
-            "IBI": init_val,
-            "ISI": init_val,
-            "SpB": init_val,
-            "period": init_val})
-    else:
-        prop["bursting"] = False
-    for i, burst in enumerate(phases["bursting"]):
-        if i >= skip_bursts:
-            # burst_duration
-            prop["burst_duration"] += burst[1] - burst[0]
-            # IBI
-            if i > 0:
-                end_older_burst = phases["bursting"][i-1][1]
-                prop["IBI"] += burst[0]-end_older_burst
-            # get num_spikes inside the burst, divide by num_neurons
-            idxs = np.where((times >= burst[0])*(times <= burst[1]))[0]
-            num_spikes = len(times[idxs])
-            num_neurons = len(set(data[0, :][idxs]))
-            if num_neurons:
-                prop["SpB"] += num_spikes / float(num_neurons)
-            # ISI
-            if num_spikes:
-                prop["ISI"] += num_neurons * (burst[1] - burst[0])\
-                               / float(num_spikes)
-    for key in prop.keys():
-        if key not in ("bursting", "firing_rate") and num_bursts > skip_bursts:
-            prop[key] /= float(num_bursts - skip_bursts)
-
-    if num_bursts > skip_bursts:
-        prop["period"] = prop["IBI"] + prop["burst_duration"]
-
-    if num_bursts and prop["SpB"] < 2.:
-        prop["ISI"] = np.NaN
-
-    return prop
-
-
 def _plot_phases(phases, fignums):
     import matplotlib.pyplot as plt
     colors = ('r', 'orange', 'g', 'b')
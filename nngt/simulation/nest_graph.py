@@ -136,8 +136,8 @@ def make_nest_network(network, send_only=None, weights=True):
     }
 
     # get all properties as scipy.sparse.csr matrices
-    csr_weights = network.adjacency_matrix(types=False, weights=weights)
-    csr_delays  = network.adjacency_matrix(types=False, weights=DELAY)
+    csr_weights = network._adjacency(types=False, weights=weights)
+    csr_delays  = network._adjacency(types=False, weights=DELAY)
 
     cspec = 'one_to_one'
 
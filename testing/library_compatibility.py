@@ -171,7 +171,7 @@ def test_closeness():
     expected = [2/3, 0.5, 0.5, 0.5714285714285714, 0.4444444444444444]
     weighted = [1.06273031, 0.89905622, 0.83253895, 1.12504606, 0.86040934]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -198,7 +198,7 @@ def test_closeness():
     harmonic_wght   = [1.42006842, 0.92688794, 0., 0.97717257, 0.5713241 ]
     arithmetic_wght = [1.28394428, 1.10939361, np.NaN, 1.86996279, 2.2852964]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -254,7 +254,7 @@ def test_closeness():
     harmonic_wght   = [1.436723, 1.382419, 1.76911934, 1.85074797, 1.38520591]
     arithmetic_wght = [1.3247182, 1.2296379, 1.5717462, 1.8040934, 1.16720163]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=False)
@@ -294,7 +294,7 @@ def test_betweenness():
     nb_exp_wght = [0.5, 2/3, 0, 0.5, 0]
     eb_exp_wght = [0.6, 0.4, 0, 0.6, 0, 0, 0.4]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=False)
@@ -324,7 +324,7 @@ def test_betweenness():
     nb_exp_wght = [0.5, 0.25, 0, 1/3, 5/12]
     eb_exp_wght = [0.3, 0.2, 0, 0.35, 0, 0.4, 0, 0.45]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -352,7 +352,7 @@ def test_components():
 
     edge_list.append((7, 3))
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -414,7 +414,7 @@ def test_diameter():
 
     weights = [0.58, 0.59, 0.88, 0.8, 0.61, 0.66, 0.62, 0.28]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -430,7 +430,7 @@ def test_diameter():
 
     weights = [0.58, 0.59, 0.88, 0.8, 0.61, 0.66, 0.28]
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.set_config("backend", bckd)
 
         g = nngt.Graph(nodes=num_nodes, directed=True)
@@ -448,7 +448,7 @@ def test_binary_shortest_distance():
     ''' Check shortest distance '''
     num_nodes = 5
 
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.use_backend(bckd)
 
         # UNDIRECTED
@@ -524,7 +524,7 @@ def test_binary_shortest_distance():
 
 def test_weighted_shortest_distance():
     ''' Check shortest distance '''
-    for bckd in backends:
+    for bckd in backends + ["nngt"]:
         nngt.use_backend(bckd)
 
         num_nodes = 5
@@ -19,8 +19,6 @@ import nngt.analysis as na
 import nngt.generation as ng
 
 
-nngt_backend = (nngt.get_config("backend") == "nngt")
-
 methods = ('barrat', 'continuous', 'onnela', 'zhang')
 
 
@@ -585,6 +583,33 @@ def test_global_clustering():
             assert gc == res
 
 
+@pytest.mark.mpi_skip
+def test_clustering_memory():
+    ''' Check that the triangles do not depend on the memory budget '''
+    g = ng.erdos_renyi(nodes=200, avg_deg=10)
+
+    modes = ('total', 'cycle', 'middleman', 'fan-in', 'fan-out')
+
+    ref = {mode: na.triangle_count(g, mode=mode) for mode in modes}
+
+    old_budget = nngt.get_config("analysis_memory")
+
+    # blocks of a few rows
+    nngt.set_config("analysis_memory", 1e-3)
+
+    try:
+        for mode in modes:
+            assert np.array_equal(na.triangle_count(g, mode=mode), ref[mode])
+
+            assert np.array_equal(
+                na.triangle_count(g, nodes=[5, 2, 8], mode=mode),
+                ref[mode][[5, 2, 8]])
+
+            assert na.triangle_count(g, nodes=3, mode=mode) == ref[mode][3]
+    finally:
+        nngt.set_config("analysis_memory", old_budget)
+
+
 @pytest.mark.mpi_skip
 def test_reciprocity():
     ''' Check reciprocity result '''
@@ -640,7 +665,6 @@ def test_iedges():
 
 
 @pytest.mark.mpi_skip
-@pytest.mark.skipif(nngt_backend, reason="Not implemented")
 def test_swp():
     ''' Check small-world propensity '''
     num_nodes = 500
@@ -686,6 +710,69 @@ def test_swp():
         na.small_world_propensity(g, use_diameter=True, weights=use_weights)
 
 
+@pytest.mark.mpi_skip
+def test_paths():
+    ''' Check distances, components, and connectedness '''
+    num_nodes = 5
+    edge_list = [(0, 1), (0, 3), (1, 3), (2, 0), (3, 2), (3, 4), (4, 2)]
+    weights   = [0.58, 0.59, 0.88, 0.8, 0.61, 0.66, 0.28]
+
+    g = nngt.Graph(nodes=num_nodes, directed=True)
+    g.new_edges(edge_list, attributes={"weight": weights})
+
+    assert g.is_connected()
+    assert na.diameter(g) == 3
+    assert np.isclose(na.diameter(g, weights="weight"), 2.29)
+
+    dist = na.shortest_distance(g)
+
+    assert np.isclose(na.average_path_length(g), dist.sum() / 20)
+    assert np.isclose(na.average_path_length(g, sources=[0, 1]),
+                      dist[:2].sum() / 8)
+
+    # remove the only edge going back to 0
+    g.delete_edges([(2, 0)])
+
+    assert not g.is_connected()
+    assert g.is_connected(mode="weak")
+    assert np.isinf(na.diameter(g))
+    assert na.diameter(g, is_connected=True) == 2
+
+    dist = na.shortest_distance(g)
+
+    assert np.isclose(na.average_path_length(g, unconnected=True),
+                      dist[np.isfinite(dist)].sum() / 10)
+
+    cc, hist = na.connected_components(g, ctype="scc")
+
+    assert np.array_equal(hist, np.ones(num_nodes))
+
+    cc, hist = na.connected_components(g, ctype="wcc")
+
+    assert np.array_equal(hist, [5])
+
+
+@pytest.mark.mpi_skip
+def test_betweenness_weights():
+    ''' Check weighted betweenness on a path graph '''
+    g = nngt.Graph(nodes=5, directed=False)
+    g.new_edges([(0, 1), (1, 2), (2, 3), (3, 4)],
+                attributes={"weight": [1, 0.5, 1, 1]})
+
+    nb, eb = na.betweenness(g, weights="weight")
+
+    # nodes 1, 2, 3 are on 3, 4, 3 of the 6 paths between the other nodes
+    assert np.allclose(nb, [0, 0.5, 2/3, 0.5, 0])
+    assert np.allclose(eb, [0.4, 0.6, 0.6, 0.4])
+
+    if nngt.get_config("backend") == "nngt":
+        # zero-length edges are invalid
+        g.set_weights([1, 0, 1, 1])
+
+        with pytest.raises(ValueError):
+            na.betweenness(g, weights="weight")
+
+
 @pytest.mark.mpi_skip
 def test_local_closure():
     # undirected
@@ -770,6 +857,278 @@ def test_local_closure():
             res))
 
 
+@pytest.mark.mpi_skip
+def test_spike_statistics():
+    ''' Check the per-neuron statistics of spike trains '''
+    rng = np.random.default_rng(0)
+
+    num_spikes = 2000
+
+    senders = rng.integers(1, 50, num_spikes).astype(float)
+    times   = np.sort(rng.uniform(0, 1000, num_spikes))
+
+    # neuron 7 does not spike, neuron 3 spikes twice
+    senders[senders == 7] = 8
+    senders[senders == 3] = 4
+    senders[:2] = 3
+
+    data  = np.array([senders, times]).T
+    nodes = [5, 7, 3, 12, 5]
+
+    b2 = na.get_b2(data=data, nodes=nodes)
+    fr = na.get_firing_rate(data=data, nodes=nodes)
+    cv = na.get_isi_cv(data=data, nodes=nodes)
+    ff = na.get_fano_factor(data=data, nodes=nodes, bin_size=100.)
+
+    duration = times.max() - times.min()
+    bins     = np.arange(times.min(), times.max() + 100., 100.)
+
+    for i, n in enumerate(nodes):
+        spikes = times[senders == n]
+
+        assert np.isclose(fr[i], len(spikes) / duration)
+
+        if len(spikes) > 2:
+            dt1 = np.diff(spikes)
+            dt2 = dt1[1:] + dt1[:-1]
+
+            assert np.isclose(
+                b2[i], (2*np.var(dt1) - np.var(dt2)) / (2*np.mean(dt1)**2))
+            assert np.isclose(cv[i], np.std(dt1) / np.mean(dt1))
+        else:
+            assert np.isnan(b2[i])
+
+        if len(spikes):
+            counts, _ = np.histogram(spikes, bins)
+
+            assert np.isclose(ff[i], np.var(counts) / np.mean(counts))
+        else:
+            assert np.isnan(cv[i]) and np.isnan(ff[i])
+
+
+@pytest.mark.mpi_skip
+def test_get_spikes():
+    ''' Check the sparse matrix of spikes '''
+    times   = [1.5, 2.68, 3., 125.6, 130.1, 140.]
+    senders = [12, 0, 12, 65, 0, 12]
+
+    mat = na.get_spikes(spike_times=times, senders=senders)
+
+    assert mat.shape == (66, 3)
+    assert np.array_equal(mat[12].toarray(), [[1.5, 3., 140.]])
+    assert np.array_equal(mat[0].toarray(), [[2.68, 130.1, 0.]])
+    assert np.array_equal(mat[65].toarray(), [[125.6, 0., 0.]])
+    assert mat[1:12].nnz == 0
+
+    mat = na.get_spikes(spike_times=times, senders=senders, dtype=np.float32)
+
+    assert mat.dtype == np.float32
+    assert np.allclose(mat[12].toarray(), [[1.5, 3., 140.]])
+
+
+@pytest.mark.mpi_skip
+def test_total_firing_rate():
+    ''' Check the batch, streaming, and per-group firing rates '''
+    rng = np.random.default_rng(1)
+
+    num_spikes = 3000
+
+    senders = rng.integers(1, 101, num_spikes).astype(float)
+    times   = np.sort(rng.uniform(0, 2000, num_spikes))
+    data    = np.array([senders, times]).T
+
+    fr, fr_times = na.total_firing_rate(data=data, kernel_std=20.)
+
+    assert len(fr) == len(fr_times)
+    assert np.allclose(np.diff(fr_times), 2.)
+
+    # each spike contributes a normalized kernel
+    assert np.isclose(np.sum(fr), 1000*num_spikes / (20*np.sqrt(np.pi)))
+
+    # streaming by batches with various edges
+    stream = na.StreamingFiringRate(kernel_std=20.)
+
+    frs, stream_times = [], []
+
+    for start, stop in ((0, 3.), (3., 700.), (700., 705.), (705., 2000.)):
+        keep = (times >= start) & (times < stop)
+
+        rate, rtimes = stream.update(data[keep], until=stop)
+
+        frs.append(rate)
+        stream_times.append(rtimes)
+
+    rate, rtimes = stream.finalize()
+
+    frs          = np.concatenate(frs + [rate])
+    stream_times = np.concatenate(stream_times + [rtimes])
+
+    num_values = min(len(fr), len(frs))
+
+    assert np.allclose(frs[:num_values], fr[:num_values])
+    assert np.allclose(stream_times[:num_values], fr_times[:num_values])
+
+    with pytest.raises(ValueError):
+        stream.update(data[:10])
+
+    # per-group rates
+    pop = nngt.NeuralPop.exc_and_inhib(100)
+    net = nngt.Network(population=pop)
+
+    net.nest_gids = np.arange(1, 101)
+
+    group_fr, _ = na.total_firing_rate(
+        net, data=data, kernel_std=20.,
+        groups=["excitatory", pop["inhibitory"]])
+
+    assert group_fr.shape == (2, len(fr))
+    assert np.allclose(group_fr.sum(axis=0), fr)
+
+    exc = np.isin(senders, pop["excitatory"].nest_gids)
+
+    exc_fr, _ = na.total_firing_rate(data=data[exc], kernel_std=20.,
+                                     resolution=fr_times)
+
+    assert np.allclose(group_fr[0], exc_fr)
+
+
+@pytest.mark.mpi_skip
+def test_activity_phases():
+    ''' Check the phases and burst properties on a synthetic raster '''
+    from nngt.analysis.activity_analysis import (
+        _analysis, _check_burst_size, _compute_properties, _find_phases,
+        _unique_counts)
+
+    # distinct values per slice
+    values = np.array([3, 1, 3, 2, 2, 1])
+
+    assert np.array_equal(
+        _unique_counts(values, np.array([0, 2, 5, 3]), np.array([3, 5, 6, 3])),
+        [2, 2, 1, 0])
+
+    rng    = np.random.default_rng(3)
+    values = rng.integers(0, 20, 500)
+    start  = rng.integers(0, 500, 50)
+    stop   = np.minimum(start + rng.integers(0, 40, 50), 500)
+
+    assert np.array_equal(
+        _unique_counts(values, start, stop),
+        [len(set(values[i:j])) for i, j in zip(start, stop)])
+
+    # ISIs are labelled burst (< 2), mixed, or quiescent (> 10)
+    times = np.array([0., 1., 2., 5., 6., 20., 21., 22.])
+
+    empty = {"bursting": [], "mixed": [], "quiescent": [], "localized": []}
+
+    phases = {k: [] for k in empty}
+
+    _find_phases(times, phases, 2., 10., False)
+
+    assert phases["bursting"] == [[0., 2.], [5., 6.], [20., 22.]]
+    assert phases["mixed"] == [[2., 5.]]
+    assert phases["quiescent"] == [[6., 20.]]
+
+    simple = {k: [] for k in empty}
+
+    _find_phases(times, simple, 2., 10., True)
+
+    assert simple["bursting"] == [[0., 6.], [20., 22.]]
+    assert simple["mixed"] == []
+    assert simple["quiescent"] == [[6., 20.]]
+
+    # the burst with a single neuron out of 4 becomes mixed and is merged
+    senders = np.array([0, 1, 2, 3, 3, 0, 1, 2])
+
+    _check_burst_size(phases, senders, times, None, 0.3, 0.5)
+
+    assert phases["bursting"] == [[0., 2.], [20., 22.]]
+    assert phases["mixed"] == [[2., 6.]]
+    assert phases["localized"] == []
+
+    # two network bursts (10 neurons, 2 spikes each, 0.1 ms apart), then a
+    # burst from a single neuron
+    burst   = 0.1*np.arange(20)
+    times   = np.concatenate((100 + burst, 300 + burst, 500 + burst[:10]))
+    senders = np.concatenate((np.tile(np.arange(10), 4), np.zeros(10)))
+
+    phases, fr = _analysis(times, senders, (0., 1000.))
+
+    # 50 spikes over 1 s for 10 neurons
+    assert np.isclose(fr, 5.)
+
+    assert np.allclose(phases["bursting"], [[100., 101.9], [300., 301.9]])
+    assert np.allclose(phases["localized"], [[500., 500.9]])
+    assert np.allclose(phases["quiescent"], [[101.9, 300.], [301.9, 500.]])
+    assert phases["mixed"] == []
+
+    prop = _compute_properties(np.array([senders, times]), phases, fr, 0)
+
+    assert prop["bursting"]
+    assert np.isclose(prop["firing_rate"], 5.)
+    assert np.isclose(prop["burst_duration"], 1.9)
+    assert np.isclose(prop["IBI"], 198.1 / 2)
+    assert np.isclose(prop["period"], 1.9 + 198.1 / 2)
+    assert np.isclose(prop["SpB"], 2.)
+    assert np.isclose(prop["ISI"], 0.95)
+
+    # skipping the first burst
+    prop = _compute_properties(np.array([senders, times]), phases, fr, 1)
+
+    assert np.isclose(prop["burst_duration"], 1.9)
+    assert np.isclose(prop["IBI"], 198.1)
+
+    # no burst
+    prop = _compute_properties(np.array([senders, times]), empty, fr, 0)
+
+    assert not prop["bursting"]
+    assert "IBI" not in prop
+
+
+@pytest.mark.mpi_skip
+def test_bayesian_blocks():
+    ''' Check that the pruned Bayesian blocks match the full search '''
+    from nngt.analysis.bayesian_blocks import Events, RegularEvents
+
+    class FullEvents(Events):
+        def can_prune(self, x, T):
+            return False
+
+    class FullRegularEvents(RegularEvents):
+        def can_prune(self, x, T):
+            return False
+
+    rng = np.random.default_rng(2)
+
+    t = np.concatenate((rng.lognormal(size=500), rng.normal(4, 0.1, 200)))
+
+    for kwargs in ({}, {"p0": 0.01}, {"gamma": 0.9}):
+        assert np.array_equal(
+            na.bayesian_blocks(t, **kwargs),
+            na.bayesian_blocks(t, fitness=FullEvents(**kwargs)))
+
+    # regular events
+    dt = 0.01
+    t  = dt*np.arange(500)
+    x  = (rng.uniform(size=500) < 0.2).astype(int)
+
+    x[200:300] = 1
+
+    assert np.array_equal(
+        na.bayesian_blocks(t, x, fitness="regular_events", dt=dt, gamma=0.9),
+        na.bayesian_blocks(t, x, fitness=FullRegularEvents(dt, gamma=0.9)))
+
+    # approximate mode is exact for integer values
+    degrees = rng.poisson(20, 5000)
+
+    assert np.array_equal(na.bayesian_blocks(degrees),
+                          na.bayesian_blocks(degrees, resolution=1))
+
+    bins = na.bayesian_blocks(rng.lognormal(size=5000), resolution=0.1)
+
+    # edges are midpoints between multiples of the resolution
+    assert np.allclose(bins*20, np.round(bins*20))
+
+
 if __name__ == "__main__":
     if not nngt.get_config("mpi"):
         test_binary_undirected_clustering()
@@ -778,7 +1137,15 @@ if __name__ == "__main__":
         test_reciprocity()
         test_iedges()
         test_swp()
+        test_paths()
+        test_betweenness_weights()
         test_partial_directed_clustering()
         test_clustering_parameters()
         test_global_clustering()
+        test_clustering_memory()
         test_local_closure()
+        test_spike_statistics()
+        test_get_spikes()
+        test_total_firing_rate()
+        test_activity_phases()
+        test_bayesian_blocks()
@@ -388,6 +388,8 @@ def test_attributes_are_copied():
 
     assert np.all(np.isclose(wghts, ww))
 
+    ww = _writable(ww)
+
     rng.shuffle(ww)
 
     assert np.all(np.isclose(wghts, g.get_weights()))
@@ -400,6 +402,8 @@ def test_attributes_are_copied():
 
     assert np.all(np.isclose(etest, 2*ww))
 
+    etest = _writable(etest)
+
     rng.shuffle(etest)
 
     assert np.all(np.isclose(2*ww, g.edge_attributes["etest"]))
@@ -414,12 +418,28 @@ def test_attributes_are_copied():
 
     assert np.all(np.isclose(ntest, vv))
 
+    ntest = _writable(ntest)
+
     rng.shuffle(ntest)
 
     assert np.all(np.isclose(vv, g.node_attributes["ntest"]))
     assert not np.all(np.isclose(vv, ntest))
 
 
+def _writable(arr):
+    '''
+    Attributes are returned either as copies or, for the "nngt" backend, as
+    read-only views: check that views cannot be modified and copy them.
+    '''
+    if not arr.flags.writeable:
+        with pytest.raises(ValueError):
+            arr[0] = 0
+
+        return arr.copy()
+
+    return arr
+
+
 # ---------- #
 # Test suite #
 # ---------- #
@@ -252,6 +252,57 @@ def test_edge_creation():
     assert g.edge_nb() == 10
 
 
+@pytest.mark.mpi_skip
+def test_ignored_edges():
+    ''' Check the edges and attributes kept with `ignore_invalid` '''
+    num_nodes = 10
+
+    for directed in (True, False):
+        g = nngt.Graph(num_nodes, directed=directed)
+        g.new_edges([(0, 1), (2, 4)])
+
+        # existing, self-loop, duplicate, reciprocal, and valid edges
+        elist = [(0, 1), (3, 3), (5, 6), (5, 6), (6, 5), (7, 8), (2, 4)]
+        ww    = [1., 2., 3., 4., 5., 6., 7.]
+
+        new_edges = g.new_edges(elist, attributes={"weight": ww},
+                                ignore_invalid=True)
+
+        if directed:
+            assert np.array_equal(new_edges, [(5, 6), (6, 5), (7, 8)])
+            assert np.array_equal(g.get_weights()[2:], [3., 5., 6.])
+        else:
+            assert np.array_equal(new_edges, [(5, 6), (7, 8)])
+            assert np.array_equal(g.get_weights()[2:], [3., 6.])
+
+        assert g.edge_nb() == 2 + len(new_edges)
+
+
+@pytest.mark.mpi_skip
+def test_unchecked_duplicates():
+    ''' Duplicate edges are kept if they are not checked '''
+    if nngt.get_config("backend") != "nngt":
+        return
+
+    for directed in (True, False):
+        g = nngt.Graph(5, directed=directed)
+
+        g.new_edges([(0, 1), (2, 3)], attributes={"weight": [1., 2.]})
+
+        g.new_edges([(0, 1), (0, 1)], attributes={"weight": [3., 4.]},
+                    check_duplicates=False, check_self_loops=False,
+                    check_existing=False)
+
+        assert g.edge_nb() == 4
+        assert np.array_equal(g.edges_array,
+                              [(0, 1), (2, 3), (0, 1), (0, 1)])
+        assert np.array_equal(g.get_weights(), [1., 2., 3., 4.])
+
+        deg = g.get_degrees("out" if directed else "total")
+
+        assert deg[0] == 3
+
+
 @pytest.mark.mpi_skip
 def test_has_edges_edge_id():
     ''' Test the ``has_edge`` and ``edge_id`` methods '''
@@ -404,6 +455,19 @@ def test_degrees_neighbors():
     assert g.neighbours(3, "out") == {2, 4}
     assert g.neighbours(3, "all") == {0, 1, 2, 4}
 
+    # batched version
+    indptr, indices = g.neighbours([3, 0, 2], "in")
+    assert np.array_equal(indptr, [0, 2, 2, 5])
+    assert np.array_equal(indices, [0, 1, 0, 3, 4])
+
+    indptr, indices = g.neighbours([3, 0, 2], "out")
+    assert np.array_equal(indptr, [0, 2, 5, 5])
+    assert np.array_equal(indices, [2, 4, 1, 2, 3])
+
+    indptr, indices = g.neighbours([3, 0, 2], "all")
+    assert np.array_equal(indptr, [0, 4, 7, 10])
+    assert np.array_equal(indices, [0, 1, 2, 4, 1, 2, 3, 0, 3, 4])
+
     # UNDIRECTED
     g = nngt.Graph(5, directed=False)
     g.new_edges(edge_list, attributes={"weight": weights})
@@ -422,6 +486,32 @@ def test_degrees_neighbors():
     assert g.neighbours(3, "out") == {0, 1, 2, 4}
     assert g.neighbours(3, "all") == {0, 1, 2, 4}
 
+    for mode in ("in", "out", "all"):
+        indptr, indices = g.neighbours([3, 0], mode)
+        assert np.array_equal(indptr, [0, 4, 7])
+        assert np.array_equal(indices, [0, 1, 2, 4, 1, 2, 3])
+
+    # MULTIGRAPH (parallel edges are only kept by the nngt backend)
+    if nngt.get_config("backend") == "nngt":
+        for directed in (True, False):
+            g = nngt.Graph(5, directed=directed)
+            g.new_edges(edge_list + [(0, 1), (1, 3), (0, 1)],
+                        check_duplicates=False, check_existing=False)
+
+            for mode in ("in", "out", "all"):
+                ref = nngt.Graph(5, directed=directed)
+                ref.new_edges(edge_list)
+
+                indptr, indices = g.neighbours([3, 0, 1], mode)
+                ref_ptr, ref_idx = ref.neighbours([3, 0, 1], mode)
+
+                assert np.array_equal(indptr, ref_ptr)
+                assert np.array_equal(indices, ref_idx)
+
+                for i, n in enumerate((3, 0, 1)):
+                    assert set(indices[indptr[i]:indptr[i+1]]) == \
+                        g.neighbours(n, mode)
+
 
 def test_directed_adjacency():
     ''' Check directed adjacency matrix '''
@@ -581,6 +671,62 @@ def test_undirected_adjacency():
         g.adjacency_matrix(types=True, weights=True).todense(), wt_mat))
 
 
+@pytest.mark.mpi_skip
+def test_adjacency_cache():
+    ''' Check that cached adjacency matrices follow graph modifications '''
+    old_cache = nngt.get_config("adjacency_cache")
+
+    g = nngt.Graph(5)
+    g.new_edges([(0, 1), (1, 2), (2, 3)], attributes={"weight": [1, 2, 3]})
+
+    # cached matrix is reused but never returned directly
+    mat = g._adjacency(weights=True)
+
+    assert g._adjacency(weights=True) is mat
+
+    wmat = g.adjacency_matrix(weights=True)
+    wmat[0, 1] = 10
+
+    assert mat[0, 1] == 1
+
+    # edge modifications
+    g.new_edge(3, 4)
+
+    assert g.adjacency_matrix()[3, 4] == 1
+
+    g.delete_edges((0, 1))
+
+    assert g.adjacency_matrix()[0, 1] == 0
+    assert g.get_degrees("out", weights=True)[1] == 2
+
+    # attribute modifications
+    g.set_weights([5, 6, 7])
+
+    assert np.array_equal(g.adjacency_matrix(weights=True).data, [5, 6, 7])
+
+    g.new_edge_attribute("distance", "double", values=[1, 2, 3])
+
+    assert np.array_equal(
+        g.adjacency_matrix(weights="distance").data, [1, 2, 3])
+
+    g.set_edge_attribute("distance", val=4.)
+
+    assert np.all(g.adjacency_matrix(weights="distance").data == 4)
+
+    g.new_node_attribute("type", "int", values=[1, -1, 1, 1, 1])
+
+    assert g.adjacency_matrix(types=True)[1, 2] == -1
+
+    # memory limit
+    nngt.set_config("adjacency_cache", 0)
+
+    g._adjacency()
+
+    assert len(g._mcache) == 0
+
+    nngt.set_config("adjacency_cache", old_cache)
+
+
 @pytest.mark.mpi_skip
 def test_get_edges():
     ''' Check that correct edges are returned '''
@@ -746,6 +892,84 @@ def test_delete():
                              g.edge_attributes["distance"]))
 
 
+@pytest.mark.mpi_skip
+def test_lazy_delete():
+    ''' Test edge deletion without compaction '''
+    num_nodes = 20
+
+    for directed in (True, False):
+        g = ng.erdos_renyi(nodes=num_nodes, avg_deg=5, directed=directed)
+
+        ww = np.arange(g.edge_nb(), dtype=float)
+        g.set_weights(ww)
+
+        edges   = g.edges_array
+        deg     = g.get_degrees()
+        removed = [0, 5, 3, len(edges) - 1, 7, 8]
+
+        # delete edges one by one, then several at once
+        for eid in removed[:4]:
+            g.delete_edges(edges[eid], compact=False)
+
+        g.delete_edges(edges[removed[4:]], compact=False)
+
+        assert g.edge_nb() == len(edges) - len(removed)
+
+        # degrees are updated before compaction
+        for e in edges[removed]:
+            deg[e[0]] -= 1
+            deg[e[1]] -= 1
+
+        assert np.array_equal(g.get_degrees(), deg)
+
+        # deleted edges cannot be found but can be re-added
+        for e in edges[removed]:
+            assert not g.has_edge(e)
+
+        keep = np.ones(len(edges), dtype=bool)
+        keep[removed] = False
+
+        assert np.array_equal(g.edges_array, edges[keep])
+        assert np.array_equal(g.get_weights(), ww[keep])
+
+        g.new_edges(edges[removed[:2]])
+
+        assert g.has_edge(edges[removed[1]])
+
+        g.compact()
+
+        assert g.edge_nb() == len(edges) - len(removed) + 2
+
+    # each occurrence of a multiple edge removes one copy
+    if nngt.get_config("backend") != "nngt":
+        return
+
+    for directed in (True, False):
+        for compact in (True, False):
+            g = nngt.Graph(4, directed=directed)
+
+            g.new_edges([(0, 1), (2, 3), (0, 1), (0, 1), (1, 2)],
+                        attributes={"weight": [1., 2., 3., 4., 5.]},
+                        check_duplicates=False, check_existing=False)
+
+            g.delete_edges([(0, 1), (0, 1)], compact=compact)
+
+            assert g.edge_nb() == 3
+            assert np.array_equal(g.edges_array, [(2, 3), (0, 1), (1, 2)])
+            assert np.array_equal(g.get_weights(), [2., 4., 5.])
+
+            # the last copy can be removed later, even before compaction
+            g.delete_edges((0, 1), compact=compact)
+
+            assert not g.has_edge((0, 1))
+            assert np.array_equal(g.edges_array, [(2, 3), (1, 2)])
+
+            # repeating a simple edge removes it once
+            g.delete_edges([(1, 2), (1, 2)], compact=compact)
+
+            assert np.array_equal(g.edges_array, [(2, 3)])
+
+
 # ---------- #
 # Test suite #
 # ---------- #
@@ -753,6 +977,7 @@ def test_delete():
 if __name__ == "__main__":
     test_directed_adjacency()
     test_undirected_adjacency()
+    test_adjacency_cache()
     test_config()
     test_new_node_attr()
     test_graph_copy()
@@ -762,5 +987,8 @@ if __name__ == "__main__":
     if not nngt.get_config('mpi'):
         test_node_creation()
         test_edge_creation()
+        test_ignored_edges()
+        test_unchecked_duplicates()
         test_has_edges_edge_id()
         test_delete()
+        test_lazy_delete()
@@ -302,6 +302,46 @@ def test_total_undirected_connectivities():
         assert avg - deviation <= average <= avg + deviation
 
 
+@pytest.mark.mpi_skip
+def test_erdos_renyi():
+    ''' Check the number of edges and the absence of invalid edges '''
+    num_nodes = 500
+
+    for directed in (True, False):
+        # sparse and dense graphs
+        for density in (0.01, 0.3):
+            g = ng.erdos_renyi(density=density, nodes=num_nodes,
+                               directed=directed)
+
+            edges = g.edges_array
+
+            assert g.edge_nb() == int(density*num_nodes**2)
+            assert not np.any(edges[:, 0] == edges[:, 1])
+
+            if not directed:
+                edges = np.sort(edges, axis=1)
+
+            assert len(np.unique(edges, axis=0)) == g.edge_nb()
+
+    # reciprocity
+    g = ng.erdos_renyi(density=0.1, nodes=num_nodes, reciprocity=0.3)
+
+    assert g.edge_nb() == int(0.1*num_nodes**2)
+    assert np.isclose(na.reciprocity(g), 0.3, atol=0.01)
+
+    # two populations
+    g = nngt.Graph(num_nodes, directed=False)
+
+    ng.connect_nodes(g, np.arange(100), np.arange(100, num_nodes),
+                     "erdos_renyi", edges=20000)
+
+    edges = g.edges_array
+
+    assert g.edge_nb() == 20000
+    assert np.all(np.sort(edges, axis=1)[:, 0] < 100)
+    assert len(np.unique(np.sort(edges, axis=1), axis=0)) == 20000
+
+
 @pytest.mark.mpi_skip
 def test_all_to_all():
     ''' Test all-to-all connection scheme '''
@@ -392,6 +432,47 @@ def test_distances():
     assert np.array_equal(dist, expected)
 
 
+def _price_law(num_nodes, m, c, gamma, directed):
+    '''
+    Exact law of the edges of a Price graph (without reciprocity), each node
+    choosing its targets as ``rng.choice(i, min(m, i), replace=False, p=p)``.
+    '''
+    from itertools import permutations
+
+    law = {(): 1.}
+
+    for i in range(1, num_nodes):
+        new_law = {}
+
+        for edges, proba in law.items():
+            degrees = np.zeros(num_nodes)
+
+            for s, t in edges:
+                degrees[t] += 1
+
+                if not directed:
+                    degrees[s] += 1
+
+            p  = np.power(degrees[:i], gamma) + c if i > 1 else np.ones(1)
+            p /= p.sum()
+
+            # targets are the first distinct values of independent draws
+            for targets in permutations(range(i), min(i, m)):
+                q, left = proba, 1.
+
+                for t in targets:
+                    q    *= p[t] / left
+                    left -= p[t]
+
+                key = tuple(sorted(edges + tuple((i, t) for t in targets)))
+
+                new_law[key] = new_law.get(key, 0.) + q
+
+        law = new_law
+
+    return law
+
+
 @pytest.mark.mpi_skip
 def test_price():
     ''' Test Price network '''
@@ -430,6 +511,40 @@ def test_price():
 
     assert rmin < na.reciprocity(g) < rmax
 
+    # each node has distinct targets, whatever the engine
+    for gamma in (0.5, 1, 1.5):
+        g = ng.price_scale_free(m, c=-0.5, gamma=gamma, nodes=100,
+                                directed=False)
+
+        edges = g.edges_array
+
+        assert len(np.unique(edges, axis=0)) == len(edges) == g.edge_nb()
+        assert g.edge_nb() == m*(100 - m) + m*(m - 1) // 2
+
+    # both engines follow the exact law of the graphs with 6 nodes
+    from scipy.stats import chisquare
+    from nngt.generation.connect_algorithms import _price_scale_free
+
+    nngt.seed(0)
+
+    num_graphs = 3000
+
+    for c, gamma, directed in ((1, 1, True), (2, 1.5, True),
+                               (-0.5, 1, False), (0.5, 1.5, False)):
+        law    = _price_law(6, 3, c, gamma, directed)
+        counts = dict.fromkeys(law, 0)
+
+        for _ in range(num_graphs):
+            edges = _price_scale_free(range(6), 3, c, gamma, 0, directed,
+                                      False)
+
+            counts[tuple(sorted(map(tuple, edges.tolist())))] += 1
+
+        _, pvalue = chisquare([counts[k] for k in law],
+                              [num_graphs*law[k] for k in law])
+
+        assert pvalue > 1e-3
+
 
 @pytest.mark.mpi_skip
 def test_connect_switch_distance_rule_max_proba():
@@ -470,16 +585,192 @@ def test_connect_switch_distance_rule_max_proba():
     nngt.set_config("multithreading", mthread)
 
 
+@pytest.mark.mpi_skip
+def test_edge_filter():
+    ''' Check the filtering of the generated edges '''
+    from nngt.generation.connect_algorithms import _EdgeSet, _filter
+
+    candidates = np.array(
+        [(0, 1), (1, 1), (1, 0), (0, 1), (2, 3), (3, 2), (2, 3)])
+
+    dist_tmp = np.arange(len(candidates), dtype=float)
+
+    # directed, with reciprocal edges
+    edges_hash = _EdgeSet(True)
+    ia_edges   = np.full((10, 2), -1, dtype=int)
+    distance   = []
+
+    ia_edges, num_edges = _filter(ia_edges, candidates, 0, edges_hash, True,
+                                  False, distance=distance, dist_tmp=dist_tmp)
+
+    assert num_edges == len(edges_hash) == 4
+    assert np.array_equal(ia_edges[:4], [(0, 1), (1, 0), (2, 3), (3, 2)])
+    assert np.array_equal(distance, [0, 2, 4, 5])
+
+    # undirected: reciprocal edges are the same
+    edges_hash = _EdgeSet(False, [(1, 0)])
+    ia_edges   = np.full((10, 2), -1, dtype=int)
+    ia_edges[0] = (1, 0)
+
+    ia_edges, num_edges = _filter(ia_edges, candidates, 1, edges_hash, True,
+                                  False)
+
+    assert num_edges == len(edges_hash) == 2
+    assert np.array_equal(ia_edges[:2], [(1, 0), (2, 3)])
+
+    assert np.array_equal(edges_hash.contains([(0, 1), (3, 2), (0, 2)]),
+                          [True, True, False])
+
+    edges_hash.remove([(3, 2), (4, 5)])
+
+    assert len(edges_hash) == 1
+    assert not edges_hash.contains([(2, 3)])[0]
+
+    # multigraph keeps duplicates
+    ia_edges = np.full((10, 2), -1, dtype=int)
+
+    ia_edges, num_edges = _filter(ia_edges, candidates, 0, _EdgeSet(), True,
+                                  True)
+
+    assert num_edges == 6
+
+
+@pytest.mark.mpi_skip
+def test_spatial_index():
+    ''' Check the neighbour search used by the distance rule '''
+    from nngt.lib.connect_tools import _SpatialIndex
+
+    rng = np.random.default_rng(0)
+
+    pos    = rng.uniform(0, 10, (300, 2))
+    points = rng.uniform(-2, 12, (50, 2))
+    radius = 1.3
+
+    index = _SpatialIndex(pos)
+
+    # brute-force neighbours (open square areas)
+    neighbours = [
+        set(np.where(np.all(np.abs(pos - p) < radius, axis=1))[0])
+        for p in points
+    ]
+
+    indptr, indices = index.neighbours(points, radius)
+
+    for i, neigh in enumerate(neighbours):
+        assert set(indices[indptr[i]:indptr[i + 1]]) == neigh
+
+    num_pairs = sum(len(neigh) for neigh in neighbours)
+
+    assert index.count_pairs(_SpatialIndex(points), radius) == num_pairs
+
+    # random pairs are valid and (roughly) uniform
+    src, tgt = index.sample_pairs(points, radius, 200000)
+
+    assert all(t in neighbours[s] for s, t in zip(src, tgt))
+
+    _, counts = np.unique(src*len(pos) + tgt, return_counts=True)
+
+    assert len(counts) == num_pairs
+    assert counts.std() < 2*np.sqrt(counts.mean())
+
+    # only the grid of the last radius is kept
+    grid = index._grid(radius)
+
+    assert index._grid(radius) is grid
+    assert index._grid(2*radius) is not grid
+    assert index._grid(radius) is not grid
+
+    # the index of a spatial graph is kept until the positions change
+    g = nngt.SpatialGraph(len(pos), positions=pos)
+
+    index = g._spatial_index()
+
+    assert g._spatial_index() is index
+
+    g.set_positions(pos[::-1])
+
+    assert g._spatial_index() is not index
+
+
+@pytest.mark.mpi_skip
+def test_multiprocessing():
+    ''' Generation with a pool of processes '''
+    num_nodes = 1000
+
+    shape = nngt.geometry.Shape.rectangle(300, 300)
+
+    nngt.set_config("processes", 3)
+
+    try:
+        # degrees are respected
+        for degree_type in ("in", "out"):
+            g = ng.fixed_degree(10, degree_type=degree_type, nodes=num_nodes)
+
+            assert set(g.get_degrees(degree_type)) == {10}
+
+        deg_list = np.random.randint(0, 50, size=num_nodes)
+
+        g = ng.from_degree_list(deg_list, nodes=num_nodes)
+
+        assert np.array_equal(g.get_degrees("in"), deg_list)
+
+        # no duplicate edges or self-loops
+        graphs = [
+            ng.erdos_renyi(avg_deg=10, nodes=num_nodes),
+            ng.distance_rule(30, rule="lin", avg_deg=10, shape=shape,
+                             nodes=num_nodes),
+            ng.distance_rule(3, rule="exp", max_proba=0.5, shape=shape,
+                             nodes=num_nodes),
+        ]
+
+        for g in graphs:
+            edges = g.edges_array
+
+            assert len(np.unique(edges, axis=0)) == len(edges)
+            assert not np.any(edges[:, 0] == edges[:, 1])
+
+        assert graphs[0].edge_nb() == graphs[1].edge_nb() == 10*num_nodes
+
+        assert graphs[2].edge_nb() > 0
+        assert np.all(
+            graphs[2].get_edge_attributes(name="distance") < 30*np.sqrt(2))
+
+        # the same seed gives the same graph
+        nngt.seed(0)
+        g1 = ng.distance_rule(30, rule="lin", avg_deg=10, shape=shape,
+                              nodes=num_nodes)
+
+        nngt.seed(0)
+        g2 = ng.distance_rule(30, rule="lin", avg_deg=10, shape=shape,
+                              nodes=num_nodes)
+
+        assert np.array_equal(g1.edges_array, g2.edges_array)
+
+        # generators that are not parallelized keep their serial version
+        if nngt.get_config("multithreading"):
+            from nngt.generation import cconnect, graph_connectivity, mp_connect
+
+            assert graph_connectivity._all_to_all is cconnect._all_to_all
+            assert mp_connect._serial("_from_degree_list") is \
+                cconnect._from_degree_list
+    finally:
+        nngt.set_config("processes", 1)
+
+
 if __name__ == "__main__":
     if not nngt.get_config("mpi"):
         test_newman_watts()
         test_from_degree_list()
         test_total_undirected_connectivities()
+        test_erdos_renyi()
         test_watts_strogatz()
         test_all_to_all()
         test_distances()
         test_price()
         test_connect_switch_distance_rule_max_proba()
+        test_edge_filter()
+        test_spatial_index()
+        test_multiprocessing()
 
     if nngt.get_config("mpi"):
         test_mpi_from_degree_list()
@@ -275,6 +275,162 @@ def test_node_attributes():
     assert np.array_equal(g.node_attributes["size"], h.node_attributes["size"])
 
 
+@pytest.mark.mpi_skip
+def test_iter_edges():
+    g = nngt.generation.erdos_renyi(nodes=100, avg_deg=5)
+
+    g.set_weights(np.random.uniform(0, 2, g.edge_nb()))
+    g.new_edge_attribute("num", "int", values=np.arange(g.edge_nb()))
+
+    for fmt in ("neighbour", "edge_list"):
+        g.to_file(gfilename, fmt=fmt)
+
+        h = nngt.load_from_file(gfilename, fmt=fmt)
+
+        # small blocks
+        blocks = list(nngt.io.iter_edges(gfilename, fmt=fmt, chunk_size=100))
+
+        assert len(blocks) > 1
+
+        edges = np.concatenate([b[0] for b in blocks])
+
+        assert np.array_equal(edges, h.edges_array)
+
+        for attr in ("weight", "num"):
+            values = np.concatenate([b[1][attr] for b in blocks])
+
+            assert np.array_equal(values, h.edge_attributes[attr])
+
+    # comments, empty lines, and non-numeric attributes
+    with open(gfilename, "w") as f:
+        f.write("@edge_attributes=['w', 'name']\n")
+        f.write("@edge_attr_types=['double', 'string']\n")
+        f.write("# comment\n0  1 0.5;a\n\n1 2 1.5;b\n# other comment\n")
+
+    h = nngt.load_from_file(gfilename, fmt="edge_list")
+
+    assert np.array_equal(h.edges_array, [(0, 1), (1, 2)])
+    assert np.array_equal(h.edge_attributes["w"], [0.5, 1.5])
+    assert list(h.edge_attributes["name"]) == ["a", "b"]
+
+
+@pytest.mark.mpi_skip
+def test_compression():
+    g = nngt.generation.erdos_renyi(nodes=100, avg_deg=5)
+
+    g.set_weights(np.random.uniform(0, 2, g.edge_nb()))
+    g.new_node_attribute("rnd", "double", values=np.random.random(100))
+
+    for fmt in ("neighbour", "edge_list"):
+        for ext in (".gz", ".bz2", ".xz"):
+            filename = gfilename + ext
+
+            try:
+                g.to_file(filename, fmt=fmt)
+
+                with open(filename, "rb") as f:
+                    assert not f.read(1).startswith(b"@")
+
+                h = nngt.load_from_file(filename, fmt=fmt)
+            finally:
+                os.remove(filename)
+
+            assert np.array_equal(g.get_degrees(), h.get_degrees())
+            assert np.array_equal(g.get_weights(), h.get_weights()) or \
+                fmt == "neighbour"
+
+            # numeric values are saved exactly
+            assert np.array_equal(g.node_attributes["rnd"],
+                                  h.node_attributes["rnd"])
+
+    # format is deduced from the extension preceding the compression
+    g.to_file(current_dir + "g.el.gz")
+
+    h = nngt.load_from_file(current_dir + "g.el.gz")
+
+    os.remove(current_dir + "g.el.gz")
+
+    assert np.array_equal(g.edges_array, h.edges_array)
+    assert np.array_equal(g.get_weights(), h.get_weights())
+
+
+@pytest.mark.mpi_skip
+def test_binary_format():
+    num_nodes = 50
+
+    g = nngt.generation.erdos_renyi(nodes=num_nodes, avg_deg=5)
+
+    g.set_weights(np.random.uniform(0, 2, g.edge_nb()))
+
+    g.new_edge_attribute("type", "string", val="odd")
+    g.new_edge_attribute("lst", "object",
+                         values=[[i] for i in range(g.edge_nb())])
+    g.new_node_attribute("size", "int", values=np.arange(num_nodes))
+
+    g.to_file(gfilename, fmt="nngt-bin")
+
+    h = nngt.load_from_file(gfilename, fmt="nngt-bin")
+
+    assert h.is_directed() == g.is_directed()
+    assert np.array_equal(g.edges_array, h.edges_array)
+    assert np.array_equal(g.get_degrees(), h.get_degrees())
+    assert np.allclose(g.get_weights(), h.get_weights())
+
+    for attr in ("type", "lst"):
+        assert list(g.edge_attributes[attr]) == list(h.edge_attributes[attr])
+
+    assert np.array_equal(g.node_attributes["size"],
+                          h.node_attributes["size"])
+
+    # modifying the loaded graph must leave the file untouched
+    h.set_weights(3.)
+    h.new_edges([(i, i) for i in range(num_nodes)], check_self_loops=False)
+
+    h = nngt.load_from_file(gfilename, fmt="nngt-bin")
+
+    assert np.array_equal(g.edges_array, h.edges_array)
+    assert np.allclose(g.get_weights(), h.get_weights())
+
+    # unweighted graph
+    g = nngt.Graph(num_nodes, weighted=False)
+
+    g.new_edges([(i, (i + 1) % num_nodes) for i in range(num_nodes)])
+
+    g.to_file(gfilename, fmt="nngt-bin")
+
+    h = nngt.load_from_file(gfilename, fmt="nngt-bin")
+
+    assert not h.is_weighted()
+    assert np.array_equal(g.edges_array, h.edges_array)
+
+    # undirected network
+    pop = nngt.NeuralPop.exc_and_inhib(100)
+
+    g = nngt.generation.erdos_renyi(avg_deg=5, population=pop, directed=False)
+
+    g.to_file(gfilename, fmt="nngt-bin")
+
+    h = nngt.load_from_file(gfilename, fmt="nngt-bin")
+
+    assert h.is_network() and not h.is_directed()
+    assert g.population == h.population
+    assert np.array_equal(g.edges_array, h.edges_array)
+    assert np.array_equal(g.get_degrees(), h.get_degrees())
+
+    # spatial graph
+    g = nngt.generation.distance_rule(
+        5., nodes=num_nodes, avg_deg=3, shape=nngt.geometry.Shape.disk(50.))
+
+    g.to_file(gfilename, fmt="nngt-bin")
+
+    h = nngt.load_from_file(gfilename, fmt="nngt-bin")
+
+    assert h.is_spatial()
+    assert np.allclose(g.get_positions(), h.get_positions())
+    assert np.allclose(g.edge_attributes["distance"],
+                       h.edge_attributes["distance"])
+
+
 # ---------- #
 # Test suite #
 # ---------- #
@@ -287,4 +443,7 @@ if __name__ == "__main__":
         test_str_attributes()
         # ~ test_structure()
         # ~ test_node_attributes()
+        # ~ test_iter_edges()
+        # ~ test_compression()
+        # ~ test_binary_format()
         # ~ unittest.main()
@@ -205,8 +205,151 @@ def test_incomplete_lattice_rewire():
         assert l2.get_edge_attributes((i+1, i), name='weight') == srt[2*i + 1]
 
 
+@pytest.mark.mpi_skip
+def test_reciprocity_lattice_rewire():
+    ''' Check lattice rewiring with partial reciprocity '''
+    for num_nodes, num_edges in ((20, 120), (20, 131), (50, 224)):
+        g = ng.erdos_renyi(edges=num_edges, nodes=num_nodes)
+
+        ww = nngt._rng.uniform(1, 5, size=g.edge_nb())
+        g.set_weights(ww)
+
+        l3 = ng.lattice_rewire(g, target_reciprocity=0.5, weight="weight")
+
+        assert g.edge_nb() == l3.edge_nb()
+        # regular lattice has 2/3 of reciprocal edges, remaining edges 1/2
+        assert 0.5 - 0.05 <= na.reciprocity(l3) <= 2/3 + 1e-6
+
+        # all nodes exist and there are no duplicates
+        assert l3.edges_array.max() < num_nodes
+        assert len(np.unique(l3.edges_array, axis=0)) == num_edges
+
+        # the largest weights go to the shortest edges
+        edges = l3.edges_array
+        dist  = np.abs(edges[:, 0] - edges[:, 1])
+        dist  = np.minimum(dist, num_nodes - dist)
+
+        order = np.argsort(l3.get_weights())[::-1]
+
+        assert np.all(np.diff(dist[order]) >= 0)
+
+        # reciprocal edges of the regular lattice have consecutive weights
+        srt = np.sort(ww)[::-1]
+
+        for i, j in edges[:20]:
+            if l3.has_edge((j, i)):
+                w1 = l3.get_edge_attributes((i, j), name="weight")
+                w2 = l3.get_edge_attributes((j, i), name="weight")
+
+                k = np.where(srt == max(w1, w2))[0][0]
+
+                assert min(w1, w2) == srt[k + 1]
+
+    # dense graphs: the lattice holds them up to a limit, then raises
+    for num_nodes, num_edges, recip in ((10, 66, 0.5), (20, 199, 0.)):
+        g = ng.erdos_renyi(edges=num_edges, nodes=num_nodes)
+
+        l3 = ng.lattice_rewire(g, target_reciprocity=recip)
+
+        assert l3.edge_nb() == num_edges
+        assert len(np.unique(l3.edges_array, axis=0)) == num_edges
+        assert np.all(l3.edges_array[:, 0] != l3.edges_array[:, 1])
+
+    for num_nodes, num_edges, recip in ((10, 85, 0.5), (20, 200, 0.)):
+        g = ng.erdos_renyi(edges=num_edges, nodes=num_nodes)
+
+        with pytest.raises(ValueError):
+            ng.lattice_rewire(g, target_reciprocity=recip)
+
+
+@pytest.mark.mpi_skip
+def test_all_degrees_rewire():
+    ''' Check degree-preserving rewiring by edge swaps '''
+    num_nodes = 100
+
+    for directed in (True, False):
+        g = ng.erdos_renyi(avg_deg=6, nodes=num_nodes, directed=directed)
+
+        num_edges = g.edge_nb()
+
+        g.new_edge_attribute("old_id", "int", values=np.arange(num_edges))
+
+        for edge_constraint in (None, "preserve_in", "preserve_out"):
+            r = ng.random_rewire(g, constraints="all-degrees",
+                                 edge_attr_constraints=edge_constraint)
+
+            assert r.edge_nb() == num_edges
+
+            for deg_type in ("in", "out", "total"):
+                assert np.array_equal(r.get_degrees(deg_type),
+                                      g.get_degrees(deg_type))
+
+            # no self-loops or multiple edges
+            edges = r.edges_array
+
+            if not directed:
+                edges = np.sort(edges, axis=1)
+
+            assert np.all(edges[:, 0] != edges[:, 1])
+            assert len(np.unique(edges, axis=0)) == num_edges
+
+            # the graph was randomized
+            assert not np.array_equal(r.edges_array, g.edges_array)
+
+            # attributes follow the preserved node
+            old_ids = r.edge_attributes["old_id"]
+
+            assert set(old_ids) == set(range(num_edges))
+
+            if directed and edge_constraint == "preserve_in":
+                assert np.array_equal(g.edges_array[old_ids, 1],
+                                      r.edges_array[:, 1])
+            elif directed and edge_constraint == "preserve_out":
+                assert np.array_equal(g.edges_array[old_ids, 0],
+                                      r.edges_array[:, 0])
+
+
+@pytest.mark.mpi_skip
+def test_clustering_rewire():
+    ''' Check rewiring with constrained clustering '''
+    g = ng.newman_watts(6, 0.2, nodes=300, directed=False)
+
+    degrees = g.get_degrees()
+
+    # keep global clustering
+    cg = na.global_clustering_binary_undirected(g)
+
+    r = ng.random_rewire(g, constraints="clustering", tolerance=5e-3,
+                         max_swaps=200*g.edge_nb())
+
+    assert np.array_equal(r.get_degrees(), degrees)
+    assert np.isclose(na.global_clustering_binary_undirected(r), cg,
+                      atol=5e-3)
+
+    edges = np.sort(r.edges_array, axis=1)
+
+    assert np.all(edges[:, 0] != edges[:, 1])
+    assert len(np.unique(edges, axis=0)) == g.edge_nb()
+
+    # reach a target average local clustering
+    r = ng.random_rewire(g, constraints="clustering", clustering_type="local",
+                         target_clustering=0.1, tolerance=1e-2)
+
+    assert np.array_equal(r.get_degrees(), degrees)
+    assert np.isclose(np.mean(na.local_clustering_binary_undirected(r)), 0.1,
+                      atol=1e-2)
+
+    # directed graphs are not supported
+    with pytest.raises(ValueError):
+        ng.random_rewire(ng.erdos_renyi(avg_deg=5, nodes=100),
+                         constraints="clustering")
+
+
 if __name__ == "__main__":
     if not nngt.get_config("mpi"):
         test_random_rewire()
+        test_all_degrees_rewire()
+        test_clustering_rewire()
         test_complete_lattice_rewire()
         test_incomplete_lattice_rewire()
+        test_reciprocity_lattice_rewire()